@@ -0,0 +1,156 @@
+"""
+Модуль с пагинацией списков приложения api
+"""
+import base64
+import binascii
+import json
+import typing
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connection
+from django.db.models import BooleanField, ExpressionWrapper, QuerySet
+from django.db.models.expressions import RawSQL
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+
+class KeysetPagination(BasePagination):
+    """
+    Пагинация по ключу (keyset): страница - это строки после последней
+    строки предыдущей страницы в порядке (поле сортировки, id).
+    Условие (поле, id) > (значение, id) сравнивает кортежи и идет
+    по индексу, поэтому глубокие страницы не дороже первой: нет ни
+    OFFSET, ни COUNT(*). Признак следующей страницы - лишняя строка
+    в выборке.
+
+    Параметры запроса: limit - размер страницы (не больше
+    LIST_MAX_PAGE_SIZE), ordering - поле сортировки из ordering_fields
+    представления (по умолчанию - первое), "-" в начале - по убыванию,
+    cursor - курсор next из предыдущего ответа. paginate=false возвращает
+    весь список без обертки, как до появления пагинации
+    """
+    ordering_fields: typing.Tuple[str, ...] = ("id",)
+
+    def __init__(self) -> None:
+        """
+        Состояние текущего запроса
+        :return: None
+        """
+        self.next_cursor: str | None = None
+
+    def paginate_queryset(self, queryset: QuerySet, request: Request,
+                          view: typing.Any = None) -> typing.List[typing.Any] | None:
+        """
+        Выбрать страницу
+        :param queryset: QuerySet
+        :param request: Request
+        :param view: Any
+        :return: list | None - None, если пагинация отключена
+        """
+        if request.query_params.get("paginate", "").lower() in ("false", "0"):
+            return None
+
+        ordering_fields: typing.Tuple[str, ...] = getattr(
+            view, "ordering_fields", self.ordering_fields)
+        ordering: str = request.query_params.get("ordering", ordering_fields[0])
+        field: str = ordering.lstrip("-")
+        if field not in ordering_fields:
+            raise ValidationError(
+                {"ordering": [f"Ordering must be one of: {', '.join(ordering_fields)}"]})
+        descending: bool = ordering.startswith("-")
+        limit: int = self._get_limit(request)
+
+        cursor: str | None = request.query_params.get("cursor")
+        if cursor:
+            queryset = queryset.filter(self._after(queryset, field, descending,
+                                                   self._decode(queryset, cursor, ordering)))
+
+        prefix: str = "-" if descending else ""
+        rows: typing.List[typing.Any] = list(
+            queryset.order_by(f"{prefix}{field}", f"{prefix}pk")[:limit + 1])
+        self.next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last: typing.Any = rows[-1]
+            self.next_cursor = self._encode(ordering, [getattr(last, field), last.pk])
+        return rows
+
+    def get_paginated_response(self, data: typing.Any) -> Response:
+        """
+        Ответ со страницей и курсором следующей страницы
+        :param data: Any
+        :return: Response
+        """
+        return Response({"results": data, "next": self.next_cursor})
+
+    @staticmethod
+    def _get_limit(request: Request) -> int:
+        """
+        Размер страницы из запроса
+        :param request: Request
+        :return: int
+        """
+        limit: str | None = request.query_params.get("limit")
+        if limit is None:
+            return settings.LIST_PAGE_SIZE
+        if not limit.isdigit() or not 1 <= int(limit) <= settings.LIST_MAX_PAGE_SIZE:
+            raise ValidationError(
+                {"limit": [f"Limit must be between 1 and {settings.LIST_MAX_PAGE_SIZE}"]})
+        return int(limit)
+
+    @staticmethod
+    def _after(queryset: QuerySet, field: str, descending: bool,
+               position: typing.List[typing.Any]) -> ExpressionWrapper:
+        """
+        Условие "строка после позиции курсора" сравнением кортежей
+        :param queryset: QuerySet
+        :param field: str
+        :param descending: bool
+        :param position: list - значение поля сортировки и id последней строки
+        :return: ExpressionWrapper
+        """
+        quote: typing.Callable = connection.ops.quote_name
+        meta: typing.Any = queryset.model._meta
+        table: str = quote(meta.db_table)
+        column: str = quote(meta.get_field(field).column)
+        pk: str = quote(meta.pk.column)
+        return ExpressionWrapper(
+            RawSQL(f"({table}.{column}, {table}.{pk}) {'<' if descending else '>'} (%s, %s)",
+                   position),
+            output_field=BooleanField())
+
+    @staticmethod
+    def _encode(ordering: str, position: typing.List[typing.Any]) -> str:
+        """
+        Непрозрачный курсор: сортировка и позиция в base64
+        :param ordering: str
+        :param position: list
+        :return: str
+        """
+        payload: bytes = json.dumps([ordering, position], separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+    @staticmethod
+    def _decode(queryset: QuerySet, cursor: str, ordering: str) -> typing.List[typing.Any]:
+        """
+        Позиция из курсора с проверкой типов значений; курсор
+        другой сортировки недействителен
+        :param queryset: QuerySet
+        :param cursor: str
+        :param ordering: str
+        :return: list
+        """
+        meta: typing.Any = queryset.model._meta
+        try:
+            cursor_ordering, (value, pk) = json.loads(
+                base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            if cursor_ordering != ordering or isinstance(value, (dict, list)):
+                raise ValueError(cursor)
+            return [meta.get_field(ordering.lstrip("-")).to_python(value),
+                    meta.pk.to_python(pk)]
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError,
+                DjangoValidationError) as exc:
+            raise ValidationError({"cursor": ["Invalid cursor"]}) from exc
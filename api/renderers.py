@@ -92,3 +92,115 @@ class UserJSONRenderer(JSONRenderer):
         return json.dumps({
             "users": data
         })
+
+
+class TestRunJSONRenderer(JSONRenderer):
+    """
+    Рендер JSON для модели тестового прогона
+    """
+    charset: str = "utf-8"
+
+    def render(
+            self,
+            data: typing.Any,
+            accepted_media_type: typing.Any = None,
+            renderer_context: typing.Any = None) -> str:
+        """
+        Функция-рендер для модели TestRun
+        :param data: Any
+        :param accepted_media_type: Any
+        :param renderer_context: Any
+        :return: str
+        """
+        errors: typing.Any = data.get("errors", None) if isinstance(data, dict) else data
+
+        if errors is not None:
+            JSONRenderer.render(self, data)
+
+        return json.dumps({
+            "test_run": data
+        })
+
+
+class TestCaseJSONRenderer(JSONRenderer):
+    """
+    Рендер JSON для модели тест-кейса
+    """
+    charset: str = "utf-8"
+
+    def render(
+            self,
+            data: typing.Any,
+            accepted_media_type: typing.Any = None,
+            renderer_context: typing.Any = None) -> str:
+        """
+        Функция-рендер для модели TestCase
+        :param data: Any
+        :param accepted_media_type: Any
+        :param renderer_context: Any
+        :return: str
+        """
+        errors: typing.Any = data.get("errors", None) if isinstance(data, dict) else data
+
+        if errors is not None:
+            JSONRenderer.render(self, data)
+
+        return json.dumps({
+            "test_case": data
+        })
+
+
+class SearchJSONRenderer(JSONRenderer):
+    """
+    Рендер JSON для результатов поиска
+    """
+    charset: str = "utf-8"
+
+    def render(
+            self,
+            data: typing.Any,
+            accepted_media_type: typing.Any = None,
+            renderer_context: typing.Any = None) -> str:
+        """
+        Функция-рендер для результатов поиска
+        :param data: Any
+        :param accepted_media_type: Any
+        :param renderer_context: Any
+        :return: str
+        """
+        errors: typing.Any = data.get("errors", None) if isinstance(data, dict) else data
+
+        if errors is not None:
+            JSONRenderer.render(self, data)
+
+        return json.dumps({
+            "search": data
+        })
+
+
+class AttachmentJSONRenderer(JSONRenderer):
+    """
+    Рендер JSON для модели вложения
+    """
+    charset: str = "utf-8"
+
+    def render(
+            self,
+            data: typing.Any,
+            accepted_media_type: typing.Any = None,
+            renderer_context: typing.Any = None) -> str:
+        """
+        Функция-рендер для модели Attachment
+        :param data: Any
+        :param accepted_media_type: Any
+        :param renderer_context: Any
+        :return: str
+        """
+        errors: typing.Any = data.get("errors", None) if isinstance(data, dict) else data
+
+        if errors is not None:
+            JSONRenderer.render(self, data)
+
+        return json.dumps({
+            "attachment": data
+        })
@@ -2,11 +2,27 @@
 Сериализаиия методов приложения api
 """
 import typing
+from pathlib import Path
 
+from django.conf import settings
 from django.contrib.auth import authenticate
-from rest_framework import serializers
+from django.utils import timezone
+from rest_framework import exceptions, serializers
+from authentication.activity import activity_tracker
 from authentication.models import User
-from testware.models import TestPlan
+from authentication.provisioning import ProvisioningReport, provision_users, read_users
+from authentication.throttling import RateLimited, login_limiter
+from authentication.tokens import TokenError, issue_refresh_token, revoke_tokens, \
+    rotate_refresh_token
+from testware.attachments import start_upload
+from testware.batch import OPERATIONS, PlanBatchReport, apply_plan_operations
+from testware.export import EXPORT_FIELDS, FORMATS, export_queryset
+from testware.ingestion import IngestionReport, ingest_results
+from testware.flakiness import flaky_cases
+from testware.history import PlanState, plan_state_at
+from testware.models import Attachment, AttachmentUpload, SearchDocument, TestCase, TestPlan, \
+    TestPlanHistory, TestResult, TestRun, TestSuite
+from testware.search import search
 
 
 class LoginSerializer(serializers.Serializer):
@@ -30,32 +46,346 @@ class LoginSerializer(serializers.Serializer):
     token: serializers.CharField = serializers.CharField(
         max_length=255,
         read_only=True)
+    access: serializers.CharField = serializers.CharField(
+        max_length=255,
+        read_only=True)
+    refresh: serializers.CharField = serializers.CharField(
+        max_length=255,
+        read_only=True)
 
     def validate(self, attrs: typing.Any) -> dict:
         """
-        Валидация введенных данных авторизации
+        Валидация введенных данных авторизации.
+        Если лимит неудачных попыток для email или IP-адреса исчерпан,
+        пароль не проверяется и поднимается Throttled (429)
         :param attrs: dict
         :return: dict
         """
         email: str = attrs.get("email")
         password: str = attrs.get("password")
+        request: typing.Any = self.context.get("request")
+        ip_address: str | None = request.META.get("REMOTE_ADDR") if request else None
+
+        try:
+            login_limiter.check(email, ip_address)
+        except RateLimited as exc:
+            raise exceptions.Throttled(wait=exc.retry_after) from exc
 
         user: User = authenticate(username=email, password=password)
 
         if user is None:
+            login_limiter.register_failure(email, ip_address)
             raise serializers.ValidationError(
                 "Invalid login or password"
             )
 
+        login_limiter.register_success(email)
+
         if not user.is_active:
             raise serializers.ValidationError(
                 "User is inactive"
             )
 
+        activity_tracker.record(user.pk, login=True)
+
+        access: str = user.token
+
         return {
             "email": user.email,
             "username": user.username,
-            "token": user.token
+            "token": access,
+            "access": access,
+            "refresh": issue_refresh_token(user)
+        }
+
+    def create(self, validated_data) -> typing.Any:
+        pass
+
+    def update(self, instance, validated_data) -> typing.Any:
+        pass
+
+
+class RefreshTokenSerializer(serializers.Serializer):
+    """
+    Сериализация метода обновления access-токена
+    """
+    refresh: serializers.CharField = serializers.CharField(
+        error_messages={"null": "Refresh token is required",
+                        "blank": "Refresh token is required"})
+    access: serializers.CharField = serializers.CharField(
+        max_length=255,
+        read_only=True)
+
+    def validate(self, attrs: typing.Any) -> dict:
+        """
+        Ротация refresh-токена и выдача нового access-токена
+        :param attrs: dict
+        :return: dict
+        """
+        try:
+            user, refresh = rotate_refresh_token(attrs.get("refresh"))
+        except TokenError as exc:
+            raise serializers.ValidationError(str(exc)) from exc
+
+        return {
+            "access": user.token,
+            "refresh": refresh
+        }
+
+    def create(self, validated_data) -> typing.Any:
+        pass
+
+    def update(self, instance, validated_data) -> typing.Any:
+        pass
+
+
+class LogoutSerializer(serializers.Serializer):
+    """
+    Сериализация метода выхода: отзыв текущего access-токена
+    и, если передан, refresh-токена
+    """
+    refresh: serializers.CharField = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        write_only=True)
+    detail: serializers.CharField = serializers.CharField(
+        read_only=True)
+
+    def validate(self, attrs: typing.Any) -> dict:
+        """
+        Отзыв токенов пользователя
+        :param attrs: dict
+        :return: dict
+        """
+        request: typing.Any = self.context["request"]
+
+        try:
+            revoke_tokens(request.user, request.auth, attrs.get("refresh"))
+        except TokenError as exc:
+            raise serializers.ValidationError(str(exc)) from exc
+
+        return {
+            "detail": "Logged out"
+        }
+
+    def create(self, validated_data) -> typing.Any:
+        pass
+
+    def update(self, instance, validated_data) -> typing.Any:
+        pass
+
+
+class ImportUsersSerializer(serializers.Serializer):
+    """
+    Сериализация метода массового создания пользователей:
+    список users в теле запроса или CSV/JSON-файл file
+    """
+    users: serializers.ListField = serializers.ListField(
+        child=serializers.DictField(),
+        required=False,
+        write_only=True)
+    file: serializers.FileField = serializers.FileField(
+        required=False,
+        write_only=True)
+    created: serializers.IntegerField = serializers.IntegerField(
+        read_only=True)
+    duplicates: serializers.ListField = serializers.ListField(
+        read_only=True)
+    errors: serializers.ListField = serializers.ListField(
+        read_only=True)
+    elapsed: serializers.FloatField = serializers.FloatField(
+        read_only=True)
+    throughput: serializers.FloatField = serializers.FloatField(
+        read_only=True)
+
+    def validate(self, attrs: typing.Any) -> dict:
+        """
+        Создание пользователей и отчет об импорте
+        :param attrs: dict
+        :return: dict
+        """
+        rows: typing.Any = attrs.get("users")
+        upload: typing.Any = attrs.get("file")
+
+        if upload is not None:
+            try:
+                rows = read_users(upload.read().decode("utf-8"),
+                                  Path(upload.name).suffix.lstrip(".").lower())
+            except (UnicodeDecodeError, ValueError) as exc:
+                raise serializers.ValidationError(
+                    "File must be a UTF-8 CSV or JSON document") from exc
+
+        if not rows:
+            raise serializers.ValidationError(
+                "Users list or file is required"
+            )
+
+        report: ProvisioningReport = provision_users(
+            rows,
+            workers=settings.USER_IMPORT_HASH_WORKERS,
+            batch_size=settings.USER_IMPORT_BATCH_SIZE)
+        return report.as_dict()
+
+    def create(self, validated_data) -> typing.Any:
+        pass
+
+    def update(self, instance, validated_data) -> typing.Any:
+        pass
+
+
+class BulkTestResultsSerializer(serializers.Serializer):
+    """
+    Сериализация метода массовой загрузки результатов в тестовый прогон.
+    Строки результатов проверяются в testware.ingestion, а не полями
+    сериализатора: так пакет из тысяч строк проверяется без лишних затрат
+    """
+    results: serializers.ListField = serializers.ListField(
+        allow_empty=False,
+        write_only=True,
+        error_messages={"empty": "Results are required"})
+    created: serializers.IntegerField = serializers.IntegerField(
+        read_only=True)
+    errors: serializers.ListField = serializers.ListField(
+        read_only=True)
+    method: serializers.CharField = serializers.CharField(
+        read_only=True)
+    elapsed: serializers.FloatField = serializers.FloatField(
+        read_only=True)
+    throughput: serializers.FloatField = serializers.FloatField(
+        read_only=True)
+
+    def validate(self, attrs: typing.Any) -> dict:
+        """
+        Загрузка результатов и отчет с ошибками по строкам
+        :param attrs: dict
+        :return: dict
+        """
+        report: IngestionReport = ingest_results(self.context["run"], attrs["results"])
+        return report.as_dict()
+
+    def create(self, validated_data) -> typing.Any:
+        pass
+
+    def update(self, instance, validated_data) -> typing.Any:
+        pass
+
+
+class SearchSerializer(serializers.Serializer):
+    """
+    Сериализация метода полнотекстового поиска
+    """
+    q: serializers.CharField = serializers.CharField(
+        max_length=255,
+        write_only=True,
+        error_messages={"blank": "Search query is required",
+                        "required": "Search query is required"})
+    type: serializers.MultipleChoiceField = serializers.MultipleChoiceField(
+        choices=SearchDocument.Entity.values,
+        required=False,
+        write_only=True)
+    limit: serializers.IntegerField = serializers.IntegerField(
+        min_value=1,
+        max_value=100,
+        default=20,
+        write_only=True)
+    results: serializers.ListField = serializers.ListField(
+        read_only=True)
+
+    def validate(self, attrs: typing.Any) -> dict:
+        """
+        Поиск по проверенным параметрам
+        :param attrs: dict
+        :return: dict
+        """
+        return {"results": [hit.as_dict() for hit in search(
+            attrs["q"], sorted(attrs.get("type", ())), attrs["limit"])]}
+
+    def create(self, validated_data) -> typing.Any:
+        pass
+
+    def update(self, instance, validated_data) -> typing.Any:
+        pass
+
+
+class FlakyTestsSerializer(serializers.Serializer):
+    """
+    Сериализация метода рейтинга нестабильных тест-кейсов
+    """
+    limit: serializers.IntegerField = serializers.IntegerField(
+        min_value=1,
+        max_value=100,
+        default=20,
+        write_only=True)
+    min_runs: serializers.IntegerField = serializers.IntegerField(
+        min_value=2,
+        default=5,
+        write_only=True)
+    results: serializers.ListField = serializers.ListField(
+        read_only=True)
+
+    def validate(self, attrs: typing.Any) -> dict:
+        """
+        Рейтинг по проверенным параметрам
+        :param attrs: dict
+        :return: dict
+        """
+        return {"results": [{
+            "test_case_id": flakiness.case_id,
+            "title": flakiness.case.title,
+            "score": round(flakiness.score, 3),
+            "flips": flakiness.flips,
+            "runs": flakiness.observed,
+            "last_status": "failed" if flakiness.outcomes & 1 else "passed"
+        } for flakiness in flaky_cases(attrs["min_runs"])[:attrs["limit"]]]}
+
+    def create(self, validated_data) -> typing.Any:
+        pass
+
+    def update(self, instance, validated_data) -> typing.Any:
+        pass
+
+
+class ExportSerializer(serializers.Serializer):
+    """
+    Сериализация метода выгрузки. Результаты можно ограничить тест-планом
+    (plan) или прогоном (run), тест-кейсы - поддеревом сьюта (suite)
+    """
+    format: serializers.ChoiceField = serializers.ChoiceField(
+        choices=tuple(FORMATS),
+        default="csv")
+    compress: serializers.ChoiceField = serializers.ChoiceField(
+        choices=("zstd",),
+        required=False)
+    plan: serializers.IntegerField = serializers.IntegerField(
+        required=False)
+    run: serializers.IntegerField = serializers.IntegerField(
+        required=False)
+    suite: serializers.IntegerField = serializers.IntegerField(
+        required=False)
+
+    def validate(self, attrs: typing.Any) -> dict:
+        """
+        Проверка фильтров и построение запроса выгрузки
+        :param attrs: dict
+        :return: dict - format, compress и queryset
+        """
+        entity: str = self.context["entity"]
+        if entity not in EXPORT_FIELDS:
+            raise exceptions.NotFound("No such export")
+        if "plan" in attrs and not TestPlan.objects.filter(pk=attrs["plan"]).exists():
+            raise exceptions.NotFound("No such test plan")
+        if "run" in attrs and not TestRun.objects.filter(pk=attrs["run"], deleted=None).exists():
+            raise exceptions.NotFound("No such test run")
+        suite: TestSuite | None = None
+        if "suite" in attrs:
+            suite = TestSuite.objects.filter(pk=attrs["suite"], deleted=None).first()
+            if suite is None:
+                raise exceptions.NotFound("No such test suite")
+
+        return {
+            "format": attrs["format"],
+            "compress": "compress" in attrs,
+            "queryset": export_queryset(entity, attrs.get("plan"), attrs.get("run"), suite)
         }
 
     def create(self, validated_data) -> typing.Any:
@@ -65,7 +395,225 @@ class LoginSerializer(serializers.Serializer):
         pass
 
 
-class CreateTestPlanSerializer(serializers.Serializer):
+class AttachmentSerializer(serializers.ModelSerializer):
+    """
+    Сериализация вложения
+    """
+    sha256: serializers.CharField = serializers.CharField(
+        source="blob_id",
+        read_only=True)
+    size: serializers.IntegerField = serializers.IntegerField(
+        source="blob.size",
+        read_only=True)
+
+    class Meta:
+        model = Attachment
+        fields = ('id', 'result', 'case', 'filename', 'content_type', 'sha256', 'size',
+                  'author', 'created')
+
+
+class StartUploadSerializer(serializers.Serializer):
+    """
+    Сериализация метода начала загрузки вложения. Вложение принадлежит
+    результату теста (result) или тест-кейсу (case). Если передан sha256
+    уже сохраненного содержимого, вложение создается сразу
+    """
+    result: serializers.IntegerField = serializers.IntegerField(
+        required=False,
+        write_only=True)
+    case: serializers.IntegerField = serializers.IntegerField(
+        required=False,
+        write_only=True)
+    filename: serializers.CharField = serializers.CharField(
+        max_length=255,
+        write_only=True,
+        error_messages={"blank": "Filename is required",
+                        "required": "Filename is required"})
+    content_type: serializers.CharField = serializers.CharField(
+        max_length=100,
+        default="application/octet-stream",
+        write_only=True)
+    size: serializers.IntegerField = serializers.IntegerField(
+        min_value=1)
+    sha256: serializers.RegexField = serializers.RegexField(
+        r"^[0-9a-f]{64}$",
+        required=False,
+        write_only=True,
+        error_messages={"invalid": "SHA-256 must be 64 lowercase hex digits"})
+    upload_id: serializers.CharField = serializers.CharField(
+        read_only=True)
+    offset: serializers.IntegerField = serializers.IntegerField(
+        read_only=True)
+    chunk_size: serializers.IntegerField = serializers.IntegerField(
+        read_only=True)
+    attachment: AttachmentSerializer = AttachmentSerializer(
+        read_only=True)
+
+    def validate(self, attrs: typing.Any) -> dict:
+        """
+        Проверка владельца и начало загрузки
+        :param attrs: dict
+        :return: dict - загрузка или созданное вложение
+        """
+        if ("result" in attrs) == ("case" in attrs):
+            raise serializers.ValidationError("Either result or case is required")
+        if "result" in attrs:
+            owner: TestResult | TestCase | None = TestResult.objects.filter(
+                pk=attrs["result"]).first()
+        else:
+            owner = TestCase.objects.filter(pk=attrs["case"], deleted=None).first()
+        if owner is None:
+            raise exceptions.NotFound("No such test result" if "result" in attrs
+                                      else "No such test case")
+
+        try:
+            started: AttachmentUpload | Attachment = start_upload(
+                owner, attrs["filename"], attrs["content_type"], attrs["size"],
+                attrs.get("sha256", ""), self.context.get("author"))
+        except ValueError as error:
+            raise serializers.ValidationError(str(error)) from error
+        if isinstance(started, Attachment):
+            return {"size": attrs["size"], "attachment": started}
+        return {
+            "upload_id": str(started.pk),
+            "offset": started.received,
+            "size": started.size,
+            "chunk_size": settings.ATTACHMENT_CHUNK_SIZE
+        }
+
+    def create(self, validated_data) -> typing.Any:
+        pass
+
+    def update(self, instance, validated_data) -> typing.Any:
+        pass
+
+
+class ReferenceLookup:
+    """
+    Поиск тест-планов и активных авторов по ID. Запрос in_bulk идет по
+    первичному ключу и только за еще не найденными ID; найденные объекты
+    и промахи кешируются, поэтому повторные проверки в пределах запроса
+    и получение объектов в представлении не обращаются к базе
+    """
+
+    def __init__(self) -> None:
+        self._plans: typing.Dict[int, TestPlan | None] = {}
+        self._authors: typing.Dict[int, User | None] = {}
+
+    def plans(self, ids: typing.Iterable[int]) -> typing.Dict[int, TestPlan]:
+        """
+        Неудаленные тест-планы по ID
+        :param ids: Iterable[int]
+        :return: dict[int, TestPlan] - только найденные планы
+        """
+        return self._resolve(self._plans, TestPlan.objects.all(), ids)
+
+    def authors(self, ids: typing.Iterable[int]) -> typing.Dict[int, User]:
+        """
+        Активные пользователи по ID
+        :param ids: Iterable[int]
+        :return: dict[int, User] - только найденные пользователи
+        """
+        return self._resolve(self._authors, User.objects.filter(is_active=True), ids)
+
+    def plan(self, pk: int) -> TestPlan | None:
+        """
+        Неудаленный тест-план по ID
+        :param pk: int
+        :return: TestPlan | None
+        """
+        return self.plans((pk,)).get(pk)
+
+    def author(self, pk: int) -> User | None:
+        """
+        Активный пользователь по ID
+        :param pk: int
+        :return: User | None
+        """
+        return self.authors((pk,)).get(pk)
+
+    @staticmethod
+    def _resolve(cache: dict, queryset: typing.Any, ids: typing.Iterable[int]) -> dict:
+        """
+        Дочитать в кеш недостающие ID одним запросом
+        :param cache: dict - объекты и промахи (None) по ID
+        :param queryset: QuerySet
+        :param ids: Iterable[int]
+        :return: dict - найденные объекты по ID
+        """
+        ids = set(ids)
+        missing: typing.Set[int] = ids.difference(cache)
+        if missing:
+            found: dict = queryset.in_bulk(missing)
+            cache.update((pk, found.get(pk)) for pk in missing)
+        return {pk: cache[pk] for pk in ids if cache[pk] is not None}
+
+
+class TestPlanReferencesMixin:
+    """
+    Проверка ссылок сериализаторов тест-плана на план и автора.
+    ReferenceLookup хранится в контексте сериализатора, а найденные при
+    валидации план и автор доступны представлению через resolved_plan
+    и resolved_author
+    """
+    context: dict
+
+    @property
+    def resolved_plan(self) -> TestPlan:
+        """
+        Тест-план, найденный при валидации
+        :return: TestPlan
+        """
+        return self.context["test_plan"]
+
+    @property
+    def resolved_author(self) -> User | None:
+        """
+        Автор, найденный при валидации (None - автор не задан)
+        :return: User | None
+        """
+        return self.context.get("author")
+
+    @property
+    def references(self) -> ReferenceLookup:
+        """
+        Кеш поиска ссылок на время запроса
+        :return: ReferenceLookup
+        """
+        if "references" not in self.context:
+            self.context["references"] = ReferenceLookup()
+        return self.context["references"]
+
+    def check_test_plan(self, test_plan_id: int) -> TestPlan:
+        """
+        Проверить, что неудаленный тест-план существует
+        :param test_plan_id: int
+        :return: TestPlan
+        """
+        test_plan: TestPlan | None = self.references.plan(test_plan_id)
+        if test_plan is None:
+            raise serializers.ValidationError(
+                "No such test plan"
+            )
+        self.context["test_plan"] = test_plan
+        return test_plan
+
+    def check_author(self, author: int | None) -> User | None:
+        """
+        Проверить, что автор, если он задан, - активный пользователь
+        :param author: int | None
+        :return: User | None
+        """
+        user: User | None = self.references.author(author) if author is not None else None
+        if author is not None and user is None:
+            raise serializers.ValidationError(
+                "No such author"
+            )
+        self.context["author"] = user
+        return user
+
+
+class CreateTestPlanSerializer(TestPlanReferencesMixin, serializers.Serializer):
     """
     Сериализация методов тест-плана
     """
@@ -109,14 +657,8 @@ class CreateTestPlanSerializer(serializers.Serializer):
         title: str = attrs.get("title")
         author: int = attrs.get("author")
         is_current: bool = attrs.get("is_current")
-        active_authors: typing.Any = \
-            list(User.objects.filter(is_active=True).values_list('id', flat=True))
 
-        if author is not None:
-            if author not in active_authors:
-                raise serializers.ValidationError(
-                    "No such author"
-                )
+        self.check_author(author)
 
         try:
             if attrs['start_date'] is not None and attrs['end_date'] is not None:
@@ -140,7 +682,7 @@ class CreateTestPlanSerializer(serializers.Serializer):
         pass
 
 
-class UpdateTestPlanSerializer(serializers.Serializer):
+class UpdateTestPlanSerializer(TestPlanReferencesMixin, serializers.Serializer):
     """
     Сериализация методов тест-плана
     """
@@ -190,21 +732,10 @@ class UpdateTestPlanSerializer(serializers.Serializer):
         title: str = attrs.get("title")
         author: int = attrs.get("author")
         is_current: bool = attrs.get("is_current")
-        active_authors: typing.Any = \
-            list(User.objects.filter(is_active=True).values_list('id', flat=True))
-        test_plans: typing.Any = \
-            list(TestPlan.objects.filter(deleted=None).values_list('id', flat=True))
 
-        if test_plan_id not in test_plans:
-            raise serializers.ValidationError(
-                "No such test plan"
-            )
+        self.check_test_plan(test_plan_id)
 
-        if author is not None:
-            if author not in active_authors:
-                raise serializers.ValidationError(
-                    "No such author"
-                )
+        self.check_author(author)
 
         try:
             if attrs['start_date'] is not None and attrs['end_date'] is not None:
@@ -229,7 +760,7 @@ class UpdateTestPlanSerializer(serializers.Serializer):
         pass
 
 
-class DeleteTestPlanSerializer(serializers.Serializer):
+class DeleteTestPlanSerializer(TestPlanReferencesMixin, serializers.Serializer):
     """
     Сериализация метода удаления тест-плана
     """
@@ -246,13 +777,8 @@ class DeleteTestPlanSerializer(serializers.Serializer):
         :return: dict
         """
         test_plan_id: int = attrs.get("test_plan_id")
-        test_plans: typing.Any = \
-            list(TestPlan.objects.filter(deleted=None).values_list('id', flat=True))
 
-        if test_plan_id not in test_plans:
-            raise serializers.ValidationError(
-                "No such test plan"
-            )
+        self.check_test_plan(test_plan_id)
 
         return {
             "test_plan_id": test_plan_id
@@ -265,6 +791,66 @@ class DeleteTestPlanSerializer(serializers.Serializer):
         pass
 
 
+class TestPlanBatchSerializer(serializers.Serializer):
+    """
+    Сериализация метода пакетных операций с тест-планами. Операция -
+    объект с op (create, update или delete) и теми же полями, что
+    в методах testplan/create/, update/ и delete/. Формат операций
+    проверяется их сериализаторами без запросов к базе, ссылки на планы
+    и авторов - в testware.batch несколькими запросами на весь пакет
+    """
+    operations: serializers.ListField = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=settings.TESTPLAN_BATCH_MAX_OPERATIONS,
+        write_only=True,
+        error_messages={"empty": "Operations are required"})
+    mode: serializers.ChoiceField = serializers.ChoiceField(
+        choices=("atomic", "best_effort"),
+        default="atomic",
+        write_only=True)
+    applied: serializers.BooleanField = serializers.BooleanField(
+        read_only=True)
+    results: serializers.ListField = serializers.ListField(
+        read_only=True)
+
+    def validate(self, attrs: typing.Any) -> dict:
+        """
+        Проверка формата операций и применение пакета
+        :param attrs: dict
+        :return: dict
+        """
+        operation_serializers: typing.Dict[str, typing.Any] = {
+            "create": CreateTestPlanSerializer,
+            "update": UpdateTestPlanSerializer,
+            "delete": DeleteTestPlanSerializer
+        }
+        operations: typing.List[dict | None] = []
+        errors: typing.Dict[int, dict] = {}
+        for index, item in enumerate(attrs["operations"]):
+            operation: typing.Any = item.get("op")
+            if operation not in OPERATIONS:
+                errors[index] = {"op": [f"Operation must be one of: {', '.join(OPERATIONS)}"]}
+                operations.append(None)
+                continue
+            try:
+                operations.append({"op": operation, **operation_serializers[operation]()
+                                   .to_internal_value(item)})
+            except serializers.ValidationError as error:
+                errors[index] = error.detail
+                operations.append({"op": operation})
+
+        report: PlanBatchReport = apply_plan_operations(
+            operations, errors, self.context.get("changed_by"), attrs["mode"] == "atomic")
+        return report.as_dict()
+
+    def create(self, validated_data) -> typing.Any:
+        pass
+
+    def update(self, instance, validated_data) -> typing.Any:
+        pass
+
+
 class GetTestPlansSerializer(serializers.ModelSerializer):
     """
     Сериализация метода GetTestPlans
@@ -275,6 +861,49 @@ class GetTestPlansSerializer(serializers.ModelSerializer):
         exclude = ('created', 'modified', 'deleted',)
 
 
+class TestPlanHistorySerializer(serializers.ModelSerializer):
+    """
+    Сериализация версии из истории тест-плана
+    """
+
+    class Meta:
+        model = TestPlanHistory
+        fields = ('version', 'changed', 'changed_by', 'changes')
+
+
+class TestPlanStateSerializer(serializers.Serializer):
+    """
+    Сериализация метода состояния тест-плана на момент времени
+    """
+    at: serializers.DateTimeField = serializers.DateTimeField(
+        required=False,
+        write_only=True)
+    version: serializers.IntegerField = serializers.IntegerField(
+        read_only=True)
+    changed: serializers.CharField = serializers.CharField(
+        read_only=True)
+    state: serializers.DictField = serializers.DictField(
+        read_only=True)
+
+    def validate(self, attrs: typing.Any) -> dict:
+        """
+        Восстановление состояния по истории; без at - текущее состояние
+        :param attrs: dict
+        :return: dict
+        """
+        plan_state: PlanState | None = plan_state_at(
+            self.context["plan_id"], attrs.get("at", timezone.now()))
+        if plan_state is None:
+            raise exceptions.NotFound("No such test plan at this time")
+        return plan_state.as_dict()
+
+    def create(self, validated_data) -> typing.Any:
+        pass
+
+    def update(self, instance, validated_data) -> typing.Any:
+        pass
+
+
 class GetUsersSerializer(serializers.ModelSerializer):
     """
     Сериализация метода GetUsers
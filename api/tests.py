@@ -1,15 +1,34 @@
 """
 Модуль с тестами приложения api
 """
+import csv
+import io
+import json
+import shutil
+import tempfile
+import threading
+import typing
+from unittest import mock
 import requests
 import environ
-from django.test import TestCase
+import zstandard
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.contrib.auth.models import Permission
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from requests import Response
 from requests.auth import AuthBase
 
-from authentication.models import User
+from api.serializers import (
+    CreateTestPlanSerializer, DeleteTestPlanSerializer, UpdateTestPlanSerializer)
+from authentication.hashing import HashingPool
+from authentication.models import Role, User
+from authentication.throttling import LoginRateLimiter, MemoryAttemptStore
 from thanqa_tms.settings import BASE_DIR
-from testware.models import TestPlan
+from testware.models import (
+    Attachment, TestCase as CaseModel, TestPlan, TestResult, TestRun, TestSuite)
 
 
 class BearerAuth(AuthBase):
@@ -1555,7 +1574,7 @@ class TestGetTestPlans(TestCase):
         """
         count_from_api: int = 0
         self.successful_get_test_plans = requests.get(
-            "http://127.0.0.1:8000/api/testplan/all/",
+            "http://127.0.0.1:8000/api/testplan/all/?paginate=false",
             auth=BearerAuth(token=self.token),
             headers=self.headers_auth,
             timeout=10
@@ -1576,7 +1595,7 @@ class TestGetTestPlans(TestCase):
         :return: None
         """
         self.successful_get_test_plans = requests.get(
-            "http://127.0.0.1:8000/api/testplan/all/",
+            "http://127.0.0.1:8000/api/testplan/all/?paginate=false",
             auth=BearerAuth(token=self.token),
             headers=self.headers_auth,
             timeout=10
@@ -1596,7 +1615,7 @@ class TestGetTestPlans(TestCase):
         """
         count_from_api: int = 0
         self.successful_get_test_plans = requests.get(
-            "http://127.0.0.1:8000/api/testplan/all?title=this",
+            "http://127.0.0.1:8000/api/testplan/all?title=this&paginate=false",
             auth=BearerAuth(token=self.token),
             headers=self.headers_auth,
             timeout=10
@@ -1623,7 +1642,7 @@ class TestGetTestPlans(TestCase):
         :return: None
         """
         self.successful_get_test_plans = requests.get(
-            "http://127.0.0.1:8000/api/testplan/all?title=lol",
+            "http://127.0.0.1:8000/api/testplan/all?title=lol&paginate=false",
             auth=BearerAuth(token=self.token),
             headers=self.headers_auth,
             timeout=10
@@ -1637,7 +1656,7 @@ class TestGetTestPlans(TestCase):
         :return: None
         """
         self.unsuccessful_get_test_plans = requests.get(
-            "http://127.0.0.1:8000/api/testplan/all/",
+            "http://127.0.0.1:8000/api/testplan/all/?paginate=false",
             headers=self.headers_auth,
             timeout=10
         )
@@ -1655,7 +1674,7 @@ class TestGetTestPlans(TestCase):
         with open('./expired_token.txt', encoding='utf-8') as file:
             self.expired_token: str = file.read()
         self.unsuccessful_get_test_plans = requests.get(
-            "http://127.0.0.1:8000/api/testplan/all/",
+            "http://127.0.0.1:8000/api/testplan/all/?paginate=false",
             auth=BearerAuth(token=self.expired_token),
             headers=self.headers_auth,
             timeout=10
@@ -1710,7 +1729,7 @@ class TestGetUsers(TestCase):
         """
         count_from_api: int = 0
         self.successful_get_users = requests.get(
-            'http://127.0.0.1:8000/api/users/all/',
+            'http://127.0.0.1:8000/api/users/all/?paginate=false',
             auth=BearerAuth(token=self.token),
             headers=self.headers_auth,
             timeout=10
@@ -1732,7 +1751,7 @@ class TestGetUsers(TestCase):
         :return: None
         """
         self.successful_get_users = requests.get(
-            'http://127.0.0.1:8000/api/users/all/',
+            'http://127.0.0.1:8000/api/users/all/?paginate=false',
             auth=BearerAuth(token=self.token),
             headers=self.headers_auth,
             timeout=10
@@ -1769,7 +1788,7 @@ class TestGetUsers(TestCase):
         :return: None
         """
         self.successful_get_users = requests.get(
-            "http://127.0.0.1:8000/api/users/all/",
+            "http://127.0.0.1:8000/api/users/all/?paginate=false",
             auth=BearerAuth(token=self.token),
             headers=self.headers_auth,
             timeout=10
@@ -1788,7 +1807,7 @@ class TestGetUsers(TestCase):
         :return: None
         """
         self.unsuccessful_get_users = requests.get(
-            "http://127.0.0.1:8000/api/users/all/",
+            "http://127.0.0.1:8000/api/users/all/?paginate=false",
             headers=self.headers_auth,
             timeout=10
         )
@@ -1807,7 +1826,7 @@ class TestGetUsers(TestCase):
         with open('./expired_token.txt', encoding='utf-8') as file:
             self.expired_token: str = file.read()
         self.unsuccessful_get_users = requests.get(
-            "http://127.0.0.1:8000/api/users/all/",
+            "http://127.0.0.1:8000/api/users/all/?paginate=false",
             auth=BearerAuth(token=self.expired_token),
             headers=self.headers_auth,
             timeout=10
@@ -1817,3 +1836,934 @@ class TestGetUsers(TestCase):
             self.unsuccessful_get_users.json()["users"]["detail"],
             "Token has expired"
         )
+
+
+class TestRefreshToken(TestCase):
+    """
+    Тестирование метода RefreshToken
+    """
+
+    def setUp(self) -> None:
+        """
+        Создание пользователя для авторизации
+        :return: None
+        """
+        self.email: str = "refresh-api@example.com"
+        self.password: str = "test123!"
+        User.objects.create_user(username="refresh_api", email=self.email,
+                                 password=self.password)
+
+    def test_refresh_returns_new_token_pair(self) -> None:
+        """
+        Тест-кейс, что метод Login возвращает пару access/refresh,
+        а метод RefreshToken обменивает refresh-токен на новую пару.
+        1. Статус-код 200
+        2. Повторное использование refresh-токена возвращает 400
+        :return: None
+        """
+        login_api = self.client.post("/api/users/login/", data={
+            "user": {"email": self.email, "password": self.password}
+        }, content_type="application/json")
+        self.assertEqual(login_api.status_code, 200)
+        self.assertTrue(login_api.json()["user"]["access"])
+        refresh: str = login_api.json()["user"]["refresh"]
+
+        refresh_api = self.client.post("/api/users/token/refresh/", data={
+            "refresh": refresh
+        }, content_type="application/json")
+        self.assertEqual(refresh_api.status_code, 200)
+        self.assertTrue(refresh_api.json()["user"]["access"])
+        self.assertNotEqual(refresh_api.json()["user"]["refresh"], refresh)
+
+        reused_refresh_api = self.client.post("/api/users/token/refresh/", data={
+            "refresh": refresh
+        }, content_type="application/json")
+        self.assertEqual(reused_refresh_api.status_code, 400)
+        self.assertEqual(reused_refresh_api.json()["user"]["errors"]["error"][0],
+                         "Token has been revoked")
+
+
+class TestAsyncLogin(TransactionTestCase):
+    """
+    Тестирование метода AsyncLogin.
+    Пароль проверяется в потоке пула со своим соединением с базой,
+    поэтому данные теста должны быть зафиксированы
+    """
+
+    def setUp(self) -> None:
+        """
+        Создание пользователя для авторизации
+        :return: None
+        """
+        self.email: str = "async-login@example.com"
+        self.password: str = "test123!"
+        User.objects.create_user(username="async_login", email=self.email,
+                                 password=self.password)
+
+    def test_async_login_returns_200_and_400(self) -> None:
+        """
+        Тест-кейс, что асинхронная авторизация отвечает так же, как Login.
+        1. Статус-код 200 и пара токенов при верном пароле
+        2. Статус-код 400 при неверном пароле
+        :return: None
+        """
+        login_api = self.client.post("/api/users/login/async/", data={
+            "user": {"email": self.email, "password": self.password}
+        }, content_type="application/json")
+        self.assertEqual(login_api.status_code, 200)
+        self.assertEqual(login_api.json()["user"]["email"], self.email)
+        self.assertTrue(login_api.json()["user"]["access"])
+
+        login_api_with_incorrect_password = self.client.post("/api/users/login/async/", data={
+            "user": {"email": self.email, "password": "wrong"}
+        }, content_type="application/json")
+        self.assertEqual(login_api_with_incorrect_password.status_code, 400)
+        self.assertEqual(
+            login_api_with_incorrect_password.json()["user"]["errors"]["error"][0],
+            "Invalid login or password")
+
+    def test_async_login_returns_429_if_pool_is_full(self) -> None:
+        """
+        Тест-кейс, что при заполненном пуле запрос отклоняется
+        с кодом 429 и заголовком Retry-After.
+        :return: None
+        """
+        pool: HashingPool = HashingPool(workers=1, queue_depth=0)
+        with mock.patch("api.views.login_pool", pool), \
+                mock.patch.object(pool, "_slots") as slots:
+            slots.acquire.return_value = False
+            login_api = self.client.post("/api/users/login/async/", data={
+                "user": {"email": self.email, "password": self.password}
+            }, content_type="application/json")
+
+        self.assertEqual(login_api.status_code, 429)
+        self.assertEqual(login_api["Retry-After"], "1")
+        self.assertEqual(pool.metrics()["rejected"], 1)
+
+
+class TestLoginRateLimit(TestCase):
+    """
+    Тестирование ограничения попыток метода Login
+    """
+
+    def setUp(self) -> None:
+        """
+        Создание пользователя и ограничителя с лимитом в 2 попытки
+        :return: None
+        """
+        self.email: str = "limited@example.com"
+        User.objects.create_user(username="limited", email=self.email, password="test123!")
+        self.limiter: LoginRateLimiter = LoginRateLimiter(
+            MemoryAttemptStore(), window=60, buckets=6, email_limit=2, ip_limit=100)
+
+    def test_rejected_attempts_never_reach_hasher(self) -> None:
+        """
+        Тест-кейс, что после исчерпания лимита метод Login возвращает 429
+        и пароль больше не хешируется.
+        :return: None
+        """
+        data: dict = {"user": {"email": self.email, "password": "wrong"}}
+        with mock.patch("api.serializers.login_limiter", self.limiter), \
+                mock.patch.object(PBKDF2PasswordHasher, "encode", autospec=True,
+                                  side_effect=PBKDF2PasswordHasher.encode) as encode:
+            for _ in range(2):
+                login_api = self.client.post(
+                    "/api/users/login/", data=data, content_type="application/json")
+                self.assertEqual(login_api.status_code, 400)
+            hashes: int = encode.call_count
+
+            for _ in range(3):
+                login_api = self.client.post(
+                    "/api/users/login/", data=data, content_type="application/json")
+                self.assertEqual(login_api.status_code, 429)
+                self.assertIn("Retry-After", login_api)
+
+        self.assertEqual(hashes, 2)
+        self.assertEqual(encode.call_count, hashes)
+
+
+class TestLogout(TestCase):
+    """
+    Тестирование метода Logout
+    """
+
+    def setUp(self) -> None:
+        """
+        Создание пользователя и его токена
+        :return: None
+        """
+        self.user: User = User.objects.create_user(
+            username="logout", email="logout@example.com", password="test123!")
+        self.token: str = self.user.token
+
+    def test_logout_revokes_token(self) -> None:
+        """
+        Тест-кейс, что после выхода токен больше не принимается.
+        1. Статус-код 200 у метода Logout
+        2. Статус-код 403 у последующего запроса с тем же токеном
+        :return: None
+        """
+        logout_api = self.client.post(
+            "/api/users/logout/", HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        self.assertEqual(logout_api.status_code, 200)
+        self.assertEqual(logout_api.json()["user"]["detail"], "Logged out")
+
+        get_users_api = self.client.get(
+            "/api/users/all/", HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        self.assertEqual(get_users_api.status_code, 403)
+        self.assertEqual(get_users_api.json()["users"]["detail"], "Token has been revoked")
+
+
+@override_settings(USER_IMPORT_HASH_WORKERS=1)
+class TestImportUsers(TestCase):
+    """
+    Тестирование метода массового создания пользователей
+    """
+
+    def setUp(self) -> None:
+        """
+        Создание администратора
+        :return: None
+        """
+        self.admin: User = User.objects.create_superuser(
+            username="import_admin", email="import-admin@example.com", password="test123!")
+
+    def test_import_users(self) -> None:
+        """
+        Тест-кейс импорта списка пользователей с повтором email.
+        1. Статус-код 200
+        2. Созданы два пользователя, повтор указан в отчете
+        :return: None
+        """
+        import_api = self.client.post(
+            "/api/users/import/",
+            data={"users": [
+                {"username": "first", "email": "first@example.com", "password": "test123!"},
+                {"username": "second", "email": "import-admin@example.com"},
+                {"username": "third", "email": "third@example.com"}
+            ]},
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {self.admin.token}")
+
+        self.assertEqual(import_api.status_code, 200)
+        report: dict = import_api.json()["users"]
+        self.assertEqual(report["created"], 2)
+        self.assertEqual(report["duplicates"], [{
+            "row": 2, "username": "second", "email": "import-admin@example.com",
+            "fields": ["email"]}])
+        self.assertFalse(User.objects.get(username="third").has_usable_password())
+
+    def test_import_users_requires_admin(self) -> None:
+        """
+        Тест-кейс, что импорт недоступен обычному пользователю.
+        :return: None
+        """
+        user: User = User.objects.create_user(
+            username="import_user", email="import-user@example.com", password="test123!")
+        import_api = self.client.post(
+            "/api/users/import/",
+            data={"users": [{"username": "first", "email": "first@example.com"}]},
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {user.token}")
+
+        self.assertEqual(import_api.status_code, 403)
+        self.assertFalse(User.objects.filter(username="first").exists())
+
+    def test_import_users_with_role(self) -> None:
+        """
+        Тест-кейс, что импорт доступен пользователю, роль которого
+        дает право authentication.add_user.
+        :return: None
+        """
+        user: User = User.objects.create_user(
+            username="import_lead", email="import-lead@example.com", password="test123!")
+        role: Role = Role.objects.create(name="Team lead")
+        role.permissions.add(Permission.objects.get(codename="add_user"))
+        role.users.add(user)
+
+        import_api = self.client.post(
+            "/api/users/import/",
+            data={"users": [{"username": "first", "email": "first@example.com"}]},
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {user.token}")
+
+        self.assertEqual(import_api.status_code, 200)
+        self.assertTrue(User.objects.filter(username="first").exists())
+
+
+class TestBulkTestResults(TestCase):
+    """
+    Тестирование метода массовой загрузки результатов тестов
+    """
+
+    def setUp(self) -> None:
+        """
+        Создание пользователя и тестового прогона
+        :return: None
+        """
+        self.user: User = User.objects.create_user(
+            username="ci", email="ci@example.com", password="test123!")
+        self.run: TestRun = TestRun.objects.create(
+            title="CI #1", plan=TestPlan.objects.create(title="Release"))
+
+    def test_bulk_results(self) -> None:
+        """
+        Тест-кейс загрузки пакета с ошибочной строкой.
+        1. Статус-код 200
+        2. Корректные строки сохранены, ошибка указана с номером строки
+        :return: None
+        """
+        results_api = self.client.post(
+            f"/api/testrun/{self.run.pk}/results/bulk/",
+            data={"results": [
+                {"name": "test_login", "status": "passed", "duration": 0.1},
+                {"name": "test_logout", "status": "unknown"},
+                {"name": "test_refresh", "status": "failed", "message": "Timeout"}
+            ]},
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {self.user.token}")
+
+        self.assertEqual(results_api.status_code, 200)
+        report: dict = results_api.json()["test_run"]
+        self.assertEqual(report["created"], 2)
+        self.assertEqual([error["row"] for error in report["errors"]], [2])
+        self.assertEqual(self.run.results.count(), 2)
+
+    def test_counters(self) -> None:
+        """
+        Тест-кейс, что счетчики тест-плана и прогона отражают
+        загруженные результаты.
+        :return: None
+        """
+        self.client.post(
+            f"/api/testrun/{self.run.pk}/results/bulk/",
+            data={"results": [{"name": "test_login", "status": "passed"},
+                              {"name": "test_logout", "status": "failed"}]},
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {self.user.token}")
+
+        run_counters_api = self.client.get(
+            f"/api/testrun/{self.run.pk}/counters/",
+            HTTP_AUTHORIZATION=f"Bearer {self.user.token}")
+        self.assertEqual(run_counters_api.status_code, 200)
+        self.assertEqual(run_counters_api.json()["test_run"]["results"], {
+            "passed": 1, "failed": 1, "blocked": 0, "skipped": 0, "in_progress": 0})
+
+        plan_counters_api = self.client.get(
+            f"/api/testplan/{self.run.plan_id}/counters/",
+            HTTP_AUTHORIZATION=f"Bearer {self.user.token}")
+        self.assertEqual(plan_counters_api.status_code, 200)
+        self.assertEqual(plan_counters_api.json()["test_plan"]["runs"], {
+            "in_progress": 1, "completed": 0, "blocked": 0, "failed": 0})
+
+    def test_bulk_results_unknown_run(self) -> None:
+        """
+        Тест-кейс загрузки в несуществующий прогон.
+        :return: None
+        """
+        results_api = self.client.post(
+            "/api/testrun/0/results/bulk/",
+            data={"results": [{"name": "test_login", "status": "passed"}]},
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {self.user.token}")
+
+        self.assertEqual(results_api.status_code, 404)
+        self.assertEqual(results_api.json()["test_run"]["detail"], "No such test run")
+
+
+class TestJUnitImport(TestCase):
+    """
+    Тестирование метода импорта отчета JUnit XML
+    """
+
+    def setUp(self) -> None:
+        """
+        Создание пользователя, прогона и сьюта
+        :return: None
+        """
+        self.user: User = User.objects.create_user(
+            username="junit", email="junit@example.com", password="test123!")
+        self.run: TestRun = TestRun.objects.create(
+            title="CI #1", plan=TestPlan.objects.create(title="Release"))
+        self.suite: TestSuite = TestSuite.objects.create(title="API")
+
+    def test_junit_import(self) -> None:
+        """
+        Тест-кейс импорта отчета.
+        1. Статус-код 200, результаты и тест-кейсы созданы
+        2. Испорченный отчет - статус-код 400
+        3. Неизвестный сьют - статус-код 404
+        :return: None
+        """
+        url: str = f"/api/testrun/{self.run.pk}/results/junit/?suite={self.suite.pk}"
+        import_api = self.client.post(
+            url, data=b'<testsuite><testcase classname="a" name="ok"/>'
+                      b'<testcase classname="a" name="bad"><error message="boom"/></testcase>'
+                      b'</testsuite>',
+            content_type="application/xml", HTTP_AUTHORIZATION=f"Bearer {self.user.token}")
+        self.assertEqual(import_api.status_code, 200)
+        self.assertEqual((import_api.json()["test_run"]["created"],
+                          import_api.json()["test_run"]["cases"]), (2, 2))
+        self.assertEqual(sorted(self.run.results.values_list("status", flat=True)),
+                         ["failed", "passed"])
+
+        malformed_api = self.client.post(
+            url, data=b"<testsuite><testcase>", content_type="application/xml",
+            HTTP_AUTHORIZATION=f"Bearer {self.user.token}")
+        self.assertEqual(malformed_api.status_code, 400)
+        self.assertEqual(self.run.results.count(), 2)
+
+        missing_api = self.client.post(
+            f"/api/testrun/{self.run.pk}/results/junit/?suite=0", data=b"<testsuite/>",
+            content_type="application/xml", HTTP_AUTHORIZATION=f"Bearer {self.user.token}")
+        self.assertEqual(missing_api.status_code, 404)
+
+
+class TestExport(TestCase):
+    """
+    Тестирование методов потоковой выгрузки
+    """
+
+    def setUp(self) -> None:
+        """
+        Создание пользователя, тест-кейсов и результатов двух тест-планов
+        :return: None
+        """
+        self.user: User = User.objects.create_user(
+            username="export", email="export@example.com", password="test123!")
+        self.plan: TestPlan = TestPlan.objects.create(title="Release")
+        suite: TestSuite = TestSuite.objects.create(title="UI")
+        self.case: CaseModel = CaseModel.objects.create(title="Логин, \"кавычки\"", suite=suite)
+        run: TestRun = TestRun.objects.create(title="CI #1", plan=self.plan)
+        other: TestRun = TestRun.objects.create(
+            title="CI #2", plan=TestPlan.objects.create(title="Hotfix"))
+        for index in range(5):
+            TestResult.objects.create(run=run, case=self.case, name=f"test_{index}",
+                                      status="passed", duration=index / 10)
+        TestResult.objects.create(run=other, name="test_other", status="failed")
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_csv_and_ndjson_export(self) -> None:
+        """
+        Тест-кейс выгрузки.
+        1. CSV с заголовком содержит только результаты тест-плана
+        2. NDJSON тест-кейсов разбирается построчно
+        3. Неизвестный тип выгрузки - статус-код 404
+        :return: None
+        """
+        csv_api = self.client.get("/api/export/results/", data={"plan": self.plan.pk},
+                                  HTTP_AUTHORIZATION=f"Bearer {self.user.token}")
+        self.assertEqual(csv_api.status_code, 200)
+        self.assertTrue(csv_api["Content-Type"].startswith("text/csv"))
+        rows: list = list(csv.DictReader(io.StringIO(
+            b"".join(csv_api.streaming_content).decode())))
+        self.assertEqual([row["name"] for row in rows], [f"test_{index}" for index in range(5)])
+        self.assertEqual(rows[1]["duration"], "0.1")
+
+        ndjson_api = self.client.get("/api/export/cases/", data={"format": "ndjson"},
+                                     HTTP_AUTHORIZATION=f"Bearer {self.user.token}")
+        cases: list = [json.loads(line) for line in
+                       b"".join(ndjson_api.streaming_content).decode().splitlines()]
+        self.assertEqual([(case["id"], case["title"]) for case in cases],
+                         [(self.case.pk, self.case.title)])
+
+        missing_api = self.client.get("/api/export/users/",
+                                      HTTP_AUTHORIZATION=f"Bearer {self.user.token}")
+        self.assertEqual(missing_api.status_code, 404)
+
+    def test_zstd_export(self) -> None:
+        """
+        Тест-кейс сжатой выгрузки: распакованный поток совпадает с несжатым
+        :return: None
+        """
+        plain: bytes = b"".join(self.client.get(
+            "/api/export/results/", data={"format": "ndjson"},
+            HTTP_AUTHORIZATION=f"Bearer {self.user.token}").streaming_content)
+        compressed_api = self.client.get(
+            "/api/export/results/", data={"format": "ndjson", "compress": "zstd"},
+            HTTP_AUTHORIZATION=f"Bearer {self.user.token}")
+        self.assertEqual(compressed_api["Content-Type"], "application/zstd")
+        self.assertIn("results.ndjson.zst", compressed_api["Content-Disposition"])
+        reader: typing.Any = zstandard.ZstdDecompressor().stream_reader(
+            io.BytesIO(b"".join(compressed_api.streaming_content)))
+        self.assertEqual(reader.read(), plain)
+        self.assertEqual(len(plain.splitlines()), 6)
+
+
+class TestCurrentTestPlanConcurrency(TransactionTestCase):
+    """
+    Тестирование параллельного переключения текущего тест-плана.
+    Запросы выполняются в потоках со своими соединениями с базой,
+    поэтому данные теста должны быть зафиксированы
+    """
+    threads: int = 6
+    iterations: int = 5
+
+    def setUp(self) -> None:
+        """
+        Создание пользователя и тест-планов
+        :return: None
+        """
+        self.user: User = User.objects.create_user(
+            username="plan_switch", email="plan-switch@example.com", password="test123!")
+        self.plans: list = [TestPlan.objects.create(title=f"Plan {index}", author=self.user)
+                            for index in range(self.threads)]
+
+    def hammer(self, index: int, barrier: threading.Barrier, statuses: list) -> None:
+        """
+        Создавать и обновлять текущие тест-планы из одного потока
+        :param index: int - номер потока
+        :param barrier: Barrier
+        :param statuses: list - статус-коды ответов
+        :return: None
+        """
+        client: Client = Client(HTTP_AUTHORIZATION=f"Bearer {self.user.token}")
+        barrier.wait()
+        try:
+            for iteration in range(self.iterations):
+                if (index + iteration) % 2:
+                    response = client.post("/api/testplan/create/", data={"test_plan": {
+                        "title": f"Created {index}-{iteration}", "is_current": True
+                    }}, content_type="application/json")
+                else:
+                    response = client.put("/api/testplan/update/", data={"test_plan": {
+                        "test_plan_id": self.plans[index].pk,
+                        "title": f"Updated {index}-{iteration}", "is_current": True
+                    }}, content_type="application/json")
+                statuses.append(response.status_code)
+        finally:
+            connection.close()
+
+    def test_parallel_switches_leave_one_current_plan(self) -> None:
+        """
+        Тест-кейс, что параллельные создания и обновления текущего плана
+        завершаются успешно и оставляют ровно один текущий план.
+        :return: None
+        """
+        barrier: threading.Barrier = threading.Barrier(self.threads)
+        statuses: list = []
+        workers: list = [threading.Thread(target=self.hammer, args=(index, barrier, statuses))
+                         for index in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(statuses, [200] * self.threads * self.iterations)
+        self.assertEqual(TestPlan.objects.filter(is_current=True, deleted=None).count(), 1)
+
+
+class TestSearch(TestCase):
+    """
+    Тестирование метода полнотекстового поиска
+    """
+
+    def setUp(self) -> None:
+        """
+        Создание пользователя, тест-плана и прогона
+        :return: None
+        """
+        self.user: User = User.objects.create_user(
+            username="search", email="search@example.com", password="test123!")
+        self.plan: TestPlan = TestPlan.objects.create(title="Checkout release")
+        self.run: TestRun = TestRun.objects.create(title="Checkout nightly", plan=self.plan)
+
+    def test_search(self) -> None:
+        """
+        Тест-кейс поиска с фильтром по типу объектов.
+        1. Статус-код 200
+        2. Возвращен только прогон, совпадение подсвечено
+        :return: None
+        """
+        search_api = self.client.get(
+            "/api/search/", data={"q": "check", "type": "run"},
+            HTTP_AUTHORIZATION=f"Bearer {self.user.token}")
+
+        self.assertEqual(search_api.status_code, 200)
+        results: list = search_api.json()["search"]["results"]
+        self.assertEqual([(result["type"], result["id"]) for result in results],
+                         [("run", self.run.pk)])
+        self.assertEqual(results[0]["snippet"], "<mark>Checkout</mark> nightly")
+
+    def test_search_validation(self) -> None:
+        """
+        Тест-кейс поиска без запроса и с неизвестным типом.
+        1. Статус-код 400
+        :return: None
+        """
+        search_api = self.client.get(
+            "/api/search/", data={"type": "user"},
+            HTTP_AUTHORIZATION=f"Bearer {self.user.token}")
+
+        self.assertEqual(search_api.status_code, 400)
+        self.assertEqual(sorted(search_api.json()["search"]["errors"]), ["q", "type"])
+
+
+class TestKeysetPagination(TestCase):
+    """
+    Тестирование пагинации списков по курсору
+    """
+
+    def setUp(self) -> None:
+        """
+        Создание пользователя и тест-планов
+        :return: None
+        """
+        self.user: User = User.objects.create_user(
+            username="pages", email="pages@example.com", password="test123!")
+        self.plans: list = TestPlan.objects.bulk_create(
+            [TestPlan(title=title) for title in ("Delta", "Alpha", "Charlie", "Bravo", "Alpha")])
+        TestPlan.objects.create(title="Current", is_current=True)
+
+    def get_plans(self, **params: typing.Any) -> typing.Any:
+        """
+        Запрос списка тест-планов
+        :param params: Any - параметры запроса
+        :return: Response
+        """
+        return self.client.get("/api/testplan/all/", data=params,
+                               HTTP_AUTHORIZATION=f"Bearer {self.user.token}")
+
+    def test_pages_follow_cursor(self) -> None:
+        """
+        Тест-кейс обхода всех страниц по курсору next.
+        1. Страницы не пересекаются и идут в порядке (название, ID)
+        2. У последней страницы нет курсора
+        3. Выборка страницы - один запрос без COUNT и OFFSET
+        :return: None
+        """
+        titles: list = []
+        cursor: str | None = None
+        for _ in range(3):
+            params: dict = {"ordering": "-title", "limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            with CaptureQueriesContext(connection) as queries:
+                page: dict = self.get_plans(**params).json()["test_plan"]
+            plan_queries: list = [query["sql"] for query in queries.captured_queries
+                                  if '"testware_testplan"' in query["sql"]]
+            self.assertEqual(len(plan_queries), 1)
+            self.assertNotIn("OFFSET", plan_queries[0])
+            self.assertNotIn("COUNT", plan_queries[0])
+            titles.extend(plan["title"] for plan in page["results"])
+            cursor = page["next"]
+
+        self.assertIsNone(cursor)
+        self.assertEqual(titles, ["Delta", "Charlie", "Bravo", "Alpha", "Alpha"])
+
+    def test_unpaginated_flag(self) -> None:
+        """
+        Тест-кейс, что paginate=false возвращает весь список, как раньше.
+        :return: None
+        """
+        plans: list = self.get_plans(paginate="false").json()["test_plan"]
+        self.assertEqual([plan["id"] for plan in plans], sorted(plan.pk for plan in self.plans))
+
+    def test_invalid_parameters(self) -> None:
+        """
+        Тест-кейс некорректных параметров пагинации.
+        1. Статус-код 400 для чужого курсора, размера страницы больше
+        предельного и неподдерживаемой сортировки
+        :return: None
+        """
+        cursor: str = self.get_plans(limit=1).json()["test_plan"]["next"]
+        for params, field in (({"cursor": cursor, "ordering": "title"}, "cursor"),
+                              ({"cursor": "bm90IGpzb24"}, "cursor"),
+                              ({"limit": 10 ** 6}, "limit"),
+                              ({"ordering": "description"}, "ordering")):
+            response: typing.Any = self.get_plans(**params)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(list(response.json()["test_plan"]["errors"]), [field])
+
+
+class TestTestPlanHistory(TestCase):
+    """
+    Тестирование методов истории тест-плана
+    """
+
+    def setUp(self) -> None:
+        """
+        Создание пользователя и тест-плана
+        :return: None
+        """
+        self.user: User = User.objects.create_user(
+            username="history", email="history@example.com", password="test123!")
+        self.plan: TestPlan = TestPlan.objects.create(title="Release", author=self.user)
+        self.created: str = timezone.now().isoformat()
+
+    def test_history_and_state(self) -> None:
+        """
+        Тест-кейс истории после редактирования через API.
+        1. Версия записана с автором изменения и измененными полями
+        2. Состояние на момент до редактирования - прежнее
+        3. Неизвестный план - статус-код 404
+        :return: None
+        """
+        update_api = self.client.put(
+            "/api/testplan/update/", content_type="application/json",
+            data={"test_plan": {"test_plan_id": self.plan.pk, "title": "Release 2",
+                                "author": self.user.pk, "end_date": "2026-12-01T00:00:00Z"}},
+            HTTP_AUTHORIZATION=f"Bearer {self.user.token}")
+        self.assertEqual(update_api.status_code, 200)
+
+        history: dict = self.client.get(
+            f"/api/testplan/{self.plan.pk}/history/",
+            HTTP_AUTHORIZATION=f"Bearer {self.user.token}").json()["test_plan"]
+        self.assertEqual([(version["version"], version["changed_by"], version["changes"])
+                          for version in history["results"][1:]],
+                         [(2, self.user.pk, {"title": "Release 2",
+                                             "end_date": "2026-12-01T00:00:00Z"})])
+
+        state: dict = self.client.get(
+            f"/api/testplan/{self.plan.pk}/history/state/", data={"at": self.created},
+            HTTP_AUTHORIZATION=f"Bearer {self.user.token}").json()["test_plan"]
+        self.assertEqual((state["version"], state["state"]["title"], state["state"]["end_date"]),
+                         (1, "Release", None))
+
+        missing_api = self.client.get(
+            f"/api/testplan/{self.plan.pk + 1}/history/state/",
+            HTTP_AUTHORIZATION=f"Bearer {self.user.token}")
+        self.assertEqual(missing_api.status_code, 404)
+
+
+class TestFlakyTests(TestCase):
+    """
+    Тестирование методов нестабильных тест-кейсов
+    """
+
+    def setUp(self) -> None:
+        """
+        Создание пользователя и результатов тест-кейсов в прогонах
+        :return: None
+        """
+        self.user: User = User.objects.create_user(
+            username="flaky", email="flaky@example.com", password="test123!")
+        plan: TestPlan = TestPlan.objects.create(title="Release")
+        suite: TestSuite = TestSuite.objects.create(title="UI")
+        self.stable: CaseModel = CaseModel.objects.create(title="Login", suite=suite)
+        self.flaky: CaseModel = CaseModel.objects.create(title="Checkout", suite=suite)
+        for index, result_status in enumerate(("passed", "failed", "passed", "passed", "failed")):
+            run: TestRun = TestRun.objects.create(title=f"CI #{index}", plan=plan)
+            TestResult.objects.create(run=run, case=self.stable, name="login", status="passed")
+            TestResult.objects.create(run=run, case=self.flaky, name="checkout",
+                                      status=result_status)
+
+    def test_ranking_and_timeline(self) -> None:
+        """
+        Тест-кейс рейтинга и хронологии.
+        1. В рейтинге только нестабильный кейс с долей смен 3/4
+        2. Хронология из 5 исходов с 3 сменами
+        3. Неизвестный кейс - статус-код 404
+        :return: None
+        """
+        ranking: list = self.client.get(
+            "/api/testcase/flaky/", data={"min_runs": 3},
+            HTTP_AUTHORIZATION=f"Bearer {self.user.token}").json()["test_case"]["results"]
+        self.assertEqual([(item["test_case_id"], item["score"], item["last_status"])
+                          for item in ranking], [(self.flaky.pk, 0.75, "failed")])
+
+        timeline: dict = self.client.get(
+            f"/api/testcase/{self.flaky.pk}/flips/",
+            HTTP_AUTHORIZATION=f"Bearer {self.user.token}").json()["test_case"]
+        self.assertEqual(len(timeline["timeline"]), 5)
+        self.assertEqual(sum(item["flip"] for item in timeline["timeline"]), 3)
+
+        missing_api = self.client.get(
+            f"/api/testcase/{self.flaky.pk + 10}/flips/",
+            HTTP_AUTHORIZATION=f"Bearer {self.user.token}")
+        self.assertEqual(missing_api.status_code, 404)
+
+
+class TestAttachments(TestCase):
+    """
+    Тестирование методов вложений
+    """
+
+    def setUp(self) -> None:
+        """
+        Создание временного хранилища, пользователя и результата теста
+        :return: None
+        """
+        root: str = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        storage: override_settings = override_settings(ATTACHMENT_ROOT=root)
+        storage.enable()
+        self.addCleanup(storage.disable)
+
+        self.user: User = User.objects.create_user(
+            username="attach", email="attach@example.com", password="test123!")
+        run: TestRun = TestRun.objects.create(
+            title="CI #1", plan=TestPlan.objects.create(title="Release"))
+        self.result: TestResult = TestResult.objects.create(
+            run=run, name="test_checkout", status="failed")
+        self.content: bytes = bytes(range(256)) * 40
+
+    def test_chunked_upload_and_range_download(self) -> None:
+        """
+        Тест-кейс загрузки по частям и скачивания диапазона.
+        1. Часть не с того смещения - статус-код 409 и Upload-Offset
+        2. Последняя часть создает вложение
+        3. Range возвращает 206 с нужными байтами, недостижимый Range - 416
+        :return: None
+        """
+        auth: str = f"Bearer {self.user.token}"
+        started: dict = self.client.post(
+            "/api/attachments/uploads/",
+            data={"attachment": {"result": self.result.pk, "filename": "trace.har",
+                                 "size": len(self.content)}},
+            content_type="application/json", HTTP_AUTHORIZATION=auth).json()["attachment"]
+        url: str = f"/api/attachments/uploads/{started['upload_id']}/"
+
+        first_api = self.client.put(
+            url, data=self.content[:4000], content_type="application/octet-stream",
+            HTTP_CONTENT_RANGE=f"bytes 0-3999/{len(self.content)}", HTTP_AUTHORIZATION=auth)
+        self.assertEqual(first_api.json()["attachment"]["offset"], 4000)
+        conflict_api = self.client.put(
+            url, data=self.content[5000:], content_type="application/octet-stream",
+            HTTP_CONTENT_RANGE=f"bytes 5000-{len(self.content) - 1}/{len(self.content)}",
+            HTTP_AUTHORIZATION=auth)
+        self.assertEqual(conflict_api.status_code, 409)
+        self.assertEqual(conflict_api["Upload-Offset"], "4000")
+        last_api = self.client.put(
+            url, data=self.content[4000:], content_type="application/octet-stream",
+            HTTP_CONTENT_RANGE=f"bytes 4000-{len(self.content) - 1}/{len(self.content)}",
+            HTTP_AUTHORIZATION=auth)
+        self.assertEqual(last_api.status_code, 201)
+        attachment_id: int = last_api.json()["attachment"]["attachment"]["id"]
+        self.assertEqual(Attachment.objects.get(pk=attachment_id).blob.size, len(self.content))
+
+        range_api = self.client.get(f"/api/attachments/{attachment_id}/",
+                                    HTTP_RANGE="bytes=100-299", HTTP_AUTHORIZATION=auth)
+        self.assertEqual(range_api.status_code, 206)
+        self.assertEqual(range_api["Content-Range"], f"bytes 100-299/{len(self.content)}")
+        self.assertEqual(b"".join(range_api.streaming_content), self.content[100:300])
+
+        full_api = self.client.get(f"/api/attachments/{attachment_id}/", HTTP_AUTHORIZATION=auth)
+        self.assertEqual(b"".join(full_api.streaming_content), self.content)
+        unsatisfiable_api = self.client.get(
+            f"/api/attachments/{attachment_id}/",
+            HTTP_RANGE=f"bytes={len(self.content)}-", HTTP_AUTHORIZATION=auth)
+        self.assertEqual(unsatisfiable_api.status_code, 416)
+
+
+class TestTestPlanBatch(TestCase):
+    """
+    Тестирование метода пакетных операций с тест-планами
+    """
+
+    def setUp(self) -> None:
+        """
+        Создание пользователя и тест-плана
+        :return: None
+        """
+        self.user: User = User.objects.create_user(
+            username="batch", email="batch@example.com", password="test123!")
+        self.plan: TestPlan = TestPlan.objects.create(title="Release")
+
+    def test_batch(self) -> None:
+        """
+        Тест-кейс пакета операций.
+        1. atomic с ошибкой - статус-код 400, пакет не применен
+        2. best_effort - статус-код 200, корректные операции применены
+        3. Пустой пакет - статус-код 400
+        :return: None
+        """
+        operations: list = [
+            {"op": "update", "test_plan_id": self.plan.pk, "title": "Release 2"},
+            {"op": "create", "title": "Hotfix", "author": self.user.pk},
+            {"op": "delete", "test_plan_id": 0},
+            {"op": "rename"}
+        ]
+        atomic_api = self.client.post(
+            "/api/testplan/batch/", data={"test_plan": {"operations": operations}},
+            content_type="application/json", HTTP_AUTHORIZATION=f"Bearer {self.user.token}")
+        self.assertEqual(atomic_api.status_code, 400)
+        self.assertEqual([result["status"] for result in atomic_api.json()["test_plan"]["results"]],
+                         ["skipped", "skipped", "error", "error"])
+        self.assertEqual(TestPlan.objects.get(pk=self.plan.pk).title, "Release")
+
+        best_effort_api = self.client.post(
+            "/api/testplan/batch/",
+            data={"test_plan": {"operations": operations, "mode": "best_effort"}},
+            content_type="application/json", HTTP_AUTHORIZATION=f"Bearer {self.user.token}")
+        self.assertEqual(best_effort_api.status_code, 200)
+        results: list = best_effort_api.json()["test_plan"]["results"]
+        self.assertEqual([result["status"] for result in results],
+                         ["updated", "created", "error", "error"])
+        self.assertEqual(TestPlan.objects.get(pk=results[1]["test_plan_id"]).author, self.user)
+        self.assertEqual(TestPlan.objects.get(pk=self.plan.pk).title, "Release 2")
+
+        empty_api = self.client.post(
+            "/api/testplan/batch/", data={"test_plan": {"operations": []}},
+            content_type="application/json", HTTP_AUTHORIZATION=f"Bearer {self.user.token}")
+        self.assertEqual(empty_api.status_code, 400)
+
+
+class TestTestPlanReferences(TestCase):
+    """
+    Тестирование проверки ссылок сериализаторов тест-плана
+    """
+
+    def setUp(self) -> None:
+        """
+        Создание пользователей и тест-планов
+        :return: None
+        """
+        self.user: User = User.objects.create_user(
+            username="references", email="references@example.com", password="test123!")
+        self.inactive: User = User.objects.create_user(
+            username="inactive", email="inactive@example.com", password="test123!")
+        User.objects.filter(pk=self.inactive.pk).update(is_active=False)
+        self.plans: list = [TestPlan.objects.create(title=f"Plan {index}") for index in range(3)]
+
+    def test_references_are_resolved_once(self) -> None:
+        """
+        Тест-кейс проверки ссылок.
+        1. План и автор проверяются запросом по ID, повторно не читаются
+        2. Удаленный план и неактивный автор не найдены
+        :return: None
+        """
+        serializer: UpdateTestPlanSerializer = UpdateTestPlanSerializer(data={
+            "test_plan_id": self.plans[0].pk, "title": "Renamed", "author": self.user.pk})
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(serializer.is_valid())
+        self.assertEqual(len(queries), 2)
+        self.assertTrue(all("WHERE" in query["sql"] for query in queries.captured_queries))
+        with self.assertNumQueries(0):
+            self.assertEqual(serializer.resolved_plan, self.plans[0])
+            self.assertEqual(serializer.resolved_author, self.user)
+            self.assertEqual(serializer.references.plan(self.plans[0].pk), self.plans[0])
+
+        TestPlan.objects.filter(pk=self.plans[1].pk).update(deleted=timezone.now())
+        self.assertFalse(DeleteTestPlanSerializer(data={"test_plan_id": self.plans[1].pk})
+                         .is_valid())
+        serializer = CreateTestPlanSerializer(data={"title": "New", "author": self.inactive.pk})
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors["error"], ["No such author"])
+
+    def test_update_and_delete_views(self) -> None:
+        """
+        Тест-кейс методов редактирования и удаления.
+        1. План и автор не перечитываются после валидации
+        2. Статус-код 200, план изменен и удален
+        :return: None
+        """
+        with CaptureQueriesContext(connection) as queries:
+            update_api = self.client.put(
+                "/api/testplan/update/",
+                data={"test_plan": {"test_plan_id": self.plans[0].pk, "title": "Renamed",
+                                    "author": self.user.pk}},
+                content_type="application/json", HTTP_AUTHORIZATION=f"Bearer {self.user.token}")
+        self.assertEqual(update_api.status_code, 200)
+        plan_table: str = TestPlan._meta.db_table
+        self.assertEqual(len([query for query in queries.captured_queries
+                              if query["sql"].startswith(f'SELECT "{plan_table}"."id"')
+                              and "FOR UPDATE" not in query["sql"]]), 1)
+        updated: TestPlan = TestPlan.objects.get(pk=self.plans[0].pk)
+        self.assertEqual((updated.title, updated.author), ("Renamed", self.user))
+
+        delete_api = self.client.delete(
+            "/api/testplan/delete/", data={"test_plan": {"test_plan_id": self.plans[2].pk}},
+            content_type="application/json", HTTP_AUTHORIZATION=f"Bearer {self.user.token}")
+        self.assertEqual(delete_api.status_code, 200)
+        self.assertFalse(TestPlan.objects.filter(pk=self.plans[2].pk).exists())
@@ -6,10 +6,39 @@ from api import views
 
 urlpatterns = [
     path("users/login/", views.LoginAPIView.as_view(), name='login'),
+    path("users/login/async/", views.AsyncLoginView.as_view(), name='async_login'),
+    path("users/token/refresh/", views.RefreshTokenAPIView.as_view(), name='refresh_token'),
+    path("users/logout/", views.LogoutAPIView.as_view(), name='logout'),
+    path("users/import/", views.ImportUsersAPIView.as_view(), name='import_users'),
     path("users/all/", views.GetUsersAPIView.as_view(), name='get_users'),
     path("testplan/create/", views.CreateTestPlanAPIView.as_view(), name='create_test_plan'),
     path("testplan/update/", views.UpdateTestPlanApiView.as_view(), name='update_test_plan'),
     path("testplan/delete/", views.DeleteTestPlanApiView.as_view(), name='delete_test_plan'),
+    path("testplan/batch/", views.TestPlanBatchAPIView.as_view(), name='test_plan_batch'),
     path("testplan/current/", views.GetTestPlanView.as_view(), name='current_test_plan'),
     path("testplan/all/", views.GetTestPlansAPIView.as_view(), name='all_test_plans'),
+    path("testplan/<int:plan_id>/counters/", views.TestPlanCountersAPIView.as_view(),
+         name='test_plan_counters'),
+    path("testplan/<int:plan_id>/history/", views.TestPlanHistoryAPIView.as_view(),
+         name='test_plan_history'),
+    path("testplan/<int:plan_id>/history/state/", views.TestPlanStateAPIView.as_view(),
+         name='test_plan_state'),
+    path("testrun/<int:run_id>/results/bulk/", views.BulkTestResultsAPIView.as_view(),
+         name='bulk_test_results'),
+    path("testrun/<int:run_id>/results/junit/", views.JUnitImportAPIView.as_view(),
+         name='junit_import'),
+    path("testrun/<int:run_id>/counters/", views.TestRunCountersAPIView.as_view(),
+         name='test_run_counters'),
+    path("testcase/flaky/", views.FlakyTestsAPIView.as_view(), name='flaky_tests'),
+    path("testcase/<int:case_id>/flips/", views.TestCaseFlipsAPIView.as_view(),
+         name='test_case_flips'),
+    path("attachments/", views.AttachmentsAPIView.as_view(), name='attachments'),
+    path("attachments/uploads/", views.StartUploadAPIView.as_view(), name='start_upload'),
+    path("attachments/uploads/<uuid:upload_id>/", views.AttachmentUploadAPIView.as_view(),
+         name='attachment_upload'),
+    path("attachments/<int:attachment_id>/", views.AttachmentAPIView.as_view(),
+         name='attachment'),
+    path("export/<str:entity>/", views.ExportAPIView.as_view(), name='export'),
+    path("search/", views.SearchAPIView.as_view(), name='search'),
+    path("metrics/", views.MetricsAPIView.as_view(), name='metrics'),
 ]
@@ -2,22 +2,55 @@
 Представления приложения api.
 Здесь собраны все API-представления проекта TestCasesTable.
 """
+import asyncio
+import json
 import typing
+from concurrent.futures import Future
+from xml.etree import ElementTree
 
+from django.conf import settings
 from django.db.models import QuerySet
+from django.http import HttpRequest, HttpResponseNotModified, JsonResponse, \
+    StreamingHttpResponse
 from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.utils.http import content_disposition_header
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework import status
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.exceptions import NotFound, Throttled
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.request import Request
 from rest_framework.views import APIView
 from rest_framework.generics import ListAPIView
 
+from authentication.activity import activity_tracker
+from authentication.cache import permission_cache, token_cache, version_map
+from authentication.hashing import PoolSaturated, login_pool
+from authentication.revocation import revocation_list
 from authentication.models import User
-from testware.models import TestPlan
-from .serializers import LoginSerializer, CreateTestPlanSerializer, \
-    UpdateTestPlanSerializer, DeleteTestPlanSerializer, GetTestPlansSerializer, GetUsersSerializer
-from .renderers import LoginJSONRenderer, TestPlanJSONRenderer, UserJSONRenderer
+from authentication.permissions import HasRolePermissions
+from testware.attachments import UploadOffsetMismatch, abort_upload, append_chunk, \
+    parse_range, read_range
+from testware.counters import get_counters
+from testware.export import FORMATS, stream_export
+from testware.flakiness import flip_timeline
+from testware.junit import JUnitImportReport, import_junit
+from testware.models import (
+    Attachment, AttachmentUpload, CaseFlakiness, PlanStatusCounter, RunStatusCounter, TestCase,
+    TestPlan, TestPlanHistory, TestResult, TestRun, TestSuite)
+from .serializers import (
+    LoginSerializer, RefreshTokenSerializer, LogoutSerializer, ImportUsersSerializer,
+    BulkTestResultsSerializer, CreateTestPlanSerializer, UpdateTestPlanSerializer,
+    DeleteTestPlanSerializer, GetTestPlansSerializer, GetUsersSerializer, SearchSerializer,
+    TestPlanHistorySerializer, TestPlanStateSerializer, FlakyTestsSerializer, AttachmentSerializer,
+    StartUploadSerializer, ExportSerializer, TestPlanBatchSerializer)
+from .pagination import KeysetPagination
+from .renderers import (
+    AttachmentJSONRenderer, LoginJSONRenderer, SearchJSONRenderer, TestCaseJSONRenderer,
+    TestPlanJSONRenderer, TestRunJSONRenderer, UserJSONRenderer)
 
 
 class LoginAPIView(APIView):
@@ -35,7 +68,550 @@ class LoginAPIView(APIView):
         :return: Response
         """
         user: typing.Any = request.data.get("user", {})
-        serializer: LoginSerializer = self.serializer_class(data=user)
+        serializer: LoginSerializer = self.serializer_class(
+            data=user, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        return Response(data=serializer.data, status=status.HTTP_200_OK)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncLoginView(View):
+    """
+    Асинхронный вариант LoginAPIView.
+
+    Проверка пароля выполняется в ограниченном пуле login_pool, а
+    обработчик запроса только ожидает результат. Если очередь пула
+    заполнена, запрос сразу отклоняется с кодом 429 и заголовком Retry-After.
+    Формат ответа совпадает с LoginAPIView
+    """
+    serializer_class: typing.Any = LoginSerializer
+
+    async def post(self, request: HttpRequest) -> JsonResponse:
+        """
+        POST-запрос авторизации
+        :param request: HttpRequest
+        :return: JsonResponse
+        """
+        try:
+            user: typing.Any = json.loads(request.body or b"{}").get("user", {})
+        except (ValueError, AttributeError):
+            return JsonResponse(
+                {"user": {"errors": {"error": ["JSON parse error"]}}},
+                status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            future: Future = login_pool.submit(self._validate, user, request)
+        except PoolSaturated:
+            return JsonResponse(
+                {"user": {"errors": {"error": ["Too many login attempts, try again later"]}}},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={"Retry-After": str(settings.LOGIN_HASH_POOL_RETRY_AFTER)})
+
+        data, status_code, headers = await asyncio.wrap_future(future)
+        return JsonResponse({"user": data}, status=status_code, headers=headers)
+
+    def _validate(self, user: typing.Any, request: HttpRequest) -> tuple:
+        """
+        Валидация данных авторизации в потоке пула
+        :param user: Any
+        :param request: HttpRequest
+        :return: tuple[dict, int, dict]
+        """
+        serializer: LoginSerializer = self.serializer_class(
+            data=user, context={"request": request})
+        try:
+            if serializer.is_valid():
+                return serializer.data, status.HTTP_200_OK, {}
+        except Throttled as exc:
+            return {"detail": exc.detail}, exc.status_code, {"Retry-After": str(exc.wait)}
+        return {"errors": serializer.errors}, status.HTTP_400_BAD_REQUEST, {}
+
+
+class MetricsAPIView(APIView):
+    """
+    Метрики процесса: пул проверки паролей и кэш токенов.
+    Доступно только администраторам
+    """
+    permission_classes: typing.ClassVar[tuple] = (IsAdminUser,)
+    renderer_classes: typing.ClassVar[tuple] = (JSONRenderer,)
+
+    def get(self, request: Request) -> Response:
+        """
+        GET-запрос метрик
+        :param request: Request
+        :return: Response
+        """
+        data: dict = {
+            "login_pool": login_pool.metrics(),
+            "token_cache": token_cache.stats(),
+            "version_map": version_map.stats(),
+            "permission_cache": permission_cache.stats(),
+            "revocation_list": revocation_list.stats(),
+            "activity_tracker": activity_tracker.stats()
+        }
+        return Response(data=data, status=status.HTTP_200_OK)
+
+
+class RefreshTokenAPIView(APIView):
+    """
+    Представление API обновления access-токена по refresh-токену
+    """
+    permission_classes: typing.ClassVar[tuple] = (AllowAny,)
+    renderer_classes: typing.ClassVar[tuple] = (LoginJSONRenderer,)
+    serializer_class: typing.Any = RefreshTokenSerializer
+
+    def post(self, request: Request) -> Response:
+        """
+        POST-запрос обновления токенов
+        :param request: Request
+        :return: Response
+        """
+        serializer: RefreshTokenSerializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(data=serializer.data, status=status.HTTP_200_OK)
+
+
+class LogoutAPIView(APIView):
+    """
+    Представление API выхода: отзыв токенов пользователя
+    """
+    permission_classes: typing.ClassVar[tuple] = (IsAuthenticated,)
+    renderer_classes: typing.ClassVar[tuple] = (LoginJSONRenderer,)
+    serializer_class: typing.Any = LogoutSerializer
+
+    def post(self, request: Request) -> Response:
+        """
+        POST-запрос выхода
+        :param request: Request
+        :return: Response
+        """
+        serializer: LogoutSerializer = self.serializer_class(
+            data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        return Response(data=serializer.data, status=status.HTTP_200_OK)
+
+
+class ImportUsersAPIView(APIView):
+    """
+    Представление API массового создания пользователей.
+    Доступно пользователям с правом authentication.add_user.
+    Повторяющиеся username и email не прерывают импорт и возвращаются в отчете
+    """
+    permission_classes: typing.ClassVar[tuple] = (HasRolePermissions,)
+    renderer_classes: typing.ClassVar[tuple] = (UserJSONRenderer,)
+    serializer_class: typing.Any = ImportUsersSerializer
+    required_permissions: typing.ClassVar[dict] = {"POST": ("authentication.add_user",)}
+
+    def post(self, request: Request) -> Response:
+        """
+        POST-запрос импорта пользователей
+        :param request: Request
+        :return: Response
+        """
+        serializer: ImportUsersSerializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(data=serializer.data, status=status.HTTP_200_OK)
+
+
+class BulkTestResultsAPIView(APIView):
+    """
+    Представление API массовой загрузки результатов тестов в прогон.
+    Корректные строки сохраняются, ошибочные возвращаются с номером строки
+    """
+    permission_classes: typing.ClassVar[tuple] = (IsAuthenticated,)
+    renderer_classes: typing.ClassVar[tuple] = (TestRunJSONRenderer,)
+    serializer_class: typing.Any = BulkTestResultsSerializer
+
+    def post(self, request: Request, run_id: int) -> Response:
+        """
+        POST-запрос загрузки результатов
+        :param request: Request
+        :param run_id: int
+        :return: Response
+        """
+        run: TestRun | None = TestRun.objects.filter(pk=run_id, deleted=None).first()
+        if run is None:
+            raise NotFound("No such test run")
+
+        serializer: BulkTestResultsSerializer = self.serializer_class(
+            data=request.data, context={"run": run})
+        serializer.is_valid(raise_exception=True)
+        return Response(data=serializer.data, status=status.HTTP_200_OK)
+
+
+class JUnitImportAPIView(APIView):
+    """
+    Представление API импорта отчета JUnit XML в прогон. Тело запроса -
+    XML-файл, который разбирается потоком, не загружаясь в память целиком;
+    параметр suite - сьют, в котором ищутся и создаются тест-кейсы
+    """
+    permission_classes: typing.ClassVar[tuple] = (IsAuthenticated,)
+    renderer_classes: typing.ClassVar[tuple] = (TestRunJSONRenderer,)
+
+    def post(self, request: Request, run_id: int) -> Response:
+        """
+        POST-запрос импорта отчета
+        :param request: Request
+        :param run_id: int
+        :return: Response
+        """
+        run: TestRun | None = TestRun.objects.filter(pk=run_id, deleted=None).first()
+        if run is None:
+            raise NotFound("No such test run")
+        suite_id: str = request.query_params.get("suite", "")
+        suite: TestSuite | None = TestSuite.objects.filter(
+            pk=suite_id, deleted=None).first() if suite_id.isdigit() else None
+        if suite is None:
+            raise NotFound("No such test suite")
+        if request.stream is None:
+            return Response(data={"errors": ["JUnit XML report is required"]},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            report: JUnitImportReport = import_junit(request.stream, run, suite)
+        except ElementTree.ParseError as error:
+            return Response(data={"errors": [f"Malformed JUnit XML: {error}"]},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(data=report.as_dict(), status=status.HTTP_200_OK)
+
+
+class TestRunCountersAPIView(APIView):
+    """
+    Счетчики результатов тестового прогона по статусам.
+    Читаются из RunStatusCounter, без подсчета результатов
+    """
+    permission_classes: typing.ClassVar[tuple] = (IsAuthenticated,)
+    renderer_classes: typing.ClassVar[tuple] = (TestRunJSONRenderer,)
+
+    def get(self, request: Request, run_id: int) -> Response:
+        """
+        GET-запрос счетчиков прогона
+        :param request: Request
+        :param run_id: int
+        :return: Response
+        """
+        if not TestRun.objects.filter(pk=run_id, deleted=None).exists():
+            raise NotFound("No such test run")
+
+        data: dict = {
+            "test_run_id": run_id,
+            "results": get_counters(
+                RunStatusCounter, "run_id", run_id, TestResult.Status.values)
+        }
+        return Response(data=data, status=status.HTTP_200_OK)
+
+
+class FlakyTestsAPIView(APIView):
+    """
+    Рейтинг нестабильных тест-кейсов по доле смен passed/failed
+    в последних FLAKY_WINDOW результатах. Параметры: limit - число
+    кейсов, min_runs - наименьшее число результатов в окне
+    """
+    permission_classes: typing.ClassVar[tuple] = (IsAuthenticated,)
+    renderer_classes: typing.ClassVar[tuple] = (TestCaseJSONRenderer,)
+    serializer_class: typing.Any = FlakyTestsSerializer
+
+    def get(self, request: Request) -> Response:
+        """
+        GET-запрос рейтинга
+        :param request: Request
+        :return: Response
+        """
+        serializer: FlakyTestsSerializer = self.serializer_class(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return Response(data=serializer.data, status=status.HTTP_200_OK)
+
+
+class TestCaseFlipsAPIView(APIView):
+    """
+    Хронология исходов тест-кейса: последние FLAKY_WINDOW результатов
+    passed/failed от старых к новым с отметкой смены исхода
+    """
+    permission_classes: typing.ClassVar[tuple] = (IsAuthenticated,)
+    renderer_classes: typing.ClassVar[tuple] = (TestCaseJSONRenderer,)
+
+    def get(self, request: Request, case_id: int) -> Response:
+        """
+        GET-запрос хронологии тест-кейса
+        :param request: Request
+        :param case_id: int
+        :return: Response
+        """
+        if not TestCase.objects.filter(pk=case_id, deleted=None).exists():
+            raise NotFound("No such test case")
+
+        flakiness: CaseFlakiness | None = CaseFlakiness.objects.filter(case_id=case_id).first()
+        data: dict = {
+            "test_case_id": case_id,
+            "score": round(flakiness.score, 3) if flakiness else 0.0,
+            "flips": flakiness.flips if flakiness else 0,
+            "timeline": flip_timeline(case_id)
+        }
+        return Response(data=data, status=status.HTTP_200_OK)
+
+
+class AttachmentsAPIView(APIView):
+    """
+    Вложения результата теста (?result=) или тест-кейса (?case=)
+    """
+    permission_classes: typing.ClassVar[tuple] = (IsAuthenticated,)
+    renderer_classes: typing.ClassVar[tuple] = (AttachmentJSONRenderer,)
+
+    def get(self, request: Request) -> Response:
+        """
+        GET-запрос списка вложений
+        :param request: Request
+        :return: Response
+        """
+        owner: typing.Dict[str, str] = {
+            f"{key}_id": value for key, value in request.query_params.items()
+            if key in ("result", "case")}
+        if len(owner) != 1 or not next(iter(owner.values())).isdigit():
+            return Response(data={"errors": ["Either result or case is required"]},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        attachments: QuerySet[Attachment] = Attachment.objects.filter(
+            **owner).select_related("blob").order_by("id")
+        return Response(data={"results": AttachmentSerializer(attachments, many=True).data},
+                        status=status.HTTP_200_OK)
+
+
+class StartUploadAPIView(APIView):
+    """
+    Начало загрузки вложения по частям. Возвращает upload_id, по которому
+    части отправляются PUT-запросами, или сразу вложение, если содержимое
+    с переданным sha256 уже есть в хранилище
+    """
+    permission_classes: typing.ClassVar[tuple] = (IsAuthenticated,)
+    renderer_classes: typing.ClassVar[tuple] = (AttachmentJSONRenderer,)
+    serializer_class: typing.Any = StartUploadSerializer
+
+    def post(self, request: Request) -> Response:
+        """
+        POST-запрос начала загрузки
+        :param request: Request
+        :return: Response
+        """
+        serializer: StartUploadSerializer = self.serializer_class(
+            data=request.data.get("attachment", {}), context={"author": request.user})
+        serializer.is_valid(raise_exception=True)
+        return Response(data=serializer.data, status=status.HTTP_201_CREATED)
+
+
+class AttachmentUploadAPIView(APIView):
+    """
+    Части загрузки вложения. Часть - тело PUT-запроса с заголовком
+    Content-Range: bytes <первый>-<последний>/<размер>; части отправляются
+    по порядку, не больше ATTACHMENT_CHUNK_SIZE байт. Если часть начинается
+    не с полученного смещения, возвращается 409 и заголовок Upload-Offset,
+    с которого нужно продолжить. Тело пишется на диск потоком
+    """
+    permission_classes: typing.ClassVar[tuple] = (IsAuthenticated,)
+    renderer_classes: typing.ClassVar[tuple] = (AttachmentJSONRenderer,)
+
+    def get(self, request: Request, upload_id: typing.Any) -> Response:
+        """
+        GET-запрос состояния загрузки
+        :param request: Request
+        :param upload_id: UUID
+        :return: Response
+        """
+        upload: AttachmentUpload | None = AttachmentUpload.objects.filter(pk=upload_id).first()
+        if upload is None:
+            raise NotFound("No such upload")
+        return Response(data={"upload_id": str(upload.pk), "offset": upload.received,
+                              "size": upload.size},
+                        status=status.HTTP_200_OK, headers={"Upload-Offset": str(upload.received)})
+
+    def put(self, request: Request, upload_id: typing.Any) -> Response:
+        """
+        PUT-запрос части загрузки
+        :param request: Request
+        :param upload_id: UUID
+        :return: Response
+        """
+        unit, _, content_range = request.headers.get("Content-Range", "").partition(" ")
+        first, _, rest = content_range.partition("-")
+        last, _, total = rest.partition("/")
+        length: str = request.META.get("CONTENT_LENGTH") or "0"
+        if unit != "bytes" or not (first + last + total + length).isdigit() \
+                or int(last) - int(first) + 1 != int(length):
+            return Response(data={"errors": ["Content-Range must be bytes <first>-<last>/<size> "
+                                             "and match Content-Length"]},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            uploaded: AttachmentUpload | Attachment = append_chunk(
+                upload_id, int(first), request.stream, int(length))
+        except AttachmentUpload.DoesNotExist as error:
+            raise NotFound("No such upload") from error
+        except UploadOffsetMismatch as error:
+            return Response(data={"errors": [str(error)], "offset": error.offset},
+                            status=status.HTTP_409_CONFLICT,
+                            headers={"Upload-Offset": str(error.offset)})
+        except ValueError as error:
+            return Response(data={"errors": [str(error)]}, status=status.HTTP_400_BAD_REQUEST)
+
+        if isinstance(uploaded, Attachment):
+            return Response(data={"attachment": AttachmentSerializer(uploaded).data},
+                            status=status.HTTP_201_CREATED)
+        return Response(data={"upload_id": str(uploaded.pk), "offset": uploaded.received,
+                              "size": uploaded.size},
+                        status=status.HTTP_200_OK,
+                        headers={"Upload-Offset": str(uploaded.received)})
+
+    def delete(self, request: Request, upload_id: typing.Any) -> Response:
+        """
+        DELETE-запрос отмены загрузки
+        :param request: Request
+        :param upload_id: UUID
+        :return: Response
+        """
+        upload: AttachmentUpload | None = AttachmentUpload.objects.filter(pk=upload_id).first()
+        if upload is None:
+            raise NotFound("No such upload")
+        abort_upload(upload)
+        return Response(data={"upload_id": str(upload_id)}, status=status.HTTP_200_OK)
+
+
+class AttachmentAPIView(APIView):
+    """
+    Скачивание и удаление вложения. Файл отдается потоком, с поддержкой
+    заголовков Range (один диапазон байт) и If-Range; ETag - SHA-256
+    содержимого, поэтому он не меняется и кешируется клиентами
+    """
+    permission_classes: typing.ClassVar[tuple] = (IsAuthenticated,)
+    renderer_classes: typing.ClassVar[tuple] = (AttachmentJSONRenderer,)
+
+    def perform_content_negotiation(self, request: Request, force: bool = False) -> typing.Any:
+        """
+        Ошибки отдаются в JSON при любом заголовке Accept, в том числе
+        при запросе файла с Accept: image/png
+        :param request: Request
+        :param force: bool
+        :return: Any
+        """
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request: Request, attachment_id: int) -> typing.Any:
+        """
+        GET-запрос скачивания вложения
+        :param request: Request
+        :param attachment_id: int
+        :return: StreamingHttpResponse | HttpResponseNotModified | Response
+        """
+        attachment: Attachment | None = Attachment.objects.filter(
+            pk=attachment_id).select_related("blob").first()
+        if attachment is None:
+            raise NotFound("No such attachment")
+
+        size: int = attachment.blob.size
+        etag: str = f'"{attachment.blob_id}"'
+        if request.headers.get("If-None-Match") == etag:
+            not_modified: HttpResponseNotModified = HttpResponseNotModified()
+            not_modified["ETag"] = etag
+            return not_modified
+
+        byte_range: typing.Tuple[int, int] | None = None
+        if request.headers.get("If-Range", etag) == etag:
+            try:
+                byte_range = parse_range(request.headers.get("Range", ""), size)
+            except ValueError:
+                return Response(data={"errors": ["Range not satisfiable"]},
+                                status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                                headers={"Content-Range": f"bytes */{size}"})
+
+        start, end = byte_range or (0, size - 1)
+        response: StreamingHttpResponse = StreamingHttpResponse(
+            read_range(attachment.blob_id, start, end - start + 1),
+            content_type=attachment.content_type,
+            status=status.HTTP_206_PARTIAL_CONTENT if byte_range else status.HTTP_200_OK)
+        response["Content-Length"] = str(end - start + 1)
+        response["Accept-Ranges"] = "bytes"
+        response["ETag"] = etag
+        response["Content-Disposition"] = content_disposition_header(False, attachment.filename)
+        if byte_range:
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        return response
+
+    def delete(self, request: Request, attachment_id: int) -> Response:
+        """
+        DELETE-запрос удаления вложения. Содержимое остается в хранилище,
+        пока на него ссылаются другие вложения
+        :param request: Request
+        :param attachment_id: int
+        :return: Response
+        """
+        deleted, _ = Attachment.objects.filter(pk=attachment_id).delete()
+        if not deleted:
+            raise NotFound("No such attachment")
+        return Response(data={"attachment_id": attachment_id}, status=status.HTTP_200_OK)
+
+
+class ExportAPIView(APIView):
+    """
+    Потоковая выгрузка тест-планов (plans), тест-кейсов (cases)
+    и результатов (results). Параметры: format - csv или ndjson,
+    compress=zstd - сжатие на лету, plan и run - результаты тест-плана
+    или прогона, suite - тест-кейсы поддерева сьюта. Строки читаются
+    курсором и отдаются блоками, поэтому память не зависит от размера выгрузки
+    """
+    permission_classes: typing.ClassVar[tuple] = (IsAuthenticated,)
+    renderer_classes: typing.ClassVar[tuple] = (TestPlanJSONRenderer,)
+    serializer_class: typing.Any = ExportSerializer
+
+    def perform_content_negotiation(self, request: Request, force: bool = False) -> typing.Any:
+        """
+        Параметр format выбирает формат выгрузки, а не рендер: ошибки
+        отдаются в JSON при любом format и заголовке Accept
+        :param request: Request
+        :param force: bool
+        :return: Any
+        """
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request: Request, entity: str) -> StreamingHttpResponse:
+        """
+        GET-запрос выгрузки
+        :param request: Request
+        :param entity: str - plans, cases или results
+        :return: StreamingHttpResponse
+        """
+        serializer: ExportSerializer = self.serializer_class(
+            data=request.query_params, context={"entity": entity})
+        serializer.is_valid(raise_exception=True)
+        export: dict = serializer.validated_data
+
+        filename: str = f"{entity}.{export['format']}"
+        response: StreamingHttpResponse = StreamingHttpResponse(
+            stream_export(export["queryset"], entity, export["format"], export["compress"]),
+            content_type="application/zstd" if export["compress"] else
+            f"{FORMATS[export['format']]}; charset=utf-8")
+        if export["compress"]:
+            filename += ".zst"
+        response["Content-Disposition"] = content_disposition_header(True, filename)
+        return response
+
+
+class SearchAPIView(APIView):
+    """
+    Полнотекстовый поиск по тест-планам, сьютам, тест-кейсам и прогонам.
+    Параметры: q - слова запроса (ищутся как префиксы), type - тип объектов
+    (plan, suite, case, run; можно повторять), limit - число результатов.
+    Результаты отсортированы по релевантности, во фрагменте snippet
+    совпадения выделены тегом <mark>
+    """
+    permission_classes: typing.ClassVar[tuple] = (IsAuthenticated,)
+    renderer_classes: typing.ClassVar[tuple] = (SearchJSONRenderer,)
+    serializer_class: typing.Any = SearchSerializer
+
+    def get(self, request: Request) -> Response:
+        """
+        GET-запрос поиска
+        :param request: Request
+        :return: Response
+        """
+        serializer: SearchSerializer = self.serializer_class(data=request.query_params)
         serializer.is_valid(raise_exception=True)
         return Response(data=serializer.data, status=status.HTTP_200_OK)
 
@@ -83,22 +659,15 @@ class CreateTestPlanAPIView(APIView):
 
         serializer: CreateTestPlanSerializer = self.serializer_class(data=test_plan_data)
         if serializer.is_valid(raise_exception=True):
-            test_plan: TestPlan = TestPlan.objects.create(
+            # Если план текущий, остальные текущие планы снимаются в TestPlan.save()
+            TestPlan(
                 title=test_plan_data["title"],
                 description=description,
                 author_id=author,
                 is_current=is_current,
                 start_date=start_date,
                 end_date=end_date
-            )
-            test_plan.save()
-            if is_current:
-                test_plan.is_current = is_current
-                test_plans = TestPlan.objects.exclude(
-                    id=test_plan.id).filter(is_current=True, deleted=None)
-                for obj in test_plans:
-                    obj.is_current = False
-                    obj.save()
+            ).save(changed_by=request.user)
             return Response(data=serializer.data, status=status.HTTP_200_OK)
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
@@ -124,11 +693,6 @@ class UpdateTestPlanApiView(APIView):
         except KeyError:
             description = None
 
-        try:
-            author = test_plan_data["author"]
-        except KeyError:
-            author = None
-
         try:
             start_date = test_plan_data["start_date"]
         except KeyError:
@@ -146,26 +710,45 @@ class UpdateTestPlanApiView(APIView):
 
         serializer: UpdateTestPlanSerializer = self.serializer_class(data=test_plan_data)
         if serializer.is_valid(raise_exception=True):
-            test_plan: TestPlan = TestPlan.objects.get(id=test_plan_data["test_plan_id"])
+            # План и автор уже найдены при валидации
+            test_plan: TestPlan = serializer.resolved_plan
             test_plan.title = test_plan_data["title"]
             test_plan.description = description
             test_plan.start_date = start_date
             test_plan.end_date = end_date
-            test_plan.author = User.objects.get(id=author) if author else None
-            if is_current:
-                test_plans = TestPlan.objects.exclude(
-                    id=test_plan_data["test_plan_id"]).filter(
-                    is_current=True,
-                    deleted=None)
-                for obj in test_plans:
-                    obj.is_current = False
-                    obj.save()
+            test_plan.author = serializer.resolved_author
+            # Остальные текущие планы снимаются в TestPlan.save()
             test_plan.is_current = is_current
-            test_plan.save()
+            test_plan.save(changed_by=request.user)
             return Response(data=serializer.data, status=status.HTTP_200_OK)
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
 
+class TestPlanBatchAPIView(APIView):
+    """
+    Пакетное создание, изменение и удаление тест-планов в одной
+    транзакции. mode=atomic (по умолчанию) не применяет пакет с ошибкой
+    и возвращает статус-код 400, mode=best_effort применяет корректные
+    операции. Результат и ошибки возвращаются по каждой операции
+    """
+    permission_classes: typing.ClassVar[tuple] = (IsAuthenticated,)
+    renderer_classes: typing.ClassVar[tuple] = (TestPlanJSONRenderer,)
+    serializer_class: typing.Any = TestPlanBatchSerializer
+
+    def post(self, request: Request) -> Response:
+        """
+        POST-запрос пакета операций
+        :param request: Request
+        :return: Response
+        """
+        serializer: TestPlanBatchSerializer = self.serializer_class(
+            data=request.data.get("test_plan", {}), context={"changed_by": request.user})
+        serializer.is_valid(raise_exception=True)
+        return Response(data=serializer.data,
+                        status=status.HTTP_200_OK if serializer.data["applied"]
+                        else status.HTTP_400_BAD_REQUEST)
+
+
 class DeleteTestPlanApiView(APIView):
     """
     Метод удаления тест-плана
@@ -183,10 +766,10 @@ class DeleteTestPlanApiView(APIView):
         test_plan_data: typing.Any = request.data.get("test_plan", {})
         serializer: DeleteTestPlanSerializer = self.serializer_class(data=test_plan_data)
         if serializer.is_valid(raise_exception=True):
-            test_plan: TestPlan = TestPlan.objects.get(id=test_plan_data["test_plan_id"])
+            test_plan: TestPlan = serializer.resolved_plan
             test_plan.deleted = timezone.now()
             test_plan.is_current = False
-            test_plan.save()
+            test_plan.save(changed_by=request.user)
             return Response(data=serializer.data, status=status.HTTP_200_OK)
         return Response(data=serializer.data, status=status.HTTP_400_BAD_REQUEST)
 
@@ -206,7 +789,7 @@ class GetTestPlanView(APIView):
         """
         data: dict
         try:
-            test_plan: TestPlan = TestPlan.objects.get(is_current=True, deleted=None)
+            test_plan: TestPlan = TestPlan.objects.get(is_current=True)
             data = {
                 "test_plan_id": test_plan.id,
                 "title": test_plan.title,
@@ -224,13 +807,88 @@ class GetTestPlanView(APIView):
             return Response(data=data, status=status.HTTP_200_OK)
 
 
+class TestPlanCountersAPIView(APIView):
+    """
+    Счетчики тестовых прогонов тест-плана по статусам для дашборда.
+    Читаются из PlanStatusCounter, без подсчета прогонов
+    """
+    permission_classes: typing.ClassVar[tuple] = (IsAuthenticated,)
+    renderer_classes: typing.ClassVar[tuple] = (TestPlanJSONRenderer,)
+
+    def get(self, request: Request, plan_id: int) -> Response:
+        """
+        GET-запрос счетчиков тест-плана
+        :param request: Request
+        :param plan_id: int
+        :return: Response
+        """
+        if not TestPlan.objects.filter(pk=plan_id).exists():
+            raise NotFound("No such test plan")
+
+        data: dict = {
+            "test_plan_id": plan_id,
+            "runs": get_counters(
+                PlanStatusCounter, "plan_id", plan_id, TestRun.Status.values)
+        }
+        return Response(data=data, status=status.HTTP_200_OK)
+
+
+class TestPlanHistoryAPIView(ListAPIView):
+    """
+    История изменений тест-плана: версии с измененными полями, временем
+    и автором изменения. Список разбит на страницы по курсору
+    (api.pagination.KeysetPagination) в порядке версий. История удаленных
+    и перенесенных в архив планов сохраняется
+    """
+    permission_classes = (IsAuthenticated,)
+    serializer_class = TestPlanHistorySerializer
+    renderer_classes = (TestPlanJSONRenderer,)
+    pagination_class = KeysetPagination
+    ordering_fields: typing.ClassVar[tuple] = ("version",)
+
+    def get_queryset(self) -> QuerySet[TestPlanHistory]:
+        """
+        Извлечение версий тест-плана
+        :return: QuerySet[TestPlanHistory]
+        """
+        return TestPlanHistory.objects.filter(plan_id=self.kwargs["plan_id"]).order_by('version')
+
+
+class TestPlanStateAPIView(APIView):
+    """
+    Состояние тест-плана на момент времени at (ISO 8601, по умолчанию -
+    сейчас), восстановленное по истории изменений
+    """
+    permission_classes: typing.ClassVar[tuple] = (IsAuthenticated,)
+    renderer_classes: typing.ClassVar[tuple] = (TestPlanJSONRenderer,)
+    serializer_class: typing.Any = TestPlanStateSerializer
+
+    def get(self, request: Request, plan_id: int) -> Response:
+        """
+        GET-запрос состояния тест-плана
+        :param request: Request
+        :param plan_id: int
+        :return: Response
+        """
+        serializer: TestPlanStateSerializer = self.serializer_class(
+            data=request.query_params, context={"plan_id": plan_id})
+        serializer.is_valid(raise_exception=True)
+        return Response(data={"test_plan_id": plan_id, **serializer.data},
+                        status=status.HTTP_200_OK)
+
+
 class GetTestPlansAPIView(ListAPIView):
     """
-    Метод извлечения всех тест-планов в алфавитном порядке
+    Метод извлечения всех тест-планов в алфавитном порядке.
+
+    Список разбит на страницы по курсору (api.pagination.KeysetPagination),
+    сортировка - по ID или названию; paginate=false возвращает весь список
     """
     permission_classes = (IsAuthenticated,)
     serializer_class = GetTestPlansSerializer
     renderer_classes = (TestPlanJSONRenderer,)
+    pagination_class = KeysetPagination
+    ordering_fields: typing.ClassVar[tuple] = ("id", "title")
 
     def get_queryset(self) -> QuerySet[TestPlan]:
         """
@@ -241,9 +899,9 @@ class GetTestPlansAPIView(ListAPIView):
         title: typing.Any = self.request.query_params.get("title")
         if title is not None:
             queryset = TestPlan.objects.filter(
-                deleted=None, title__icontains=title, is_current=False).order_by('id')
+                title__icontains=title, is_current=False).order_by('id')
         else:
-            queryset = TestPlan.objects.filter(deleted=None, is_current=False).order_by('id')
+            queryset = TestPlan.objects.filter(is_current=False).order_by('id')
         return queryset
 
 
@@ -254,8 +912,12 @@ class GetUsersAPIView(ListAPIView):
     Метод возвращает ID, имя, фамилию и email пользователя.
 
     Метод возвращает список, отсортированный по ID по возрастанию
+    (или по email), страницами по курсору; paginate=false возвращает
+    весь список
     """
     permission_classes = (IsAuthenticated,)
     serializer_class = GetUsersSerializer
     renderer_classes = (UserJSONRenderer,)
+    pagination_class = KeysetPagination
+    ordering_fields: typing.ClassVar[tuple] = ("id", "email")
     queryset = User.objects.filter(is_active=True, is_staff=True).order_by('id')
@@ -0,0 +1,149 @@
+"""
+Модуль учета активности пользователей.
+
+Время последнего запроса (last_seen) и входа (last_login) собирается в
+памяти процесса и периодически записывается одним UPDATE на поле вместо
+запроса к базе на каждый запрос пользователя. Оставшиеся записи
+сбрасываются при завершении процесса.
+"""
+import atexit
+import logging
+import threading
+import typing
+from datetime import datetime
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection
+from django.db.models import Case, DateTimeField, F, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import User
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class ActivityTracker:
+    """
+    Накопитель времени активности пользователей с отложенной записью
+    """
+
+    def __init__(self, flush_interval: int, max_pending: int, batch_size: int = 500) -> None:
+        """
+        Инициализация накопителя
+        :param flush_interval: int - период записи в секундах
+        :param max_pending: int - число пользователей, после которого запись начинается досрочно
+        :param batch_size: int - сколько пользователей обновляется одним UPDATE
+        """
+        self.flush_interval: int = flush_interval
+        self.max_pending: int = max_pending
+        self.batch_size: int = batch_size
+        self.flushed: int = 0
+        self._pending: typing.Dict[str, typing.Dict[int, datetime]] = {
+            "last_seen": {}, "last_login": {}}
+        self._database: str | None = None
+        self._lock: threading.Lock = threading.Lock()
+        self._wakeup: threading.Event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def record(self, user_id: int, login: bool = False) -> None:
+        """
+        Учесть запрос (или вход) пользователя
+        :param user_id: int
+        :param login: bool - пользователь вошел в систему
+        :return: None
+        """
+        now: datetime = timezone.now()
+        with self._lock:
+            if self._database is None:
+                self._database = connection.settings_dict["NAME"]
+            self._pending["last_seen"][user_id] = now
+            if login:
+                self._pending["last_login"][user_id] = now
+            pending: int = len(self._pending["last_seen"])
+
+        if self._thread is None:
+            self._start()
+        if pending >= self.max_pending:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """
+        Записать накопленное время активности.
+        Более раннее время не затирает более позднее, записанное другим процессом
+        :return: int - число обновленных пользователей
+        """
+        with self._lock:
+            pending: typing.Dict[str, typing.Dict[int, datetime]] = self._pending
+            database: str | None = self._database
+            self._pending = {"last_seen": {}, "last_login": {}}
+            self._database = None
+
+        # Накопленное для другой базы (например, тестовой, уже удаленной) не записывается
+        if database is None or database != connection.settings_dict["NAME"]:
+            return 0
+
+        updated: int = 0
+        for field, timestamps in pending.items():
+            items: list = list(timestamps.items())
+            for start in range(0, len(items), self.batch_size):
+                batch: list = items[start:start + self.batch_size]
+                seen_at: Case = Case(
+                    *[When(pk=user_id, then=Value(moment)) for user_id, moment in batch],
+                    output_field=DateTimeField())
+                updated += User.objects.filter(pk__in=[user_id for user_id, _ in batch]).update(
+                    **{field: Greatest(Coalesce(F(field), seen_at), seen_at)})
+
+        self.flushed += updated
+        return updated
+
+    def stats(self) -> dict:
+        """
+        Вернуть размер очереди и число записанных обновлений
+        :return: dict
+        """
+        with self._lock:
+            return {
+                "pending": len(self._pending["last_seen"]),
+                "flushed": self.flushed
+            }
+
+    def _start(self) -> None:
+        """
+        Запустить фоновый поток записи и запись при завершении процесса
+        :return: None
+        """
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="activity-tracker", daemon=True)
+            self._thread.start()
+        atexit.register(self._safe_flush)
+
+    def _run(self) -> None:
+        """
+        Цикл фонового потока
+        :return: None
+        """
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._safe_flush()
+            close_old_connections()
+
+    def _safe_flush(self) -> None:
+        """
+        Запись без падения потока при ошибке базы
+        :return: None
+        """
+        try:
+            self.flush()
+        except DatabaseError:
+            logger.exception("Failed to flush user activity")
+
+
+activity_tracker: ActivityTracker = ActivityTracker(
+    flush_interval=settings.ACTIVITY_FLUSH_INTERVAL,
+    max_pending=settings.ACTIVITY_MAX_PENDING
+)
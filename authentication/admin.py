@@ -2,7 +2,7 @@
 Модуль настройки страницы администрирования приложения authentication
 """
 from django.contrib import admin
-from .models import User
+from .models import Role, User
 
 
 @admin.register(User)
@@ -11,5 +11,17 @@ class UserAdmin(admin.ModelAdmin):
     Регистрация модели User
     на странице администрирования
     """
-    list_display = ['username', 'email', 'is_active', 'is_staff', 'is_superuser']
+    list_display = ['username', 'email', 'is_active', 'is_staff', 'is_superuser',
+                    'last_seen', 'last_login']
     list_filter = ['username', 'email']
+
+
+@admin.register(Role)
+class RoleAdmin(admin.ModelAdmin):
+    """
+    Регистрация модели Role
+    на странице администрирования
+    """
+    list_display = ['name', 'description']
+    search_fields = ['name']
+    filter_horizontal = ['permissions', 'users']
@@ -1,6 +1,20 @@
+"""
+Модуль конфигурации приложения authentication
+"""
 from django.apps import AppConfig
 
 
 class AuthenticationConfig(AppConfig):
+    """
+    Конфигурация приложения authentication
+    """
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'authentication'
+
+    def ready(self) -> None:
+        """
+        Подключение обработчиков сигналов приложения
+        :return: None
+        """
+        # pylint: disable=import-outside-toplevel,unused-import
+        from . import signals  # noqa: F401
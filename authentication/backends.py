@@ -1,47 +1,103 @@
 """
 Модуль аутентификации с помощью JWT-токена
 """
-import jwt
 import typing
-import datetime
 from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.db import router
 from rest_framework import authentication, exceptions
 from rest_framework.request import Request
 
+from .activity import activity_tracker
+from .cache import TokenCache, permission_cache, token_cache, version_map
+from .codec import TokenError, TokenPayload, decode_token
 from .models import User
+from .revocation import revocation_list
 
 
-def _authenticate_credentials(request: Request, token: str) -> tuple:
+# Поля пользователя, которые собираются из утверждений токена (в порядке модели)
+CLAIM_FIELDS: tuple = ('id', 'is_superuser', 'is_active', 'is_staff', 'token_version')
+
+
+def _user_from_claims(payload: TokenPayload) -> typing.Any:
     """
-    Метод аутентификации токена
+    Собрать пользователя из утверждений токена без чтения из базы.
+    Версия токенов сверяется с картой версий, которая обращается
+    к базе только для устаревших записей
+    :param payload: TokenPayload
+    :return: User
+    """
+    state: typing.Any = version_map.get(payload.user_id)
+    if state is None:
+        msg: str = 'User not found'
+        raise exceptions.AuthenticationFailed(msg)
+
+    token_version, is_active = state
+    if not is_active:
+        msg: str = 'The user is inactive'
+        raise exceptions.AuthenticationFailed(msg)
+
+    if payload.claims["ver"] != token_version:
+        msg: str = 'Token has been revoked'
+        raise exceptions.AuthenticationFailed(msg)
+
+    claims: typing.Mapping = payload.claims
+    return User.from_db(router.db_for_read(User), CLAIM_FIELDS, (
+        payload.user_id, claims.get("su", False), is_active,
+        claims.get("stf", False), token_version))
+
+
+def _authenticate_credentials(request: Request, token: str,
+                              cache: TokenCache | None = None) -> tuple:
+    """
+    Метод аутентификации токена.
+    Если передан кэш, проверенный токен сохраняется в нем вместе со снимком
+    пользователя, и повторная проверка того же токена не обращается к базе.
+    Отзыв токена проверяется при каждом запросе, в том числе для токенов из кэша
     :param request: Request
     :param token: str
+    :param cache: TokenCache | None
     :return: Any
     """
+    if cache is not None:
+        cached: typing.Any = cache.get(token)
+        if cached is not None:
+            cached_user, jti = cached
+            if jti is not None and revocation_list.is_revoked(jti):
+                cache.invalidate_token(token)
+                msg: str = 'Token has been revoked'
+                raise exceptions.AuthenticationFailed(msg)
+            return cached_user, token
 
     try:
-        payload: typing.Mapping = jwt.decode(token, settings.SECRET_KEY)
-    except Exception:
-        msg: str = 'Token decode error'
+        payload: TokenPayload = decode_token(token)
+    except TokenError as exc:
+        raise exceptions.AuthenticationFailed(str(exc))
+
+    if payload.token_type != "access":
+        msg: str = 'Invalid token type'
         raise exceptions.AuthenticationFailed(msg)
 
-    try:
-        user: typing.Any = User.objects.get(pk=payload['UserId'])
-    except User.DoesNotExist:
-        msg: str = 'User not found'
+    if payload.jti is not None and revocation_list.is_revoked(payload.jti):
+        msg: str = 'Token has been revoked'
         raise exceptions.AuthenticationFailed(msg)
 
-    token_lifetime: datetime.datetime = datetime.datetime.strptime(
-        str(payload["ExpirationDate"]), '%Y%m%d%H%M%S')
-    time_difference: datetime.timedelta = token_lifetime - datetime.datetime.now()
+    if "ver" in payload.claims:
+        user: typing.Any = _user_from_claims(payload)
+    else:
+        # Токены без версии (v1) проверяются по строке пользователя
+        try:
+            user = User.objects.get(pk=payload.user_id)
+        except User.DoesNotExist:
+            msg: str = 'User not found'
+            raise exceptions.AuthenticationFailed(msg)
 
-    if int(time_difference.total_seconds()) <= 0:
-        msg: str = 'Token has expired'
-        raise exceptions.AuthenticationFailed(msg)
+        if not user.is_active:
+            msg: str = 'The user is inactive'
+            raise exceptions.AuthenticationFailed(msg)
 
-    if not user.is_active:
-        msg: str = 'The user is inactive'
-        raise exceptions.AuthenticationFailed(msg)
+    if cache is not None:
+        cache.set(token, user, payload.expires_at, payload.jti)
 
     return user, token
 
@@ -51,6 +107,7 @@ class JWTAuthentication(authentication.BaseAuthentication):
     Бэкенд с JWT-аутентификаицей
     """
     authentication_header_prefix: str = 'Bearer'
+    use_token_cache: bool = settings.JWT_TOKEN_CACHE_ENABLED
 
     SECONDS_IN_DAY: int = 2
 
@@ -79,4 +136,40 @@ class JWTAuthentication(authentication.BaseAuthentication):
         if prefix.lower() != auth_header_prefix:
             return None
 
-        return _authenticate_credentials(request, token)
+        user, token = _authenticate_credentials(
+            request, token, token_cache if self.use_token_cache else None)
+        activity_tracker.record(user.pk)
+        return user, token
+
+
+class RoleModelBackend(ModelBackend):
+    """
+    Бэкенд авторизации Django, который берет права пользователя из кэша
+    наборов прав (права пользователя, его групп и ролей).
+    В установившемся режиме проверка has_perm не обращается к базе
+    """
+
+    def get_all_permissions(self, user_obj: typing.Any, obj: typing.Any = None) -> set:
+        """
+        Вернуть все права пользователя
+        :param user_obj: User
+        :param obj: Any - права на уровне объектов не поддерживаются
+        :return: set[str]
+        """
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if user_obj.is_superuser:
+            return super().get_all_permissions(user_obj, obj)
+        return set(permission_cache.get(user_obj.pk))
+
+    def has_perm(self, user_obj: typing.Any, perm: str, obj: typing.Any = None) -> bool:
+        """
+        Проверить право пользователя без копирования набора прав
+        :param user_obj: User
+        :param perm: str - "app_label.codename"
+        :param obj: Any
+        :return: bool
+        """
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return False
+        return perm in permission_cache.get(user_obj.pk)
@@ -0,0 +1,382 @@
+"""
+Модуль с кэшем проверенных JWT-токенов.
+
+Кэш хранит для каждого токена небольшой снимок полей пользователя,
+чтобы повторные запросы с тем же токеном не обращались к базе данных.
+Карта версий хранит token_version и активность пользователей, по которым
+проверяются токены, собирающие пользователя из утверждений.
+Кэш прав хранит заранее вычисленный набор прав каждого пользователя.
+"""
+import threading
+import time
+import typing
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import Permission
+
+from .models import User
+
+# Поля перечислены в порядке объявления в модели: этого требует User.from_db
+USER_SNAPSHOT_FIELDS: tuple = (
+    'id', 'is_superuser', 'username', 'first_name', 'last_name',
+    'email', 'is_active', 'is_staff',
+)
+
+
+class TokenCache:
+    """
+    Ограниченный LRU-кэш проверенных токенов.
+
+    Запись живет не дольше срока действия самого токена и не дольше ttl секунд:
+    ttl ограничивает устаревание снимка в других процессах, где сигналы
+    об изменении пользователя не были получены.
+    """
+
+    def __init__(self, max_size: int, ttl: int) -> None:
+        """
+        Инициализация кэша
+        :param max_size: int
+        :param ttl: int
+        """
+        self.max_size: int = max_size
+        self.ttl: int = ttl
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._tokens_by_user: typing.Dict[int, typing.Set[str]] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def get(self, token: str) -> typing.Any:
+        """
+        Вернуть пользователя, собранного из снимка, и jti токена
+        или None при промахе
+        :param token: str
+        :return: tuple[User, str | None] | None
+        """
+        with self._lock:
+            entry: typing.Any = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            user_id, database, fields, values, expires_at, jti = entry
+            if expires_at <= time.time():
+                self._discard(token, user_id)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(token)
+            self.hits += 1
+
+        return User.from_db(database, fields, values), jti
+
+    def set(self, token: str, user: typing.Any, expires_at: float,
+            jti: str | None = None) -> None:
+        """
+        Сохранить снимок пользователя для токена
+        :param token: str
+        :param user: User
+        :param expires_at: float - срок действия токена (UNIX-время)
+        :param jti: str | None - идентификатор токена для проверки отзыва
+        :return: None
+        """
+        expires_at = min(expires_at, time.time() + self.ttl)
+        # Сохраняются только загруженные поля, чтобы не загружать
+        # отложенные поля пользователя, собранного из утверждений токена
+        fields: tuple = tuple(field for field in USER_SNAPSHOT_FIELDS if field in user.__dict__)
+        values: tuple = tuple(user.__dict__[field] for field in fields)
+
+        with self._lock:
+            if token in self._entries:
+                self._discard(token, self._entries[token][0])
+
+            self._entries[token] = (user.pk, user._state.db, fields, values, expires_at, jti)
+            self._tokens_by_user.setdefault(user.pk, set()).add(token)
+
+            while len(self._entries) > self.max_size:
+                oldest_token, oldest_entry = next(iter(self._entries.items()))
+                self._discard(oldest_token, oldest_entry[0])
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: int) -> None:
+        """
+        Удалить из кэша все токены пользователя
+        :param user_id: int
+        :return: None
+        """
+        with self._lock:
+            for token in self._tokens_by_user.pop(user_id, set()):
+                self._entries.pop(token, None)
+
+    def invalidate_token(self, token: str) -> None:
+        """
+        Удалить токен из кэша
+        :param token: str
+        :return: None
+        """
+        with self._lock:
+            entry: typing.Any = self._entries.get(token)
+            if entry is not None:
+                self._discard(token, entry[0])
+
+    def clear(self) -> None:
+        """
+        Очистить кэш и сбросить счетчики
+        :return: None
+        """
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """
+        Вернуть счетчики попаданий и промахов кэша
+        :return: dict
+        """
+        with self._lock:
+            lookups: int = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
+
+    def _discard(self, token: str, user_id: int) -> None:
+        """
+        Удалить запись без захвата блокировки
+        :param token: str
+        :param user_id: int
+        :return: None
+        """
+        self._entries.pop(token, None)
+        user_tokens: typing.Any = self._tokens_by_user.get(user_id)
+        if user_tokens is not None:
+            user_tokens.discard(token)
+            if not user_tokens:
+                del self._tokens_by_user[user_id]
+
+    def __len__(self) -> int:
+        """
+        Количество токенов в кэше
+        :return: int
+        """
+        return len(self._entries)
+
+
+class TokenVersionMap:
+    """
+    Ограниченная LRU-карта user_id -> (token_version, is_active).
+
+    Запись обновляется сигналом при сохранении пользователя в этом процессе
+    и перечитывается из базы не чаще, чем раз в ttl секунд, чтобы увидеть
+    изменения, сделанные в других процессах
+    """
+
+    def __init__(self, max_size: int, ttl: int) -> None:
+        """
+        Инициализация карты
+        :param max_size: int
+        :param ttl: int
+        """
+        self.max_size: int = max_size
+        self.ttl: int = ttl
+        self.hits: int = 0
+        self.misses: int = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+
+    def get(self, user_id: int) -> typing.Tuple[int, bool] | None:
+        """
+        Вернуть версию токенов и активность пользователя или None,
+        если пользователя нет
+        :param user_id: int
+        :return: tuple[int, bool] | None
+        """
+        with self._lock:
+            entry: typing.Any = self._entries.get(user_id)
+            if entry is not None and entry[2] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[0], entry[1]
+            self.misses += 1
+
+        row: typing.Any = User.objects.filter(pk=user_id).values_list(
+            'token_version', 'is_active').first()
+        if row is None:
+            self.discard(user_id)
+            return None
+
+        self.set(user_id, *row)
+        return row
+
+    def set(self, user_id: int, token_version: int, is_active: bool) -> None:
+        """
+        Запомнить версию токенов и активность пользователя
+        :param user_id: int
+        :param token_version: int
+        :param is_active: bool
+        :return: None
+        """
+        with self._lock:
+            self._entries[user_id] = (token_version, is_active, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, user_id: int) -> None:
+        """
+        Удалить пользователя из карты
+        :param user_id: int
+        :return: None
+        """
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        """
+        Очистить карту и сбросить счетчики
+        :return: None
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Вернуть счетчики попаданий и промахов карты
+        :return: dict
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+class PermissionCache:
+    """
+    Ограниченный LRU-кэш user_id -> набор прав "app_label.codename".
+
+    Набор собирается одним запросом из прав пользователя, его групп и ролей.
+    Каждая запись помечена поколением кэша: изменение прав группы или роли
+    увеличивает поколение, и все наборы, вычисленные раньше, перестают
+    приниматься без обхода кэша. Изменения в других процессах видны не
+    позже чем через ttl секунд
+    """
+
+    def __init__(self, max_size: int, ttl: int) -> None:
+        """
+        Инициализация кэша
+        :param max_size: int
+        :param ttl: int
+        """
+        self.max_size: int = max_size
+        self.ttl: int = ttl
+        self.generation: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+
+    def get(self, user_id: int) -> typing.FrozenSet[str]:
+        """
+        Вернуть набор прав пользователя
+        :param user_id: int
+        :return: frozenset[str]
+        """
+        with self._lock:
+            entry: typing.Any = self._entries.get(user_id)
+            if entry is not None and entry[0] == self.generation and entry[2] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation: int = self.generation
+
+        permissions: typing.FrozenSet[str] = frozenset(
+            f"{app_label}.{codename}" for app_label, codename in self._load(user_id))
+
+        with self._lock:
+            # Набор, вычисленный до смены поколения, не сохраняется
+            if generation == self.generation:
+                self._entries[user_id] = (generation, permissions, time.monotonic() + self.ttl)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return permissions
+
+    def invalidate_user(self, user_id: int) -> None:
+        """
+        Сбросить набор прав пользователя
+        :param user_id: int
+        :return: None
+        """
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def invalidate_all(self) -> None:
+        """
+        Сменить поколение кэша: все вычисленные наборы становятся устаревшими
+        :return: None
+        """
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def clear(self) -> None:
+        """
+        Очистить кэш и сбросить счетчики
+        :return: None
+        """
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Вернуть поколение и счетчики попаданий и промахов кэша
+        :return: dict
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "generation": self.generation,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+    @staticmethod
+    def _load(user_id: int) -> typing.List[tuple]:
+        """
+        Прочитать права пользователя, его групп и ролей одним запросом
+        :param user_id: int
+        :return: list[tuple[str, str]]
+        """
+        fields: tuple = ('content_type__app_label', 'codename')
+        return list(Permission.objects.filter(user=user_id).values_list(*fields).union(
+            Permission.objects.filter(group__user=user_id).values_list(*fields),
+            Permission.objects.filter(roles__users=user_id).values_list(*fields)))
+
+
+token_cache: TokenCache = TokenCache(
+    max_size=settings.JWT_TOKEN_CACHE_SIZE,
+    ttl=settings.JWT_TOKEN_CACHE_TTL
+)
+
+version_map: TokenVersionMap = TokenVersionMap(
+    max_size=settings.JWT_VERSION_MAP_SIZE,
+    ttl=settings.JWT_VERSION_MAP_TTL
+)
+
+permission_cache: PermissionCache = PermissionCache(
+    max_size=settings.PERMISSION_CACHE_SIZE,
+    ttl=settings.PERMISSION_CACHE_TTL
+)
@@ -0,0 +1,167 @@
+"""
+Модуль кодирования и проверки JWT-токенов.
+
+Формат v2 использует стандартные числовые утверждения exp/iat/sub и
+заголовок kid, по которому ключ подписи выбирается из заранее загруженной
+связки ключей (KeyRing). Это позволяет добавить новый ключ, переключить на
+него выдачу и удалить старый, не инвалидируя все сессии разом.
+
+Формат v1 (UserId/ExpirationDate без kid) принимается, пока включен
+JWT_ACCEPT_V1_TOKENS: флаг можно выключить, когда истекут все выданные
+ранее токены.
+"""
+import time
+import typing
+from datetime import datetime
+
+import jwt
+from django.conf import settings
+
+ALGORITHM: str = "HS256"
+
+
+class TokenError(Exception):
+    """
+    Ошибка проверки JWT-токена
+    """
+
+
+class TokenPayload(typing.NamedTuple):
+    """
+    Нормализованное содержимое токена любой версии
+    """
+    user_id: typing.Any
+    token_type: str
+    expires_at: float
+    jti: str | None
+    claims: typing.Mapping
+
+
+class KeyRing:
+    """
+    Связка ключей подписи JWT-токенов
+    """
+
+    def __init__(self, keys: typing.Mapping[str, str], active_kid: str) -> None:
+        """
+        Инициализация связки ключей
+        :param keys: Mapping[str, str] - kid -> секрет
+        :param active_kid: str - ключ, которым подписываются новые токены
+        """
+        if active_kid not in keys:
+            raise KeyError(f"Signing key '{active_kid}' is not in the key ring")
+        self.keys: typing.Dict[str, str] = dict(keys)
+        self.active_kid: str = active_kid
+
+    @classmethod
+    def from_settings(cls) -> "KeyRing":
+        """
+        Загрузить связку ключей из настроек проекта
+        :return: KeyRing
+        """
+        return cls(settings.JWT_SIGNING_KEYS, settings.JWT_ACTIVE_KEY_ID)
+
+    def get(self, kid: str) -> str:
+        """
+        Вернуть секрет по идентификатору ключа
+        :param kid: str
+        :return: str
+        """
+        try:
+            return self.keys[kid]
+        except KeyError as exc:
+            raise TokenError('Unknown signing key') from exc
+
+
+key_ring: KeyRing = KeyRing.from_settings()
+
+
+def encode_token(user_id: typing.Any, token_type: str, lifetime: int,
+                 **claims: typing.Any) -> str:
+    """
+    Выпустить токен формата v2, подписанный активным ключом
+    :param user_id: Any
+    :param token_type: str - access или refresh
+    :param lifetime: int - срок действия в секундах
+    :param claims: Any - дополнительные утверждения
+    :return: str
+    """
+    issued_at: int = int(time.time())
+    token: bytes = jwt.encode({
+        "sub": str(user_id),
+        "typ": token_type,
+        "iat": issued_at,
+        "exp": issued_at + lifetime,
+        **claims
+    }, key_ring.get(key_ring.active_kid), algorithm=ALGORITHM,
+        headers={"kid": key_ring.active_kid})
+
+    return token.decode("utf-8")
+
+
+def decode_token(token: str) -> TokenPayload:
+    """
+    Проверить подпись и срок действия токена v2 или v1
+    :param token: str
+    :return: TokenPayload
+    """
+    try:
+        kid: str | None = jwt.get_unverified_header(token).get("kid")
+    except jwt.InvalidTokenError as exc:
+        raise TokenError('Token decode error') from exc
+
+    if kid is None:
+        return _decode_v1_token(token)
+
+    try:
+        claims: typing.Mapping = jwt.decode(
+            token, key_ring.get(kid), algorithms=[ALGORITHM],
+            options={"require_exp": True, "require_iat": True})
+    except jwt.ExpiredSignatureError as exc:
+        raise TokenError('Token has expired') from exc
+    except jwt.InvalidTokenError as exc:
+        raise TokenError('Token decode error') from exc
+
+    try:
+        user_id: int = int(claims["sub"])
+    except (KeyError, ValueError) as exc:
+        raise TokenError('Token decode error') from exc
+
+    return TokenPayload(
+        user_id=user_id,
+        token_type=claims.get("typ", "access"),
+        expires_at=float(claims["exp"]),
+        jti=claims.get("jti"),
+        claims=claims
+    )
+
+
+def _decode_v1_token(token: str) -> TokenPayload:
+    """
+    Проверить токен старого формата: ExpirationDate хранится как число
+    %Y%m%d%H%M%S в локальном времени сервера
+    :param token: str
+    :return: TokenPayload
+    """
+    if not settings.JWT_ACCEPT_V1_TOKENS:
+        raise TokenError('Token decode error')
+
+    try:
+        claims: typing.Mapping = jwt.decode(
+            token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+        expires_at: float = datetime.strptime(
+            str(claims["ExpirationDate"]), '%Y%m%d%H%M%S').timestamp()
+        user_id: typing.Any = claims["UserId"]
+    except (jwt.InvalidTokenError, KeyError, ValueError) as exc:
+        raise TokenError('Token decode error') from exc
+
+    if expires_at <= time.time():
+        raise TokenError('Token has expired')
+
+    return TokenPayload(
+        user_id=user_id,
+        token_type=claims.get("TokenType", "access"),
+        expires_at=expires_at,
+        jti=claims.get("jti"),
+        claims=claims
+    )
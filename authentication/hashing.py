@@ -0,0 +1,105 @@
+"""
+Модуль ограниченного пула для проверки паролей.
+
+Хеширование пароля (PBKDF2) - самая дорогая операция входа. Пул выполняет
+ее в отдельных потоках (hashlib отпускает GIL на время хеширования) и
+ограничивает число ожидающих задач: если очередь заполнена, новая задача
+сразу отклоняется, а не копится вместе с занятыми воркерами запросов.
+"""
+import threading
+import typing
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+
+class PoolSaturated(Exception):
+    """
+    Пул хеширования заполнен, задача не принята
+    """
+
+
+class HashingPool:
+    """
+    Пул потоков с ограниченной очередью и счетчиками для метрик
+    """
+
+    def __init__(self, workers: int, queue_depth: int) -> None:
+        """
+        Инициализация пула
+        :param workers: int - число потоков хеширования
+        :param queue_depth: int - сколько задач может ждать свободный поток
+        """
+        self.workers: int = workers
+        self.queue_depth: int = queue_depth
+        self.submitted: int = 0
+        self.rejected: int = 0
+        self.completed: int = 0
+        self.in_flight: int = 0
+        self._slots: threading.BoundedSemaphore = threading.BoundedSemaphore(workers + queue_depth)
+        self._lock: threading.Lock = threading.Lock()
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="login-hash")
+
+    def submit(self, fn: typing.Callable, *args: typing.Any, **kwargs: typing.Any) -> Future:
+        """
+        Поставить задачу в пул или поднять PoolSaturated, если мест нет
+        :param fn: Callable
+        :param args: Any
+        :param kwargs: Any
+        :return: Future
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PoolSaturated()
+
+        with self._lock:
+            self.submitted += 1
+            self.in_flight += 1
+
+        return self._executor.submit(self._run, fn, *args, **kwargs)
+
+    def metrics(self) -> dict:
+        """
+        Вернуть размер пула и счетчики задач
+        :return: dict
+        """
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_depth": self.queue_depth,
+                "in_flight": self.in_flight,
+                "queued": max(0, self.in_flight - self.workers),
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "completed": self.completed
+            }
+
+    def _run(self, fn: typing.Callable, *args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+        """
+        Выполнить задачу в потоке пула и освободить ее место до того,
+        как ожидающий получит результат.
+        Соединения с базой в потоках пула закрываются так же, как
+        по окончании обычного запроса
+        :param fn: Callable
+        :param args: Any
+        :param kwargs: Any
+        :return: Any
+        """
+        close_old_connections()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            close_old_connections()
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+            self._slots.release()
+
+
+login_pool: HashingPool = HashingPool(
+    workers=settings.LOGIN_HASH_POOL_WORKERS,
+    queue_depth=settings.LOGIN_HASH_POOL_QUEUE_DEPTH
+)
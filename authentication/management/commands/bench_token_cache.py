@@ -0,0 +1,69 @@
+"""
+Команда сравнения пропускной способности JWTAuthentication.authenticate
+с включенным и выключенным кэшем проверенных токенов
+"""
+import time
+import typing
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+from django.test import RequestFactory
+
+from authentication.backends import JWTAuthentication
+from authentication.cache import token_cache
+from authentication.models import User
+
+
+class Command(BaseCommand):
+    """
+    Бенчмарк кэша проверенных токенов.
+    Тестовый пользователь создается в транзакции, которая откатывается
+    после замеров
+    """
+    help = "Benchmark JWTAuthentication.authenticate with the token cache on and off"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+        Аргументы команды
+        :param parser: CommandParser
+        :return: None
+        """
+        parser.add_argument("--iterations", type=int, default=5000)
+
+    def handle(self, *args: typing.Any, **options: typing.Any) -> None:
+        """
+        Запуск бенчмарка
+        :param args: Any
+        :param options: Any
+        :return: None
+        """
+        iterations: int = options["iterations"]
+
+        with transaction.atomic():
+            user: User = User.objects.create_user(
+                username="bench_token_cache",
+                email="bench-token-cache@example.com",
+                password="bench123!"
+            )
+            request: typing.Any = RequestFactory().get(
+                "/", HTTP_AUTHORIZATION=f"Bearer {user.token}")
+
+            for use_cache in (False, True):
+                token_cache.clear()
+                backend: JWTAuthentication = JWTAuthentication()
+                backend.use_token_cache = use_cache
+
+                started: float = time.perf_counter()
+                for _ in range(iterations):
+                    backend.authenticate(request)
+                elapsed: float = time.perf_counter() - started
+
+                self.stdout.write(
+                    f"cache {'on ' if use_cache else 'off'}: "
+                    f"{iterations / elapsed:,.0f} req/s "
+                    f"({elapsed / iterations * 1e6:.1f} us/req)")
+                if use_cache:
+                    self.stdout.write(f"cache stats: {token_cache.stats()}")
+
+            transaction.set_rollback(True)
+        token_cache.clear()
@@ -0,0 +1,55 @@
+"""
+Команда микробенчмарка проверки JWT-токенов форматов v1 и v2
+"""
+import time
+import typing
+from datetime import datetime, timedelta
+
+import jwt
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+from authentication.codec import decode_token, encode_token
+
+
+class Command(BaseCommand):
+    """
+    Сравнение скорости decode_token для токенов v1 и v2
+    """
+    help = "Micro-benchmark of the JWT decode path for v1 and v2 tokens"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+        Аргументы команды
+        :param parser: CommandParser
+        :return: None
+        """
+        parser.add_argument("--iterations", type=int, default=50000)
+
+    def handle(self, *args: typing.Any, **options: typing.Any) -> None:
+        """
+        Запуск бенчмарка
+        :param args: Any
+        :param options: Any
+        :return: None
+        """
+        iterations: int = options["iterations"]
+        expiration_date: datetime = datetime.now() + timedelta(days=1)
+        tokens: typing.Dict[str, str] = {
+            "v1": jwt.encode({
+                "UserId": 1,
+                "ExpirationDate": int(expiration_date.strftime("%Y%m%d%H%M%S"))
+            }, settings.SECRET_KEY, algorithm="HS256").decode("utf-8"),
+            "v2": encode_token(1, "access", 24 * 60 * 60)
+        }
+
+        for version, token in tokens.items():
+            decode_token(token)
+            started: float = time.perf_counter()
+            for _ in range(iterations):
+                decode_token(token)
+            elapsed: float = time.perf_counter() - started
+
+            self.stdout.write(
+                f"{version}: {iterations / elapsed:,.0f} decodes/s "
+                f"({elapsed / iterations * 1e6:.2f} us/decode)")
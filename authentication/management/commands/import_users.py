@@ -0,0 +1,60 @@
+"""
+Команда массового создания пользователей из CSV- или JSON-файла
+"""
+import typing
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from authentication.provisioning import ProvisioningReport, provision_users, read_users
+
+
+class Command(BaseCommand):
+    """
+    Импорт пользователей.
+    CSV-файл содержит заголовок username,email,password,first_name,last_name,
+    JSON-файл - список объектов с теми же полями
+    """
+    help = "Create users in bulk from a CSV or JSON file"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+        Аргументы команды
+        :param parser: CommandParser
+        :return: None
+        """
+        parser.add_argument("path", type=Path)
+        parser.add_argument("--format", choices=("csv", "json"), default=None,
+                            help="File format, detected from the extension by default")
+        parser.add_argument("--workers", type=int, default=settings.USER_IMPORT_HASH_WORKERS)
+        parser.add_argument("--batch-size", type=int, default=settings.USER_IMPORT_BATCH_SIZE)
+
+    def handle(self, *args: typing.Any, **options: typing.Any) -> None:
+        """
+        Запуск импорта
+        :param args: Any
+        :param options: Any
+        :return: None
+        """
+        path: Path = options["path"]
+        file_format: str = options["format"] or path.suffix.lstrip(".").lower()
+        try:
+            rows: typing.List[dict] = read_users(path.read_text(encoding="utf-8"), file_format)
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc)) from exc
+
+        report: ProvisioningReport = provision_users(
+            rows, workers=options["workers"], batch_size=options["batch_size"])
+
+        for duplicate in report.duplicates:
+            self.stderr.write(
+                f"row {duplicate['row']}: {', '.join(duplicate['fields'])} already taken "
+                f"({duplicate['username']}, {duplicate['email']})")
+        for error in report.errors:
+            self.stderr.write(f"row {error['row']}: {error['error']}")
+
+        self.stdout.write(
+            f"Created {len(report.created)} users, skipped {len(report.duplicates)} duplicates "
+            f"and {len(report.errors)} invalid rows in {report.elapsed:.2f}s "
+            f"({report.throughput:,.0f} users/s)")
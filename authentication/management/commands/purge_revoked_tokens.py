@@ -0,0 +1,27 @@
+"""
+Команда удаления истекших отозванных и refresh-токенов
+"""
+import typing
+
+from django.core.management.base import BaseCommand
+
+from authentication.revocation import revocation_list
+
+
+class Command(BaseCommand):
+    """
+    Удаление истекших записей RevokedToken и RefreshToken.
+    Процессы приложения делают это сами раз в JWT_REVOCATION_GC_INTERVAL,
+    команда нужна для запуска по расписанию
+    """
+    help = "Delete expired revoked tokens and refresh tokens"
+
+    def handle(self, *args: typing.Any, **options: typing.Any) -> None:
+        """
+        Запуск очистки
+        :param args: Any
+        :param options: Any
+        :return: None
+        """
+        deleted: int = revocation_list.purge_expired()
+        self.stdout.write(f"Deleted {deleted} expired token records")
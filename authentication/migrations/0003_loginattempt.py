@@ -0,0 +1,26 @@
+# Generated by Django 4.2.3 on 2026-10-18 10:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_refreshtoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoginAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=320)),
+                ('bucket', models.BigIntegerField(db_index=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='loginattempt',
+            constraint=models.UniqueConstraint(fields=('key', 'bucket'), name='unique_login_attempt_bucket'),
+        ),
+    ]
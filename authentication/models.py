@@ -2,13 +2,15 @@
 Модуль с моделями приложения authentication
 """
 import typing
-from datetime import datetime, timedelta
-import jwt
+import uuid
 from django.db import models
 from django.conf import settings
-from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
+from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, Permission, \
+    PermissionsMixin
 from django.contrib.auth.hashers import make_password
 
+from .codec import encode_token
+
 
 class UserManager(BaseUserManager):
     """
@@ -68,6 +70,12 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_staff: models.BooleanField = models.BooleanField(default=False)
     created_at: models.DateTimeField = models.DateTimeField(auto_now_add=True)
     updated_at: models.DateTimeField = models.DateTimeField(auto_now=True)
+    # Версия токенов: увеличивается при смене пароля, деактивации и смене
+    # is_staff или is_superuser, что делает недействительными все ранее
+    # выданные токены (права берутся из утверждений токена)
+    token_version: models.PositiveIntegerField = models.PositiveIntegerField(default=0)
+    # Время последнего запроса к API, записывается пачками (authentication.activity)
+    last_seen: models.DateTimeField = models.DateTimeField(blank=True, null=True)
 
     USERNAME_FIELD: typing.ClassVar[str] = "email"
     REQUIRED_FIELDS: typing.ClassVar[list] = ["username"]
@@ -81,6 +89,58 @@ class User(AbstractBaseUser, PermissionsMixin):
         """
         return str(self.email)
 
+    @classmethod
+    def from_db(cls, db: typing.Any, field_names: typing.Any, values: typing.Any) -> typing.Any:
+        """
+        Загрузка пользователя из базы с запоминанием пароля, активности
+        и флагов прав, чтобы при сохранении увидеть их изменение
+        :param db: Any
+        :param field_names: Any
+        :param values: Any
+        :return: User
+        """
+        instance: typing.Any = super().from_db(db, field_names, values)
+        instance._remember_credentials()
+        return instance
+
+    def save(self, *args: typing.Any, **kwargs: typing.Any) -> None:
+        """
+        Сохранение пользователя.
+        Смена пароля, деактивация или смена is_staff и is_superuser
+        увеличивает token_version
+        :param args: Any
+        :param kwargs: Any
+        :return: None
+        """
+        loaded_password, loaded_is_active, loaded_is_staff, loaded_is_superuser = getattr(
+            self, "_loaded_credentials", (None, None, None, None))
+        password_changed: bool = loaded_password is not None \
+            and self.__dict__.get("password") not in (None, loaded_password)
+        deactivated: bool = bool(loaded_is_active) and self.__dict__.get("is_active") is False
+        # Флаги прав входят в утверждения токена: старый токен не должен их сохранять
+        privileges_changed: bool = any(
+            loaded is not None and self.__dict__.get(name) not in (None, loaded)
+            for name, loaded in (("is_staff", loaded_is_staff),
+                                 ("is_superuser", loaded_is_superuser)))
+
+        if password_changed or deactivated or privileges_changed:
+            self.token_version += 1
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "token_version"}
+
+        super().save(*args, **kwargs)
+        self._remember_credentials()
+
+    def _remember_credentials(self) -> None:
+        """
+        Запомнить текущие пароль, активность и флаги прав пользователя
+        :return: None
+        """
+        # pylint: disable=attribute-defined-outside-init
+        self._loaded_credentials: tuple = (
+            self.__dict__.get("password"), self.__dict__.get("is_active"),
+            self.__dict__.get("is_staff"), self.__dict__.get("is_superuser"))
+
     @property
     def token(self) -> str:
         """
@@ -105,16 +165,98 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     def _generate_jwt_token(self) -> str:
         """
-        Генерирует веб-токен JSON, в котором хранится идентификатор
-        пользователя.
-        Срок действия токена - 1 день от даты создания.
+        Генерирует веб-токен JSON (access-токен) формата v2, в котором хранится
+        идентификатор пользователя, версия токенов и флаги доступа.
+        Срок действия токена - JWT_ACCESS_TOKEN_LIFETIME секунд от даты создания,
+        после чего токен обновляется через refresh-токен.
+        :return: str
+        """
+        return encode_token(self.pk, "access", settings.JWT_ACCESS_TOKEN_LIFETIME,
+                            jti=uuid.uuid4().hex,
+                            ver=self.token_version,
+                            act=self.is_active,
+                            stf=self.is_staff,
+                            su=self.is_superuser)
+
+
+class Role(models.Model):
+    """
+    Таблица с ролями пользователей.
+    Права роли складываются с правами пользователя и его групп
+    """
+    name: models.CharField = models.CharField(max_length=150, unique=True)
+    description: models.TextField = models.TextField(blank=True)
+    permissions: models.ManyToManyField = models.ManyToManyField(
+        Permission, blank=True, related_name="roles")
+    users: models.ManyToManyField = models.ManyToManyField(
+        User, blank=True, related_name="roles")
+
+    def __str__(self) -> str:
+        """
+        Строковое представление роли - ее название
+        :return: str
+        """
+        return str(self.name)
+
+
+class RefreshToken(models.Model):
+    """
+    Таблица с выданными refresh-токенами.
+
+    Все токены, полученные ротацией из одного входа, относятся к одному
+    семейству (family). Повторное предъявление уже использованного токена
+    считается кражей и отзывает все семейство.
+    """
+    jti: models.UUIDField = models.UUIDField(primary_key=True, default=uuid.uuid4)
+    family: models.UUIDField = models.UUIDField(db_index=True)
+    user: models.ForeignKey = models.ForeignKey(User, on_delete=models.CASCADE)
+    expires_at: models.DateTimeField = models.DateTimeField()
+    used: models.BooleanField = models.BooleanField(default=False)
+
+    def __str__(self) -> str:
+        """
+        Строковое представление refresh-токена - его идентификатор
+        :return: str
+        """
+        return str(self.jti)
+
+
+class RevokedToken(models.Model):
+    """
+    Таблица с отозванными токенами.
+    Запись нужна только до истечения срока действия токена,
+    после чего удаляется
+    """
+    jti: models.CharField = models.CharField(max_length=64, primary_key=True)
+    expires_at: models.DateTimeField = models.DateTimeField(db_index=True)
+    revoked_at: models.DateTimeField = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self) -> str:
+        """
+        Строковое представление отозванного токена - его идентификатор
         :return: str
         """
-        expiration_date: datetime = datetime.now() + timedelta(days=1)
+        return str(self.jti)
+
+
+class LoginAttempt(models.Model):
+    """
+    Таблица со счетчиками неудачных попыток входа.
+    Одна строка - число попыток по ключу (email или IP) в одном интервале
+    скользящего окна
+    """
+    key: models.CharField = models.CharField(max_length=320)
+    bucket: models.BigIntegerField = models.BigIntegerField(db_index=True)
+    count: models.PositiveIntegerField = models.PositiveIntegerField(default=0)
 
-        token: bytes = jwt.encode({
-            "UserId": self.pk,
-            "ExpirationDate": int(expiration_date.strftime("%Y%m%d%H%M%S"))
-        }, settings.SECRET_KEY, algorithm="HS256")
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['key', 'bucket'], name='unique_login_attempt_bucket')
+        ]
 
-        return token.decode("utf-8")
+    def __str__(self) -> str:
+        """
+        Строковое представление счетчика - ключ и интервал
+        :return: str
+        """
+        return f"{self.key}@{self.bucket}"
@@ -0,0 +1,43 @@
+"""
+Модуль с классами прав DRF, основанными на ролях пользователей
+"""
+import typing
+
+from rest_framework import permissions
+from rest_framework.request import Request
+
+
+class HasRolePermissions(permissions.BasePermission):
+    """
+    Доступ к представлению по правам пользователя, его групп и ролей.
+
+    Представление объявляет required_permissions: кортеж прав
+    "app_label.codename" для всех методов или словарь метод -> кортеж.
+    Права проверяются через RoleModelBackend и кэш наборов прав
+    """
+    message: str = "You do not have permission to perform this action"
+
+    def has_permission(self, request: Request, view: typing.Any) -> bool:
+        """
+        Проверить, есть ли у пользователя все права, нужные методу
+        :param request: Request
+        :param view: APIView
+        :return: bool
+        """
+        user: typing.Any = request.user
+        if not user or not user.is_authenticated:
+            return False
+        return user.has_perms(self.get_required_permissions(request.method, view))
+
+    @staticmethod
+    def get_required_permissions(method: str, view: typing.Any) -> typing.Tuple[str, ...]:
+        """
+        Вернуть права, нужные методу представления
+        :param method: str
+        :param view: APIView
+        :return: tuple[str, ...]
+        """
+        required: typing.Any = getattr(view, "required_permissions", ())
+        if isinstance(required, dict):
+            return tuple(required.get(method, ()))
+        return tuple(required)
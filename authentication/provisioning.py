@@ -0,0 +1,231 @@
+"""
+Модуль массового создания пользователей.
+
+Пароли хешируются в пуле процессов (PBKDF2 занимает CPU, а процессы не
+делят GIL), пользователи вставляются пачками через bulk_create. Строки с
+username или email, уже занятыми в базе или встречавшимися выше в том же
+импорте, не прерывают импорт, а попадают в отчет.
+"""
+import csv
+import io
+import json
+import multiprocessing
+import time
+import typing
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from .models import User
+
+USER_IMPORT_FIELDS: typing.Tuple[str, ...] = (
+    'username', 'email', 'password', 'first_name', 'last_name')
+
+
+class ProvisioningReport(typing.NamedTuple):
+    """
+    Результат импорта пользователей
+    """
+    created: typing.List[User]
+    duplicates: typing.List[dict]
+    errors: typing.List[dict]
+    elapsed: float
+
+    @property
+    def throughput(self) -> float:
+        """
+        Число созданных пользователей в секунду
+        :return: float
+        """
+        return len(self.created) / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> dict:
+        """
+        Отчет в виде словаря для ответа API
+        :return: dict
+        """
+        return {
+            "created": len(self.created),
+            "duplicates": self.duplicates,
+            "errors": self.errors,
+            "elapsed": round(self.elapsed, 3),
+            "throughput": round(self.throughput, 1)
+        }
+
+
+def read_users(content: str, file_format: str) -> typing.List[dict]:
+    """
+    Прочитать пользователей из CSV (с заголовком) или JSON (список объектов)
+    :param content: str
+    :param file_format: str - csv или json
+    :return: list[dict]
+    """
+    if file_format == "csv":
+        return list(csv.DictReader(io.StringIO(content)))
+
+    if file_format == "json":
+        rows: typing.Any = json.loads(content)
+        if isinstance(rows, dict):
+            rows = rows.get("users")
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError("JSON must be a list of user objects")
+        return rows
+
+    raise ValueError(f"Unsupported format '{file_format}'")
+
+
+def hash_passwords(passwords: typing.List[str | None], workers: int) -> typing.List[str]:
+    """
+    Захешировать пароли в пуле процессов.
+    Процессы запускаются через spawn: процесс Django держит фоновые потоки,
+    и fork мог бы скопировать захваченные ими блокировки
+    :param passwords: list[str | None]
+    :param workers: int - число процессов, 1 - хешировать в текущем процессе
+    :return: list[str]
+    """
+    if workers <= 1 or len(passwords) <= 1:
+        return [make_password(password) for password in passwords]
+
+    workers = min(workers, len(passwords))
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=multiprocessing.get_context("spawn"),
+                             initializer=django.setup) as executor:
+        return list(executor.map(make_password, passwords,
+                                 chunksize=max(1, len(passwords) // (workers * 4))))
+
+
+def provision_users(rows: typing.Iterable[dict], workers: int,
+                    batch_size: int) -> ProvisioningReport:
+    """
+    Создать пользователей из строк импорта
+    :param rows: Iterable[dict] - username, email, password, first_name, last_name
+    :param workers: int - число процессов хеширования
+    :param batch_size: int - размер пачки bulk_create
+    :return: ProvisioningReport
+    """
+    started: float = time.perf_counter()
+    candidates, duplicates, errors = _prepare_rows(rows)
+
+    passwords: typing.List[str] = hash_passwords(
+        [candidate["password"] for _, candidate in candidates], workers)
+
+    created: typing.List[User] = []
+    for start in range(0, len(candidates), batch_size):
+        batch: list = [
+            (index, User(**{**candidate, "password": password}))
+            for (index, candidate), password in zip(
+                candidates[start:start + batch_size], passwords[start:start + batch_size])
+        ]
+        created.extend(_insert_batch(batch, duplicates))
+
+    duplicates.sort(key=lambda item: item["row"])
+    return ProvisioningReport(created, duplicates, errors, time.perf_counter() - started)
+
+
+def _prepare_rows(rows: typing.Iterable[dict]) -> tuple:
+    """
+    Нормализовать строки и отсеять ошибочные и повторяющиеся.
+    Занятые в базе username и email находятся одним запросом
+    :param rows: Iterable[dict]
+    :return: tuple[list, list[dict], list[dict]]
+    """
+    candidates: list = []
+    duplicates: typing.List[dict] = []
+    errors: typing.List[dict] = []
+    seen: typing.Dict[str, set] = {"username": set(), "email": set()}
+
+    for index, row in enumerate(rows, start=1):
+        values: dict = {field: (row.get(field) or "").strip() for field in USER_IMPORT_FIELDS}
+        values["password"] = row.get("password") or None
+        if not values["username"] or not values["email"]:
+            errors.append({"row": index, "error": "Username and email are required"})
+            continue
+
+        values["email"] = User.objects.normalize_email(values["email"])
+        fields: typing.List[str] = [
+            field for field in ("username", "email") if values[field] in seen[field]]
+        if fields:
+            duplicates.append(_duplicate(index, values, fields))
+            continue
+
+        seen["username"].add(values["username"])
+        seen["email"].add(values["email"])
+        candidates.append((index, values))
+
+    taken: typing.Dict[str, set] = _taken(seen["username"], seen["email"])
+    unique: list = []
+    for index, values in candidates:
+        fields = [field for field in ("username", "email") if values[field] in taken[field]]
+        if fields:
+            duplicates.append(_duplicate(index, values, fields))
+        else:
+            unique.append((index, values))
+
+    return unique, duplicates, errors
+
+
+def _insert_batch(batch: list, duplicates: typing.List[dict]) -> typing.List[User]:
+    """
+    Вставить пачку пользователей. Если пачку опередил параллельный импорт,
+    занятые строки переносятся в отчет и пачка вставляется повторно
+    :param batch: list[tuple[int, User]]
+    :param duplicates: list[dict] - отчет о повторах, дополняется
+    :return: list[User]
+    """
+    try:
+        with transaction.atomic():
+            return User.objects.bulk_create([user for _, user in batch])
+    except IntegrityError:
+        taken: typing.Dict[str, set] = _taken(
+            {user.username for _, user in batch}, {user.email for _, user in batch})
+        if not taken["username"] and not taken["email"]:
+            raise
+
+    remaining: list = []
+    for index, user in batch:
+        fields: typing.List[str] = [
+            field for field in ("username", "email") if getattr(user, field) in taken[field]]
+        if fields:
+            duplicates.append(_duplicate(index, {"username": user.username, "email": user.email},
+                                         fields))
+        else:
+            remaining.append((index, user))
+
+    return _insert_batch(remaining, duplicates) if remaining else []
+
+
+def _taken(usernames: typing.Set[str], emails: typing.Set[str]) -> typing.Dict[str, set]:
+    """
+    Найти username и email, уже занятые в базе
+    :param usernames: set[str]
+    :param emails: set[str]
+    :return: dict[str, set]
+    """
+    taken: typing.Dict[str, set] = {"username": set(), "email": set()}
+    if not usernames and not emails:
+        return taken
+
+    for username, email in User.objects.filter(
+            Q(username__in=usernames) | Q(email__in=emails)).values_list('username', 'email'):
+        taken["username"].add(username)
+        taken["email"].add(email)
+    return taken
+
+
+def _duplicate(index: int, values: dict, fields: typing.List[str]) -> dict:
+    """
+    Запись отчета о повторяющейся строке
+    :param index: int - номер строки импорта
+    :param values: dict
+    :param fields: list[str] - поля, значения которых уже заняты
+    :return: dict
+    """
+    return {
+        "row": index,
+        "username": values["username"],
+        "email": values["email"],
+        "fields": fields
+    }
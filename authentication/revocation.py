@@ -0,0 +1,193 @@
+"""
+Модуль отзыва JWT-токенов.
+
+Отозванные токены хранятся по jti в таблице RevokedToken до истечения их
+срока действия. Каждый процесс держит фильтр Блума со всеми jti из таблицы:
+если jti нет в фильтре, токен точно не отозван и запрос к базе не нужен.
+Только при срабатывании фильтра (отзыв или ложное срабатывание) наличие jti
+проверяется в таблице.
+
+Фильтр периодически дополняется записями, отозванными в других процессах,
+и время от времени перестраивается, чтобы из него ушли истекшие записи.
+"""
+import hashlib
+import math
+import threading
+import time
+import typing
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import RefreshToken, RevokedToken
+
+
+class BloomFilter:
+    """
+    Фильтр Блума над строками
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        """
+        Инициализация фильтра
+        :param capacity: int - ожидаемое число элементов
+        :param error_rate: float - допустимая доля ложных срабатываний
+        """
+        self.size: int = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count: int = max(1, round(self.size / capacity * math.log(2)))
+        self.count: int = 0
+        self._bits: bytearray = bytearray((self.size + 7) // 8)
+
+    def add(self, item: str) -> None:
+        """
+        Добавить элемент
+        :param item: str
+        :return: None
+        """
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        """
+        Проверить, мог ли элемент быть добавлен
+        :param item: str
+        :return: bool
+        """
+        return all(self._bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(item))
+
+    def _positions(self, item: str) -> typing.Iterator[int]:
+        """
+        Позиции битов элемента (двойное хеширование)
+        :param item: str
+        :return: Iterator[int]
+        """
+        digest: bytes = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first: int = int.from_bytes(digest[:8], "little")
+        second: int = int.from_bytes(digest[8:], "little") | 1
+        for index in range(self.hash_count):
+            yield (first + index * second) % self.size
+
+
+class RevocationList:
+    """
+    Список отозванных токенов процесса: фильтр Блума поверх таблицы RevokedToken
+    """
+
+    def __init__(self, capacity: int, error_rate: float,
+                 sync_interval: int, gc_interval: int) -> None:
+        """
+        Инициализация списка
+        :param capacity: int - емкость фильтра
+        :param error_rate: float - доля ложных срабатываний фильтра
+        :param sync_interval: int - как часто подгружать новые отзывы, секунды
+        :param gc_interval: int - как часто удалять истекшие записи, секунды
+        """
+        self.capacity: int = capacity
+        self.error_rate: float = error_rate
+        self.sync_interval: int = sync_interval
+        self.gc_interval: int = gc_interval
+        self.lookups: int = 0
+        self._filter: BloomFilter = BloomFilter(capacity, error_rate)
+        self._synced_at: datetime | None = None
+        self._next_sync: float = 0.0
+        self._next_rebuild: float = 0.0
+        self._next_gc: float = 0.0
+        self._lock: threading.Lock = threading.Lock()
+
+    def is_revoked(self, jti: str) -> bool:
+        """
+        Проверить, отозван ли токен
+        :param jti: str
+        :return: bool
+        """
+        self._maybe_sync()
+        if jti not in self._filter:
+            return False
+
+        self.lookups += 1
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    def revoke(self, jti: str, expires_at: float) -> None:
+        """
+        Отозвать токен до истечения его срока действия
+        :param jti: str
+        :param expires_at: float - срок действия токена (UNIX-время)
+        :return: None
+        """
+        RevokedToken.objects.bulk_create([RevokedToken(
+            jti=jti,
+            expires_at=datetime.fromtimestamp(expires_at, tz=timezone.utc)
+        )], ignore_conflicts=True)
+
+        with self._lock:
+            self._filter.add(jti)
+
+        if time.monotonic() >= self._next_gc:
+            self._next_gc = time.monotonic() + self.gc_interval
+            self.purge_expired()
+
+    def sync(self, rebuild: bool = False) -> None:
+        """
+        Подгрузить в фильтр отзывы, сделанные с момента прошлой синхронизации.
+        При rebuild фильтр строится заново из всех действующих записей
+        :param rebuild: bool
+        :return: None
+        """
+        now: datetime = timezone.now()
+        queryset: typing.Any = RevokedToken.objects.filter(expires_at__gt=now)
+        if not rebuild and self._synced_at is not None:
+            # Перекрытие интервалов покрывает транзакции, зафиксированные
+            # позже момента отзыва
+            queryset = queryset.filter(
+                revoked_at__gte=self._synced_at - timedelta(seconds=self.sync_interval))
+
+        jtis: list = list(queryset.values_list('jti', flat=True))
+        with self._lock:
+            if rebuild or self._synced_at is None:
+                self._filter = BloomFilter(max(self.capacity, len(jtis) * 2), self.error_rate)
+            for jti in jtis:
+                self._filter.add(jti)
+            self._synced_at = now
+            self._next_sync = time.monotonic() + self.sync_interval
+            if rebuild or not self._next_rebuild:
+                self._next_rebuild = time.monotonic() + self.gc_interval
+
+    def purge_expired(self) -> int:
+        """
+        Удалить истекшие отозванные и refresh-токены
+        :return: int - число удаленных записей
+        """
+        now: datetime = timezone.now()
+        deleted, _ = RevokedToken.objects.filter(expires_at__lte=now).delete()
+        refresh_deleted, _ = RefreshToken.objects.filter(expires_at__lte=now).delete()
+        return deleted + refresh_deleted
+
+    def stats(self) -> dict:
+        """
+        Вернуть размер фильтра и число обращений к таблице
+        :return: dict
+        """
+        return {
+            "filter_size": self._filter.count,
+            "lookups": self.lookups
+        }
+
+    def _maybe_sync(self) -> None:
+        """
+        Синхронизировать фильтр, если подошел срок
+        :return: None
+        """
+        now: float = time.monotonic()
+        if now >= self._next_sync:
+            self.sync(rebuild=bool(self._next_rebuild) and now >= self._next_rebuild)
+
+
+revocation_list: RevocationList = RevocationList(
+    capacity=settings.JWT_REVOCATION_FILTER_CAPACITY,
+    error_rate=settings.JWT_REVOCATION_FILTER_ERROR_RATE,
+    sync_interval=settings.JWT_REVOCATION_SYNC_INTERVAL,
+    gc_interval=settings.JWT_REVOCATION_GC_INTERVAL
+)
@@ -0,0 +1,127 @@
+"""
+Модуль с обработчиками сигналов приложения authentication
+"""
+import typing
+from django.contrib.auth.models import Group, Permission
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import permission_cache, token_cache, version_map
+from .models import Role, User
+
+
+@receiver(post_save, sender=User)
+def update_token_version(sender: typing.Any, instance: User, **kwargs: typing.Any) -> None:
+    # pylint: disable=unused-argument
+    """
+    Обновление карты версий токенов после сохранения пользователя
+    :param sender: Any
+    :param instance: User
+    :param kwargs: Any
+    :return: None
+    """
+    if "token_version" in instance.__dict__ and "is_active" in instance.__dict__:
+        version_map.set(instance.pk, instance.token_version, instance.is_active)
+    else:
+        version_map.discard(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def forget_token_version(sender: typing.Any, instance: User, **kwargs: typing.Any) -> None:
+    # pylint: disable=unused-argument
+    """
+    Удаление пользователя из карты версий токенов
+    :param sender: Any
+    :param instance: User
+    :param kwargs: Any
+    :return: None
+    """
+    version_map.discard(instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_tokens(sender: typing.Any, instance: User, **kwargs: typing.Any) -> None:
+    # pylint: disable=unused-argument
+    """
+    Сброс кэшированных токенов пользователя при его сохранении,
+    деактивации или удалении
+    :param sender: Any
+    :param instance: User
+    :param kwargs: Any
+    :return: None
+    """
+    token_cache.invalidate_user(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=Role.users.through)
+def invalidate_user_permissions(sender: typing.Any, instance: typing.Any, action: str,
+                                reverse: typing.Any, pk_set: typing.Any,
+                                **kwargs: typing.Any) -> None:
+    # pylint: disable=unused-argument,too-many-arguments
+    """
+    Сброс наборов прав пользователей, у которых изменились группы,
+    личные права или роли
+    :param sender: Any
+    :param instance: Any - пользователь, группа, право или роль
+    :param action: str
+    :param reverse: Any
+    :param pk_set: Any
+    :param kwargs: Any
+    :return: None
+    """
+    if not action.startswith("post_"):
+        return
+
+    if isinstance(instance, User):
+        permission_cache.invalidate_user(instance.pk)
+    elif pk_set is not None and kwargs.get("model") is User:
+        for user_id in pk_set:
+            permission_cache.invalidate_user(user_id)
+    else:
+        # Очистка связи со стороны группы или роли: затронутые пользователи неизвестны
+        permission_cache.invalidate_all()
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+@receiver(m2m_changed, sender=Role.permissions.through)
+def invalidate_all_permissions(sender: typing.Any, action: str, **kwargs: typing.Any) -> None:
+    # pylint: disable=unused-argument
+    """
+    Смена поколения кэша прав при изменении прав группы или роли
+    :param sender: Any
+    :param action: str
+    :param kwargs: Any
+    :return: None
+    """
+    if action.startswith("post_"):
+        permission_cache.invalidate_all()
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Role)
+@receiver(post_delete, sender=Permission)
+def invalidate_permissions_on_delete(sender: typing.Any, **kwargs: typing.Any) -> None:
+    # pylint: disable=unused-argument
+    """
+    Смена поколения кэша прав при удалении группы, роли или права
+    :param sender: Any
+    :param kwargs: Any
+    :return: None
+    """
+    permission_cache.invalidate_all()
+
+
+@receiver(post_delete, sender=User)
+def forget_user_permissions(sender: typing.Any, instance: User, **kwargs: typing.Any) -> None:
+    # pylint: disable=unused-argument
+    """
+    Удаление набора прав удаленного пользователя
+    :param sender: Any
+    :param instance: User
+    :param kwargs: Any
+    :return: None
+    """
+    permission_cache.invalidate_user(instance.pk)
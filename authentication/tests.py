@@ -1,8 +1,26 @@
 """
 Тестирование приложения authentication
 """
-from django.test import TestCase
-from .models import User
+import threading
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+import jwt
+from django.conf import settings
+from django.contrib.auth.models import Group, Permission
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework import exceptions
+from . import codec
+from .activity import ActivityTracker
+from .backends import JWTAuthentication
+from .cache import permission_cache, token_cache, version_map
+from .hashing import HashingPool, PoolSaturated
+from .models import LoginAttempt, RefreshToken, RevokedToken, Role, User
+from .provisioning import ProvisioningReport, provision_users, read_users
+from .revocation import BloomFilter, revocation_list
+from .throttling import DatabaseAttemptStore, LoginRateLimiter, MemoryAttemptStore, RateLimited
+from .tokens import TokenError, issue_refresh_token, revoke_tokens, rotate_refresh_token
 
 
 class TestAuthModel(TestCase):
@@ -92,3 +110,617 @@ class TestAuthModel(TestCase):
         self.assertTrue(self.superuser.is_staff)
         self.assertTrue(self.superuser.is_superuser)
         self.assertTrue(self.superuser.token, str)
+
+
+class TestTokenCache(TestCase):
+    """
+    Тестирование кэша проверенных токенов
+    """
+    # pylint: disable=attribute-defined-outside-init
+    def setUp(self) -> None:
+        """
+        Создание пользователя и запроса с его токеном
+        :return: None
+        """
+        token_cache.clear()
+        self.user: User = User.objects.create_user(
+            email="cached@example.com",
+            username="cached_user",
+            password="test123!"
+        )
+        self.request = RequestFactory().get(
+            "/", HTTP_AUTHORIZATION=f"Bearer {self.user.token}")
+        self.backend: JWTAuthentication = JWTAuthentication()
+        self.backend.use_token_cache = True
+        revocation_list.sync()
+
+    def tearDown(self) -> None:
+        """
+        Очистка кэша после теста
+        :return: None
+        """
+        token_cache.clear()
+
+    def test_repeated_authentication_hits_cache(self) -> None:
+        """
+        Тест-кейс, что повторная аутентификация тем же токеном
+        не обращается к базе данных.
+        :return: None
+        """
+        user, _ = self.backend.authenticate(self.request)
+        with self.assertNumQueries(0):
+            cached_user, _ = self.backend.authenticate(self.request)
+
+        self.assertEqual(user.pk, cached_user.pk)
+        self.assertTrue(cached_user.is_active)
+        self.assertTrue(cached_user.is_authenticated)
+        self.assertEqual(token_cache.stats()["hits"], 1)
+        self.assertEqual(token_cache.stats()["misses"], 1)
+
+    def test_saving_user_invalidates_cache(self) -> None:
+        """
+        Тест-кейс, что деактивация пользователя сбрасывает его токены из кэша.
+        :return: None
+        """
+        self.backend.authenticate(self.request)
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(len(token_cache), 0)
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.backend.authenticate(self.request)
+
+    def test_cache_is_bounded_and_respects_expiry(self) -> None:
+        """
+        Тест-кейс, что кэш вытесняет старые записи и не отдает просроченные.
+        :return: None
+        """
+        max_size: int = token_cache.max_size
+        token_cache.max_size = 2
+        try:
+            for token in ("a", "b", "c"):
+                token_cache.set(token, self.user, time.time() + 60)
+            self.assertEqual(len(token_cache), 2)
+            self.assertIsNone(token_cache.get("a"))
+            self.assertEqual(token_cache.stats()["evictions"], 1)
+
+            token_cache.set("expired", self.user, time.time() - 1)
+            self.assertIsNone(token_cache.get("expired"))
+        finally:
+            token_cache.max_size = max_size
+
+
+class TestRefreshToken(TestCase):
+    """
+    Тестирование ротации refresh-токенов
+    """
+    # pylint: disable=attribute-defined-outside-init
+    def setUp(self) -> None:
+        """
+        Создание пользователя и его refresh-токена
+        :return: None
+        """
+        self.user: User = User.objects.create_user(
+            email="refresh@example.com",
+            username="refresh_user",
+            password="test123!"
+        )
+        self.refresh: str = issue_refresh_token(self.user)
+
+    def test_rotation_issues_new_refresh_token(self) -> None:
+        """
+        Тест-кейс, что обновление выдает новый refresh-токен того же семейства,
+        а старый помечается использованным.
+        :return: None
+        """
+        user, new_refresh = rotate_refresh_token(self.refresh)
+
+        self.assertEqual(user, self.user)
+        self.assertNotEqual(new_refresh, self.refresh)
+        self.assertEqual(RefreshToken.objects.filter(user=self.user, used=True).count(), 1)
+        self.assertEqual(
+            RefreshToken.objects.values('family').distinct().count(), 1)
+
+    def test_reuse_revokes_whole_family(self) -> None:
+        """
+        Тест-кейс, что повторное использование refresh-токена
+        отзывает все токены семейства.
+        :return: None
+        """
+        _, new_refresh = rotate_refresh_token(self.refresh)
+
+        with self.assertRaisesMessage(TokenError, 'Token has been revoked'):
+            rotate_refresh_token(self.refresh)
+        with self.assertRaisesMessage(TokenError, 'Token has been revoked'):
+            rotate_refresh_token(new_refresh)
+        self.assertFalse(RefreshToken.objects.filter(user=self.user).exists())
+
+    def test_refresh_token_is_not_accepted_as_access_token(self) -> None:
+        """
+        Тест-кейс, что refresh-токен нельзя использовать для доступа к API.
+        :return: None
+        """
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {self.refresh}")
+
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            JWTAuthentication().authenticate(request)
+
+
+class TestTokenFormat(TestCase):
+    """
+    Тестирование форматов токенов v1 и v2 и связки ключей
+    """
+    # pylint: disable=attribute-defined-outside-init
+    def setUp(self) -> None:
+        """
+        Создание пользователя и токена старого формата
+        :return: None
+        """
+        self.user: User = User.objects.create_user(
+            email="format@example.com",
+            username="format_user",
+            password="test123!"
+        )
+        expiration_date: datetime = datetime.now() + timedelta(days=1)
+        self.v1_token: str = jwt.encode({
+            "UserId": self.user.pk,
+            "ExpirationDate": int(expiration_date.strftime("%Y%m%d%H%M%S"))
+        }, settings.SECRET_KEY, algorithm="HS256").decode("utf-8")
+
+    def test_v2_token_has_standard_claims_and_kid(self) -> None:
+        """
+        Тест-кейс, что access-токен имеет заголовок kid и утверждения sub/iat/exp.
+        :return: None
+        """
+        token: str = self.user.token
+        claims: dict = jwt.decode(token, verify=False)
+
+        self.assertEqual(jwt.get_unverified_header(token)["kid"], codec.key_ring.active_kid)
+        self.assertEqual(claims["sub"], str(self.user.pk))
+        self.assertEqual(claims["exp"] - claims["iat"], settings.JWT_ACCESS_TOKEN_LIFETIME)
+        self.assertEqual(codec.decode_token(token).user_id, self.user.pk)
+
+    def test_v1_token_is_accepted_during_migration_window(self) -> None:
+        """
+        Тест-кейс, что токен v1 принимается, пока включен JWT_ACCEPT_V1_TOKENS.
+        :return: None
+        """
+        payload: codec.TokenPayload = codec.decode_token(self.v1_token)
+        self.assertEqual(payload.user_id, self.user.pk)
+        self.assertEqual(payload.token_type, "access")
+
+        with override_settings(JWT_ACCEPT_V1_TOKENS=False):
+            with self.assertRaises(codec.TokenError):
+                codec.decode_token(self.v1_token)
+
+    def test_key_rotation_keeps_old_tokens_valid(self) -> None:
+        """
+        Тест-кейс, что после смены активного ключа токены, подписанные
+        старым ключом, остаются действительными, а неизвестный kid отклоняется.
+        :return: None
+        """
+        old_ring: codec.KeyRing = codec.KeyRing({"old": "old-secret"}, "old")
+        new_ring: codec.KeyRing = codec.KeyRing(
+            {"old": "old-secret", "new": "new-secret"}, "new")
+
+        with mock.patch.object(codec, "key_ring", old_ring):
+            old_token: str = self.user.token
+        with mock.patch.object(codec, "key_ring", new_ring):
+            new_token: str = self.user.token
+            self.assertEqual(codec.decode_token(old_token).user_id, self.user.pk)
+            self.assertEqual(jwt.get_unverified_header(new_token)["kid"], "new")
+        with mock.patch.object(codec, "key_ring", old_ring):
+            with self.assertRaisesMessage(codec.TokenError, 'Unknown signing key'):
+                codec.decode_token(new_token)
+
+
+class TestHashingPool(TestCase):
+    """
+    Тестирование пула проверки паролей
+    """
+
+    def test_pool_rejects_tasks_when_queue_is_full(self) -> None:
+        """
+        Тест-кейс, что пул принимает не больше workers + queue_depth задач
+        и считает отклоненные задачи.
+        :return: None
+        """
+        pool: HashingPool = HashingPool(workers=1, queue_depth=1)
+        release: threading.Event = threading.Event()
+        running = pool.submit(release.wait, 5)
+        queued = pool.submit(release.wait, 5)
+
+        with self.assertRaises(PoolSaturated):
+            pool.submit(release.wait, 5)
+        self.assertEqual(pool.metrics()["in_flight"], 2)
+        self.assertEqual(pool.metrics()["queued"], 1)
+        self.assertEqual(pool.metrics()["rejected"], 1)
+
+        release.set()
+        running.result(timeout=5)
+        queued.result(timeout=5)
+        self.assertEqual(pool.metrics()["completed"], 2)
+        pool.submit(release.wait, 5).result(timeout=5)
+
+
+class TestLoginRateLimiter(TestCase):
+    """
+    Тестирование ограничителя попыток входа
+    """
+
+    def assert_limits_failures(self, store) -> None:
+        """
+        Проверка, что после email_limit неудач email блокируется,
+        а другой email с другого адреса - нет
+        :param store: MemoryAttemptStore | DatabaseAttemptStore
+        :return: None
+        """
+        limiter: LoginRateLimiter = LoginRateLimiter(
+            store, window=60, buckets=6, email_limit=2, ip_limit=10)
+
+        for _ in range(2):
+            limiter.check("User@example.com", "10.0.0.1")
+            limiter.register_failure("User@example.com", "10.0.0.1")
+
+        with self.assertRaises(RateLimited):
+            limiter.check("user@example.com", "10.0.0.2")
+        limiter.check("other@example.com", "10.0.0.2")
+
+        limiter.register_success("user@example.com")
+        limiter.check("user@example.com", "10.0.0.1")
+
+    def test_memory_store(self) -> None:
+        """
+        Тест-кейс ограничения попыток с хранилищем в памяти.
+        :return: None
+        """
+        self.assert_limits_failures(MemoryAttemptStore())
+
+    def test_database_store(self) -> None:
+        """
+        Тест-кейс ограничения попыток с хранилищем в базе:
+        повторные неудачи увеличивают счетчик в той же строке.
+        :return: None
+        """
+        self.assert_limits_failures(DatabaseAttemptStore())
+        self.assertEqual(LoginAttempt.objects.get(key="ip:10.0.0.1").count, 2)
+
+
+class TestTokenRevocation(TestCase):
+    """
+    Тестирование отзыва токенов
+    """
+    # pylint: disable=attribute-defined-outside-init
+    def setUp(self) -> None:
+        """
+        Создание пользователя, его токенов и синхронизация фильтра
+        :return: None
+        """
+        token_cache.clear()
+        self.user: User = User.objects.create_user(
+            email="revoked@example.com",
+            username="revoked_user",
+            password="test123!"
+        )
+        self.access: str = self.user.token
+        self.request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {self.access}")
+        self.backend: JWTAuthentication = JWTAuthentication()
+        self.backend.use_token_cache = True
+        revocation_list.sync(rebuild=True)
+
+    def tearDown(self) -> None:
+        """
+        Очистка кэша после теста
+        :return: None
+        """
+        token_cache.clear()
+
+    def test_not_revoked_token_needs_no_lookup(self) -> None:
+        """
+        Тест-кейс, что для неотозванного токена из кэша
+        не выполняется ни одного запроса.
+        :return: None
+        """
+        self.backend.authenticate(self.request)
+        with self.assertNumQueries(0):
+            self.backend.authenticate(self.request)
+
+    def test_revoked_token_is_rejected(self) -> None:
+        """
+        Тест-кейс, что отозванный токен отклоняется даже из кэша,
+        а refresh-токен отзывается вместе с семейством.
+        :return: None
+        """
+        refresh: str = issue_refresh_token(self.user)
+        self.backend.authenticate(self.request)
+
+        revoke_tokens(self.user, self.access, refresh)
+
+        with self.assertRaisesMessage(exceptions.AuthenticationFailed, 'Token has been revoked'):
+            self.backend.authenticate(self.request)
+        with self.assertRaises(TokenError):
+            rotate_refresh_token(refresh)
+        self.assertTrue(RevokedToken.objects.filter(expires_at__gt=timezone.now()).exists())
+
+    def test_expired_entries_are_purged(self) -> None:
+        """
+        Тест-кейс, что истекшие записи удаляются.
+        :return: None
+        """
+        revocation_list.revoke("expired-jti", time.time() - 1)
+        revocation_list.revoke("active-jti", time.time() + 60)
+
+        revocation_list.purge_expired()
+
+        self.assertEqual(list(RevokedToken.objects.values_list('jti', flat=True)),
+                         ["active-jti"])
+
+    def test_bloom_filter_has_no_false_negatives(self) -> None:
+        """
+        Тест-кейс, что фильтр Блума находит все добавленные элементы.
+        :return: None
+        """
+        bloom: BloomFilter = BloomFilter(capacity=1000, error_rate=0.01)
+        for index in range(1000):
+            bloom.add(f"jti-{index}")
+
+        self.assertTrue(all(f"jti-{index}" in bloom for index in range(1000)))
+        false_positives: int = sum(f"other-{index}" in bloom for index in range(1000))
+        self.assertLess(false_positives, 50)
+
+
+class TestTokenVersion(TestCase):
+    """
+    Тестирование версии токенов пользователя
+    """
+    # pylint: disable=attribute-defined-outside-init
+    def setUp(self) -> None:
+        """
+        Создание пользователя и запроса с его токеном
+        :return: None
+        """
+        token_cache.clear()
+        version_map.clear()
+        revocation_list.sync()
+        self.user: User = User.objects.create_user(
+            email="versioned@example.com",
+            username="versioned_user",
+            password="test123!"
+        )
+        self.request = RequestFactory().get(
+            "/", HTTP_AUTHORIZATION=f"Bearer {self.user.token}")
+        self.backend: JWTAuthentication = JWTAuthentication()
+        self.backend.use_token_cache = False
+
+    def test_user_is_built_from_claims(self) -> None:
+        """
+        Тест-кейс, что пользователь собирается из утверждений токена,
+        а база читается только при промахе карты версий.
+        :return: None
+        """
+        version_map.clear()
+        with self.assertNumQueries(1):
+            user, _ = self.backend.authenticate(self.request)
+        with self.assertNumQueries(0):
+            user, _ = self.backend.authenticate(self.request)
+
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertTrue(user.is_active)
+        self.assertFalse(user.is_staff)
+        self.assertFalse(user.is_superuser)
+
+    def test_password_change_revokes_tokens(self) -> None:
+        """
+        Тест-кейс, что смена пароля увеличивает версию и отзывает токены.
+        :return: None
+        """
+        user: User = User.objects.get(pk=self.user.pk)
+        user.set_password("new-password!")
+        user.save()
+
+        self.assertEqual(user.token_version, self.user.token_version + 1)
+        with self.assertRaisesMessage(exceptions.AuthenticationFailed, 'Token has been revoked'):
+            self.backend.authenticate(self.request)
+
+    def test_deactivation_revokes_tokens(self) -> None:
+        """
+        Тест-кейс, что деактивация увеличивает версию и отклоняет токены,
+        даже если в другом процессе карта версий устарела.
+        :return: None
+        """
+        self.backend.authenticate(self.request)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        version_map.clear()
+
+        with self.assertRaisesMessage(exceptions.AuthenticationFailed, 'The user is inactive'):
+            self.backend.authenticate(self.request)
+
+        user: User = User.objects.get(pk=self.user.pk)
+        user.is_active = True
+        user.save()
+        user.is_active = False
+        user.save(update_fields=["is_active"])
+        self.assertEqual(
+            User.objects.get(pk=self.user.pk).token_version, self.user.token_version + 1)
+
+    def test_demotion_revokes_tokens(self) -> None:
+        """
+        Тест-кейс, что снятие прав суперпользователя и персонала
+        увеличивает версию и отклоняет старый токен с этими правами.
+        :return: None
+        """
+        user: User = User.objects.get(pk=self.user.pk)
+        user.is_superuser = user.is_staff = True
+        user.save()
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {user.token}")
+        authenticated, _ = self.backend.authenticate(request)
+        self.assertTrue(authenticated.has_perm("testware.delete_testplan"))
+
+        user.is_superuser = False
+        user.save(update_fields=["is_superuser"])
+        self.assertEqual(User.objects.get(pk=self.user.pk).token_version,
+                         self.user.token_version + 2)
+        with self.assertRaisesMessage(exceptions.AuthenticationFailed, 'Token has been revoked'):
+            self.backend.authenticate(request)
+
+        user.is_staff = False
+        user.save()
+        self.assertEqual(user.token_version, self.user.token_version + 3)
+
+
+class TestActivityTracker(TestCase):
+    """
+    Тестирование учета активности пользователей
+    """
+
+    def test_flush_updates_users_in_one_query(self) -> None:
+        """
+        Тест-кейс, что накопленная активность нескольких пользователей
+        записывается одним UPDATE и не затирает более позднее время.
+        :return: None
+        """
+        users: list = [
+            User.objects.create(username=f"active_{index}", email=f"active-{index}@example.com")
+            for index in range(3)]
+        later: timezone.datetime = timezone.now() + timedelta(hours=1)
+        User.objects.filter(pk=users[0].pk).update(last_seen=later)
+
+        tracker: ActivityTracker = ActivityTracker(flush_interval=3600, max_pending=100)
+        tracker._thread = mock.Mock()  # pylint: disable=protected-access
+        for user in users:
+            tracker.record(user.pk)
+        tracker.record(users[1].pk, login=True)
+
+        with self.assertNumQueries(2):
+            tracker.flush()
+
+        self.assertEqual(User.objects.get(pk=users[0].pk).last_seen, later)
+        self.assertIsNotNone(User.objects.get(pk=users[2].pk).last_seen)
+        self.assertIsNotNone(User.objects.get(pk=users[1].pk).last_login)
+        self.assertIsNone(User.objects.get(pk=users[2].pk).last_login)
+        self.assertEqual(tracker.stats()["pending"], 0)
+
+
+class TestProvisioning(TestCase):
+    """
+    Тестирование массового создания пользователей
+    """
+
+    def test_provision_users_reports_duplicates(self) -> None:
+        """
+        Тест-кейс, что повторы в базе и внутри импорта попадают в отчет,
+        а остальные пользователи создаются с захешированными паролями.
+        :return: None
+        """
+        User.objects.create_user(username="taken", email="taken@example.com", password="test123!")
+        rows: list = read_users(
+            "username,email,password,first_name,last_name\n"
+            "alice,alice@example.com,alice123!,Alice,\n"
+            "taken,new@example.com,test123!,,\n"
+            "bob,bob@EXAMPLE.com,bob123!,,Builder\n"
+            "alice,other@example.com,test123!,,\n"
+            ",empty@example.com,test123!,,\n", "csv")
+
+        report: ProvisioningReport = provision_users(rows, workers=2, batch_size=1)
+
+        self.assertEqual([user.username for user in report.created], ["alice", "bob"])
+        self.assertEqual([(item["row"], item["fields"]) for item in report.duplicates],
+                         [(2, ["username"]), (4, ["username"])])
+        self.assertEqual([item["row"] for item in report.errors], [5])
+        self.assertTrue(User.objects.get(username="alice").check_password("alice123!"))
+        self.assertEqual(User.objects.get(username="bob").email, "bob@example.com")
+        self.assertEqual(User.objects.get(username="bob").last_name, "Builder")
+
+    def test_read_users_rejects_invalid_json(self) -> None:
+        """
+        Тест-кейс, что JSON должен быть списком объектов.
+        :return: None
+        """
+        self.assertEqual(read_users('{"users": [{"username": "a"}]}', "json"),
+                         [{"username": "a"}])
+        with self.assertRaises(ValueError):
+            read_users('["a"]', "json")
+        with self.assertRaises(ValueError):
+            read_users("", "xml")
+
+
+class TestRolePermissions(TestCase):
+    """
+    Тестирование прав пользователей по ролям и кэша наборов прав
+    """
+
+    def setUp(self) -> None:
+        """
+        Создание пользователя, роли и группы
+        :return: None
+        """
+        permission_cache.clear()
+        self.user: User = User.objects.create_user(
+            username="role_user", email="role-user@example.com", password="test123!")
+        self.role: Role = Role.objects.create(name="Test lead")
+        self.group: Group = Group.objects.create(name="QA")
+        self.add_user: Permission = Permission.objects.get(codename="add_user")
+        self.view_user: Permission = Permission.objects.get(codename="view_user")
+
+    def reload(self) -> User:
+        """
+        Пользователь, как он приходит в очередной запрос
+        :return: User
+        """
+        return User.objects.get(pk=self.user.pk)
+
+    def test_steady_state_check_uses_no_queries(self) -> None:
+        """
+        Тест-кейс, что права роли и группы складываются, а повторная
+        проверка не обращается к базе.
+        :return: None
+        """
+        self.role.permissions.add(self.add_user)
+        self.role.users.add(self.user)
+        self.group.permissions.add(self.view_user)
+        self.user.groups.add(self.group)
+
+        user: User = self.reload()
+        with self.assertNumQueries(1):
+            self.assertTrue(user.has_perms(["authentication.add_user",
+                                            "authentication.view_user"]))
+
+        user = self.reload()
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_perm("authentication.add_user"))
+            self.assertFalse(user.has_perm("authentication.delete_user"))
+
+    def test_role_changes_invalidate_cache(self) -> None:
+        """
+        Тест-кейс, что изменения прав роли и состава роли сразу видны.
+        :return: None
+        """
+        self.role.users.add(self.user)
+        self.assertFalse(self.reload().has_perm("authentication.add_user"))
+
+        self.role.permissions.add(self.add_user)
+        self.assertTrue(self.reload().has_perm("authentication.add_user"))
+
+        self.user.roles.remove(self.role)
+        self.assertFalse(self.reload().has_perm("authentication.add_user"))
+
+        self.role.users.add(self.user)
+        self.assertTrue(self.reload().has_perm("authentication.add_user"))
+        self.role.delete()
+        self.assertFalse(self.reload().has_perm("authentication.add_user"))
+
+    def test_stale_generation_is_not_stored(self) -> None:
+        """
+        Тест-кейс, что набор прав, вычисленный до смены поколения,
+        не попадает в кэш.
+        :return: None
+        """
+        load = permission_cache._load  # pylint: disable=protected-access
+
+        def load_and_invalidate(user_id: int) -> list:
+            permission_cache.invalidate_all()
+            return load(user_id)
+
+        with mock.patch.object(permission_cache, "_load", side_effect=load_and_invalidate):
+            permission_cache.get(self.user.pk)
+        self.assertEqual(permission_cache.stats()["size"], 0)
@@ -0,0 +1,277 @@
+"""
+Модуль ограничения попыток входа.
+
+Неудачные попытки считаются по email и по IP-адресу в скользящем окне,
+разбитом на короткие интервалы (bucket). Проверка лимита выполняется до
+authenticate(), поэтому отклоненная попытка не тратит время на хеширование
+пароля.
+
+Счетчики хранятся в подключаемом хранилище: MemoryAttemptStore для одного
+процесса или DatabaseAttemptStore для нескольких узлов.
+"""
+import threading
+import time
+import typing
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from .models import LoginAttempt
+
+
+class RateLimited(Exception):
+    """
+    Превышен лимит попыток входа
+    """
+
+    def __init__(self, retry_after: int) -> None:
+        """
+        :param retry_after: int - через сколько секунд освободится окно
+        """
+        super().__init__(retry_after)
+        self.retry_after: int = retry_after
+
+
+class MemoryAttemptStore:
+    """
+    Хранилище счетчиков в памяти процесса
+    """
+
+    def __init__(self) -> None:
+        """
+        Инициализация хранилища
+        """
+        self._buckets: typing.Dict[str, typing.Dict[int, int]] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def add(self, keys: typing.Iterable[str], bucket: int) -> None:
+        """
+        Увеличить счетчики ключей в интервале bucket
+        :param keys: Iterable[str]
+        :param bucket: int
+        :return: None
+        """
+        with self._lock:
+            for key in keys:
+                buckets: typing.Dict[int, int] = self._buckets.setdefault(key, {})
+                buckets[bucket] = buckets.get(bucket, 0) + 1
+
+    def counts(self, keys: typing.Iterable[str], since: int) -> typing.Dict[str, int]:
+        """
+        Вернуть суммы счетчиков ключей начиная с интервала since
+        :param keys: Iterable[str]
+        :param since: int
+        :return: dict[str, int]
+        """
+        result: typing.Dict[str, int] = {}
+        with self._lock:
+            for key in keys:
+                buckets: typing.Dict[int, int] = self._buckets.get(key, {})
+                for old_bucket in [item for item in buckets if item < since]:
+                    del buckets[old_bucket]
+                if not buckets:
+                    self._buckets.pop(key, None)
+                result[key] = sum(buckets.values())
+        return result
+
+    def reset(self, key: str) -> None:
+        """
+        Сбросить счетчики ключа
+        :param key: str
+        :return: None
+        """
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def purge(self, before: int) -> None:
+        """
+        Удалить интервалы старше before
+        :param before: int
+        :return: None
+        """
+        with self._lock:
+            for key in list(self._buckets):
+                buckets: typing.Dict[int, int] = self._buckets[key]
+                for old_bucket in [item for item in buckets if item < before]:
+                    del buckets[old_bucket]
+                if not buckets:
+                    del self._buckets[key]
+
+
+class DatabaseAttemptStore:
+    """
+    Хранилище счетчиков в таблице LoginAttempt.
+    Счетчик увеличивается одним запросом INSERT ... ON CONFLICT DO UPDATE
+    """
+
+    def add(self, keys: typing.Iterable[str], bucket: int) -> None:
+        """
+        Увеличить счетчики ключей в интервале bucket
+        :param keys: Iterable[str]
+        :param bucket: int
+        :return: None
+        """
+        keys = list(keys)
+        if not keys:
+            return
+
+        quote: typing.Callable = connection.ops.quote_name
+        table: str = quote(LoginAttempt._meta.db_table)
+        values: str = ", ".join(["(%s, %s, 1)"] * len(keys))
+        params: list = [value for key in keys for value in (key, bucket)]
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} ({quote('key')}, {quote('bucket')}, {quote('count')}) "
+                f"VALUES {values} "
+                f"ON CONFLICT ({quote('key')}, {quote('bucket')}) "
+                f"DO UPDATE SET {quote('count')} = {table}.{quote('count')} + 1",
+                params)
+
+    def counts(self, keys: typing.Iterable[str], since: int) -> typing.Dict[str, int]:
+        """
+        Вернуть суммы счетчиков ключей начиная с интервала since
+        :param keys: Iterable[str]
+        :param since: int
+        :return: dict[str, int]
+        """
+        keys = list(keys)
+        result: typing.Dict[str, int] = dict.fromkeys(keys, 0)
+        for key, count in LoginAttempt.objects.filter(
+                key__in=keys, bucket__gte=since).values_list('key', 'count'):
+            result[key] += count
+        return result
+
+    def reset(self, key: str) -> None:
+        """
+        Сбросить счетчики ключа
+        :param key: str
+        :return: None
+        """
+        LoginAttempt.objects.filter(key=key).delete()
+
+    def purge(self, before: int) -> None:
+        """
+        Удалить интервалы старше before
+        :param before: int
+        :return: None
+        """
+        LoginAttempt.objects.filter(bucket__lt=before).delete()
+
+
+class LoginRateLimiter:
+    """
+    Ограничитель неудачных попыток входа по email и IP-адресу
+    """
+    # pylint: disable=too-many-arguments
+
+    def __init__(self, store: typing.Any, window: int, buckets: int,
+                 email_limit: int, ip_limit: int) -> None:
+        """
+        Инициализация ограничителя
+        :param store: MemoryAttemptStore | DatabaseAttemptStore
+        :param window: int - длина окна в секундах
+        :param buckets: int - на сколько интервалов делится окно
+        :param email_limit: int - неудачных попыток на email за окно
+        :param ip_limit: int - неудачных попыток с IP-адреса за окно
+        """
+        self.store: typing.Any = store
+        self.window: int = window
+        self.bucket_size: int = max(1, window // buckets)
+        self.buckets: int = buckets
+        self.email_limit: int = email_limit
+        self.ip_limit: int = ip_limit
+        self._purged_at: int = 0
+
+    @classmethod
+    def from_settings(cls) -> "LoginRateLimiter":
+        """
+        Создать ограничитель по настройкам проекта
+        :return: LoginRateLimiter
+        """
+        return cls(
+            store=import_string(settings.LOGIN_RATE_LIMIT_STORE)(),
+            window=settings.LOGIN_RATE_LIMIT_WINDOW,
+            buckets=settings.LOGIN_RATE_LIMIT_BUCKETS,
+            email_limit=settings.LOGIN_RATE_LIMIT_PER_EMAIL,
+            ip_limit=settings.LOGIN_RATE_LIMIT_PER_IP
+        )
+
+    def check(self, email: str | None, ip_address: str | None) -> None:
+        """
+        Поднять RateLimited, если лимит попыток для email или IP исчерпан
+        :param email: str | None
+        :param ip_address: str | None
+        :return: None
+        """
+        limits: typing.Dict[str, int] = self._limits(email, ip_address)
+        if not limits:
+            return
+
+        counts: typing.Dict[str, int] = self.store.counts(limits, self._oldest_bucket())
+        if any(counts[key] >= limit for key, limit in limits.items()):
+            raise RateLimited(self.bucket_size - int(time.time()) % self.bucket_size)
+
+    def register_failure(self, email: str | None, ip_address: str | None) -> None:
+        """
+        Учесть неудачную попытку входа
+        :param email: str | None
+        :param ip_address: str | None
+        :return: None
+        """
+        self.store.add(self._limits(email, ip_address), self._current_bucket())
+
+        oldest_bucket: int = self._oldest_bucket()
+        if oldest_bucket - self._purged_at >= self.buckets:
+            self._purged_at = oldest_bucket
+            self.store.purge(oldest_bucket)
+
+    def register_success(self, email: str | None) -> None:
+        """
+        Сбросить счетчик email после успешного входа
+        :param email: str | None
+        :return: None
+        """
+        if email:
+            self.store.reset(self._email_key(email))
+
+    def _limits(self, email: str | None, ip_address: str | None) -> typing.Dict[str, int]:
+        """
+        Ключи счетчиков и их лимиты
+        :param email: str | None
+        :param ip_address: str | None
+        :return: dict[str, int]
+        """
+        limits: typing.Dict[str, int] = {}
+        if email:
+            limits[self._email_key(email)] = self.email_limit
+        if ip_address:
+            limits[f"ip:{ip_address}"] = self.ip_limit
+        return limits
+
+    @staticmethod
+    def _email_key(email: str) -> str:
+        """
+        Ключ счетчика email
+        :param email: str
+        :return: str
+        """
+        return f"email:{email.strip().lower()}"
+
+    def _current_bucket(self) -> int:
+        """
+        Номер текущего интервала
+        :return: int
+        """
+        return int(time.time()) // self.bucket_size
+
+    def _oldest_bucket(self) -> int:
+        """
+        Номер самого старого интервала, входящего в окно
+        :return: int
+        """
+        return self._current_bucket() - self.buckets + 1
+
+
+login_limiter: LoginRateLimiter = LoginRateLimiter.from_settings()
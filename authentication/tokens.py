@@ -0,0 +1,114 @@
+"""
+Модуль выдачи и ротации refresh-токенов.
+
+Access-токен живет недолго и проверяется без обращения к паролю.
+Refresh-токен хранится в таблице RefreshToken и при каждом обновлении
+заменяется новым (ротация); повторное использование старого токена
+отзывает все семейство токенов пользователя.
+"""
+import typing
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import token_cache
+from .codec import TokenError, TokenPayload, decode_token, encode_token
+from .models import RefreshToken, User
+from .revocation import revocation_list
+
+
+def issue_refresh_token(user: User, family: uuid.UUID | None = None) -> str:
+    """
+    Выдать refresh-токен и сохранить его в таблице RefreshToken
+    :param user: User
+    :param family: UUID | None - семейство токенов; None для нового входа
+    :return: str
+    """
+    lifetime: timedelta = timedelta(seconds=settings.JWT_REFRESH_TOKEN_LIFETIME)
+    if family is None:
+        # При новом входе заодно удаляются истекшие токены пользователя
+        RefreshToken.objects.filter(user=user, expires_at__lte=timezone.now()).delete()
+
+    stored: RefreshToken = RefreshToken.objects.create(
+        jti=uuid.uuid4(),
+        family=family or uuid.uuid4(),
+        user=user,
+        expires_at=timezone.now() + lifetime
+    )
+
+    return encode_token(user.pk, "refresh", settings.JWT_REFRESH_TOKEN_LIFETIME,
+                        jti=str(stored.jti), ver=user.token_version)
+
+
+def rotate_refresh_token(token: str) -> typing.Tuple[User, str]:
+    """
+    Проверить refresh-токен, пометить его использованным и выдать новый
+    из того же семейства.
+    Если токен уже использовался, все семейство отзывается
+    :param token: str
+    :return: tuple[User, str]
+    """
+    payload: TokenPayload = decode_token(token)
+
+    if payload.token_type != "refresh":
+        raise TokenError('Invalid token type')
+
+    reused_family: uuid.UUID | None = None
+    with transaction.atomic():
+        try:
+            stored: RefreshToken = RefreshToken.objects.select_for_update(
+                of=('self',)).select_related('user').get(jti=payload.jti)
+        except (RefreshToken.DoesNotExist, ValidationError) as exc:
+            raise TokenError('Token has been revoked') from exc
+
+        if stored.used:
+            reused_family = stored.family
+            RefreshToken.objects.filter(family=reused_family).delete()
+        else:
+            if stored.expires_at <= timezone.now():
+                raise TokenError('Token has expired')
+
+            if not stored.user.is_active:
+                raise TokenError('The user is inactive')
+
+            if payload.claims.get("ver", stored.user.token_version) != stored.user.token_version:
+                raise TokenError('Token has been revoked')
+
+            stored.used = True
+            stored.save(update_fields=['used'])
+            new_token: str = issue_refresh_token(stored.user, stored.family)
+
+    # Отзыв семейства должен быть зафиксирован, поэтому ошибка поднимается
+    # уже после выхода из транзакции
+    if reused_family is not None:
+        raise TokenError('Token has been revoked')
+
+    return stored.user, new_token
+
+
+def revoke_tokens(user: User, access: str, refresh: str | None = None) -> None:
+    """
+    Отозвать access-токен пользователя и, если передан, его refresh-токен
+    вместе со всем семейством
+    :param user: User
+    :param access: str
+    :param refresh: str | None
+    :return: None
+    """
+    payload: TokenPayload = decode_token(access)
+    if payload.jti is not None:
+        revocation_list.revoke(payload.jti, payload.expires_at)
+    token_cache.invalidate_token(access)
+
+    if refresh:
+        refresh_payload: TokenPayload = decode_token(refresh)
+        if refresh_payload.token_type != "refresh" or refresh_payload.user_id != user.pk:
+            raise TokenError('Invalid token type')
+
+        families: typing.Any = RefreshToken.objects.filter(
+            jti=refresh_payload.jti).values('family')
+        RefreshToken.objects.filter(family__in=families).delete()
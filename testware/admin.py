@@ -1,8 +1,13 @@
 """
 Модуль настройки страницы администрирования приложения testware
 """
+import typing
+
 from django.contrib import admin
-from .models import TestPlan
+from django.db.models import QuerySet
+from django.http import HttpRequest
+
+from .models import ArchivedTestPlan, TestCase, TestPlan, TestResult, TestRun, TestSuite
 
 
 @admin.register(TestPlan)
@@ -11,5 +16,82 @@ class TestPlanAdmin(admin.ModelAdmin):
     Регистрация модели TestPlan
     на странице администрирования
     """
-    list_display = ['title', 'author', 'start_date', 'end_date']
+    list_display = ['title', 'author', 'start_date', 'end_date', 'deleted']
     list_filter = ['title', 'author']
+
+    def get_queryset(self, request: HttpRequest) -> QuerySet:
+        """
+        Все тест-планы, включая мягко удаленные
+        :param request: HttpRequest
+        :return: QuerySet
+        """
+        queryset: QuerySet = TestPlan.all_objects.get_queryset()
+        ordering: typing.Sequence[str] = self.get_ordering(request)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return queryset
+
+    def save_model(self, request: HttpRequest, obj: TestPlan, form: typing.Any,
+                   change: bool) -> None:
+        """
+        Сохранение тест-плана с автором изменения для истории
+        :param request: HttpRequest
+        :param obj: TestPlan
+        :param form: Any
+        :param change: bool
+        :return: None
+        """
+        obj.save(changed_by=request.user)
+
+
+@admin.register(ArchivedTestPlan)
+class ArchivedTestPlanAdmin(admin.ModelAdmin):
+    """
+    Регистрация модели ArchivedTestPlan
+    на странице администрирования
+    """
+    list_display = ['title', 'author_id', 'deleted', 'archived']
+    search_fields = ['title']
+
+
+@admin.register(TestSuite)
+class TestSuiteAdmin(admin.ModelAdmin):
+    """
+    Регистрация модели TestSuite
+    на странице администрирования
+    """
+    list_display = ['title', 'parent', 'path', 'author']
+    list_filter = ['author']
+    search_fields = ['title']
+
+
+@admin.register(TestCase)
+class TestCaseAdmin(admin.ModelAdmin):
+    """
+    Регистрация модели TestCase
+    на странице администрирования
+    """
+    list_display = ['title', 'suite', 'author']
+    list_filter = ['author']
+    search_fields = ['title']
+
+
+@admin.register(TestRun)
+class TestRunAdmin(admin.ModelAdmin):
+    """
+    Регистрация модели TestRun
+    на странице администрирования
+    """
+    list_display = ['title', 'plan', 'status', 'author', 'created']
+    list_filter = ['status', 'plan']
+
+
+@admin.register(TestResult)
+class TestResultAdmin(admin.ModelAdmin):
+    """
+    Регистрация модели TestResult
+    на странице администрирования
+    """
+    list_display = ['name', 'run', 'status', 'duration']
+    list_filter = ['status']
+    raw_id_fields = ['run', 'case']
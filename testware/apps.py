@@ -10,3 +10,11 @@ class TestwareConfig(AppConfig):
     """
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'testware'
+
+    def ready(self) -> None:
+        """
+        Подключение обработчиков сигналов приложения
+        :return: None
+        """
+        # pylint: disable=import-outside-toplevel,unused-import
+        from . import signals  # noqa: F401
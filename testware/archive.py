@@ -0,0 +1,99 @@
+"""
+Модуль переноса мягко удаленных тест-планов в архив.
+
+Удаленные планы остаются в TestPlan и раздувают его индексы, поэтому
+планы, удаленные раньше заданного срока, переносятся в ArchivedTestPlan.
+Перенос идет пачками: каждая пачка - одна короткая транзакция из
+INSERT ... SELECT в архив и DELETE из TestPlan, между пачками - пауза,
+так что задача не держит долгих блокировок и может работать днем.
+Строки пачки выбираются с FOR UPDATE SKIP LOCKED: планы, которые в этот
+момент меняет другой запрос, пропускаются до следующего запуска.
+Планы, у которых остались прогоны, не переносятся: удаление плана
+каскадно удалило бы прогоны и результаты
+"""
+import datetime
+import time
+import typing
+
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef, QuerySet
+from django.utils import timezone
+
+from .models import (ArchivedTestPlan, PlanStatusCounter, SearchDocument,
+                     TestPlan, TestRun)
+
+
+class ArchiveReport(typing.NamedTuple):
+    """
+    Итог архивирования
+    """
+    archived: int
+    skipped: int
+    batches: int
+    elapsed: float
+
+
+def archive_deleted_plans(older_than: datetime.timedelta, batch_size: int,
+                          pause: float) -> ArchiveReport:
+    """
+    Перенести в архив тест-планы, удаленные раньше чем older_than назад
+    :param older_than: timedelta
+    :param batch_size: int - планов в одной транзакции
+    :param pause: float - пауза между пачками в секундах
+    :return: ArchiveReport
+    """
+    started: float = time.perf_counter()
+    cutoff: datetime.datetime = timezone.now() - older_than
+    expired: QuerySet = TestPlan.all_objects.filter(deleted__lt=cutoff)
+    candidates: QuerySet = expired.filter(
+        ~Exists(TestRun.objects.filter(plan=OuterRef("pk"))))
+
+    archived: int = 0
+    batches: int = 0
+    while True:
+        with transaction.atomic():
+            ids: typing.List[int] = list(
+                candidates.order_by("pk").select_for_update(skip_locked=True)
+                .values_list("pk", flat=True)[:batch_size])
+            if ids:
+                _move_to_archive(ids)
+        if not ids:
+            break
+        archived += len(ids)
+        batches += 1
+        if len(ids) < batch_size:
+            break
+        time.sleep(pause)
+
+    skipped: int = expired.count()
+    return ArchiveReport(archived, skipped, batches, time.perf_counter() - started)
+
+
+def _move_to_archive(ids: typing.List[int]) -> None:
+    """
+    Скопировать планы в архив и удалить их вместе со счетчиками
+    и поисковыми документами. Вызывается внутри транзакции
+    :param ids: list[int]
+    :return: None
+    """
+    quote: typing.Callable = connection.ops.quote_name
+    columns: str = ", ".join(quote(field.column) for field in TestPlan._meta.concrete_fields)
+    placeholders: str = ", ".join(["%s"] * len(ids))
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(ArchivedTestPlan._meta.db_table)} "
+            f"({columns}, {quote('archived')}) "
+            f"SELECT {columns}, %s FROM {quote(TestPlan._meta.db_table)} "
+            f"WHERE {quote('id')} IN ({placeholders})",
+            [timezone.now(), *ids])
+        cursor.execute(
+            f"DELETE FROM {quote(PlanStatusCounter._meta.db_table)} "
+            f"WHERE {quote('plan_id')} IN ({placeholders})", ids)
+        cursor.execute(
+            f"DELETE FROM {quote(SearchDocument._meta.db_table)} "
+            f"WHERE {quote('entity')} = %s AND {quote('object_id')} IN ({placeholders})",
+            [SearchDocument.Entity.PLAN.value, *ids])
+        cursor.execute(
+            f"DELETE FROM {quote(TestPlan._meta.db_table)} "
+            f"WHERE {quote('id')} IN ({placeholders})", ids)
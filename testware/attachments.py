@@ -0,0 +1,336 @@
+"""
+Модуль хранилища вложений результатов тестов и тест-кейсов.
+
+Содержимое адресуется своим SHA-256: файл лежит в ATTACHMENT_ROOT
+по пути blobs/ab/cd/<sha256> и хранится один раз, сколько бы вложений
+на него ни ссылалось (Blob.refcount). Загрузка идет по частям: каждая
+часть дописывается в файл загрузки с проверкой смещения, поэтому
+прерванную загрузку можно продолжить с AttachmentUpload.received.
+После последней части файл хешируется потоково и переносится
+в хранилище переименованием, а если такое содержимое уже есть -
+удаляется. Файлы читаются и пишутся блоками BLOCK_SIZE, целиком в память
+не загружаются. Сборка мусора (collect_garbage) удаляет содержимое
+без ссылок и брошенные загрузки.
+"""
+import datetime
+import hashlib
+import os
+import time
+import typing
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from .models import Attachment, AttachmentUpload, Blob, TestCase, TestResult
+
+# Размер блока чтения и записи файлов
+BLOCK_SIZE: int = 64 * 1024
+
+
+class UploadOffsetMismatch(Exception):
+    """
+    Часть загрузки начинается не с того места, на котором остановилась
+    загрузка: клиент должен продолжить с offset
+    """
+
+    def __init__(self, offset: int) -> None:
+        """
+        Ошибка со смещением, с которого нужно продолжить загрузку
+        :param offset: int
+        :return: None
+        """
+        super().__init__(f"Upload must continue at offset {offset}")
+        self.offset: int = offset
+
+
+class GarbageReport(typing.NamedTuple):
+    """
+    Итог сборки мусора
+    """
+    blobs: int
+    uploads: int
+    orphans: int
+    freed: int
+    elapsed: float
+
+
+def blob_path(sha256: str) -> Path:
+    """
+    Путь к файлу содержимого
+    :param sha256: str
+    :return: Path
+    """
+    return Path(settings.ATTACHMENT_ROOT) / "blobs" / sha256[:2] / sha256[2:4] / sha256
+
+
+def upload_path(upload: AttachmentUpload) -> Path:
+    """
+    Путь к файлу незавершенной загрузки
+    :param upload: AttachmentUpload
+    :return: Path
+    """
+    return Path(settings.ATTACHMENT_ROOT) / "uploads" / f"{upload.pk}.part"
+
+
+def start_upload(owner: TestResult | TestCase, filename: str, content_type: str,
+                 size: int, sha256: str = "",
+                 author: typing.Any = None) -> AttachmentUpload | Attachment:
+    """
+    Начать загрузку вложения. Если передан SHA-256 уже сохраненного
+    содержимого того же размера, вложение создается сразу, без загрузки
+    :param owner: TestResult | TestCase
+    :param filename: str
+    :param content_type: str
+    :param size: int - размер файла в байтах
+    :param sha256: str - ожидаемый хеш, пустая строка - не проверять
+    :param author: User | None
+    :return: AttachmentUpload | Attachment
+    """
+    if not 0 < size <= settings.ATTACHMENT_MAX_SIZE:
+        raise ValueError(f"Size must be between 1 and {settings.ATTACHMENT_MAX_SIZE} bytes")
+
+    fields: typing.Dict[str, typing.Any] = {
+        "result" if isinstance(owner, TestResult) else "case": owner,
+        "filename": filename,
+        "content_type": content_type,
+        "author": author
+    }
+    if sha256:
+        with transaction.atomic():
+            # Блокировка строки не дает сборке мусора удалить содержимое
+            if Blob.objects.select_for_update().filter(pk=sha256, size=size).exists():
+                Blob.objects.filter(pk=sha256).update(refcount=F("refcount") + 1)
+                return Attachment.objects.create(blob_id=sha256, **fields)
+
+    upload: AttachmentUpload = AttachmentUpload.objects.create(size=size, sha256=sha256, **fields)
+    path: Path = upload_path(upload)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+    return upload
+
+
+def append_chunk(upload_id: typing.Any, offset: int, stream: typing.BinaryIO,
+                 length: int) -> AttachmentUpload | Attachment:
+    """
+    Дописать часть загрузки из потока. Строка загрузки блокируется,
+    поэтому параллельные части одной загрузки записываются по очереди
+    :param upload_id: UUID
+    :param offset: int - смещение части в файле
+    :param stream: BinaryIO - тело запроса
+    :param length: int - длина части
+    :return: AttachmentUpload | Attachment - вложение после последней части
+    """
+    with transaction.atomic():
+        upload: AttachmentUpload = AttachmentUpload.objects.select_for_update().get(pk=upload_id)
+        if offset != upload.received:
+            raise UploadOffsetMismatch(upload.received)
+        if not 0 < length <= settings.ATTACHMENT_CHUNK_SIZE:
+            raise ValueError(
+                f"Chunk size must be between 1 and {settings.ATTACHMENT_CHUNK_SIZE} bytes")
+        if offset + length > upload.size:
+            raise ValueError("Chunk ends beyond the declared size")
+
+        written: int = 0
+        with open(upload_path(upload), "r+b") as file:
+            # Хвост от оборванной предыдущей попытки перезаписывается
+            file.seek(offset)
+            file.truncate()
+            while written < length:
+                block: bytes = stream.read(min(BLOCK_SIZE, length - written))
+                if not block:
+                    break
+                file.write(block)
+                written += len(block)
+            if written != length:
+                file.truncate(offset)
+                raise ValueError("Chunk is shorter than Content-Length")
+
+        upload.received += written
+        upload.save(update_fields=["received", "updated"])
+        if upload.received < upload.size:
+            return upload
+        attachment: Attachment | None = _complete_upload(upload)
+    # Ошибка поднимается после фиксации, чтобы отмена загрузки не откатилась
+    if attachment is None:
+        raise ValueError("SHA-256 of the uploaded file does not match")
+    return attachment
+
+
+def abort_upload(upload: AttachmentUpload) -> None:
+    """
+    Отменить загрузку и удалить ее файл
+    :param upload: AttachmentUpload
+    :return: None
+    """
+    upload.delete()
+    upload_path(upload).unlink(missing_ok=True)
+
+
+def read_range(sha256: str, start: int, length: int) -> typing.Iterator[bytes]:
+    """
+    Читать часть файла содержимого блоками
+    :param sha256: str
+    :param start: int
+    :param length: int
+    :return: Iterator[bytes]
+    """
+    with open(blob_path(sha256), "rb") as file:
+        file.seek(start)
+        while length > 0:
+            block: bytes = file.read(min(BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+
+
+def parse_range(header: str, size: int) -> typing.Tuple[int, int] | None:
+    """
+    Разобрать заголовок Range с одним диапазоном байт
+    :param header: str - например "bytes=0-1023", "bytes=1024-", "bytes=-500"
+    :param size: int - размер файла
+    :return: tuple[int, int] | None - первый и последний байт; None,
+             если заголовок не задан или содержит несколько диапазонов
+             (тогда отдается весь файл)
+    """
+    unit, _, ranges = header.partition("=")
+    if unit.strip() != "bytes" or not ranges or "," in ranges:
+        return None
+    first, separator, last = ranges.strip().partition("-")
+    if not separator or not (first or last) or not (first or "0").isdigit() \
+            or not (last or "0").isdigit():
+        return None
+
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError(f"Range not satisfiable for {size} bytes")
+    return start, end
+
+
+def collect_garbage(scan: bool = False, batch_size: int = 500) -> GarbageReport:
+    """
+    Удалить содержимое без ссылок, брошенные загрузки и (при scan)
+    файлы старше ATTACHMENT_UPLOAD_TTL без строки Blob или AttachmentUpload -
+    например, оставшиеся после сбоя между переносом файла и фиксацией
+    транзакции или после удаления результата с незавершенной загрузкой
+    :param scan: bool - обойти каталог хранилища
+    :param batch_size: int
+    :return: GarbageReport
+    """
+    started: float = time.perf_counter()
+    blobs, freed = 0, 0
+    while True:
+        with transaction.atomic():
+            # Строки, которые сейчас получают новую ссылку, заблокированы и пропускаются
+            unreferenced: typing.List[tuple] = list(
+                Blob.objects.filter(refcount__lte=0)
+                .exclude(Exists(Attachment.objects.filter(blob=OuterRef("pk"))))
+                .select_for_update(skip_locked=True).values_list("sha256", "size")[:batch_size])
+            if not unreferenced:
+                break
+            Blob.objects.filter(pk__in=[sha256 for sha256, _ in unreferenced]).delete()
+            # Файлы удаляются до фиксации: новая загрузка того же содержимого
+            # ждет блокировку строки и затем не найдет старый файл
+            for sha256, size in unreferenced:
+                blob_path(sha256).unlink(missing_ok=True)
+                freed += size
+        blobs += len(unreferenced)
+
+    expired: datetime.datetime = timezone.now() - datetime.timedelta(
+        seconds=settings.ATTACHMENT_UPLOAD_TTL)
+    uploads: int = 0
+    for upload in AttachmentUpload.objects.filter(updated__lt=expired).iterator():
+        abort_upload(upload)
+        uploads += 1
+
+    orphans: int = _remove_orphans(batch_size) if scan else 0
+    return GarbageReport(blobs, uploads, orphans, freed, time.perf_counter() - started)
+
+
+def _complete_upload(upload: AttachmentUpload) -> Attachment | None:
+    """
+    Проверить хеш загруженного файла, перенести его в хранилище
+    и создать вложение. Вызывается в транзакции с заблокированной загрузкой
+    :param upload: AttachmentUpload
+    :return: Attachment | None - None, если хеш не совпал и загрузка отменена
+    """
+    source: Path = upload_path(upload)
+    digest: typing.Any = hashlib.sha256()
+    with open(source, "rb") as file:
+        for block in iter(lambda: file.read(BLOCK_SIZE), b""):
+            digest.update(block)
+    sha256: str = digest.hexdigest()
+    if upload.sha256 and upload.sha256 != sha256:
+        abort_upload(upload)
+        return None
+
+    quote: typing.Callable = connection.ops.quote_name
+    table: str = quote(Blob._meta.db_table)
+    with connection.cursor() as cursor:
+        # Строка блокируется до фиксации, поэтому сборка мусора
+        # не удалит файл между проверкой и созданием вложения
+        cursor.execute(
+            f"INSERT INTO {table} ({quote('sha256')}, {quote('size')}, {quote('refcount')}, "
+            f"{quote('created')}) VALUES (%s, %s, 1, %s) "
+            f"ON CONFLICT ({quote('sha256')}) "
+            f"DO UPDATE SET {quote('refcount')} = {table}.{quote('refcount')} + 1",
+            [sha256, upload.size, timezone.now()])
+
+    target: Path = blob_path(sha256)
+    if target.exists():
+        source.unlink()
+    else:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(source, target)
+
+    attachment: Attachment = Attachment.objects.create(
+        blob_id=sha256, result_id=upload.result_id, case_id=upload.case_id,
+        filename=upload.filename, content_type=upload.content_type,
+        author_id=upload.author_id)
+    upload.delete()
+    return attachment
+
+
+def _remove_orphans(batch_size: int) -> int:
+    """
+    Удалить старые файлы хранилища и загрузок, для которых нет строки
+    Blob или AttachmentUpload
+    :param batch_size: int
+    :return: int - число удаленных файлов
+    """
+    expired: float = time.time() - settings.ATTACHMENT_UPLOAD_TTL
+    root: Path = Path(settings.ATTACHMENT_ROOT)
+    removed: int = 0
+    for model, pattern in ((Blob, "blobs/*/*/*"), (AttachmentUpload, "uploads/*.part")):
+        paths: typing.List[Path] = []
+        for path in root.glob(pattern):
+            if path.stat().st_mtime < expired:
+                paths.append(path)
+            if len(paths) >= batch_size:
+                removed += _remove_unknown(model, paths)
+                paths = []
+        removed += _remove_unknown(model, paths)
+    return removed
+
+
+def _remove_unknown(model: typing.Any, paths: typing.List[Path]) -> int:
+    """
+    Удалить файлы, по именам которых не найдено строк
+    :param model: Blob | AttachmentUpload
+    :param paths: list[Path]
+    :return: int
+    """
+    keys: typing.Dict[str, Path] = {path.stem if model is AttachmentUpload else path.name: path
+                                    for path in paths}
+    known: typing.Set[str] = {str(key) for key in model.objects.filter(
+        pk__in=list(keys)).values_list("pk", flat=True)}
+    unknown: typing.List[Path] = [path for key, path in keys.items() if key not in known]
+    for path in unknown:
+        path.unlink(missing_ok=True)
+    return len(unknown)
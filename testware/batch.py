@@ -0,0 +1,224 @@
+"""
+Модуль пакетного создания, изменения и удаления тест-планов.
+
+Пакет проверяется несколькими запросами на множества, а не запросом на
+каждую операцию: изменяемые и удаляемые планы читаются с блокировкой
+одним in_bulk, активные авторы - одним запросом. Операции применяются
+в одной транзакции массовыми записями: удаление - одним UPDATE,
+изменение - bulk_update, создание - bulk_create; история
+(TestPlanHistory) и поисковые документы пишутся так же пачками.
+В режиме atomic пакет с ошибкой не применяется целиком, в режиме
+best effort применяются корректные операции, а ошибочные возвращаются
+с номером операции
+"""
+import typing
+
+from django.db import connection, transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from authentication.models import User
+from .models import TestPlan, record_plan_history
+from .search import index_objects
+
+OPERATIONS: typing.Tuple[str, ...] = ("create", "update", "delete")
+TITLE_MAX_LENGTH: int = TestPlan._meta.get_field('title').max_length
+# Поля плана, которые задает операция создания или изменения
+PLAN_FIELDS: typing.Tuple[str, ...] = (
+    "title", "description", "author_id", "start_date", "end_date", "is_current")
+
+
+class PlanBatchReport(typing.NamedTuple):
+    """
+    Итог пакета операций: результат и ошибки по каждой операции
+    """
+    applied: bool
+    results: typing.List[dict]
+
+    def as_dict(self) -> dict:
+        """
+        Отчет в виде словаря для ответа API
+        :return: dict
+        """
+        return {
+            "applied": self.applied,
+            "results": self.results
+        }
+
+
+def apply_plan_operations(operations: typing.Sequence[dict | None],
+                          errors: typing.Dict[int, dict], changed_by: typing.Any = None,
+                          atomic: bool = True) -> PlanBatchReport:
+    """
+    Проверить и применить пакет операций с тест-планами
+    :param operations: Sequence[dict | None] - op и поля операции: test_plan_id
+                       для update и delete; title, description, author,
+                       start_date, end_date, is_current для create и update
+                       (отсутствующие поля сбрасываются, как в testplan/update/);
+                       None - операция без данных, ее ошибка уже есть в errors
+    :param errors: dict[int, dict] - ошибки формата по номеру операции;
+                   дополняются ошибками проверки
+    :param changed_by: User | None - автор изменений для истории
+    :param atomic: bool - не применять пакет, если в нем есть ошибки
+    :return: PlanBatchReport
+    """
+    with transaction.atomic():
+        plans: typing.Dict[int, TestPlan] = _check_operations(operations, errors)
+        if errors and atomic:
+            return PlanBatchReport(False, [
+                {"index": index, "op": (operation or {}).get("op"),
+                 "status": "error" if index in errors else "skipped",
+                 **({"errors": errors[index]} if index in errors else {})}
+                for index, operation in enumerate(operations)])
+
+        valid: typing.List[typing.Tuple[int, dict]] = [
+            (index, operation) for index, operation in enumerate(operations)
+            if index not in errors and operation is not None]
+        plan_ids: typing.Dict[int, int] = _apply(valid, plans, changed_by)
+
+    results: typing.List[dict] = []
+    for index, operation in enumerate(operations):
+        # Операция без данных (None) всегда есть в errors
+        if index in errors or operation is None:
+            results.append({"index": index, "op": (operation or {}).get("op"),
+                            "status": "error", "errors": errors[index]})
+        else:
+            results.append({"index": index, "op": operation["op"],
+                            "status": f"{operation['op']}d", "test_plan_id": plan_ids[index]})
+    return PlanBatchReport(True, results)
+
+
+def _check_operations(operations: typing.Sequence[dict | None],
+                      errors: typing.Dict[int, dict]) -> typing.Dict[int, TestPlan]:
+    """
+    Проверить ссылки операций двумя запросами и заблокировать
+    изменяемые планы. Вызывается в транзакции
+    :param operations: Sequence[dict | None]
+    :param errors: dict[int, dict]
+    :return: dict[int, TestPlan] - найденные неудаленные планы по ID
+    """
+    checked: typing.List[typing.Tuple[int, dict]] = [
+        (index, operation) for index, operation in enumerate(operations)
+        if index not in errors and operation is not None]
+    plans: typing.Dict[int, TestPlan] = TestPlan.objects.select_for_update().order_by(
+        'pk').in_bulk({operation["test_plan_id"] for _, operation in checked
+                       if operation["op"] != "create"})
+    authors: typing.Set[int] = {operation["author"] for _, operation in checked
+                                if operation.get("author") is not None}
+    active_authors: typing.Set[int] = set(User.objects.filter(
+        pk__in=authors, is_active=True).values_list('pk', flat=True)) if authors else set()
+
+    seen: typing.Set[int] = set()
+    current: typing.List[int] = []
+    for index, operation in checked:
+        item_errors: typing.Dict[str, list] = {}
+        if operation["op"] != "create":
+            if operation["test_plan_id"] not in plans:
+                item_errors["test_plan_id"] = ["No such test plan"]
+            elif operation["test_plan_id"] in seen:
+                item_errors["test_plan_id"] = ["Test plan is already changed in this batch"]
+            seen.add(operation["test_plan_id"])
+        if operation["op"] != "delete":
+            if len(operation["title"]) > TITLE_MAX_LENGTH:
+                item_errors["title"] = [
+                    f"Ensure this field has no more than {TITLE_MAX_LENGTH} characters"]
+            if operation.get("author") is not None and operation["author"] not in active_authors:
+                item_errors["author"] = ["No such author"]
+            if operation.get("start_date") is not None and operation.get("end_date") is not None \
+                    and operation["start_date"] > operation["end_date"]:
+                item_errors["end_date"] = ["Incorrect date"]
+        if item_errors:
+            errors[index] = item_errors
+        elif operation.get("is_current"):
+            current.append(index)
+
+    for index in current[1:]:
+        errors[index] = {"is_current": ["Only one test plan in a batch can be made current"]}
+    return plans
+
+
+def _apply(operations: typing.List[typing.Tuple[int, dict]], plans: typing.Dict[int, TestPlan],
+           changed_by: typing.Any) -> typing.Dict[int, int]:
+    """
+    Применить проверенные операции массовыми записями. Вызывается
+    в транзакции с заблокированными планами
+    :param operations: list[tuple[int, dict]] - номер и операция
+    :param plans: dict[int, TestPlan]
+    :param changed_by: User | None
+    :return: dict[int, int] - ID плана по номеру операции
+    """
+    now: typing.Any = timezone.now()
+    plan_ids: typing.Dict[int, int] = {
+        index: operation["test_plan_id"] for index, operation in operations
+        if operation["op"] != "create"}
+    deleted: typing.List[int] = [operation["test_plan_id"] for _, operation in operations
+                                 if operation["op"] == "delete"]
+    updates: typing.List[typing.Tuple[TestPlan, dict]] = [
+        (plans[operation["test_plan_id"]], operation) for _, operation in operations
+        if operation["op"] == "update"]
+    creates: typing.List[typing.Tuple[int, dict]] = [
+        (index, operation) for index, operation in operations if operation["op"] == "create"]
+    new_current: typing.Any = next((operation.get("test_plan_id", 0) for _, operation in operations
+                                    if operation.get("is_current")), None)
+
+    # Удаленные планы снимаются с текущих в том же UPDATE, история пишется в update()
+    if deleted:
+        TestPlan.objects.filter(pk__in=deleted).update(
+            deleted=now, is_current=False, changed_by=changed_by)
+
+    # Текущие планы снимаются до записи нового текущего: частичный
+    # уникальный индекс проверяется для каждой строки сразу
+    cleared: typing.Set[int] = {plan.pk for plan, operation in updates
+                                if plan.is_current and not operation.get("is_current")}
+    if new_current is not None or cleared:
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))",
+                               [f"{TestPlan._meta.db_table}.is_current"])
+        stale: Q = Q(pk__in=cleared) if new_current is None else ~Q(pk=new_current)
+        cleared.update(TestPlan.objects.filter(stale, is_current=True).values_list('pk', flat=True))
+        TestPlan.objects.filter(pk__in=cleared).update(is_current=False, changed_by=changed_by)
+
+    entries: typing.Dict[int, typing.Tuple[dict, dict]] = {}
+    for plan, operation in updates:
+        if plan.pk in cleared:
+            # Снятие с текущих уже записано в историю
+            plan._recorded["is_current"] = False
+        _assign(plan, operation)
+        plan.modified = now
+        state: typing.Dict[str, typing.Any] = plan._history_state()
+        changes: dict = {name: value for name, value in state.items()
+                         if plan._recorded.get(name) != value}
+        if changes:
+            entries[plan.pk] = (changes, state)
+        plan._recorded = state
+    # Обычный QuerySet: TestPlanQuerySet.update записал бы историю без автора изменения
+    QuerySet(TestPlan).bulk_update([plan for plan, _ in updates], [*PLAN_FIELDS, "modified"])
+    record_plan_history(entries, changed_by)
+
+    created: typing.List[TestPlan] = TestPlan.objects.bulk_create(
+        [_assign(TestPlan(), operation) for _, operation in creates])
+    record_plan_history({plan.pk: (plan._history_state(), plan._history_state())
+                         for plan in created}, changed_by, created=True)
+    plan_ids.update((index, plan.pk) for (index, _), plan in zip(creates, created))
+
+    # bulk_create, bulk_update и update() не вызывают сигналы поискового индекса
+    index_objects([*(plan for plan, _ in updates), *created,
+                   *(TestPlan(pk=pk, deleted=now) for pk in deleted)])
+    return plan_ids
+
+
+def _assign(plan: TestPlan, operation: dict) -> TestPlan:
+    """
+    Задать поля плана из операции создания или изменения
+    :param plan: TestPlan
+    :param operation: dict
+    :return: TestPlan
+    """
+    plan.title = operation["title"]
+    plan.description = operation.get("description")
+    plan.author_id = operation.get("author")
+    plan.start_date = operation.get("start_date")
+    plan.end_date = operation.get("end_date")
+    plan.is_current = bool(operation.get("is_current"))
+    return plan
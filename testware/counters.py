@@ -0,0 +1,170 @@
+"""
+Модуль счетчиков статусов для дашборда.
+
+Счетчики прогонов тест-плана (PlanStatusCounter) и результатов прогона
+(RunStatusCounter) меняются в той же транзакции, что и сами статусы:
+одиночные изменения - в save()/delete() моделей, массовые - функциями
+этого модуля, которые обновляют строки и счетчики одним проходом без
+запроса на строку. rebuild_counters пересчитывает счетчики с нуля
+на случай изменений в обход этих путей (например, QuerySet.update).
+"""
+import typing
+from collections import Counter, defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Count, F, QuerySet
+
+from .models import Attachment, AttachmentUpload, Blob, PlanStatusCounter, RunStatusCounter, \
+    TestResult, TestRun, adjust_counters
+
+
+def update_results_status(queryset: QuerySet, status: str) -> int:
+    """
+    Сменить статус результатов выборки и поправить счетчики прогонов.
+    Строки блокируются, а их прежний статус возвращается тем же UPDATE,
+    поэтому параллельные изменения не искажают счетчики
+    :param queryset: QuerySet[TestResult]
+    :param status: str
+    :return: int - число измененных результатов
+    """
+    if status not in TestResult.Status.values:
+        raise ValueError(f"Unknown test result status '{status}'")
+
+    quote: typing.Callable = connection.ops.quote_name
+    table: str = quote(TestResult._meta.db_table)
+    subquery, params = queryset.values('pk').query.sql_with_params()
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"WITH changed AS ("
+                f"UPDATE {table} SET {quote('status')} = %s "
+                f"FROM (SELECT {quote('id')}, {quote('status')} FROM {table} "
+                f"WHERE {quote('id')} IN ({subquery}) AND {quote('status')} <> %s "
+                f"ORDER BY {quote('id')} FOR UPDATE) AS old "
+                f"WHERE {table}.{quote('id')} = old.{quote('id')} "
+                f"RETURNING {table}.{quote('run_id')}, old.{quote('status')}) "
+                f"SELECT {quote('run_id')}, {quote('status')}, COUNT(*) FROM changed "
+                f"GROUP BY {quote('run_id')}, {quote('status')}",
+                [status, *params, status])
+            changed: typing.List[tuple] = cursor.fetchall()
+
+        deltas: typing.Counter = Counter()
+        for run_id, old_status, count in changed:
+            deltas[(run_id, old_status)] -= count
+            deltas[(run_id, status)] += count
+        adjust_counters(RunStatusCounter, "run_id", deltas)
+
+    return sum(count for _, _, count in changed)
+
+
+def delete_results(queryset: QuerySet) -> int:
+    """
+    Удалить результаты выборки и уменьшить счетчики прогонов.
+    Удаление идет в обход каскада Django, поэтому вложения и загрузки
+    результатов удаляются здесь же, а ссылки на содержимое вложений
+    уменьшаются по одному UPDATE на каждое число ссылок
+    :param queryset: QuerySet[TestResult]
+    :return: int - число удаленных результатов
+    """
+    quote: typing.Callable = connection.ops.quote_name
+    table: str = quote(TestResult._meta.db_table)
+    subquery, params = queryset.values('pk').query.sql_with_params()
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"WITH removed AS ("
+                f"DELETE FROM {quote(Attachment._meta.db_table)} "
+                f"WHERE {quote('result_id')} IN ({subquery}) "
+                f"RETURNING {quote('blob_id')}) "
+                f"SELECT {quote('blob_id')}, COUNT(*) FROM removed GROUP BY {quote('blob_id')}",
+                params)
+            released: typing.Dict[int, typing.List[str]] = defaultdict(list)
+            for blob_id, count in cursor.fetchall():
+                released[count].append(blob_id)
+        for count, blob_ids in released.items():
+            Blob.objects.filter(pk__in=blob_ids).update(refcount=F("refcount") - count)
+        # Недогруженные части удаляет сборка мусора (collect_garbage(scan=True))
+        AttachmentUpload.objects.filter(result_id__in=queryset.values('pk')).delete()
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"WITH removed AS ("
+                f"DELETE FROM {table} WHERE {quote('id')} IN ({subquery}) "
+                f"RETURNING {quote('run_id')}, {quote('status')}) "
+                f"SELECT {quote('run_id')}, {quote('status')}, COUNT(*) FROM removed "
+                f"GROUP BY {quote('run_id')}, {quote('status')}",
+                params)
+            removed: typing.List[tuple] = cursor.fetchall()
+
+        adjust_counters(RunStatusCounter, "run_id", {
+            (run_id, status): -count for run_id, status, count in removed})
+
+    return sum(count for _, _, count in removed)
+
+
+def count_new_results(run: TestRun, statuses: typing.Iterable[str]) -> None:
+    """
+    Учесть в счетчиках прогона только что вставленные результаты
+    :param run: TestRun
+    :param statuses: Iterable[str] - статусы вставленных строк
+    :return: None
+    """
+    adjust_counters(RunStatusCounter, "run_id", {
+        (run.pk, status): count for status, count in Counter(statuses).items()})
+
+
+def rebuild_counters() -> typing.Dict[str, int]:
+    """
+    Пересчитать все счетчики с нуля.
+    Таблицы прогонов и результатов блокируются от записи до конца
+    транзакции, чтобы пересчет не разошелся с параллельными изменениями
+    :return: dict[str, int] - сколько счетчиков каждой таблицы было исправлено
+    """
+    quote: typing.Callable = connection.ops.quote_name
+    corrected: typing.Dict[str, int] = {}
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"LOCK TABLE {quote(TestRun._meta.db_table)}, "
+                f"{quote(TestResult._meta.db_table)} IN SHARE MODE")
+
+        for model, owner_field, source in (
+                (PlanStatusCounter, "plan_id",
+                 TestRun.objects.filter(deleted=None).values('plan_id', 'status')),
+                (RunStatusCounter, "run_id",
+                 TestResult.objects.values('run_id', 'status'))):
+            actual: typing.Dict[tuple, int] = {
+                (row[owner_field], row["status"]): row["count"]
+                for row in source.annotate(count=Count('pk')).order_by()}
+            stored: typing.Dict[tuple, int] = {
+                (owner_id, status): count for owner_id, status, count
+                in model.objects.filter(count__gt=0).values_list(owner_field, 'status', 'count')}
+
+            model.objects.all().delete()
+            model.objects.bulk_create(
+                [model(**{owner_field: owner_id}, status=status, count=count)
+                 for (owner_id, status), count in actual.items()],
+                batch_size=1000)
+            corrected[model.__name__] = sum(
+                1 for key in actual.keys() | stored.keys() if actual.get(key) != stored.get(key))
+
+    return corrected
+
+
+def get_counters(model: typing.Any, owner_field: str, owner_id: int,
+                 statuses: typing.Iterable[str]) -> typing.Dict[str, int]:
+    """
+    Прочитать счетчики одного тест-плана или прогона: одна выборка
+    по уникальному индексу, не более строки на статус
+    :param model: PlanStatusCounter | RunStatusCounter
+    :param owner_field: str - plan_id или run_id
+    :param owner_id: int
+    :param statuses: Iterable[str] - все статусы, отсутствующие равны 0
+    :return: dict[str, int]
+    """
+    counts: typing.Dict[str, int] = dict(
+        model.objects.filter(**{owner_field: owner_id}).values_list('status', 'count'))
+    return {status: counts.get(status, 0) for status in statuses}
@@ -0,0 +1,140 @@
+"""
+Модуль потоковой выгрузки тест-планов, тест-кейсов и результатов
+в CSV и NDJSON.
+
+Строки читаются через QuerySet.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+(в PostgreSQL - серверным курсором) в виде кортежей values_list
+и сразу кодируются в блоки около EXPORT_BLOCK_SIZE байт, которые
+отдаются StreamingHttpResponse. В памяти одновременно находятся только
+одна пачка строк курсора и один блок, поэтому расход памяти не зависит
+от числа строк. Блоки можно сжимать zstd на лету
+"""
+import csv
+import json
+import typing
+
+import zstandard
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+
+from .models import TestCase, TestPlan, TestResult, TestSuite
+
+# Размер блока, который отдается клиенту за раз
+EXPORT_BLOCK_SIZE: int = 64 * 1024
+
+FORMATS: typing.Dict[str, str] = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson"
+}
+
+# Выгружаемые столбцы каждого типа объектов
+EXPORT_FIELDS: typing.Dict[str, typing.Tuple[str, ...]] = {
+    "plans": ("id", "title", "description", "author_id", "start_date", "end_date",
+              "is_current", "created", "modified"),
+    "cases": ("id", "title", "description", "steps", "expected_result", "suite_id",
+              "author_id", "created", "modified"),
+    "results": ("id", "run_id", "case_id", "name", "status", "duration", "message", "created")
+}
+
+
+class _Line:
+    """
+    Псевдофайл для csv.writer: writerow возвращает записанную строку
+    """
+
+    def write(self, value: str) -> str:
+        """
+        Вернуть строку вместо записи
+        :param value: str
+        :return: str
+        """
+        return value
+
+
+def export_queryset(entity: str, plan_id: int | None = None, run_id: int | None = None,
+                    suite: TestSuite | None = None) -> QuerySet:
+    """
+    Строки выгрузки неудаленных объектов в порядке ID
+    :param entity: str - plans, cases или results
+    :param plan_id: int | None - результаты прогонов тест-плана
+    :param run_id: int | None - результаты прогона
+    :param suite: TestSuite | None - тест-кейсы поддерева сьюта
+    :return: QuerySet[tuple]
+    """
+    queryset: QuerySet
+    if entity == "plans":
+        queryset = TestPlan.objects.all()
+    elif entity == "cases":
+        queryset = TestCase.objects.filter(deleted=None)
+        if suite is not None:
+            queryset = queryset.filter(path__startswith=suite.path)
+    else:
+        queryset = TestResult.objects.filter(run__deleted=None)
+        if plan_id is not None:
+            queryset = queryset.filter(run__plan_id=plan_id)
+        if run_id is not None:
+            queryset = queryset.filter(run_id=run_id)
+    return queryset.order_by("id").values_list(*EXPORT_FIELDS[entity])
+
+
+def stream_export(queryset: QuerySet, entity: str, export_format: str,
+                  compress: bool = False) -> typing.Iterator[bytes]:
+    """
+    Закодировать строки выгрузки блоками
+    :param queryset: QuerySet[tuple] - строки export_queryset
+    :param entity: str
+    :param export_format: str - csv или ndjson
+    :param compress: bool - сжимать блоки zstd
+    :return: Iterator[bytes]
+    """
+    blocks: typing.Iterator[bytes] = _blocks(_lines(queryset, entity, export_format))
+    if not compress:
+        yield from blocks
+        return
+
+    compressor: typing.Any = zstandard.ZstdCompressor().compressobj()
+    for block in blocks:
+        compressed: bytes = compressor.compress(block)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _lines(queryset: QuerySet, entity: str, export_format: str) -> typing.Iterator[str]:
+    """
+    Строки выгрузки в текстовом виде; CSV начинается с заголовка
+    :param queryset: QuerySet[tuple]
+    :param entity: str
+    :param export_format: str
+    :return: Iterator[str]
+    """
+    fields: typing.Tuple[str, ...] = EXPORT_FIELDS[entity]
+    rows: typing.Iterator[tuple] = queryset.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    if export_format == "csv":
+        writer: typing.Any = csv.writer(_Line())
+        yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow(row)
+    else:
+        encoder: json.JSONEncoder = DjangoJSONEncoder(ensure_ascii=False)
+        for row in rows:
+            yield encoder.encode(dict(zip(fields, row))) + "\n"
+
+
+def _blocks(lines: typing.Iterator[str]) -> typing.Iterator[bytes]:
+    """
+    Собрать строки в блоки около EXPORT_BLOCK_SIZE байт
+    :param lines: Iterator[str]
+    :return: Iterator[bytes]
+    """
+    block: typing.List[str] = []
+    size: int = 0
+    for line in lines:
+        block.append(line)
+        size += len(line)
+        if size >= EXPORT_BLOCK_SIZE:
+            yield "".join(block).encode()
+            block, size = [], 0
+    if block:
+        yield "".join(block).encode()
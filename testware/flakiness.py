@@ -0,0 +1,183 @@
+"""
+Модуль оценки нестабильности (flakiness) тест-кейсов.
+
+Нестабильность кейса - доля смен passed/failed между соседними из
+последних FLAKY_WINDOW результатов. Окно хранится в CaseFlakiness
+битовой маской, поэтому новый результат сдвигает маску и пересчитывает
+число смен за постоянное время, без чтения истории результатов. Пакет
+результатов обновляет строки кейсов двумя запросами: чтение строк
+с блокировкой и INSERT ... ON CONFLICT DO UPDATE (по запросу
+на UPSERT_BATCH_SIZE кейсов). Учитываются
+результаты со статусом passed или failed, привязанные к тест-кейсу,
+в момент создания; если статусы исправлены задним числом,
+rebuild_flakiness пересчитывает оценки по истории результатов.
+"""
+import collections
+import typing
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from .models import CaseFlakiness, TestResult
+
+# Статусы, которые считаются исходом результата; остальные пропускаются
+OUTCOME_STATUSES: typing.Tuple[str, ...] = (TestResult.Status.PASSED, TestResult.Status.FAILED)
+
+# Строк в одном INSERT: 6 параметров на строку укладываются в лимит SQLite
+UPSERT_BATCH_SIZE: int = 2000
+UPSERT_COLUMNS: typing.Tuple[str, ...] = (
+    'case_id', 'outcomes', 'observed', 'flips', 'score', 'updated')
+
+
+class FlakinessWindow(typing.NamedTuple):
+    """
+    Окно последних исходов тест-кейса
+    """
+    outcomes: int
+    observed: int
+
+    def push(self, status: str, window: int) -> "FlakinessWindow":
+        """
+        Окно после нового исхода
+        :param status: str - passed или failed
+        :param window: int - размер окна
+        :return: FlakinessWindow
+        """
+        return FlakinessWindow(
+            ((self.outcomes << 1) | (status == TestResult.Status.FAILED)) & ((1 << window) - 1),
+            min(self.observed + 1, window))
+
+    @property
+    def flips(self) -> int:
+        """
+        Число смен исхода между соседними результатами окна
+        :return: int
+        """
+        if self.observed < 2:
+            return 0
+        return bin((self.outcomes ^ (self.outcomes >> 1))
+                   & ((1 << (self.observed - 1)) - 1)).count("1")
+
+    @property
+    def score(self) -> float:
+        """
+        Доля смен исхода среди соседних пар окна
+        :return: float
+        """
+        return self.flips / (self.observed - 1) if self.observed > 1 else 0.0
+
+
+def record_outcomes(results: typing.Iterable[typing.Tuple[int | None, str]]) -> int:
+    """
+    Учесть новые результаты в оценках нестабильности их тест-кейсов.
+    Результаты без кейса и со статусами кроме passed и failed пропускаются
+    :param results: Iterable[tuple[int | None, str]] - ID тест-кейса и статус
+                    в порядке получения результатов
+    :return: int - число обновленных тест-кейсов
+    """
+    window: int = settings.FLAKY_WINDOW
+    outcomes: typing.Dict[int, typing.List[str]] = collections.defaultdict(list)
+    for case_id, status in results:
+        if case_id is not None and status in OUTCOME_STATUSES:
+            outcomes[case_id].append(status)
+    if not outcomes:
+        return 0
+
+    with transaction.atomic():
+        current: typing.Dict[int, FlakinessWindow] = {
+            case_id: FlakinessWindow(bits, observed)
+            for case_id, bits, observed in CaseFlakiness.objects.filter(
+                case_id__in=list(outcomes)).order_by('case_id').select_for_update()
+            .values_list('case_id', 'outcomes', 'observed')}
+
+        updated: typing.Any = timezone.now()
+        rows: typing.List[tuple] = []
+        for case_id, statuses in sorted(outcomes.items()):
+            state: FlakinessWindow = current.get(case_id, FlakinessWindow(0, 0))
+            for status in statuses[-window:]:
+                state = state.push(status, window)
+            rows.append((case_id, state.outcomes, state.observed, state.flips, state.score,
+                         updated))
+        _upsert(rows)
+    return len(rows)
+
+
+def _upsert(rows: typing.List[tuple]) -> None:
+    """
+    Записать строки оценок запросами INSERT ... ON CONFLICT DO UPDATE.
+    Сырой SQL вместо bulk_create: на пакетах из десятков тысяч кейсов
+    подготовка моделей и параметров в ORM дороже самого запроса
+    :param rows: list[tuple] - значения столбцов UPSERT_COLUMNS
+    :return: None
+    """
+    quote: typing.Callable = connection.ops.quote_name
+    columns: str = ", ".join(quote(column) for column in UPSERT_COLUMNS)
+    placeholder: str = f"({', '.join(['%s'] * len(UPSERT_COLUMNS))})"
+    assignments: str = ", ".join(
+        f"{quote(column)} = EXCLUDED.{quote(column)}" for column in UPSERT_COLUMNS[1:])
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            batch: typing.List[tuple] = rows[start:start + UPSERT_BATCH_SIZE]
+            cursor.execute(
+                f"INSERT INTO {quote(CaseFlakiness._meta.db_table)} ({columns}) "
+                f"VALUES {', '.join([placeholder] * len(batch))} "
+                f"ON CONFLICT ({quote('case_id')}) DO UPDATE SET {assignments}",
+                [value for row in batch for value in row])
+
+
+def flaky_cases(min_runs: int = 2) -> QuerySet:
+    """
+    Нестабильные неудаленные тест-кейсы по убыванию оценки
+    :param min_runs: int - наименьшее число результатов в окне
+    :return: QuerySet[CaseFlakiness]
+    """
+    return CaseFlakiness.objects.filter(
+        flips__gt=0, observed__gte=min_runs, case__deleted=None).select_related(
+            'case').order_by('-score', 'case_id')
+
+
+def flip_timeline(case_id: int) -> typing.List[dict]:
+    """
+    Последние FLAKY_WINDOW исходов тест-кейса от старых к новым с отметкой
+    смены исхода. Читается по индексу (case, id) результатов
+    :param case_id: int
+    :return: list[dict] - result, run, status, created, flip
+    """
+    results: typing.List[dict] = list(TestResult.objects.filter(
+        case_id=case_id, status__in=OUTCOME_STATUSES).order_by('-id').values(
+            'id', 'run_id', 'status', 'created')[:settings.FLAKY_WINDOW])
+    timeline: typing.List[dict] = []
+    previous: str | None = None
+    for result in reversed(results):
+        timeline.append({
+            "result": result["id"],
+            "run": result["run_id"],
+            "status": result["status"],
+            "created": result["created"].isoformat(),
+            "flip": previous is not None and result["status"] != previous
+        })
+        previous = result["status"]
+    return timeline
+
+
+def rebuild_flakiness(batch_size: int = 2000) -> int:
+    """
+    Пересчитать оценки всех тест-кейсов по истории результатов
+    :param batch_size: int
+    :return: int - число тест-кейсов с результатами
+    """
+    with transaction.atomic():
+        CaseFlakiness.objects.all().delete()
+        batch: typing.List[tuple] = []
+        for result in TestResult.objects.filter(
+                case__isnull=False, status__in=OUTCOME_STATUSES).order_by(
+                    'case_id', 'id').values_list('case_id', 'status') \
+                .iterator(chunk_size=batch_size):
+            batch.append(result)
+            if len(batch) >= batch_size:
+                record_outcomes(batch)
+                batch = []
+        record_outcomes(batch)
+        return CaseFlakiness.objects.count()
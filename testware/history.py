@@ -0,0 +1,60 @@
+"""
+Модуль чтения истории изменений тест-планов.
+
+История только пополняется: версию с новыми значениями измененных полей
+добавляет каждое сохранение тест-плана и каждое массовое изменение через
+QuerySet.update (TestPlan.save, TestPlanQuerySet.update), а каждая
+HISTORY_SNAPSHOT_INTERVAL-я версия хранит и полное состояние плана.
+Состояние на момент времени собирается из последнего снимка до этого
+момента и изменений после него: два запроса по индексу (план, время),
+не больше HISTORY_SNAPSHOT_INTERVAL строк независимо от длины истории.
+Значения полей возвращаются в том виде, в каком хранятся в JSON
+(даты - строками ISO 8601, автор - ID)
+"""
+import datetime
+import typing
+
+from django.db.models import QuerySet
+
+from .models import TestPlanHistory
+
+
+class PlanState(typing.NamedTuple):
+    """
+    Состояние тест-плана на момент времени
+    """
+    version: int
+    changed: datetime.datetime
+    state: typing.Dict[str, typing.Any]
+
+    def as_dict(self) -> dict:
+        """
+        Состояние в виде словаря для ответа API
+        :return: dict
+        """
+        return {
+            "version": self.version,
+            "changed": self.changed.isoformat(),
+            "state": self.state
+        }
+
+
+def plan_state_at(plan_id: int, moment: datetime.datetime) -> PlanState | None:
+    """
+    Восстановить состояние тест-плана на момент времени
+    :param plan_id: int
+    :param moment: datetime
+    :return: PlanState | None - None, если план тогда еще не существовал
+    """
+    history: QuerySet = TestPlanHistory.objects.filter(plan_id=plan_id, changed__lte=moment)
+    snapshot: tuple | None = history.filter(snapshot__isnull=False).order_by(
+        '-changed', '-version').values_list('version', 'changed', 'snapshot').first()
+    if snapshot is None:
+        return None
+
+    version, changed, state = snapshot
+    for version, changed, changes in history.filter(
+            version__gt=version, changed__gte=changed).order_by('version').values_list(
+                'version', 'changed', 'changes'):
+        state.update(changes)
+    return PlanState(version, changed, state)
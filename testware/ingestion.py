@@ -0,0 +1,202 @@
+"""
+Модуль массовой загрузки результатов тестов в прогон.
+
+Строки проверяются в памяти: единственный запрос при проверке - выборка
+существующих тест-кейсов, на которые ссылается пакет. Корректные строки
+вставляются пачками через bulk_create, а большие пакеты в PostgreSQL -
+командой COPY, которая обходит разбор отдельных INSERT. Счетчики статусов
+прогона и оценки нестабильности тест-кейсов обновляются в той же
+транзакции. Ошибочные строки не прерывают загрузку и возвращаются
+в отчете с номером строки.
+"""
+import csv
+import io
+import math
+import time
+import typing
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .counters import count_new_results
+from .flakiness import record_outcomes
+from .models import TestCase, TestResult, TestRun
+
+RESULT_STATUSES: typing.FrozenSet[str] = frozenset(TestResult.Status.values)
+NAME_MAX_LENGTH: int = TestResult._meta.get_field('name').max_length
+
+# Столбцы COPY; пустое значение без кавычек в CSV означает NULL
+COPY_COLUMNS: typing.Tuple[str, ...] = (
+    'run_id', 'case_id', 'name', 'status', 'duration', 'message', 'created')
+
+
+class IngestionReport(typing.NamedTuple):
+    """
+    Результат загрузки пакета
+    """
+    created: int
+    errors: typing.List[dict]
+    method: str
+    elapsed: float
+
+    @property
+    def throughput(self) -> float:
+        """
+        Число загруженных строк в секунду
+        :return: float
+        """
+        return self.created / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> dict:
+        """
+        Отчет в виде словаря для ответа API
+        :return: dict
+        """
+        return {
+            "created": self.created,
+            "errors": self.errors,
+            "method": self.method,
+            "elapsed": round(self.elapsed, 3),
+            "throughput": round(self.throughput, 1)
+        }
+
+
+def ingest_results(run: TestRun, rows: typing.Sequence[typing.Any],
+                   use_copy: bool | None = None) -> IngestionReport:
+    """
+    Проверить и загрузить результаты тестов в прогон
+    :param run: TestRun
+    :param rows: Sequence[dict] - name, status, case, duration, message
+    :param use_copy: bool | None - None: COPY для пакетов от
+    TESTRUN_RESULT_COPY_THRESHOLD строк, если база - PostgreSQL
+    :return: IngestionReport
+    """
+    started: float = time.perf_counter()
+    results, errors = validate_results(rows)
+
+    if use_copy is None:
+        use_copy = len(results) >= settings.TESTRUN_RESULT_COPY_THRESHOLD
+    use_copy = use_copy and connection.vendor == "postgresql"
+
+    with transaction.atomic():
+        if use_copy:
+            _copy_results(run, results)
+        else:
+            TestResult.objects.bulk_create(
+                [TestResult(run=run, **result) for result in results],
+                batch_size=settings.TESTRUN_RESULT_BATCH_SIZE)
+        count_new_results(run, (result["status"] for result in results))
+        record_outcomes((result["case_id"], result["status"]) for result in results)
+
+    return IngestionReport(len(results), errors, "copy" if use_copy else "bulk_create",
+                           time.perf_counter() - started)
+
+
+def validate_results(rows: typing.Sequence[typing.Any]) -> tuple:
+    """
+    Проверить строки пакета без запросов на каждую строку
+    :param rows: Sequence[dict]
+    :return: tuple[list[dict], list[dict]] - корректные строки и ошибки
+    """
+    results: typing.List[dict] = []
+    errors: typing.List[dict] = []
+    case_refs: typing.List[tuple] = []
+
+    for index, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors.append({"row": index, "errors": {"error": ["Result must be an object"]}})
+            continue
+
+        row_errors, result = _validate_row(row)
+        if row_errors:
+            errors.append({"row": index, "errors": row_errors})
+            continue
+
+        results.append(result)
+        if result["case_id"] is not None:
+            case_refs.append((index, result))
+
+    if case_refs:
+        existing: typing.Set[int] = set(TestCase.objects.filter(
+            pk__in={result["case_id"] for _, result in case_refs},
+            deleted=None).values_list('pk', flat=True))
+        missing: typing.List[int] = [
+            index for index, result in case_refs if result["case_id"] not in existing]
+        if missing:
+            results = [result for result in results
+                       if result["case_id"] is None or result["case_id"] in existing]
+            errors.extend({"row": index, "errors": {"case": ["No such test case"]}}
+                          for index in missing)
+            errors.sort(key=lambda item: item["row"])
+
+    return results, errors
+
+
+def _validate_row(row: dict) -> tuple:
+    """
+    Проверить одну строку
+    :param row: dict
+    :return: tuple[dict, dict] - ошибки по полям и нормализованная строка
+    """
+    row_errors: typing.Dict[str, list] = {}
+
+    name: typing.Any = row.get("name")
+    if not isinstance(name, str) or not name.strip():
+        row_errors["name"] = ["Name is required"]
+    elif len(name) > NAME_MAX_LENGTH:
+        row_errors["name"] = [f"Ensure this field has no more than {NAME_MAX_LENGTH} characters"]
+
+    result_status: typing.Any = row.get("status")
+    if result_status not in RESULT_STATUSES:
+        row_errors["status"] = [f"Status must be one of: {', '.join(TestResult.Status.values)}"]
+
+    duration: typing.Any = row.get("duration")
+    if duration is not None and (isinstance(duration, bool)
+                                 or not isinstance(duration, (int, float))
+                                 or not math.isfinite(duration) or duration < 0):
+        row_errors["duration"] = ["Duration must be a non-negative number"]
+
+    case_id: typing.Any = row.get("case")
+    if case_id is not None and (isinstance(case_id, bool) or not isinstance(case_id, int)):
+        row_errors["case"] = ["Case must be an integer ID"]
+
+    message: typing.Any = row.get("message") or ""
+    if not isinstance(message, str):
+        row_errors["message"] = ["Message must be a string"]
+
+    if row_errors:
+        return row_errors, None
+
+    return None, {
+        "name": name,
+        "status": result_status,
+        "duration": duration,
+        "case_id": case_id,
+        "message": message
+    }
+
+
+def _copy_results(run: TestRun, results: typing.List[dict]) -> None:
+    """
+    Загрузить строки командой COPY ... FROM STDIN в формате CSV
+    :param run: TestRun
+    :param results: list[dict]
+    :return: None
+    """
+    created: str = timezone.now().isoformat()
+    buffer: io.StringIO = io.StringIO()
+    writer: typing.Any = csv.writer(buffer)
+    for result in results:
+        writer.writerow((run.pk, result["case_id"], result["name"], result["status"],
+                         result["duration"], result["message"], created))
+    buffer.seek(0)
+
+    quote: typing.Callable = connection.ops.quote_name
+    columns: str = ", ".join(quote(column) for column in COPY_COLUMNS)
+    with connection.cursor() as cursor:
+        # Пустая строка в name и message - это строка, а не NULL
+        cursor.copy_expert(
+            f"COPY {quote(TestResult._meta.db_table)} ({columns}) FROM STDIN "
+            f"WITH (FORMAT csv, FORCE_NOT_NULL ({quote('name')}, {quote('message')}))",
+            buffer)
@@ -0,0 +1,213 @@
+"""
+Модуль импорта отчетов JUnit XML (в том числе pytest --junitxml) в прогон.
+
+Отчет разбирается потоково (ElementTree.iterparse): каждый разобранный
+testcase сразу отдается дальше и удаляется из дерева вместе с прочими
+дочерними элементами сьюта, поэтому память не растет с размером файла.
+Результаты копятся пачками по JUNIT_IMPORT_BATCH_SIZE строк; на пачку -
+один запрос существующих тест-кейсов, вставка новых вместе с поисковыми
+документами и загрузка результатов через testware.ingestion (bulk_create или COPY, счетчики
+статусов и оценки нестабильности). Тест-кейсы сопоставляются по названию
+внутри выбранного сьюта: "<classname>.<name>", обрезанное до длины
+названия тест-кейса. Импорт идет в одной транзакции: испорченный файл
+не оставляет в прогоне половину отчета
+"""
+import math
+import time
+import typing
+from xml.etree import ElementTree
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .ingestion import ingest_results
+from .models import SearchDocument, TestCase, TestResult, TestRun, TestSuite
+
+SUITE_TAGS: typing.FrozenSet[str] = frozenset(("testsuites", "testsuite"))
+TITLE_MAX_LENGTH: int = TestCase._meta.get_field('title').max_length
+# Новых тест-кейсов в одном INSERT: параметры укладываются в лимит SQLite
+CREATE_BATCH_SIZE: int = 2000
+
+
+class JUnitImportReport(typing.NamedTuple):
+    """
+    Итог импорта отчета
+    """
+    created: int
+    cases: int
+    errors: typing.List[dict]
+    batches: int
+    elapsed: float
+
+    @property
+    def throughput(self) -> float:
+        """
+        Число загруженных результатов в секунду
+        :return: float
+        """
+        return self.created / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> dict:
+        """
+        Отчет в виде словаря для ответа API
+        :return: dict
+        """
+        return {
+            "created": self.created,
+            "cases": self.cases,
+            "errors": self.errors,
+            "batches": self.batches,
+            "elapsed": round(self.elapsed, 3),
+            "throughput": round(self.throughput, 1)
+        }
+
+
+def parse_junit(source: typing.Any) -> typing.Iterator[dict]:
+    """
+    Потоково разобрать отчет JUnit XML
+    :param source: str | BinaryIO - путь к файлу или поток
+    :return: Iterator[dict] - name, status, duration, message по порядку testcase
+    """
+    parents: typing.List[ElementTree.Element] = []
+    for event, element in ElementTree.iterparse(source, events=("start", "end")):
+        if event == "start":
+            parents.append(element)
+            continue
+
+        parents.pop()
+        if element.tag == "testcase":
+            yield _testcase_row(element)
+        if parents and parents[-1].tag in SUITE_TAGS:
+            # Разобранный элемент больше не нужен: сьют не копит testcase,
+            # properties и system-out, и память не растет с размером отчета
+            parents[-1].remove(element)
+
+
+def import_junit(source: typing.Any, run: TestRun, suite: TestSuite,
+                 batch_size: int | None = None) -> JUnitImportReport:
+    """
+    Импортировать отчет в прогон, создавая недостающие тест-кейсы в сьюте
+    :param source: str | BinaryIO - путь к файлу или поток
+    :param run: TestRun
+    :param suite: TestSuite - сьют тест-кейсов отчета
+    :param batch_size: int | None - None: JUNIT_IMPORT_BATCH_SIZE
+    :return: JUnitImportReport
+    """
+    started: float = time.perf_counter()
+    created, cases, batches, processed = 0, 0, 0, 0
+    errors: typing.List[dict] = []
+
+    with transaction.atomic():
+        # Параллельный импорт в тот же сьют ждет, чтобы не создать дубли тест-кейсов
+        suite = TestSuite.objects.select_for_update().get(pk=suite.pk)
+        for batch in _batches(parse_junit(source), batch_size or settings.JUNIT_IMPORT_BATCH_SIZE):
+            report, new_cases = _import_batch(run, suite, batch)
+            errors.extend({**error, "row": error["row"] + processed} for error in report.errors)
+            processed += len(batch)
+            created, cases, batches = created + report.created, cases + new_cases, batches + 1
+
+    return JUnitImportReport(created, cases, errors, batches, time.perf_counter() - started)
+
+
+def _batches(rows: typing.Iterator[dict], size: int) -> typing.Iterator[typing.List[dict]]:
+    """
+    Разбить поток строк на пачки
+    :param rows: Iterator[dict]
+    :param size: int
+    :return: Iterator[list[dict]]
+    """
+    batch: typing.List[dict] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _import_batch(run: TestRun, suite: TestSuite, rows: typing.List[dict]) -> tuple:
+    """
+    Сопоставить пачку с тест-кейсами сьюта и загрузить результаты
+    :param run: TestRun
+    :param suite: TestSuite
+    :param rows: list[dict]
+    :return: tuple[IngestionReport, int] - отчет загрузки и число новых тест-кейсов
+    """
+    titles: typing.Set[str] = {row["name"][:TITLE_MAX_LENGTH] for row in rows if row["name"]}
+    # При дублях названий берется самый старый тест-кейс
+    case_ids: typing.Dict[str, int] = dict(TestCase.objects.filter(
+        suite=suite, title__in=titles, deleted=None).order_by('-pk').values_list('title', 'pk'))
+    new_cases: typing.Dict[str, int] = _create_cases(suite, sorted(titles.difference(case_ids)))
+    case_ids.update(new_cases)
+
+    for row in rows:
+        row["case"] = case_ids.get(row["name"][:TITLE_MAX_LENGTH])
+    return ingest_results(run, rows), len(new_cases)
+
+
+def _create_cases(suite: TestSuite, titles: typing.List[str]) -> typing.Dict[str, int]:
+    """
+    Создать тест-кейсы сьюта и их поисковые документы вставкой
+    INSERT ... RETURNING без создания моделей. Сигналы при этом не
+    вызываются, поэтому документы вставляются здесь же
+    :param suite: TestSuite
+    :param titles: list[str]
+    :return: dict[str, int] - ID новых тест-кейсов по названию
+    """
+    quote: typing.Callable = connection.ops.quote_name
+    created: typing.Any = timezone.now()
+    case_ids: typing.Dict[str, int] = {}
+    with connection.cursor() as cursor:
+        for start in range(0, len(titles), CREATE_BATCH_SIZE):
+            batch: typing.List[str] = titles[start:start + CREATE_BATCH_SIZE]
+            cursor.execute(
+                f"INSERT INTO {quote(TestCase._meta.db_table)} ({quote('title')}, "
+                f"{quote('suite_id')}, {quote('path')}, {quote('created')}, {quote('modified')}) "
+                f"VALUES {', '.join(['(%s, %s, %s, %s, %s)'] * len(batch))} "
+                f"RETURNING {quote('id')}, {quote('title')}",
+                [value for title in batch
+                 for value in (title, suite.pk, suite.path, created, created)])
+            inserted: typing.List[tuple] = cursor.fetchall()
+            cursor.execute(
+                f"INSERT INTO {quote(SearchDocument._meta.db_table)} ({quote('entity')}, "
+                f"{quote('object_id')}, {quote('title')}, {quote('body')}) "
+                f"VALUES {', '.join(['(%s, %s, %s, %s)'] * len(inserted))}",
+                [value for pk, title in inserted
+                 for value in (SearchDocument.Entity.CASE.value, pk, title, "")])
+            case_ids.update((title, pk) for pk, title in inserted)
+    return case_ids
+
+
+def _testcase_row(element: ElementTree.Element) -> dict:
+    """
+    Результат из элемента testcase: failure и error - failed,
+    skipped - skipped, без них - passed
+    :param element: Element
+    :return: dict
+    """
+    name: str = element.get("name", "")
+    classname: str = element.get("classname", "")
+    result_status: str = TestResult.Status.PASSED
+    message: str = ""
+    for child in element:
+        if child.tag in ("failure", "error", "skipped"):
+            result_status = TestResult.Status.SKIPPED if child.tag == "skipped" \
+                else TestResult.Status.FAILED
+            message = "\n".join(part for part in (
+                child.get("message", ""), (child.text or "").strip()) if part)
+            break
+
+    try:
+        duration: float | None = max(float(element.get("time", "")), 0.0)
+    except ValueError:
+        duration = None
+    if duration is not None and not math.isfinite(duration):
+        duration = None
+    return {
+        "name": f"{classname}.{name}" if classname and name else name,
+        "status": result_status,
+        "duration": duration,
+        "message": message
+    }
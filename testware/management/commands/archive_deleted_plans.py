@@ -0,0 +1,43 @@
+"""
+Команда переноса давно удаленных тест-планов в архив
+"""
+import datetime
+import typing
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+from testware.archive import ArchiveReport, archive_deleted_plans
+
+
+class Command(BaseCommand):
+    """
+    Перенос мягко удаленных тест-планов в ArchivedTestPlan пачками
+    с паузами. Безопасна для запуска в рабочее время и по расписанию
+    """
+    help = "Move test plans soft-deleted more than N days ago into the archive table"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+        Аргументы команды
+        :param parser: CommandParser
+        :return: None
+        """
+        parser.add_argument("--days", type=int, default=settings.ARCHIVE_AFTER_DAYS)
+        parser.add_argument("--batch-size", type=int, default=settings.ARCHIVE_BATCH_SIZE)
+        parser.add_argument("--pause", type=float, default=settings.ARCHIVE_BATCH_PAUSE)
+
+    def handle(self, *args: typing.Any, **options: typing.Any) -> None:
+        """
+        Запуск архивирования
+        :param args: Any
+        :param options: Any
+        :return: None
+        """
+        report: ArchiveReport = archive_deleted_plans(
+            datetime.timedelta(days=options["days"]), options["batch_size"], options["pause"])
+        self.stdout.write(
+            f"Archived {report.archived} test plans in {report.batches} batches "
+            f"({report.elapsed:.1f}s)")
+        if report.skipped:
+            self.stdout.write(f"Skipped {report.skipped} test plans that still have test runs")
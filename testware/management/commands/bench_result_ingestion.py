@@ -0,0 +1,59 @@
+"""
+Команда замера скорости загрузки результатов тестов через bulk_create и COPY
+"""
+import random
+import typing
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+
+from testware.ingestion import IngestionReport, ingest_results
+from testware.models import TestCase, TestPlan, TestResult, TestRun, TestSuite
+
+
+class Command(BaseCommand):
+    """
+    Бенчмарк загрузки результатов.
+    Данные создаются в транзакции, которая откатывается после замеров
+    """
+    help = "Benchmark bulk test result ingestion with bulk_create and COPY"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+        Аргументы команды
+        :param parser: CommandParser
+        :return: None
+        """
+        parser.add_argument("--rows", type=int, default=100000)
+        parser.add_argument("--cases", type=int, default=1000)
+
+    def handle(self, *args: typing.Any, **options: typing.Any) -> None:
+        """
+        Запуск бенчмарка
+        :param args: Any
+        :param options: Any
+        :return: None
+        """
+        with transaction.atomic():
+            plan: TestPlan = TestPlan.objects.create(title="bench_result_ingestion")
+            suite: TestSuite = TestSuite.objects.create(title="bench_result_ingestion")
+            case_ids: typing.List[int] = [case.pk for case in TestCase.objects.bulk_create([
+                TestCase(title=f"case {index}", suite=suite, path=suite.path)
+                for index in range(options["cases"])])]
+            statuses: typing.List[str] = TestResult.Status.values
+            rows: typing.List[dict] = [{
+                "name": f"tests.module_{index % 100}.test_{index}",
+                "status": random.choice(statuses),
+                "case": random.choice(case_ids) if case_ids and index % 2 else None,
+                "duration": round(random.uniform(0, 5), 3),
+                "message": "" if index % 10 else "AssertionError: expected 200, got 500"
+            } for index in range(options["rows"])]
+
+            for use_copy in (False, True):
+                run: TestRun = TestRun.objects.create(title="bench", plan=plan)
+                report: IngestionReport = ingest_results(run, rows, use_copy=use_copy)
+                self.stdout.write(
+                    f"{report.method:>11}: {report.created:,} rows in {report.elapsed:.2f}s "
+                    f"({report.throughput:,.0f} rows/s)")
+
+            transaction.set_rollback(True)
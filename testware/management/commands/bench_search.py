@@ -0,0 +1,126 @@
+"""
+Команда замера времени полнотекстового поиска на большом числе тест-кейсов
+"""
+import csv
+import io
+import itertools
+import random
+import statistics
+import time
+import typing
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection, transaction
+
+from testware.models import SearchDocument
+from testware.search import search
+
+SYLLABLES: typing.Tuple[str, ...] = (
+    "ba", "ce", "di", "fo", "gu", "ka", "le", "mi", "no", "pu",
+    "ra", "se", "ti", "vo", "zu", "lo", "ne", "sa", "ri", "te")
+
+
+class Command(BaseCommand):
+    """
+    Бенчмарк поиска.
+    Документы тест-кейсов со словами из частотного (по закону Ципфа)
+    словаря загружаются командой COPY в транзакции, которая откатывается
+    после замеров. Поиск в PostgreSQL
+    """
+    help = "Measure full-text search latency percentiles on generated test cases"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+        Аргументы команды
+        :param parser: CommandParser
+        :return: None
+        """
+        parser.add_argument("--documents", type=int, default=1000000)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args: typing.Any, **options: typing.Any) -> None:
+        """
+        Запуск бенчмарка
+        :param args: Any
+        :param options: Any
+        :return: None
+        """
+        generator: random.Random = random.Random(0)
+        vocabulary: typing.List[str] = sorted({
+            "".join(generator.choices(SYLLABLES, k=generator.randint(2, 4)))
+            for _ in range(20000)})
+        generator.shuffle(vocabulary)
+        weights: typing.List[float] = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+
+        with transaction.atomic():
+            started: float = time.perf_counter()
+            self._seed(options["documents"], vocabulary, weights, generator)
+            self.stdout.write(
+                f"Seeded {options['documents']:,} documents "
+                f"in {time.perf_counter() - started:.1f}s")
+
+            queries: typing.Dict[str, str] = {
+                "frequent word": vocabulary[0],
+                "medium word": vocabulary[100],
+                "rare word": vocabulary[5000],
+                "two words": f"{vocabulary[3]} {vocabulary[40]}",
+                "short prefix": vocabulary[1][:3],
+            }
+            for name, query in queries.items():
+                timings: typing.List[float] = []
+                for _ in range(options["repeat"]):
+                    started = time.perf_counter()
+                    search(query, limit=20)
+                    timings.append((time.perf_counter() - started) * 1000)
+                timings.sort()
+                self.stdout.write(
+                    f"{name:>13} ({query}): "
+                    f"p50 {statistics.median(timings):.1f} ms, "
+                    f"p95 {timings[int(len(timings) * 0.95) - 1]:.1f} ms")
+
+            transaction.set_rollback(True)
+
+        # Откаченные строки остаются в таблице и индексе до очистки
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"VACUUM ANALYZE {connection.ops.quote_name(SearchDocument._meta.db_table)}")
+
+    @staticmethod
+    def _seed(count: int, vocabulary: typing.List[str], weights: typing.List[float],
+              generator: random.Random) -> None:
+        """
+        Загрузить документы пачками по 50 000 строк
+        :param count: int
+        :param vocabulary: list[str]
+        :param weights: list[float]
+        :param generator: Random
+        :return: None
+        """
+        quote: typing.Callable = connection.ops.quote_name
+        columns: str = ", ".join(
+            quote(column) for column in ("entity", "object_id", "title", "body"))
+        cumulative: typing.List[float] = list(itertools.accumulate(weights))
+
+        for offset in range(0, count, 50000):
+            buffer: io.StringIO = io.StringIO()
+            writer: typing.Any = csv.writer(buffer)
+            for object_id in range(offset, min(count, offset + 50000)):
+                words: typing.List[str] = generator.choices(
+                    vocabulary, cum_weights=cumulative, k=36)
+                writer.writerow((SearchDocument.Entity.CASE.value, object_id,
+                                 " ".join(words[:6]), " ".join(words[6:])))
+            buffer.seek(0)
+            with connection.cursor() as cursor:
+                cursor.copy_expert(
+                    f"COPY {quote(SearchDocument._meta.db_table)} ({columns}) "
+                    f"FROM STDIN WITH (FORMAT csv)", buffer)
+
+        with connection.cursor() as cursor:
+            # Перенести строки из списка ожидания GIN в индекс, как это
+            # сделал бы autovacuum после массовой загрузки
+            cursor.execute("SELECT gin_clean_pending_list(%s::regclass)",
+                           [f"{SearchDocument._meta.db_table}_vector_idx"])
+            # Статистику метастраницы GIN обновляет только VACUUM, который в
+            # транзакции недоступен: планировщик недооценивает bitmap-чтение
+            # индекса, и замеры здесь хуже, чем на зафиксированных данных
+            cursor.execute(f"ANALYZE {quote(SearchDocument._meta.db_table)}")
@@ -0,0 +1,124 @@
+"""
+Команда сравнения планов и времени запросов списка тест-планов
+и текущего тест-плана без индексов и с индексами
+"""
+import statistics
+import time
+import typing
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from testware.models import TestPlan
+
+# Индексы, которые сравниваются: частичные индексы списка и текущего плана
+# и триграммный индекс названия (если он создан миграцией)
+BENCHMARK_INDEXES: typing.Tuple[str, ...] = (
+    'testplan_list_idx', 'unique_current_test_plan', 'testplan_title_trgm_idx')
+
+
+class Command(BaseCommand):
+    """
+    Бенчмарк индексов TestPlan.
+    Тестовые планы создаются, а индексы удаляются и создаются заново в
+    транзакции, которая откатывается после замеров. Команда держит
+    эксклюзивную блокировку таблицы, поэтому ее не следует запускать
+    на рабочей базе
+    """
+    help = "Show query plans and timings of test plan queries with and without indexes"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+        Аргументы команды
+        :param parser: CommandParser
+        :return: None
+        """
+        parser.add_argument("--plans", type=int, default=100000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args: typing.Any, **options: typing.Any) -> None:
+        """
+        Запуск бенчмарка
+        :param args: Any
+        :param options: Any
+        :return: None
+        """
+        with transaction.atomic():
+            self._seed(options["plans"])
+            definitions: typing.Dict[str, str] = self._index_definitions()
+            missing: typing.List[str] = [
+                name for name in BENCHMARK_INDEXES if name not in definitions]
+            if missing:
+                self.stdout.write(f"Indexes not found (not measured): {', '.join(missing)}")
+
+            with connection.cursor() as cursor:
+                # Отложенные проверки внешних ключей не дают менять индексы таблицы
+                cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+                for name in definitions:
+                    cursor.execute(f"DROP INDEX {connection.ops.quote_name(name)}")
+                cursor.execute(f"ANALYZE {TestPlan._meta.db_table}")
+            self._measure("without indexes", options["repeat"])
+
+            with connection.cursor() as cursor:
+                for definition in definitions.values():
+                    cursor.execute(definition)
+                cursor.execute(f"ANALYZE {TestPlan._meta.db_table}")
+            self._measure("with indexes", options["repeat"])
+
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def _seed(count: int) -> None:
+        """
+        Создать тест-планы: каждый десятый удален, один текущий
+        :param count: int
+        :return: None
+        """
+        now: typing.Any = timezone.now()
+        TestPlan.objects.filter(is_current=True).update(is_current=False)
+        TestPlan.objects.bulk_create([
+            TestPlan(title=f"Regression plan {index}",
+                     deleted=now if index % 10 == 0 else None,
+                     is_current=index == count - 1)
+            for index in range(count)], batch_size=5000)
+
+    @staticmethod
+    def _index_definitions() -> typing.Dict[str, str]:
+        """
+        Прочитать определения сравниваемых индексов
+        :return: dict[str, str] - имя индекса -> CREATE INDEX
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT indexname, indexdef FROM pg_indexes "
+                "WHERE tablename = %s AND indexname = ANY(%s)",
+                [TestPlan._meta.db_table, list(BENCHMARK_INDEXES)])
+            return dict(cursor.fetchall())
+
+    def _measure(self, label: str, repeat: int) -> None:
+        """
+        Вывести план и медианное время запросов представлений
+        :param label: str
+        :param repeat: int
+        :return: None
+        """
+        queries: typing.Dict[str, QuerySet] = {
+            "current plan": TestPlan.objects.filter(is_current=True),
+            "list page": TestPlan.objects.filter(
+                is_current=False).order_by('id')[:50],
+            "title search": TestPlan.objects.filter(
+                title__icontains="plan 4242", is_current=False).order_by('id'),
+        }
+
+        self.stdout.write(f"=== {label} ===")
+        for name, queryset in queries.items():
+            timings: typing.List[float] = []
+            for _ in range(repeat):
+                started: float = time.perf_counter()
+                list(queryset.all())
+                timings.append(time.perf_counter() - started)
+
+            self.stdout.write(f"--- {name}: median {statistics.median(timings) * 1000:.2f} ms")
+            self.stdout.write(queryset.explain(analyze=True))
@@ -0,0 +1,38 @@
+"""
+Команда сборки мусора хранилища вложений
+"""
+import typing
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from testware.attachments import GarbageReport, collect_garbage
+
+
+class Command(BaseCommand):
+    """
+    Удаление содержимого вложений без ссылок и брошенных загрузок.
+    С --scan дополнительно обходит каталог хранилища и удаляет файлы,
+    для которых нет строк в базе
+    """
+    help = "Delete unreferenced attachment blobs and abandoned uploads"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+        Аргументы команды
+        :param parser: CommandParser
+        :return: None
+        """
+        parser.add_argument("--scan", action="store_true")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args: typing.Any, **options: typing.Any) -> None:
+        """
+        Запуск сборки мусора
+        :param args: Any
+        :param options: Any
+        :return: None
+        """
+        report: GarbageReport = collect_garbage(options["scan"], options["batch_size"])
+        self.stdout.write(
+            f"Deleted {report.blobs} blobs ({report.freed} bytes), {report.uploads} "
+            f"abandoned uploads and {report.orphans} orphaned files ({report.elapsed:.1f}s)")
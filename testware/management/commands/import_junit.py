@@ -0,0 +1,61 @@
+"""
+Команда импорта отчетов JUnit XML в тестовый прогон
+"""
+import resource
+import typing
+from xml.etree import ElementTree
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from testware.junit import JUnitImportReport, import_junit
+from testware.models import TestRun, TestSuite
+
+
+class Command(BaseCommand):
+    """
+    Потоковый импорт отчетов JUnit XML (pytest --junitxml, Maven Surefire
+    и т.п.) в прогон с созданием недостающих тест-кейсов в сьюте.
+    Печатает скорость загрузки и пиковый объем памяти процесса
+    """
+    help = "Import JUnit XML reports into a test run"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+        Аргументы команды
+        :param parser: CommandParser
+        :return: None
+        """
+        parser.add_argument("reports", nargs="+")
+        parser.add_argument("--run", type=int, required=True)
+        parser.add_argument("--suite", type=int, required=True)
+        parser.add_argument("--batch-size", type=int, default=None)
+
+    def handle(self, *args: typing.Any, **options: typing.Any) -> None:
+        """
+        Запуск импорта
+        :param args: Any
+        :param options: Any
+        :return: None
+        """
+        run: TestRun | None = TestRun.objects.filter(pk=options["run"], deleted=None).first()
+        if run is None:
+            raise CommandError("No such test run")
+        suite: TestSuite | None = TestSuite.objects.filter(
+            pk=options["suite"], deleted=None).first()
+        if suite is None:
+            raise CommandError("No such test suite")
+
+        for path in options["reports"]:
+            try:
+                report: JUnitImportReport = import_junit(path, run, suite, options["batch_size"])
+            except (OSError, ElementTree.ParseError) as error:
+                raise CommandError(f"{path}: {error}") from error
+            self.stdout.write(
+                f"{path}: {report.created:,} results, {report.cases:,} new test cases, "
+                f"{len(report.errors):,} errors in {report.batches} batches, "
+                f"{report.elapsed:.2f}s ({report.throughput:,.0f} results/s)")
+            for row_error in report.errors[:10]:
+                self.stdout.write(f"  testcase #{row_error['row']}: {row_error['errors']}")
+
+        peak: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        self.stdout.write(f"Peak memory: {peak / 1024:,.1f} MiB")
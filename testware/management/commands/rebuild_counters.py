@@ -0,0 +1,28 @@
+"""
+Команда пересчета счетчиков статусов тест-планов и прогонов
+"""
+import typing
+
+from django.core.management.base import BaseCommand
+
+from testware.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    """
+    Пересчет PlanStatusCounter и RunStatusCounter с нуля.
+    Нужна после изменений статусов в обход моделей и testware.counters
+    (например, QuerySet.update или ручных правок в базе)
+    """
+    help = "Rebuild test plan and test run status counters from scratch"
+
+    def handle(self, *args: typing.Any, **options: typing.Any) -> None:
+        """
+        Запуск пересчета
+        :param args: Any
+        :param options: Any
+        :return: None
+        """
+        corrected: typing.Dict[str, int] = rebuild_counters()
+        for model_name, count in corrected.items():
+            self.stdout.write(f"{model_name}: corrected {count} counters")
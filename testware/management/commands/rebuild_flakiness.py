@@ -0,0 +1,27 @@
+"""
+Команда пересчета оценок нестабильности тест-кейсов
+"""
+import typing
+
+from django.core.management.base import BaseCommand
+
+from testware.flakiness import rebuild_flakiness
+
+
+class Command(BaseCommand):
+    """
+    Пересчет CaseFlakiness по истории результатов.
+    Нужна после изменения FLAKY_WINDOW и исправления статусов
+    результатов задним числом
+    """
+    help = "Rebuild test case flakiness scores from result history"
+
+    def handle(self, *args: typing.Any, **options: typing.Any) -> None:
+        """
+        Запуск пересчета
+        :param args: Any
+        :param options: Any
+        :return: None
+        """
+        rebuilt: int = rebuild_flakiness()
+        self.stdout.write(f"Rebuilt flakiness scores for {rebuilt} test cases")
@@ -0,0 +1,28 @@
+"""
+Команда пересоздания поисковых документов
+"""
+import typing
+
+from django.core.management.base import BaseCommand
+
+from testware.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    """
+    Пересоздание SearchDocument по всем неудаленным объектам.
+    Нужна после изменений в обход save() и delete() моделей
+    (например, QuerySet.update, bulk_create или ручных правок в базе)
+    """
+    help = "Rebuild full-text search documents for test plans, suites, cases and runs"
+
+    def handle(self, *args: typing.Any, **options: typing.Any) -> None:
+        """
+        Запуск пересоздания
+        :param args: Any
+        :param options: Any
+        :return: None
+        """
+        indexed: typing.Dict[str, int] = rebuild_search_index()
+        for entity, count in indexed.items():
+            self.stdout.write(f"{entity}: indexed {count} documents")
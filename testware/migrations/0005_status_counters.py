@@ -0,0 +1,40 @@
+# Generated by Django 4.2.3 on 2026-10-18 10:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testware', '0004_testrun_testresult'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RunStatusCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('passed', 'Passed'), ('failed', 'Failed'), ('blocked', 'Blocked'), ('skipped', 'Skipped'), ('in_progress', 'In Progress')], max_length=20)),
+                ('count', models.BigIntegerField(default=0)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_counters', to='testware.testrun')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PlanStatusCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('in_progress', 'In Progress'), ('completed', 'Completed'), ('blocked', 'Blocked'), ('failed', 'Failed')], max_length=20)),
+                ('count', models.BigIntegerField(default=0)),
+                ('plan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_counters', to='testware.testplan')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='runstatuscounter',
+            constraint=models.UniqueConstraint(fields=('run', 'status'), name='unique_run_status_counter'),
+        ),
+        migrations.AddConstraint(
+            model_name='planstatuscounter',
+            constraint=models.UniqueConstraint(fields=('plan', 'status'), name='unique_plan_status_counter'),
+        ),
+    ]
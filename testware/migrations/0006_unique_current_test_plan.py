@@ -0,0 +1,30 @@
+# Generated by Django 4.2.3 on 2026-10-18 10:53
+
+from django.db import migrations, models
+
+
+def keep_latest_current_plan(apps, schema_editor):
+    """
+    Оставить текущим только последний измененный тест-план,
+    чтобы индекс можно было создать на существующих данных
+    """
+    test_plan = apps.get_model('testware', 'TestPlan')
+    current = test_plan.objects.filter(is_current=True, deleted=None).order_by('-modified', '-id')
+    latest = current.values_list('id', flat=True).first()
+    if latest is not None:
+        current.exclude(id=latest).update(is_current=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testware', '0005_status_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(keep_latest_current_plan, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='testplan',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted', None), ('is_current', True)), fields=('is_current',), name='unique_current_test_plan'),
+        ),
+    ]
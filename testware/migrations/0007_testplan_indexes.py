@@ -0,0 +1,50 @@
+# Generated by Django 4.2.3 on 2026-10-18 10:55
+
+from django.db import migrations, models
+
+TRIGRAM_INDEX_SQL = (
+    'CREATE INDEX IF NOT EXISTS "testplan_title_trgm_idx" ON "testware_testplan" '
+    'USING gin ((UPPER("title"::text)) gin_trgm_ops) '
+    'WHERE "deleted" IS NULL AND NOT "is_current"'
+)
+
+
+def create_trigram_index(apps, schema_editor):
+    """
+    Создать триграммный GIN-индекс для поиска по подстроке названия
+    (title__icontains компилируется в UPPER(title::text) LIKE UPPER(...)).
+    Если расширение pg_trgm недоступно на сервере, индекс не создается:
+    поиск продолжает работать, но без индекса
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        cursor.execute(TRIGRAM_INDEX_SQL)
+
+
+def drop_trigram_index(apps, schema_editor):
+    """
+    Удалить триграммный индекс (расширение pg_trgm остается)
+    """
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS "testplan_title_trgm_idx"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testware', '0006_unique_current_test_plan'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='testplan',
+            index=models.Index(condition=models.Q(('deleted', None), ('is_current', False)), fields=['id'], name='testplan_list_idx'),
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 4.2.3 on 2026-10-18 10:58
+
+from django.db import migrations, models
+
+# Словарь 'simple' без стемминга: названия и шаги смешивают русский и английский.
+# Угловые скобки и слэши заменяются пробелами, иначе парсер считает "<button>"
+# HTML-тегом и отбрасывает, а "/api/users" индексирует одним словом
+POSTGRES_INDEX_SQL = (
+    'ALTER TABLE "testware_searchdocument" ADD COLUMN "search_vector" tsvector '
+    'GENERATED ALWAYS AS ('
+    "setweight(to_tsvector('simple', translate(\"title\", '<>/', '   ')), 'A') || "
+    "setweight(to_tsvector('simple', translate(\"body\", '<>/', '   ')), 'B')) STORED",
+    'CREATE INDEX "testware_searchdocument_vector_idx" '
+    'ON "testware_searchdocument" USING gin ("search_vector")',
+)
+
+SQLITE_INDEX_SQL = (
+    'CREATE VIRTUAL TABLE "testware_searchdocument_fts" USING fts5('
+    "title, body, content='testware_searchdocument', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    'CREATE TRIGGER "testware_searchdocument_fts_insert" '
+    'AFTER INSERT ON "testware_searchdocument" BEGIN '
+    'INSERT INTO "testware_searchdocument_fts" (rowid, title, body) '
+    'VALUES (new.id, new.title, new.body); END',
+    'CREATE TRIGGER "testware_searchdocument_fts_delete" '
+    'AFTER DELETE ON "testware_searchdocument" BEGIN '
+    'INSERT INTO "testware_searchdocument_fts" ("testware_searchdocument_fts", rowid, title, body) '
+    "VALUES ('delete', old.id, old.title, old.body); END",
+    'CREATE TRIGGER "testware_searchdocument_fts_update" '
+    'AFTER UPDATE ON "testware_searchdocument" BEGIN '
+    'INSERT INTO "testware_searchdocument_fts" ("testware_searchdocument_fts", rowid, title, body) '
+    "VALUES ('delete', old.id, old.title, old.body); "
+    'INSERT INTO "testware_searchdocument_fts" (rowid, title, body) '
+    'VALUES (new.id, new.title, new.body); END',
+)
+
+# Поля тела документа каждого типа объектов
+BODY_FIELDS = {
+    'plan': ('TestPlan', ('description',)),
+    'suite': ('TestSuite', ('description',)),
+    'case': ('TestCase', ('description', 'steps', 'expected_result')),
+    'run': ('TestRun', ()),
+}
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Создать полнотекстовый индекс над документами и проиндексировать
+    существующие неудаленные объекты
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        statements = POSTGRES_INDEX_SQL
+    elif vendor == 'sqlite':
+        statements = SQLITE_INDEX_SQL
+    else:
+        statements = ()
+    for statement in statements:
+        schema_editor.execute(statement)
+
+    search_document = apps.get_model('testware', 'SearchDocument')
+    for entity, (model_name, fields) in BODY_FIELDS.items():
+        objects = apps.get_model('testware', model_name).objects.filter(
+            deleted=None).values_list('pk', 'title', *fields)
+        search_document.objects.bulk_create(
+            [search_document(entity=entity, object_id=pk, title=title,
+                             body="\n".join(value for value in values if value))
+             for pk, title, *values in objects.iterator(chunk_size=2000)],
+            batch_size=2000)
+
+
+def drop_search_index(apps, schema_editor):
+    """
+    Удалить таблицу FTS5 и ее триггеры (столбец tsvector удаляется
+    вместе с таблицей документов)
+    """
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS "testware_searchdocument_fts"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testware', '0007_testplan_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(choices=[('plan', 'Test plan'), ('suite', 'Test suite'), ('case', 'Test case'), ('run', 'Test run')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('body', models.TextField(blank=True, default='')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='searchdocument',
+            constraint=models.UniqueConstraint(fields=('entity', 'object_id'), name='unique_search_document'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
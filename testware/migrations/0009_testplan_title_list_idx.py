@@ -0,0 +1,17 @@
+# Generated by Django 4.2.3 on 2026-10-18 11:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testware', '0008_search_documents'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='testplan',
+            index=models.Index(condition=models.Q(('deleted', None), ('is_current', False)), fields=['title', 'id'], name='testplan_title_list_idx'),
+        ),
+    ]
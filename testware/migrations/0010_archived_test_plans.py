@@ -0,0 +1,29 @@
+# Generated by Django 4.2.3 on 2026-10-18 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testware', '0009_testplan_title_list_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTestPlan',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=150)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('author_id', models.BigIntegerField(blank=True, null=True)),
+                ('start_date', models.DateTimeField(blank=True, null=True)),
+                ('end_date', models.DateTimeField(blank=True, null=True)),
+                ('created', models.DateTimeField()),
+                ('modified', models.DateTimeField()),
+                ('deleted', models.DateTimeField()),
+                ('is_current', models.BooleanField(default=False)),
+                ('archived', models.DateTimeField()),
+            ],
+        ),
+    ]
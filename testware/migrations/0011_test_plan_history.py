@@ -0,0 +1,58 @@
+# Generated by Django 4.2.3 on 2026-10-18 11:24
+
+from django.conf import settings
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Поля тест-плана, которые хранятся в истории (TestPlan.history_fields)
+HISTORY_FIELDS = ('title', 'description', 'author_id', 'start_date', 'end_date',
+                  'deleted', 'is_current')
+
+
+def create_initial_versions(apps, schema_editor):
+    """
+    Записать текущее состояние существующих тест-планов
+    первой версией истории (со снимком)
+    """
+    test_plan = apps.get_model('testware', 'TestPlan')
+    test_plan_history = apps.get_model('testware', 'TestPlanHistory')
+    versions = []
+    for plan_id, modified, *values in test_plan.objects.values_list(
+            'pk', 'modified', *HISTORY_FIELDS).iterator(chunk_size=2000):
+        state = dict(zip(HISTORY_FIELDS, values))
+        state['author'] = state.pop('author_id')
+        versions.append(test_plan_history(plan_id=plan_id, version=1, changed=modified,
+                                          changes=state, snapshot=state))
+    test_plan_history.objects.bulk_create(versions, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('testware', '0010_archived_test_plans'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestPlanHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField()),
+                ('changed', models.DateTimeField()),
+                ('changes', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('snapshot', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('plan', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='history', to='testware.testplan')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['plan', 'changed'], name='testplanhistory_changed_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='testplanhistory',
+            constraint=models.UniqueConstraint(fields=('plan', 'version'), name='unique_test_plan_history_version'),
+        ),
+        migrations.RunPython(create_initial_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.3 on 2026-10-18 11:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testware', '0011_test_plan_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CaseFlakiness',
+            fields=[
+                ('case', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='flakiness', serialize=False, to='testware.testcase')),
+                ('outcomes', models.BigIntegerField(default=0)),
+                ('observed', models.PositiveSmallIntegerField(default=0)),
+                ('flips', models.PositiveSmallIntegerField(default=0)),
+                ('score', models.FloatField(default=0.0)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='testresult',
+            name='case',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='results', to='testware.testcase'),
+        ),
+        migrations.AddIndex(
+            model_name='testresult',
+            index=models.Index(fields=['case', 'id'], name='testresult_case_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='caseflakiness',
+            index=models.Index(fields=['-score', 'case'], name='caseflakiness_score_idx'),
+        ),
+    ]
@@ -1,15 +1,93 @@
 """
 Модуль с таблицами тест-кейса, тестового прогона, чеклиста и тестового плана
 """
-from django.db import models
+import typing
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, models, transaction
+from django.db.models.functions import Concat, Substr
 from django.urls import reverse
+from django.utils import timezone
 from authentication.models import User
 
 
+class SoftDeleteManager(models.Manager):
+    """
+    Менеджер, скрывающий мягко удаленные строки (deleted не NULL).
+    Удаленные строки доступны через менеджер all_objects модели
+    """
+
+    def get_queryset(self) -> models.QuerySet:
+        """
+        Выборка неудаленных строк
+        :return: QuerySet
+        """
+        return super().get_queryset().filter(deleted=None)
+
+
+class TestPlanQuerySet(models.QuerySet):
+    """
+    Выборка тест-планов, массовые изменения которой попадают в историю
+    """
+
+    def update(self, **kwargs: typing.Any) -> int:
+        """
+        Массовое изменение тест-планов с записью в историю (TestPlanHistory).
+        Строки блокируются и читаются до изменения; если поля истории
+        меняются выражениями или внешними ключами, строки перечитываются
+        после него, иначе новые значения известны заранее
+        :param kwargs: Any - значения полей и changed_by: User | None - автор изменения
+        :return: int - число измененных планов
+        """
+        changed_by: typing.Any = kwargs.pop("changed_by", None)
+        meta: typing.Any = self.model._meta
+        values: typing.Dict[str, typing.Any] = {
+            meta.get_field(key).name: value for key, value in kwargs.items()}
+        tracked: typing.List[str] = [name for name in self.model.history_fields if name in values]
+        if not tracked:
+            return super().update(**kwargs)
+
+        with transaction.atomic(using=self.db):
+            before: typing.Dict[int, dict] = {
+                row.pop("pk"): row
+                for row in self.select_for_update().values("pk", *self.model.history_fields)}
+            if not before:
+                return 0
+            locked: TestPlanQuerySet = self.model.all_objects.filter(pk__in=list(before))
+            updated: int = super(TestPlanQuerySet, locked).update(**kwargs)
+
+            after: typing.Dict[int, dict]
+            if any(hasattr(values[name], "resolve_expression") or meta.get_field(name).is_relation
+                   for name in tracked):
+                after = {row.pop("pk"): row
+                         for row in locked.values("pk", *self.model.history_fields)}
+            else:
+                new: dict = {name: meta.get_field(name).to_python(values[name]) for name in tracked}
+                after = {pk: {**row, **new} for pk, row in before.items()}
+
+            entries: typing.Dict[int, typing.Tuple[dict, dict]] = {}
+            for pk, state in after.items():
+                changes: dict = {name: state[name] for name in tracked
+                                 if state[name] != before[pk][name]}
+                if changes:
+                    entries[pk] = (changes, state)
+            record_plan_history(entries, changed_by)
+        return updated
+
+
 class TestPlan(models.Model):
     """
-    Таблица с тест-планами
+    Таблица с тест-планами.
+    objects возвращает только неудаленные планы, all_objects - все.
+    Изменения полей history_fields записываются в TestPlanHistory
     """
+    # Поля, изменения которых хранятся в истории
+    history_fields: typing.ClassVar[typing.Tuple[str, ...]] = (
+        "title", "description", "author", "start_date", "end_date", "deleted", "is_current")
+
     title: models.CharField = models.CharField(
         max_length=150
     )
@@ -39,6 +117,34 @@ class TestPlan(models.Model):
         default=False
     )
 
+    objects: SoftDeleteManager = SoftDeleteManager.from_queryset(TestPlanQuerySet)()
+    all_objects: models.Manager = models.Manager.from_queryset(TestPlanQuerySet)()
+
+    class Meta:
+        constraints = [
+            # Не более одного текущего неудаленного тест-плана. Индекс
+            # ограничения обслуживает и выборку текущего плана
+            models.UniqueConstraint(
+                fields=['is_current'],
+                condition=models.Q(is_current=True, deleted=None),
+                name='unique_current_test_plan')
+        ]
+        indexes = [
+            # Список тест-планов: неудаленные нетекущие планы по порядку ID.
+            # Поиск по подстроке названия обслуживает триграммный GIN-индекс
+            # testplan_title_trgm_idx, который создается миграцией 0007 только
+            # при наличии расширения pg_trgm и поэтому не описан здесь
+            models.Index(
+                fields=['id'],
+                condition=models.Q(is_current=False, deleted=None),
+                name='testplan_list_idx'),
+            # Страницы списка в порядке названия (api.pagination)
+            models.Index(
+                fields=['title', 'id'],
+                condition=models.Q(is_current=False, deleted=None),
+                name='testplan_title_list_idx')
+        ]
+
     def __str__(self) -> str:
         """
         Возвращение строкового представления тест-плана
@@ -46,9 +152,1044 @@ class TestPlan(models.Model):
         """
         return str(self.title)
 
+    @classmethod
+    def from_db(cls, db: typing.Any, field_names: typing.Any, values: typing.Any) -> typing.Any:
+        """
+        Загрузка тест-плана из базы с запоминанием полей истории
+        :param db: Any
+        :param field_names: Any
+        :param values: Any
+        :return: TestPlan
+        """
+        instance: typing.Any = super().from_db(db, field_names, values)
+        instance._recorded = {
+            field.name: instance.__dict__[field.attname]
+            for field in map(cls._meta.get_field, cls.history_fields)
+            if field.attname in instance.__dict__}
+        return instance
+
+    def save(self, *args: typing.Any, **kwargs: typing.Any) -> None:
+        """
+        Сохранение тест-плана с записью измененных полей в историю
+        в той же транзакции.
+        Если план текущий, остальные текущие планы снимаются одним UPDATE
+        в той же транзакции. Переключения текущего плана выполняются по
+        очереди под транзакционной advisory-блокировкой, иначе параллельный
+        запрос не увидел бы еще не зафиксированный новый текущий план и
+        уперся бы в частичный уникальный индекс
+        :param args: Any
+        :param kwargs: Any - параметры Model.save и changed_by: User | None - автор изменения
+        :return: None
+        """
+        changed_by: typing.Any = kwargs.pop("changed_by", None)
+        created: bool = self._state.adding and self.pk is None
+        recorded: typing.Dict[str, typing.Any] = getattr(self, "_recorded", {})
+        update_fields: typing.Any = kwargs.get("update_fields")
+
+        with transaction.atomic():
+            if self.is_current and self.deleted is None:
+                # SQLite и так выполняет записи по очереди
+                if connection.vendor == "postgresql":
+                    with connection.cursor() as cursor:
+                        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))",
+                                       [f"{TestPlan._meta.db_table}.is_current"])
+                TestPlan.objects.filter(is_current=True).exclude(
+                    pk=self.pk).update(is_current=False, changed_by=changed_by)
+            super().save(*args, **kwargs)
+
+            state: typing.Dict[str, typing.Any] = self._history_state()
+            changes: typing.Dict[str, typing.Any] = {
+                name: value for name, value in state.items()
+                if (created or name not in recorded or recorded[name] != value)
+                and (update_fields is None or name in update_fields)}
+            if changes:
+                record_plan_history({self.pk: (changes, state)}, changed_by, created)
+        # pylint: disable=attribute-defined-outside-init
+        self._recorded = state
+
+    def _history_state(self) -> typing.Dict[str, typing.Any]:
+        """
+        Значения полей истории (автор - ID). Значения приводятся к типам
+        полей: представления присваивают даты строками из запроса
+        :return: dict[str, Any]
+        """
+        return {field.name: field.to_python(field.value_from_object(self))
+                for field in map(self._meta.get_field, self.history_fields)}
+
     def get_absolute_url(self) -> str:
         """
         Возвращение одного тест-плана по ID
         :return: str
         """
         return reverse("test_plan_info", args=[self.id])
+
+
+class TestSuite(models.Model):
+    """
+    Таблица с тест-сьютами.
+
+    Сьюты вкладываются друг в друга на любую глубину. Дерево хранится
+    материализованным путем: path - идентификаторы предков и самого сьюта
+    через "/" ("1/5/12/"). Поддерево выбирается одним запросом
+    path LIKE 'prefix%' по индексу (для CharField с db_index PostgreSQL
+    создает индекс varchar_pattern_ops), перенос поддерева - одним UPDATE
+    на таблицу независимо от числа узлов
+    """
+    title: models.CharField = models.CharField(
+        max_length=150
+    )
+    description: models.TextField = models.TextField(
+        blank=True, null=True
+    )
+    parent: models.ForeignKey = models.ForeignKey(
+        "self", on_delete=models.CASCADE,
+        blank=True, null=True,
+        related_name="children"
+    )
+    path: models.CharField = models.CharField(
+        max_length=1024, db_index=True, editable=False
+    )
+    depth: models.PositiveIntegerField = models.PositiveIntegerField(
+        default=0, editable=False
+    )
+    author: models.ForeignKey = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        blank=True, null=True
+    )
+    created: models.DateTimeField = models.DateTimeField(
+        auto_now_add=True
+    )
+    modified: models.DateTimeField = models.DateTimeField(
+        auto_now=True
+    )
+    deleted: models.DateTimeField = models.DateTimeField(
+        blank=True, null=True
+    )
+
+    def __str__(self) -> str:
+        """
+        Возвращение строкового представления тест-сьюта
+        :return: str
+        """
+        return str(self.title)
+
+    @classmethod
+    def from_db(cls, db: typing.Any, field_names: typing.Any, values: typing.Any) -> typing.Any:
+        """
+        Загрузка сьюта из базы с запоминанием родителя,
+        чтобы при сохранении перенести поддерево
+        :param db: Any
+        :param field_names: Any
+        :param values: Any
+        :return: TestSuite
+        """
+        instance: typing.Any = super().from_db(db, field_names, values)
+        instance._loaded_parent_id = instance.__dict__.get("parent_id")
+        return instance
+
+    def save(self, *args: typing.Any, **kwargs: typing.Any) -> None:
+        """
+        Сохранение тест-сьюта.
+        Новому сьюту путь назначается после вставки (в путь входит его ID),
+        смена родителя у существующего сьюта переносит все поддерево
+        :param args: Any
+        :param kwargs: Any
+        :return: None
+        """
+        loaded_parent_id: typing.Any = getattr(self, "_loaded_parent_id", None)
+        if self.pk is not None and "parent_id" in self.__dict__ \
+                and self.parent_id != loaded_parent_id:
+            with transaction.atomic():
+                self._move_subtree(self.parent_id)
+                super().save(*args, **kwargs)
+            # pylint: disable=attribute-defined-outside-init
+            self._loaded_parent_id = self.parent_id
+            return
+
+        if self.pk is not None:
+            super().save(*args, **kwargs)
+            return
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            parent_path: str = self.parent.path if self.parent_id else ""
+            self.path = f"{parent_path}{self.pk}/"
+            self.depth = self.parent.depth + 1 if self.parent_id else 0
+            TestSuite.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+        # pylint: disable=attribute-defined-outside-init
+        self._loaded_parent_id = self.parent_id
+
+    def move_to(self, parent: typing.Optional["TestSuite"]) -> None:
+        """
+        Перенести сьют со всем поддеревом и тест-кейсами под другой сьют
+        (None - в корень)
+        :param parent: TestSuite | None
+        :return: None
+        """
+        self.parent = parent
+        self.save(update_fields=["parent", "modified"])
+
+    def get_descendants(self, include_self: bool = False) -> models.QuerySet:
+        """
+        Вернуть все не удаленные (мягко) сьюты поддерева одним запросом
+        :param include_self: bool
+        :return: QuerySet[TestSuite]
+        """
+        queryset: models.QuerySet = TestSuite.objects.filter(
+            path__startswith=self.path, deleted=None)
+        return queryset if include_self else queryset.exclude(pk=self.pk)
+
+    def get_cases(self) -> models.QuerySet:
+        """
+        Вернуть все тест-кейсы поддерева одним запросом без соединения таблиц
+        :return: QuerySet[TestCase]
+        """
+        return TestCase.objects.filter(path__startswith=self.path, deleted=None)
+
+    def case_counts(self) -> typing.Dict[int, int]:
+        """
+        Вернуть число тест-кейсов в поддереве каждого сьюта этого поддерева.
+        Кейсы считаются одним запросом: каждый кейс учитывается во всех
+        сьютах своего пути. Вторым запросом добавляются сьюты без кейсов.
+        На других СУБД, кроме PostgreSQL, пути кейсов разбираются в Python
+        :return: dict[int, int] - ID сьюта -> число кейсов
+        """
+        parent_path_length: int = len(self.path) - len(f"{self.pk}/")
+
+        counts: typing.Dict[int, int]
+        if connection.vendor == "postgresql":
+            quote: typing.Callable = connection.ops.quote_name
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT ancestor_id::bigint, COUNT(*) "
+                    f"FROM {quote(TestCase._meta.db_table)}, "
+                    f"unnest(string_to_array(rtrim(substr({quote('path')}, %s), '/'), '/')) "
+                    f"AS ancestor_id "
+                    f"WHERE {quote('path')} LIKE %s AND {quote('deleted')} IS NULL "
+                    f"GROUP BY ancestor_id",
+                    [parent_path_length + 1, f"{self.path}%"])
+                counts = dict(cursor.fetchall())
+        else:
+            counts = Counter(
+                int(ancestor_id)
+                for path in self.get_cases().values_list('path', flat=True).iterator()
+                for ancestor_id in path[parent_path_length:].rstrip("/").split("/"))
+
+        return {suite_id: counts.get(suite_id, 0)
+                for suite_id in self.get_descendants(include_self=True).values_list(
+                    'pk', flat=True)}
+
+    def _move_subtree(self, parent_id: int | None) -> None:
+        """
+        Переписать пути поддерева и его тест-кейсов под нового родителя:
+        по одному UPDATE на сьюты и на кейсы. Строки сьюта и нового
+        родителя блокируются, а пути читаются из базы, а не из объектов
+        в памяти: иначе перенос через устаревший объект родителя или два
+        встречных переноса замкнули бы дерево в цикл
+        :param parent_id: int | None
+        :return: None
+        """
+        locked: typing.Dict[int, typing.Tuple[str, int]] = {
+            pk: (path, depth) for pk, path, depth in TestSuite.objects.select_for_update()
+            .filter(pk__in=[pk for pk in (self.pk, parent_id) if pk is not None])
+            .order_by('pk').values_list('pk', 'path', 'depth')}
+        old_path, old_depth = locked[self.pk]
+        if parent_id is not None and parent_id not in locked:
+            raise ValueError("No such parent test suite")
+        parent_path, parent_depth = locked[parent_id] if parent_id is not None else ("", -1)
+        if parent_path.startswith(old_path):
+            raise ValueError("Test suite cannot be moved into its own subtree")
+
+        new_path: str = f"{parent_path}{self.pk}/"
+        new_depth: int = parent_depth + 1
+        rewritten_path: Concat = Concat(
+            models.Value(new_path), Substr('path', len(old_path) + 1),
+            output_field=models.CharField())
+
+        TestSuite.objects.filter(path__startswith=old_path).update(
+            path=rewritten_path, depth=models.F('depth') + (new_depth - old_depth))
+        TestCase.objects.filter(path__startswith=old_path).update(path=rewritten_path)
+        self.path, self.depth = new_path, new_depth
+
+
+class TestCase(models.Model):
+    """
+    Таблица с тест-кейсами.
+    path - копия пути сьюта, чтобы кейсы поддерева выбирались
+    по индексу без соединения с таблицей сьютов
+    """
+    title: models.CharField = models.CharField(
+        max_length=150
+    )
+    description: models.TextField = models.TextField(
+        blank=True, null=True
+    )
+    steps: models.TextField = models.TextField(
+        blank=True, null=True
+    )
+    expected_result: models.TextField = models.TextField(
+        blank=True, null=True
+    )
+    suite: models.ForeignKey = models.ForeignKey(
+        TestSuite, on_delete=models.CASCADE,
+        related_name="cases"
+    )
+    path: models.CharField = models.CharField(
+        max_length=1024, db_index=True, editable=False
+    )
+    author: models.ForeignKey = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        blank=True, null=True
+    )
+    created: models.DateTimeField = models.DateTimeField(
+        auto_now_add=True
+    )
+    modified: models.DateTimeField = models.DateTimeField(
+        auto_now=True
+    )
+    deleted: models.DateTimeField = models.DateTimeField(
+        blank=True, null=True
+    )
+
+    def __str__(self) -> str:
+        """
+        Возвращение строкового представления тест-кейса
+        :return: str
+        """
+        return str(self.title)
+
+    def save(self, *args: typing.Any, **kwargs: typing.Any) -> None:
+        """
+        Сохранение тест-кейса с путем его сьюта.
+        Путь читается из базы: объект сьюта в памяти мог устареть после переноса
+        :param args: Any
+        :param kwargs: Any
+        :return: None
+        """
+        self.path = TestSuite.objects.values_list('path', flat=True).get(pk=self.suite_id)
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "path"}
+        super().save(*args, **kwargs)
+
+
+class TestRun(models.Model):
+    """
+    Таблица с тестовыми прогонами тест-плана
+    """
+    # Поля, из которых складывается ключ счетчика (_counter_key)
+    counter_fields: typing.ClassVar[typing.Tuple[str, ...]] = ("plan_id", "status", "deleted")
+
+    class Status(models.TextChoices):
+        """
+        Статусы тестового прогона
+        """
+        IN_PROGRESS = "in_progress", "In Progress"
+        COMPLETED = "completed", "Completed"
+        BLOCKED = "blocked", "Blocked"
+        FAILED = "failed", "Failed"
+
+    title: models.CharField = models.CharField(
+        max_length=150
+    )
+    plan: models.ForeignKey = models.ForeignKey(
+        TestPlan, on_delete=models.CASCADE,
+        related_name="runs"
+    )
+    status: models.CharField = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.IN_PROGRESS
+    )
+    author: models.ForeignKey = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        blank=True, null=True
+    )
+    created: models.DateTimeField = models.DateTimeField(
+        auto_now_add=True
+    )
+    modified: models.DateTimeField = models.DateTimeField(
+        auto_now=True
+    )
+    finished: models.DateTimeField = models.DateTimeField(
+        blank=True, null=True
+    )
+    deleted: models.DateTimeField = models.DateTimeField(
+        blank=True, null=True
+    )
+
+    def __str__(self) -> str:
+        """
+        Возвращение строкового представления тестового прогона
+        :return: str
+        """
+        return str(self.title)
+
+    @classmethod
+    def from_db(cls, db: typing.Any, field_names: typing.Any, values: typing.Any) -> typing.Any:
+        """
+        Загрузка прогона из базы с запоминанием того, как он учтен в счетчиках.
+        Если поля ключа отложены (only/defer), ключ читается из базы при сохранении
+        :param db: Any
+        :param field_names: Any
+        :param values: Any
+        :return: TestRun
+        """
+        instance: typing.Any = super().from_db(db, field_names, values)
+        if all(name in instance.__dict__ for name in cls.counter_fields):
+            instance._counted = cls._counter_key(instance.__dict__)
+        return instance
+
+    def save(self, *args: typing.Any, **kwargs: typing.Any) -> None:
+        """
+        Сохранение прогона и счетчиков тест-плана в одной транзакции
+        :param args: Any
+        :param kwargs: Any
+        :return: None
+        """
+        with transaction.atomic():
+            stored: typing.Dict[str, typing.Any] = _stored_counter_values(self)
+            counted: tuple | None = getattr(
+                self, "_counted", self._counter_key(stored) if stored else None)
+            super().save(*args, **kwargs)
+            current: tuple | None = self._counter_key({**stored, **self.__dict__})
+            if current != counted:
+                _move_counter(PlanStatusCounter, "plan_id", counted, current)
+        # pylint: disable=attribute-defined-outside-init
+        self._counted = current
+
+    def delete(self, *args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+        """
+        Удаление прогона с уменьшением счетчика тест-плана
+        :param args: Any
+        :param kwargs: Any
+        :return: Any
+        """
+        with transaction.atomic():
+            counted: tuple | None = getattr(
+                self, "_counted", self._counter_key(_stored_counter_values(self) or self.__dict__))
+            deleted: typing.Any = super().delete(*args, **kwargs)
+            _move_counter(PlanStatusCounter, "plan_id", counted, None)
+        # pylint: disable=attribute-defined-outside-init
+        self._counted = None
+        return deleted
+
+    @staticmethod
+    def _counter_key(values: typing.Mapping[str, typing.Any]) -> tuple | None:
+        """
+        Счетчик тест-плана, в котором учтен прогон: (ID плана, статус).
+        Удаленные (мягко) прогоны не учитываются
+        :param values: Mapping[str, Any] - значения полей counter_fields
+        :return: tuple | None
+        """
+        if values["deleted"] is not None:
+            return None
+        return values["plan_id"], values["status"]
+
+
+class TestResult(models.Model):
+    """
+    Таблица с результатами тестов в прогоне.
+    name - идентификатор теста в CI, case - связанный тест-кейс, если он есть
+    """
+    # Поля, из которых складывается ключ счетчика (_counter_key)
+    counter_fields: typing.ClassVar[typing.Tuple[str, ...]] = ("run_id", "status")
+
+    class Status(models.TextChoices):
+        """
+        Статусы результата теста
+        """
+        PASSED = "passed", "Passed"
+        FAILED = "failed", "Failed"
+        BLOCKED = "blocked", "Blocked"
+        SKIPPED = "skipped", "Skipped"
+        IN_PROGRESS = "in_progress", "In Progress"
+
+    run: models.ForeignKey = models.ForeignKey(
+        TestRun, on_delete=models.CASCADE,
+        related_name="results"
+    )
+    case: models.ForeignKey = models.ForeignKey(
+        TestCase, on_delete=models.SET_NULL,
+        blank=True, null=True, db_index=False,
+        related_name="results"
+    )
+    name: models.CharField = models.CharField(
+        max_length=255
+    )
+    status: models.CharField = models.CharField(
+        max_length=20, choices=Status.choices
+    )
+    duration: models.FloatField = models.FloatField(
+        blank=True, null=True
+    )
+    message: models.TextField = models.TextField(
+        blank=True, default=""
+    )
+    created: models.DateTimeField = models.DateTimeField(
+        auto_now_add=True
+    )
+
+    class Meta:
+        indexes = [
+            # Последние результаты тест-кейса (хронология флаки-тестов);
+            # заменяет индекс внешнего ключа на case
+            models.Index(fields=['case', 'id'], name='testresult_case_idx')
+        ]
+
+    def __str__(self) -> str:
+        """
+        Возвращение строкового представления результата теста
+        :return: str
+        """
+        return f"{self.name}: {self.status}"
+
+    @classmethod
+    def from_db(cls, db: typing.Any, field_names: typing.Any, values: typing.Any) -> typing.Any:
+        """
+        Загрузка результата из базы с запоминанием его статуса.
+        Если поля ключа отложены (only/defer), ключ читается из базы при сохранении
+        :param db: Any
+        :param field_names: Any
+        :param values: Any
+        :return: TestResult
+        """
+        instance: typing.Any = super().from_db(db, field_names, values)
+        if all(name in instance.__dict__ for name in cls.counter_fields):
+            instance._counted = cls._counter_key(instance.__dict__)
+        return instance
+
+    def save(self, *args: typing.Any, **kwargs: typing.Any) -> None:
+        """
+        Сохранение результата и счетчиков прогона в одной транзакции.
+        Массовые вставки и смены статуса - в testware.ingestion и testware.counters
+        :param args: Any
+        :param kwargs: Any
+        :return: None
+        """
+        with transaction.atomic():
+            stored: typing.Dict[str, typing.Any] = _stored_counter_values(self)
+            counted: tuple | None = getattr(
+                self, "_counted", self._counter_key(stored) if stored else None)
+            super().save(*args, **kwargs)
+            current: tuple | None = self._counter_key({**stored, **self.__dict__})
+            if current != counted:
+                _move_counter(RunStatusCounter, "run_id", counted, current)
+        # pylint: disable=attribute-defined-outside-init
+        self._counted = current
+
+    def delete(self, *args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+        """
+        Удаление результата с уменьшением счетчика прогона
+        :param args: Any
+        :param kwargs: Any
+        :return: Any
+        """
+        with transaction.atomic():
+            counted: tuple | None = getattr(
+                self, "_counted", self._counter_key(_stored_counter_values(self) or self.__dict__))
+            deleted: typing.Any = super().delete(*args, **kwargs)
+            _move_counter(RunStatusCounter, "run_id", counted, None)
+        # pylint: disable=attribute-defined-outside-init
+        self._counted = None
+        return deleted
+
+    @staticmethod
+    def _counter_key(values: typing.Mapping[str, typing.Any]) -> tuple | None:
+        """
+        Счетчик прогона, в котором учтен результат: (ID прогона, статус)
+        :param values: Mapping[str, Any] - значения полей counter_fields
+        :return: tuple | None
+        """
+        return values["run_id"], values["status"]
+
+
+class PlanStatusCounter(models.Model):
+    """
+    Таблица со счетчиками прогонов тест-плана по статусам.
+    Обновляется в той же транзакции, что и статус прогона,
+    поэтому дашборд читает готовые числа без COUNT(*) по прогонам
+    """
+    plan: models.ForeignKey = models.ForeignKey(
+        TestPlan, on_delete=models.CASCADE,
+        related_name="status_counters"
+    )
+    status: models.CharField = models.CharField(
+        max_length=20, choices=TestRun.Status.choices
+    )
+    count: models.BigIntegerField = models.BigIntegerField(
+        default=0
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['plan', 'status'], name='unique_plan_status_counter')
+        ]
+
+    def __str__(self) -> str:
+        """
+        Возвращение строкового представления счетчика
+        :return: str
+        """
+        return f"{self.plan_id}/{self.status}: {self.count}"
+
+
+class RunStatusCounter(models.Model):
+    """
+    Таблица со счетчиками результатов тестового прогона по статусам.
+    Обновляется в той же транзакции, что и статусы результатов
+    """
+    run: models.ForeignKey = models.ForeignKey(
+        TestRun, on_delete=models.CASCADE,
+        related_name="status_counters"
+    )
+    status: models.CharField = models.CharField(
+        max_length=20, choices=TestResult.Status.choices
+    )
+    count: models.BigIntegerField = models.BigIntegerField(
+        default=0
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['run', 'status'], name='unique_run_status_counter')
+        ]
+
+    def __str__(self) -> str:
+        """
+        Возвращение строкового представления счетчика
+        :return: str
+        """
+        return f"{self.run_id}/{self.status}: {self.count}"
+
+
+class CaseFlakiness(models.Model):
+    """
+    Таблица с нестабильностью тест-кейсов.
+    outcomes - исходы последних observed результатов кейса битами
+    (младший бит - последний результат, 1 - failed), flips - число смен
+    passed/failed между соседними исходами, score - доля смен среди
+    observed - 1 соседних пар. Окно - FLAKY_WINDOW последних результатов;
+    строка обновляется при загрузке результатов (testware.flakiness)
+    за постоянное время на результат, без чтения истории
+    """
+    case: models.OneToOneField = models.OneToOneField(
+        TestCase, on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="flakiness"
+    )
+    outcomes: models.BigIntegerField = models.BigIntegerField(
+        default=0
+    )
+    observed: models.PositiveSmallIntegerField = models.PositiveSmallIntegerField(
+        default=0
+    )
+    flips: models.PositiveSmallIntegerField = models.PositiveSmallIntegerField(
+        default=0
+    )
+    score: models.FloatField = models.FloatField(
+        default=0.0
+    )
+    updated: models.DateTimeField = models.DateTimeField(
+        auto_now=True
+    )
+
+    class Meta:
+        indexes = [
+            # Рейтинг нестабильных тест-кейсов
+            models.Index(fields=['-score', 'case'], name='caseflakiness_score_idx')
+        ]
+
+    def __str__(self) -> str:
+        """
+        Возвращение строкового представления нестабильности тест-кейса
+        :return: str
+        """
+        return f"{self.case_id}: {self.score:.2f}"
+
+
+class TestPlanHistory(models.Model):
+    """
+    Таблица с историей изменений тест-планов; строки только добавляются.
+    Каждое сохранение плана и каждое массовое изменение через
+    QuerySet.update добавляет строку с новыми значениями измененных полей,
+    каждая HISTORY_SNAPSHOT_INTERVAL-я версия (начиная с первой) хранит
+    и полное состояние плана, поэтому состояние на любой момент собирается
+    не более чем из HISTORY_SNAPSHOT_INTERVAL строк (testware.history).
+    Внешний ключ на план без ограничения в базе: история остается
+    после переноса плана в архив
+    """
+    plan: models.ForeignKey = models.ForeignKey(
+        TestPlan, on_delete=models.DO_NOTHING,
+        db_constraint=False, db_index=False,
+        related_name="history"
+    )
+    version: models.PositiveIntegerField = models.PositiveIntegerField()
+    changed: models.DateTimeField = models.DateTimeField()
+    changed_by: models.ForeignKey = models.ForeignKey(
+        User, on_delete=models.SET_NULL,
+        blank=True, null=True,
+        related_name="+"
+    )
+    changes: models.JSONField = models.JSONField(
+        encoder=DjangoJSONEncoder
+    )
+    snapshot: models.JSONField = models.JSONField(
+        encoder=DjangoJSONEncoder,
+        blank=True, null=True
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['plan', 'version'],
+                                    name='unique_test_plan_history_version')
+        ]
+        indexes = [
+            # Последний снимок до момента времени и изменения после него
+            models.Index(fields=['plan', 'changed'], name='testplanhistory_changed_idx')
+        ]
+
+    def __str__(self) -> str:
+        """
+        Возвращение строкового представления версии тест-плана
+        :return: str
+        """
+        return f"{self.plan_id} v{self.version}"
+
+    def save(self, *args: typing.Any, **kwargs: typing.Any) -> None:
+        """
+        Добавление версии; существующие версии не изменяются
+        :param args: Any
+        :param kwargs: Any
+        :return: None
+        """
+        if not self._state.adding:
+            raise ValueError("Test plan history is append-only")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+        """
+        Версии не удаляются
+        :param args: Any
+        :param kwargs: Any
+        :return: Any
+        """
+        raise ValueError("Test plan history is append-only")
+
+
+class SearchDocument(models.Model):
+    """
+    Таблица поисковых документов тест-планов, наборов, тест-кейсов и прогонов.
+    Строки поддерживаются обработчиками сигналов (testware.search),
+    полнотекстовый индекс над ними создается миграцией 0008 и обновляется
+    самой базой: столбец tsvector в PostgreSQL, таблица FTS5 в SQLite
+    """
+    class Entity(models.TextChoices):
+        """
+        Тип проиндексированного объекта
+        """
+        PLAN = "plan", "Test plan"
+        SUITE = "suite", "Test suite"
+        CASE = "case", "Test case"
+        RUN = "run", "Test run"
+
+    entity: models.CharField = models.CharField(
+        max_length=10, choices=Entity.choices
+    )
+    object_id: models.BigIntegerField = models.BigIntegerField()
+    title: models.CharField = models.CharField(
+        max_length=255
+    )
+    body: models.TextField = models.TextField(
+        blank=True, default=""
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['entity', 'object_id'],
+                                    name='unique_search_document')
+        ]
+
+    def __str__(self) -> str:
+        """
+        Возвращение строкового представления документа
+        :return: str
+        """
+        return f"{self.entity}/{self.object_id}: {self.title}"
+
+
+class Blob(models.Model):
+    """
+    Таблица с содержимым вложений. Файл хранится в ATTACHMENT_ROOT один
+    раз под своим SHA-256 (testware.attachments), refcount - число
+    вложений, которые на него ссылаются. Файлы без ссылок удаляет
+    команда gc_attachments
+    """
+    sha256: models.CharField = models.CharField(
+        max_length=64, primary_key=True
+    )
+    size: models.BigIntegerField = models.BigIntegerField()
+    refcount: models.IntegerField = models.IntegerField(
+        default=0
+    )
+    created: models.DateTimeField = models.DateTimeField(
+        auto_now_add=True
+    )
+
+    class Meta:
+        indexes = [
+            # Файлы без ссылок для сборки мусора
+            models.Index(fields=['sha256'], condition=models.Q(refcount__lte=0),
+                         name='blob_unreferenced_idx')
+        ]
+
+    def __str__(self) -> str:
+        """
+        Возвращение строкового представления содержимого
+        :return: str
+        """
+        return f"{self.sha256} ({self.size} bytes)"
+
+
+class Attachment(models.Model):
+    """
+    Таблица с вложениями результатов тестов и тест-кейсов
+    (скриншоты, HAR-файлы, логи). Вложение принадлежит ровно одному
+    результату или тест-кейсу и ссылается на содержимое в Blob
+    """
+    blob: models.ForeignKey = models.ForeignKey(
+        Blob, on_delete=models.PROTECT,
+        related_name="attachments"
+    )
+    result: models.ForeignKey = models.ForeignKey(
+        TestResult, on_delete=models.CASCADE,
+        blank=True, null=True,
+        related_name="attachments"
+    )
+    case: models.ForeignKey = models.ForeignKey(
+        TestCase, on_delete=models.CASCADE,
+        blank=True, null=True,
+        related_name="attachments"
+    )
+    filename: models.CharField = models.CharField(
+        max_length=255
+    )
+    content_type: models.CharField = models.CharField(
+        max_length=100
+    )
+    author: models.ForeignKey = models.ForeignKey(
+        User, on_delete=models.SET_NULL,
+        blank=True, null=True,
+        related_name="+"
+    )
+    created: models.DateTimeField = models.DateTimeField(
+        auto_now_add=True
+    )
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(result__isnull=False, case__isnull=True)
+                | models.Q(result__isnull=True, case__isnull=False),
+                name='attachment_single_owner')
+        ]
+
+    def __str__(self) -> str:
+        """
+        Возвращение строкового представления вложения
+        :return: str
+        """
+        return str(self.filename)
+
+
+class AttachmentUpload(models.Model):
+    """
+    Таблица с незавершенными загрузками вложений по частям.
+    Части дописываются в файл загрузки, received - число полученных
+    байт, с которого клиент продолжает прерванную загрузку. После
+    последней части файл переносится в хранилище, а строка удаляется;
+    брошенные загрузки удаляет команда gc_attachments
+    """
+    id: models.UUIDField = models.UUIDField(
+        primary_key=True, default=uuid.uuid4, editable=False
+    )
+    result: models.ForeignKey = models.ForeignKey(
+        TestResult, on_delete=models.CASCADE,
+        blank=True, null=True,
+        related_name="+"
+    )
+    case: models.ForeignKey = models.ForeignKey(
+        TestCase, on_delete=models.CASCADE,
+        blank=True, null=True,
+        related_name="+"
+    )
+    filename: models.CharField = models.CharField(
+        max_length=255
+    )
+    content_type: models.CharField = models.CharField(
+        max_length=100
+    )
+    size: models.BigIntegerField = models.BigIntegerField()
+    sha256: models.CharField = models.CharField(
+        max_length=64, blank=True, default=""
+    )
+    received: models.BigIntegerField = models.BigIntegerField(
+        default=0
+    )
+    author: models.ForeignKey = models.ForeignKey(
+        User, on_delete=models.SET_NULL,
+        blank=True, null=True,
+        related_name="+"
+    )
+    created: models.DateTimeField = models.DateTimeField(
+        auto_now_add=True
+    )
+    updated: models.DateTimeField = models.DateTimeField(
+        auto_now=True
+    )
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(result__isnull=False, case__isnull=True)
+                | models.Q(result__isnull=True, case__isnull=False),
+                name='attachment_upload_single_owner')
+        ]
+
+    def __str__(self) -> str:
+        """
+        Возвращение строкового представления загрузки
+        :return: str
+        """
+        return f"{self.filename}: {self.received}/{self.size}"
+
+
+class ArchivedTestPlan(models.Model):
+    """
+    Таблица с архивом тест-планов, мягко удаленных дольше
+    ARCHIVE_AFTER_DAYS дней. Строки переносятся из TestPlan с теми же ID
+    командой archive_deleted_plans (testware.archive); автор хранится
+    без внешнего ключа, чтобы архив не мешал удалению пользователей
+    """
+    id: models.BigIntegerField = models.BigIntegerField(
+        primary_key=True
+    )
+    title: models.CharField = models.CharField(
+        max_length=150
+    )
+    description: models.TextField = models.TextField(
+        blank=True, null=True
+    )
+    author_id: models.BigIntegerField = models.BigIntegerField(
+        blank=True, null=True
+    )
+    start_date: models.DateTimeField = models.DateTimeField(
+        blank=True, null=True
+    )
+    end_date: models.DateTimeField = models.DateTimeField(
+        blank=True, null=True
+    )
+    created: models.DateTimeField = models.DateTimeField()
+    modified: models.DateTimeField = models.DateTimeField()
+    deleted: models.DateTimeField = models.DateTimeField()
+    is_current: models.BooleanField = models.BooleanField(
+        default=False
+    )
+    archived: models.DateTimeField = models.DateTimeField()
+
+    def __str__(self) -> str:
+        """
+        Возвращение строкового представления архивного тест-плана
+        :return: str
+        """
+        return str(self.title)
+
+
+def record_plan_history(entries: typing.Mapping[int, typing.Tuple[dict, dict]],
+                        changed_by: typing.Any = None, created: bool = False) -> None:
+    """
+    Добавить в историю по версии на каждый измененный тест-план одним
+    INSERT. Вызывается в транзакции изменения, когда строки планов уже
+    заблокированы, поэтому параллельные изменения одного плана получают
+    разные номера версий
+    :param entries: Mapping[int, tuple[dict, dict]] - ID плана ->
+                    (измененные поля, состояние после изменения)
+    :param changed_by: User | None
+    :param created: bool - планы только что созданы и истории у них нет
+    :return: None
+    """
+    if not entries:
+        return
+
+    last: typing.Dict[int, int] = {} if created else dict(
+        TestPlanHistory.objects.filter(plan_id__in=list(entries)).values('plan_id')
+        .annotate(last_version=models.Max('version')).values_list('plan_id', 'last_version'))
+    changed: typing.Any = timezone.now()
+    versions: typing.List[TestPlanHistory] = []
+    for plan_id, (changes, state) in sorted(entries.items()):
+        version: int = last.get(plan_id, 0) + 1
+        versions.append(TestPlanHistory(
+            plan_id=plan_id, version=version, changed=changed, changed_by=changed_by,
+            changes=changes,
+            snapshot=state if (version - 1) % settings.HISTORY_SNAPSHOT_INTERVAL == 0 else None))
+    TestPlanHistory.objects.bulk_create(versions)
+
+
+def adjust_counters(model: typing.Any, owner_field: str,
+                    deltas: typing.Mapping[tuple, int]) -> None:
+    """
+    Изменить счетчики одним запросом INSERT ... ON CONFLICT DO UPDATE
+    :param model: PlanStatusCounter | RunStatusCounter
+    :param owner_field: str - plan_id или run_id
+    :param deltas: Mapping[tuple, int] - (ID владельца, статус) -> изменение
+    :return: None
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    quote: typing.Callable = connection.ops.quote_name
+    table: str = quote(model._meta.db_table)
+    values: str = ", ".join(["(%s, %s, %s)"] * len(deltas))
+    params: list = [value for (owner_id, status), delta in sorted(deltas.items())
+                    for value in (owner_id, status, delta)]
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({quote(owner_field)}, {quote('status')}, {quote('count')}) "
+            f"VALUES {values} "
+            f"ON CONFLICT ({quote(owner_field)}, {quote('status')}) "
+            f"DO UPDATE SET {quote('count')} = "
+            f"{table}.{quote('count')} + EXCLUDED.{quote('count')}",
+            params)
+
+
+def _stored_counter_values(instance: typing.Any) -> typing.Dict[str, typing.Any]:
+    """
+    Сохраненные в базе значения полей ключа счетчика. Читаются одним
+    запросом, только если ключ не запомнен при загрузке или часть его
+    полей отложена (only/defer); присвоенные экземпляру значения не затираются
+    :param instance: TestRun | TestResult
+    :return: dict[str, Any] - пустой, если чтение не нужно или строки нет
+    """
+    if instance._state.adding or (
+            hasattr(instance, "_counted")
+            and all(name in instance.__dict__ for name in instance.counter_fields)):
+        return {}
+    return type(instance)._base_manager.filter(pk=instance.pk).values(
+        *instance.counter_fields).first() or {}
+
+
+def _move_counter(model: typing.Any, owner_field: str,
+                  old: tuple | None, new: tuple | None) -> None:
+    """
+    Перенести одну единицу из счетчика old в счетчик new
+    :param model: PlanStatusCounter | RunStatusCounter
+    :param owner_field: str
+    :param old: tuple | None - (ID владельца, статус)
+    :param new: tuple | None
+    :return: None
+    """
+    deltas: typing.Dict[tuple, int] = {}
+    if old is not None:
+        deltas[old] = deltas.get(old, 0) - 1
+    if new is not None:
+        deltas[new] = deltas.get(new, 0) + 1
+    adjust_counters(model, owner_field, deltas)
@@ -0,0 +1,303 @@
+"""
+Модуль полнотекстового поиска по тест-планам, наборам, тест-кейсам и прогонам.
+
+Каждый неудаленный объект представлен строкой SearchDocument: заголовок
+и тело из текстовых полей. Строки обновляются обработчиками сигналов
+при сохранении и удалении объектов, а индекс над ними поддерживает сама
+база - сгенерированный столбец tsvector с GIN-индексом в PostgreSQL или
+таблица FTS5 с триггерами в SQLite. Массовые изменения в обход save()
+(QuerySet.update, bulk_create) переносятся в индекс rebuild_search_index.
+
+Все слова запроса обязательны, последнее ищется как префикс: запрос
+набирается по мере ввода, а префиксы всех слов сделали бы пересечение
+списков GIN на порядок дороже. Результаты упорядочены по релевантности
+(совпадения в заголовке весят больше), для каждого возвращается фрагмент
+текста с подсвеченными совпадениями. Фрагменты строятся в Python
+по возвращаемой странице, одинаково для обеих баз: ts_headline
+отбрасывает из текста похожее на HTML-теги ("<button>").
+"""
+import re
+import typing
+
+from django.conf import settings
+from django.db import NotSupportedError, connection, transaction
+from django.db.models import Model
+from django.utils.html import escape
+
+from .models import SearchDocument, TestCase, TestPlan, TestRun, TestSuite
+
+# Тип документа и поля тела для каждой индексируемой модели
+SEARCH_FIELDS: typing.Dict[typing.Type[Model], typing.Tuple[str, typing.Tuple[str, ...]]] = {
+    TestPlan: (SearchDocument.Entity.PLAN.value, ('description',)),
+    TestSuite: (SearchDocument.Entity.SUITE.value, ('description',)),
+    TestCase: (SearchDocument.Entity.CASE.value, ('description', 'steps', 'expected_result')),
+    TestRun: (SearchDocument.Entity.RUN.value, ()),
+}
+
+# Длина фрагмента текста с совпадениями в символах
+SNIPPET_LENGTH: int = 200
+
+TERM_PATTERN: typing.Pattern = re.compile(r"[^\W_]+")
+
+
+class SearchHit(typing.NamedTuple):
+    """
+    Найденный объект
+    """
+    entity: str
+    object_id: int
+    title: str
+    rank: float
+    snippet: str
+
+    def as_dict(self) -> dict:
+        """
+        Результат в виде словаря для ответа API
+        :return: dict
+        """
+        return {
+            "type": self.entity,
+            "id": self.object_id,
+            "title": self.title,
+            "rank": self.rank,
+            "snippet": self.snippet
+        }
+
+
+class PostgresSearchBackend:
+    """
+    Поиск по столбцу tsvector. Ранжируются не более
+    SEARCH_RANK_CANDIDATES совпадений, поэтому время запроса
+    ограничено и для слов, которые встречаются в большинстве документов
+    """
+
+    def search(self, terms: typing.List[str], entities: typing.Sequence[str],
+               limit: int) -> typing.List[tuple]:
+        """
+        Найти документы
+        :param terms: list[str] - нормализованные слова запроса
+        :param entities: Sequence[str] - типы документов, пустой - все
+        :param limit: int
+        :return: list[tuple] - entity, object_id, title, body, rank
+        """
+        quote: typing.Callable = connection.ops.quote_name
+        table: str = quote(SearchDocument._meta.db_table)
+        entity_filter: str = f"AND {quote('entity')} = ANY(%s) " if entities else ""
+        tsquery: str = " & ".join([*terms[:-1], f"{terms[-1]}:*"])
+
+        with connection.cursor() as cursor:
+            # tsquery - константа, а не CTE: так планировщик оценивает частоту
+            # слов и для частых выбирает последовательное чтение до LIMIT
+            cursor.execute(
+                f"SELECT document.{quote('entity')}, document.{quote('object_id')}, "
+                f"document.{quote('title')}, document.{quote('body')}, ranked.rank "
+                f"FROM (SELECT {quote('id')}, "
+                f"ts_rank_cd({quote('search_vector')}, to_tsquery('simple', %s)) AS rank "
+                f"FROM (SELECT {quote('id')}, {quote('search_vector')} FROM {table} "
+                f"WHERE {quote('search_vector')} @@ to_tsquery('simple', %s) {entity_filter}"
+                f"LIMIT %s) AS candidates "
+                f"ORDER BY rank DESC, {quote('id')} LIMIT %s) AS ranked "
+                f"JOIN {table} AS document USING ({quote('id')}) "
+                f"ORDER BY ranked.rank DESC, ranked.{quote('id')}",
+                [tsquery, tsquery, *([list(entities)] if entities else []),
+                 settings.SEARCH_RANK_CANDIDATES, limit])
+            return cursor.fetchall()
+
+
+class SQLiteSearchBackend:
+    """
+    Поиск по таблице FTS5 для локального запуска и тестов.
+    Релевантность - bm25 с весом заголовка 10
+    """
+    fts_table: str = f"{SearchDocument._meta.db_table}_fts"
+
+    def search(self, terms: typing.List[str], entities: typing.Sequence[str],
+               limit: int) -> typing.List[tuple]:
+        """
+        Найти документы
+        :param terms: list[str] - нормализованные слова запроса
+        :param entities: Sequence[str] - типы документов, пустой - все
+        :param limit: int
+        :return: list[tuple] - entity, object_id, title, body, rank
+        """
+        quote: typing.Callable = connection.ops.quote_name
+        table: str = quote(SearchDocument._meta.db_table)
+        fts: str = quote(self.fts_table)
+        entity_filter: str = (
+            f"AND document.{quote('entity')} IN ({', '.join(['%s'] * len(entities))}) "
+            if entities else "")
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT document.{quote('entity')}, document.{quote('object_id')}, "
+                f"document.{quote('title')}, document.{quote('body')}, "
+                f"-bm25({fts}, 10.0, 1.0) AS rank "
+                f"FROM {fts} JOIN {table} AS document ON document.{quote('id')} = {fts}.rowid "
+                f"WHERE {fts} MATCH %s {entity_filter}"
+                f"ORDER BY rank DESC, document.{quote('id')} LIMIT %s",
+                [" ".join([*(f'"{term}"' for term in terms[:-1]), f'"{terms[-1]}"*']),
+                 *entities, limit])
+            return cursor.fetchall()
+
+
+def get_search_backend() -> PostgresSearchBackend | SQLiteSearchBackend:
+    """
+    Бэкенд поиска для текущей базы данных
+    :return: PostgresSearchBackend | SQLiteSearchBackend
+    """
+    if connection.vendor == "postgresql":
+        return PostgresSearchBackend()
+    if connection.vendor == "sqlite":
+        return SQLiteSearchBackend()
+    raise NotSupportedError(f"Full-text search is not supported on {connection.vendor}")
+
+
+def parse_query(query: str) -> typing.List[str]:
+    """
+    Разбить запрос на слова без операторов и спецсимволов
+    :param query: str
+    :return: list[str]
+    """
+    return TERM_PATTERN.findall(query.lower())[:settings.SEARCH_MAX_TERMS]
+
+
+def search(query: str, entities: typing.Sequence[str] = (),
+           limit: int = 20) -> typing.List[SearchHit]:
+    """
+    Найти объекты по словам запроса
+    :param query: str
+    :param entities: Sequence[str] - типы объектов (SearchDocument.Entity), пустой - все
+    :param limit: int
+    :return: list[SearchHit] - по убыванию релевантности
+    """
+    terms: typing.List[str] = parse_query(query)
+    if not terms:
+        return []
+
+    alternatives: typing.List[str] = [rf"{re.escape(term)}\b" for term in terms[:-1]]
+    alternatives.append(rf"{re.escape(terms[-1])}\w*")
+    pattern: typing.Pattern = re.compile(rf"\b(?:{'|'.join(alternatives)})", re.IGNORECASE)
+    return [SearchHit(entity, object_id, title, float(rank), make_snippet(title, body, pattern))
+            for entity, object_id, title, body, rank
+            in get_search_backend().search(terms, entities, limit)]
+
+
+def make_snippet(title: str, body: str, pattern: typing.Pattern) -> str:
+    """
+    Фрагмент тела документа вокруг первого совпадения (или заголовок,
+    если совпадения только в нем) с экранированным HTML и совпадениями
+    в теге <mark>
+    :param title: str
+    :param body: str
+    :param pattern: Pattern - префиксы слов запроса
+    :return: str
+    """
+    match: typing.Optional[typing.Match] = pattern.search(body)
+    text: str = body if match is not None else title
+    start: int = 0
+    if match is not None and match.start() > SNIPPET_LENGTH // 4:
+        start = text.rfind(" ", 0, match.start() - SNIPPET_LENGTH // 4) + 1
+    end: int = min(len(text), start + SNIPPET_LENGTH)
+    if end < len(text) and text.rfind(" ", start, end) > start:
+        end = text.rfind(" ", start, end)
+
+    pieces: typing.List[str] = ["… "] if start else []
+    position: int = start
+    for found in pattern.finditer(text, start, end):
+        pieces.append(escape(text[position:found.start()]))
+        pieces.append(f"<mark>{escape(found.group())}</mark>")
+        position = found.end()
+    pieces.append(escape(text[position:end]))
+    if end < len(text):
+        pieces.append(" …")
+    return "".join(pieces)
+
+
+def index_object(instance: Model) -> None:
+    """
+    Обновить документ объекта одним INSERT ... ON CONFLICT DO UPDATE.
+    Удаленный (в том числе мягко) объект убирается из индекса
+    :param instance: TestPlan | TestSuite | TestCase | TestRun
+    :return: None
+    """
+    index_objects([instance])
+
+
+def index_objects(instances: typing.Sequence[Model]) -> None:
+    """
+    Обновить документы объектов одного типа: удаленные убираются одним
+    DELETE, остальные обновляются одним INSERT ... ON CONFLICT DO UPDATE
+    :param instances: Sequence[TestPlan | TestSuite | TestCase | TestRun]
+    :return: None
+    """
+    if not instances:
+        return
+    entity, fields = SEARCH_FIELDS[type(instances[0])]
+    deleted: typing.List[int] = [instance.pk for instance in instances
+                                 if instance.deleted is not None]
+    if deleted:
+        SearchDocument.objects.filter(entity=entity, object_id__in=deleted).delete()
+    indexed: typing.List[Model] = [instance for instance in instances if instance.deleted is None]
+    if not indexed:
+        return
+
+    quote: typing.Callable = connection.ops.quote_name
+    table: str = quote(SearchDocument._meta.db_table)
+    with connection.cursor() as cursor:
+        # Документ не переписывается, если текст не изменился
+        cursor.execute(
+            f"INSERT INTO {table} ({quote('entity')}, {quote('object_id')}, "
+            f"{quote('title')}, {quote('body')}) "
+            f"VALUES {', '.join(['(%s, %s, %s, %s)'] * len(indexed))} "
+            f"ON CONFLICT ({quote('entity')}, {quote('object_id')}) DO UPDATE "
+            f"SET {quote('title')} = EXCLUDED.{quote('title')}, "
+            f"{quote('body')} = EXCLUDED.{quote('body')} "
+            f"WHERE {table}.{quote('title')} <> EXCLUDED.{quote('title')} "
+            f"OR {table}.{quote('body')} <> EXCLUDED.{quote('body')}",
+            [value for instance in indexed
+             for value in (entity, instance.pk, instance.title, _document_body(instance, fields))])
+
+
+def unindex_object(instance: Model) -> None:
+    """
+    Удалить документ объекта
+    :param instance: TestPlan | TestSuite | TestCase | TestRun
+    :return: None
+    """
+    entity, _ = SEARCH_FIELDS[type(instance)]
+    SearchDocument.objects.filter(entity=entity, object_id=instance.pk).delete()
+
+
+def rebuild_search_index(batch_size: int = 2000) -> typing.Dict[str, int]:
+    """
+    Пересоздать все документы по неудаленным объектам
+    :param batch_size: int
+    :return: dict[str, int] - число документов каждого типа
+    """
+    indexed: typing.Dict[str, int] = {}
+    with transaction.atomic():
+        SearchDocument.objects.all().delete()
+        for model, (entity, fields) in SEARCH_FIELDS.items():
+            batch: typing.List[SearchDocument] = []
+            indexed[entity] = 0
+            for pk, title, *values in model.objects.filter(deleted=None).values_list(
+                    'pk', 'title', *fields).iterator(chunk_size=batch_size):
+                batch.append(SearchDocument(entity=entity, object_id=pk, title=title,
+                                            body="\n".join(value for value in values if value)))
+                if len(batch) >= batch_size:
+                    SearchDocument.objects.bulk_create(batch)
+                    indexed[entity] += len(batch)
+                    batch = []
+            SearchDocument.objects.bulk_create(batch)
+            indexed[entity] += len(batch)
+    return indexed
+
+
+def _document_body(instance: Model, fields: typing.Tuple[str, ...]) -> str:
+    """
+    Тело документа: непустые текстовые поля через перевод строки
+    :param instance: Model
+    :param fields: tuple[str, ...]
+    :return: str
+    """
+    return "\n".join(value for value in (getattr(instance, field) for field in fields) if value)
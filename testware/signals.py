@@ -0,0 +1,81 @@
+"""
+Модуль с обработчиками сигналов приложения testware
+"""
+import typing
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+
+from .flakiness import record_outcomes
+from .models import Attachment, Blob, TestResult
+from .search import SEARCH_FIELDS, index_object, unindex_object
+
+
+def update_search_document(sender: typing.Any, instance: typing.Any,
+                           update_fields: typing.Any = None, **kwargs: typing.Any) -> None:
+    # pylint: disable=unused-argument
+    """
+    Обновление поискового документа после сохранения объекта.
+    Сохранение только неиндексируемых полей (например, статуса прогона)
+    документ не трогает
+    :param sender: Any
+    :param instance: TestPlan | TestSuite | TestCase | TestRun
+    :param update_fields: frozenset | None
+    :param kwargs: Any
+    :return: None
+    """
+    _, fields = SEARCH_FIELDS[sender]
+    if update_fields is not None and update_fields.isdisjoint(('title', 'deleted', *fields)):
+        return
+    index_object(instance)
+
+
+def remove_search_document(sender: typing.Any, instance: typing.Any, **kwargs: typing.Any) -> None:
+    # pylint: disable=unused-argument
+    """
+    Удаление поискового документа вместе с объектом
+    :param sender: Any
+    :param instance: TestPlan | TestSuite | TestCase | TestRun
+    :param kwargs: Any
+    :return: None
+    """
+    unindex_object(instance)
+
+
+def record_result_outcome(sender: typing.Any, instance: TestResult, created: bool,
+                          **kwargs: typing.Any) -> None:
+    # pylint: disable=unused-argument
+    """
+    Учет нового результата в оценке нестабильности тест-кейса.
+    Пакеты результатов учитываются в testware.ingestion
+    :param sender: Any
+    :param instance: TestResult
+    :param created: bool
+    :param kwargs: Any
+    :return: None
+    """
+    if created:
+        record_outcomes([(instance.case_id, instance.status)])
+
+
+def release_blob(sender: typing.Any, instance: Attachment, **kwargs: typing.Any) -> None:
+    # pylint: disable=unused-argument
+    """
+    Уменьшение числа ссылок на содержимое удаленного вложения, в том
+    числе при каскадном удалении результата или тест-кейса. Файл
+    без ссылок удаляется сборкой мусора (testware.attachments)
+    :param sender: Any
+    :param instance: Attachment
+    :param kwargs: Any
+    :return: None
+    """
+    Blob.objects.filter(pk=instance.blob_id).update(refcount=F("refcount") - 1)
+
+
+post_save.connect(record_result_outcome, sender=TestResult, dispatch_uid="flakiness_result_save")
+post_delete.connect(release_blob, sender=Attachment, dispatch_uid="attachment_release_blob")
+
+for indexed_model in SEARCH_FIELDS:
+    post_save.connect(update_search_document, sender=indexed_model,
+                      dispatch_uid=f"search_document_save_{indexed_model.__name__}")
+    post_delete.connect(remove_search_document, sender=indexed_model,
+                        dispatch_uid=f"search_document_delete_{indexed_model.__name__}")
@@ -1,11 +1,32 @@
 """
 Модуль с тестами приложения testware
 """
+import datetime
+import hashlib
+import io
+import shutil
+import tempfile
+from unittest import mock
+
 import pytz
-from django.test import TestCase
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
 from django.utils import timezone
 from authentication.models import User
-from .models import TestPlan
+from .counters import delete_results, get_counters, rebuild_counters, update_results_status
+from .ingestion import IngestionReport, ingest_results, validate_results
+from .junit import JUnitImportReport, import_junit, parse_junit
+from .archive import ArchiveReport, archive_deleted_plans
+from .batch import PlanBatchReport, apply_plan_operations
+from .attachments import UploadOffsetMismatch, append_chunk, blob_path, collect_garbage, \
+    start_upload
+from .flakiness import flaky_cases, flip_timeline, rebuild_flakiness, record_outcomes
+from .history import PlanState, plan_state_at
+from .models import (
+    ArchivedTestPlan, Attachment, AttachmentUpload, Blob, CaseFlakiness, PlanStatusCounter,
+    RunStatusCounter, SearchDocument, TestCase as CaseModel, TestPlan, TestPlanHistory, TestResult,
+    TestRun, TestSuite)
+from .search import rebuild_search_index, search
 
 
 class TestTestPlan(TestCase):
@@ -114,3 +135,879 @@ class TestTestPlan(TestCase):
 
         # Проверка поля текущего тест-плана
         self.assertEqual(self.test_plan.is_current, False)
+
+
+class TestTestSuiteTree(TestCase):
+    """
+    Тестирование дерева тест-сьютов
+    """
+    # pylint: disable=attribute-defined-outside-init
+    def setUp(self) -> None:
+        """
+        Дерево root -> (api -> auth, ui) и кейсы в каждом сьюте
+        :return: None
+        """
+        self.root: TestSuite = TestSuite.objects.create(title="Root")
+        self.api: TestSuite = TestSuite.objects.create(title="API", parent=self.root)
+        self.auth: TestSuite = TestSuite.objects.create(title="Auth", parent=self.api)
+        self.ui: TestSuite = TestSuite.objects.create(title="UI", parent=self.root)
+        for suite, count in ((self.root, 1), (self.api, 2), (self.auth, 3), (self.ui, 4)):
+            CaseModel.objects.bulk_create([
+                CaseModel(title=f"{suite.title} {index}", suite=suite, path=suite.path)
+                for index in range(count)])
+
+    def test_paths(self) -> None:
+        """
+        Тест-кейс, что путь и глубина назначаются при создании.
+        :return: None
+        """
+        self.assertEqual(self.auth.path, f"{self.root.pk}/{self.api.pk}/{self.auth.pk}/")
+        self.assertEqual(self.auth.depth, 2)
+        case: CaseModel = CaseModel.objects.create(title="Login", suite=self.auth)
+        self.assertEqual(case.path, self.auth.path)
+
+    def test_subtree_queries(self) -> None:
+        """
+        Тест-кейс, что кейсы поддерева и счетчики по поддеревьям
+        выбираются одним запросом.
+        :return: None
+        """
+        with self.assertNumQueries(1):
+            self.assertEqual(self.api.get_cases().count(), 5)
+        self.assertEqual(self.root.get_cases().count(), 10)
+        self.assertEqual(set(self.api.get_descendants()), {self.auth})
+
+        with self.assertNumQueries(2):
+            counts: dict = self.root.case_counts()
+        self.assertEqual(counts, {
+            self.root.pk: 10, self.api.pk: 5, self.auth.pk: 3, self.ui.pk: 4})
+        self.assertEqual(self.auth.case_counts(), {self.auth.pk: 3})
+
+    def test_portable_case_counts(self) -> None:
+        """
+        Тест-кейс, что на других СУБД счетчики по поддеревьям совпадают
+        с подсчетом в PostgreSQL.
+        :return: None
+        """
+        expected: dict = self.root.case_counts()
+        with mock.patch.object(connection, "vendor", "sqlite"):
+            self.assertEqual(self.root.case_counts(), expected)
+            self.assertEqual(self.api.case_counts(), {self.api.pk: 5, self.auth.pk: 3})
+
+    def test_deleted_descendants(self) -> None:
+        """
+        Тест-кейс, что мягко удаленные сьюты не входят в поддерево.
+        :return: None
+        """
+        self.ui.deleted = timezone.now()
+        self.ui.save()
+        self.assertEqual(set(self.root.get_descendants()), {self.api, self.auth})
+        self.assertNotIn(self.ui.pk, self.root.case_counts())
+
+    def test_move_subtree(self) -> None:
+        """
+        Тест-кейс, что перенос поддерева не зависит от числа узлов
+        и переписывает пути сьютов и кейсов.
+        :return: None
+        """
+        CaseModel.objects.bulk_create([
+            CaseModel(title=f"Bulk {index}", suite=self.auth, path=self.auth.path)
+            for index in range(200)])
+
+        with self.assertNumQueries(6):
+            self.api.move_to(self.ui)
+
+        self.auth.refresh_from_db()
+        self.assertEqual(self.auth.path,
+                         f"{self.root.pk}/{self.ui.pk}/{self.api.pk}/{self.auth.pk}/")
+        self.assertEqual(self.auth.depth, 3)
+        self.assertEqual(self.ui.get_cases().count(), 209)
+        self.assertEqual(CaseModel.objects.filter(
+            suite=self.auth).exclude(path=self.auth.path).count(), 0)
+
+        self.api.move_to(None)
+        self.auth.refresh_from_db()
+        self.assertEqual(self.auth.path, f"{self.api.pk}/{self.auth.pk}/")
+        self.assertEqual(self.auth.depth, 1)
+
+    def test_move_into_own_subtree(self) -> None:
+        """
+        Тест-кейс, что сьют нельзя перенести в его же поддерево.
+        :return: None
+        """
+        with self.assertRaises(ValueError):
+            self.api.move_to(self.auth)
+
+        self.api.refresh_from_db()
+        self.assertEqual(self.api.parent, self.root)
+
+    def test_move_through_stale_parent(self) -> None:
+        """
+        Тест-кейс, что путь нового родителя читается из базы:
+        перенос через устаревший объект не замыкает дерево в цикл.
+        :return: None
+        """
+        stale_ui: TestSuite = TestSuite.objects.get(pk=self.ui.pk)
+        self.ui.move_to(self.api)
+        with self.assertRaises(ValueError):
+            self.api.move_to(stale_ui)
+
+        self.api.refresh_from_db()
+        self.ui.refresh_from_db()
+        self.assertEqual((self.api.parent, self.api.path),
+                         (self.root, f"{self.root.pk}/{self.api.pk}/"))
+        self.assertEqual(self.ui.path, f"{self.root.pk}/{self.api.pk}/{self.ui.pk}/")
+
+
+class TestResultIngestion(TestCase):
+    """
+    Тестирование массовой загрузки результатов тестов
+    """
+    # pylint: disable=attribute-defined-outside-init
+    def setUp(self) -> None:
+        """
+        Создание тест-плана, прогона и тест-кейса
+        :return: None
+        """
+        self.plan: TestPlan = TestPlan.objects.create(title="Release")
+        self.run: TestRun = TestRun.objects.create(title="CI #1", plan=self.plan)
+        self.suite: TestSuite = TestSuite.objects.create(title="API")
+        self.case: CaseModel = CaseModel.objects.create(title="Login", suite=self.suite)
+        self.rows: list = [
+            {"name": "test_login", "status": "passed", "case": self.case.pk, "duration": 0.5},
+            {"name": "", "status": "passed"},
+            {"name": "test_logout", "status": "broken", "duration": -1},
+            {"name": "test_missing_case", "status": "failed", "case": 10 ** 9},
+            {"name": "test_message", "status": "failed", "message": ""},
+            "not an object"
+        ]
+
+    def test_validation_reports_row_errors_in_one_query(self) -> None:
+        """
+        Тест-кейс, что ошибки возвращаются по строкам, а проверка
+        ссылок на тест-кейсы выполняется одним запросом.
+        :return: None
+        """
+        with self.assertNumQueries(1):
+            results, errors = validate_results(self.rows)
+
+        self.assertEqual([result["name"] for result in results], ["test_login", "test_message"])
+        self.assertEqual([error["row"] for error in errors], [2, 3, 4, 6])
+        self.assertEqual(sorted(errors[1]["errors"]), ["duration", "status"])
+        self.assertEqual(errors[2]["errors"], {"case": ["No such test case"]})
+
+    def test_copy_and_bulk_create_store_same_rows(self) -> None:
+        """
+        Тест-кейс, что загрузка через COPY и через bulk_create
+        сохраняет одинаковые строки.
+        :return: None
+        """
+        copy_run: TestRun = TestRun.objects.create(title="CI #2", plan=self.plan)
+        reports: list = [ingest_results(self.run, self.rows, use_copy=False),
+                         ingest_results(copy_run, self.rows, use_copy=True)]
+
+        self.assertEqual([report.method for report in reports], ["bulk_create", "copy"])
+        fields: tuple = ('name', 'status', 'case_id', 'duration', 'message')
+        stored: list = [list(TestResult.objects.filter(run=run).order_by('name').values_list(
+            *fields)) for run in (self.run, copy_run)]
+        self.assertEqual(stored[0], stored[1])
+        self.assertEqual(stored[0], [
+            ("test_login", "passed", self.case.pk, 0.5, ""),
+            ("test_message", "failed", None, None, "")])
+        report: IngestionReport = reports[1]
+        self.assertEqual(report.created, 2)
+        self.assertEqual(len(report.errors), 4)
+
+
+class TestJUnitImport(TestCase):
+    """
+    Тестирование импорта отчетов JUnit XML
+    """
+    # pylint: disable=attribute-defined-outside-init
+    def setUp(self) -> None:
+        """
+        Создание прогона, сьюта и отчета
+        :return: None
+        """
+        self.run: TestRun = TestRun.objects.create(
+            title="CI #1", plan=TestPlan.objects.create(title="Release"))
+        self.suite: TestSuite = TestSuite.objects.create(title="API")
+        self.case: CaseModel = CaseModel.objects.create(title="tests.test_auth.test_login",
+                                                        suite=self.suite)
+        cases: str = "".join(
+            f'<testcase classname="tests.test_orders" name="test_{index}" time="0.01"/>'
+            for index in range(25))
+        self.report: bytes = (
+            '<?xml version="1.0" encoding="utf-8"?><testsuites>'
+            '<testsuite name="pytest" tests="29"><properties><property name="ci" value="1"/>'
+            '</properties>'
+            '<testcase classname="tests.test_auth" name="test_login" time="0.5"/>'
+            '<testcase classname="tests.test_auth" name="test_logout" time="1.25">'
+            '<failure message="assert 500 == 200">Traceback</failure></testcase>'
+            '<testcase classname="tests.test_auth" name="test_refresh">'
+            '<skipped message="flaky backend"/></testcase>'
+            f'<testcase name="" time="nan"/>{cases}'
+            '<system-out>log</system-out></testsuite></testsuites>').encode()
+
+    def test_parse_statuses(self) -> None:
+        """
+        Тест-кейс потокового разбора: статусы, сообщения и длительности
+        testcase, элементы сьюта пропускаются
+        :return: None
+        """
+        rows: list = list(parse_junit(io.BytesIO(self.report)))
+        self.assertEqual(len(rows), 29)
+        self.assertEqual(rows[1], {"name": "tests.test_auth.test_logout", "status": "failed",
+                                   "duration": 1.25, "message": "assert 500 == 200\nTraceback"})
+        self.assertEqual((rows[2]["status"], rows[2]["duration"]), ("skipped", None))
+
+    @override_settings(JUNIT_IMPORT_BATCH_SIZE=10)
+    def test_import_upserts_cases_in_batches(self) -> None:
+        """
+        Тест-кейс импорта.
+        1. Существующий тест-кейс переиспользуется, недостающие создаются
+        2. Результаты загружаются пачками, ошибка указана с номером testcase
+        3. Повторный импорт не создает тест-кейсов
+        :return: None
+        """
+        report: JUnitImportReport = import_junit(io.BytesIO(self.report), self.run, self.suite)
+        self.assertEqual((report.created, report.cases, report.batches), (28, 27, 3))
+        self.assertEqual([error["row"] for error in report.errors], [4])
+        self.assertEqual(TestResult.objects.get(
+            run=self.run, name="tests.test_auth.test_login").case_id, self.case.pk)
+        self.assertEqual(get_counters(RunStatusCounter, "run_id", self.run.pk, ["failed"]),
+                         {"failed": 1})
+        self.assertTrue(SearchDocument.objects.filter(
+            entity=SearchDocument.Entity.CASE, title="tests.test_orders.test_7").exists())
+
+        again: JUnitImportReport = import_junit(io.BytesIO(self.report), self.run, self.suite)
+        self.assertEqual((again.created, again.cases), (28, 0))
+        self.assertEqual(self.suite.cases.count(), 28)
+
+
+class TestStatusCounters(TestCase):
+    """
+    Тестирование счетчиков статусов тест-планов и прогонов
+    """
+    # pylint: disable=attribute-defined-outside-init
+    def setUp(self) -> None:
+        """
+        Создание тест-плана и прогона
+        :return: None
+        """
+        self.plan: TestPlan = TestPlan.objects.create(title="Release")
+        self.run: TestRun = TestRun.objects.create(title="CI #1", plan=self.plan)
+
+    def plan_counters(self) -> dict:
+        """
+        Ненулевые счетчики прогонов тест-плана
+        :return: dict
+        """
+        return {status: count for status, count in get_counters(
+            PlanStatusCounter, "plan_id", self.plan.pk, TestRun.Status.values).items() if count}
+
+    def run_counters(self) -> dict:
+        """
+        Ненулевые счетчики результатов прогона
+        :return: dict
+        """
+        return {status: count for status, count in get_counters(
+            RunStatusCounter, "run_id", self.run.pk, TestResult.Status.values).items() if count}
+
+    def test_run_status_changes(self) -> None:
+        """
+        Тест-кейс, что создание, смена статуса, мягкое и полное удаление
+        прогона меняют счетчики тест-плана.
+        :return: None
+        """
+        other: TestRun = TestRun.objects.create(title="CI #2", plan=self.plan)
+        self.assertEqual(self.plan_counters(), {"in_progress": 2})
+
+        run: TestRun = TestRun.objects.get(pk=other.pk)
+        run.status = TestRun.Status.FAILED
+        run.save()
+        self.assertEqual(self.plan_counters(), {"in_progress": 1, "failed": 1})
+
+        run.deleted = timezone.now()
+        run.save()
+        self.assertEqual(self.plan_counters(), {"in_progress": 1})
+
+        TestRun.objects.get(pk=self.run.pk).delete()
+        self.assertEqual(self.plan_counters(), {})
+
+    def test_result_changes(self) -> None:
+        """
+        Тест-кейс, что одиночные и массовые изменения результатов
+        меняют счетчики прогона в той же транзакции.
+        :return: None
+        """
+        ingest_results(self.run, [{"name": f"test_{index}", "status": "passed"}
+                                  for index in range(5)], use_copy=True)
+        ingest_results(self.run, [{"name": "test_slow", "status": "failed"}], use_copy=False)
+        self.assertEqual(self.run_counters(), {"passed": 5, "failed": 1})
+
+        result: TestResult = TestResult.objects.get(name="test_slow")
+        result.status = TestResult.Status.BLOCKED
+        result.save()
+        self.assertEqual(self.run_counters(), {"passed": 5, "blocked": 1})
+
+        with self.assertNumQueries(4):
+            changed: int = update_results_status(
+                TestResult.objects.filter(run=self.run, name__in=["test_0", "test_1", "test_slow"]),
+                TestResult.Status.FAILED)
+        self.assertEqual(changed, 3)
+        self.assertEqual(self.run_counters(), {"passed": 3, "failed": 3})
+
+        self.assertEqual(delete_results(TestResult.objects.filter(status="failed")), 3)
+        TestResult.objects.get(name="test_2").delete()
+        self.assertEqual(self.run_counters(), {"passed": 2})
+
+    def test_deferred_fields(self) -> None:
+        """
+        Тест-кейс, что изменения экземпляров, загруженных с отложенными
+        статусом и признаком удаления, учитываются в счетчиках.
+        :return: None
+        """
+        ingest_results(self.run, [{"name": "test_0", "status": "passed"}])
+
+        result: TestResult = TestResult.objects.only("name").get(name="test_0")
+        result.status = TestResult.Status.FAILED
+        result.save()
+        self.assertEqual(self.run_counters(), {"failed": 1})
+
+        run: TestRun = TestRun.objects.only("title").get(pk=self.run.pk)
+        run.deleted = timezone.now()
+        run.save()
+        self.assertEqual(self.plan_counters(), {})
+        run.deleted = None
+        run.save()
+        self.assertEqual(self.plan_counters(), {"in_progress": 1})
+
+        TestResult.objects.defer("status").get(name="test_0").delete()
+        self.assertEqual(self.run_counters(), {})
+
+    def test_rebuild_counters(self) -> None:
+        """
+        Тест-кейс, что пересчет исправляет счетчики после изменений
+        в обход моделей.
+        :return: None
+        """
+        ingest_results(self.run, [{"name": f"test_{index}", "status": "passed"}
+                                  for index in range(3)])
+        TestResult.objects.filter(name="test_0").update(status="skipped")
+        TestRun.objects.filter(pk=self.run.pk).update(status="completed")
+
+        corrected: dict = rebuild_counters()
+
+        self.assertEqual(corrected, {"PlanStatusCounter": 2, "RunStatusCounter": 2})
+        self.assertEqual(self.run_counters(), {"passed": 2, "skipped": 1})
+        self.assertEqual(self.plan_counters(), {"completed": 1})
+
+
+class TestCurrentTestPlan(TestCase):
+    """
+    Тестирование переключения текущего тест-плана
+    """
+
+    def test_saving_current_plan_demotes_others(self) -> None:
+        """
+        Тест-кейс, что новый текущий план снимает предыдущий одним UPDATE
+        (остальные запросы - блокировки, версии обоих планов в истории,
+        поисковый документ плана и точки сохранения).
+        :return: None
+        """
+        first: TestPlan = TestPlan.objects.create(title="First", is_current=True)
+        with self.assertNumQueries(12):
+            second: TestPlan = TestPlan.objects.create(title="Second", is_current=True)
+
+        first.refresh_from_db()
+        self.assertFalse(first.is_current)
+        self.assertEqual(TestPlan.objects.get(is_current=True, deleted=None), second)
+
+        first.is_current = True
+        first.save()
+        self.assertEqual(TestPlan.objects.get(is_current=True, deleted=None), first)
+
+    def test_index_rejects_second_current_plan(self) -> None:
+        """
+        Тест-кейс, что индекс не дает сделать текущими два плана в обход save(),
+        но допускает удаленный текущий план.
+        :return: None
+        """
+        TestPlan.objects.create(title="First", is_current=True)
+        second: TestPlan = TestPlan.objects.create(title="Second")
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            TestPlan.objects.filter(pk=second.pk).update(is_current=True)
+
+        TestPlan.objects.filter(pk=second.pk).update(is_current=True, deleted=timezone.now())
+        self.assertEqual(TestPlan.all_objects.filter(is_current=True).count(), 2)
+
+    def test_list_queries_use_partial_indexes(self) -> None:
+        """
+        Тест-кейс, что список тест-планов и текущий план читаются
+        по частичным индексам (последовательное чтение запрещено,
+        чтобы на маленькой таблице план не зависел от статистики).
+        :return: None
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+        self.assertIn("testplan_list_idx", TestPlan.objects.filter(
+            is_current=False).order_by('id')[:50].explain())
+        self.assertIn("unique_current_test_plan", TestPlan.objects.filter(
+            is_current=True).explain())
+
+
+class TestSearch(TestCase):
+    """
+    Тестирование полнотекстового поиска
+    """
+    # pylint: disable=attribute-defined-outside-init
+    def setUp(self) -> None:
+        """
+        Создание тест-плана, сьюта, тест-кейса и прогона
+        :return: None
+        """
+        self.plan: TestPlan = TestPlan.objects.create(
+            title="Checkout release", description="Covers payment flows")
+        self.suite: TestSuite = TestSuite.objects.create(title="Payments")
+        self.case: CaseModel = CaseModel.objects.create(
+            title="Pay with card", suite=self.suite,
+            steps="Open the checkout page and press <button>",
+            expected_result="Payment is accepted")
+        self.run: TestRun = TestRun.objects.create(title="Nightly checkout", plan=self.plan)
+
+    def test_ranked_prefix_search(self) -> None:
+        """
+        Тест-кейс, что последнее слово ищется как префикс, совпадения
+        в заголовке ранжируются выше, а фрагмент экранирован и подсвечен.
+        :return: None
+        """
+        hits: list = search("paym")
+        self.assertEqual([(hit.entity, hit.object_id) for hit in hits][0],
+                         ("suite", self.suite.pk))
+        self.assertEqual({hit.entity for hit in hits}, {"suite", "plan", "case"})
+
+        hits = search("checkout butt", entities=["case"])
+        self.assertEqual([hit.object_id for hit in hits], [self.case.pk])
+        self.assertEqual(hits[0].snippet,
+                         "Open the <mark>checkout</mark> page and press "
+                         "&lt;<mark>button</mark>&gt;\nPayment is accepted")
+        self.assertEqual(search("check butt"), [])
+        self.assertEqual(search("!!"), [])
+
+    def test_documents_follow_objects(self) -> None:
+        """
+        Тест-кейс, что документы обновляются при изменении объектов
+        и удаляются при удалении, в том числе мягком.
+        :return: None
+        """
+        self.run.title = "Nightly basket"
+        self.run.save()
+        self.assertEqual([hit.entity for hit in search("checkout")], ["plan", "case"])
+        self.assertEqual([hit.object_id for hit in search("basket")], [self.run.pk])
+
+        self.plan.deleted = timezone.now()
+        self.plan.save()
+        self.case.delete()
+        self.assertEqual(search("checkout"), [])
+        self.assertEqual(SearchDocument.objects.count(), 2)
+
+    def test_rebuild_search_index(self) -> None:
+        """
+        Тест-кейс, что пересоздание индекса учитывает объекты,
+        созданные в обход save().
+        :return: None
+        """
+        CaseModel.objects.bulk_create([CaseModel(title="Refund order", suite=self.suite)])
+        self.assertEqual(search("refund"), [])
+
+        self.assertEqual(rebuild_search_index(),
+                         {"plan": 1, "suite": 1, "case": 2, "run": 1})
+        self.assertEqual([hit.title for hit in search("refund")], ["Refund order"])
+
+
+class TestTestPlanBatch(TestCase):
+    """
+    Тестирование пакетных операций с тест-планами
+    """
+    # pylint: disable=attribute-defined-outside-init
+    def setUp(self) -> None:
+        """
+        Создание автора, текущего и обычных тест-планов
+        :return: None
+        """
+        self.author: User = User.objects.create_user(
+            username="batch", email="batch@example.com", password="test123!")
+        self.current: TestPlan = TestPlan.objects.create(title="Current", is_current=True)
+        self.plans: list = [TestPlan.objects.create(title=f"Plan {index}") for index in range(3)]
+
+    def test_batch_is_applied_with_bulk_writes(self) -> None:
+        """
+        Тест-кейс пакета.
+        1. Число запросов не зависит от числа операций
+        2. Текущий план переключается, история и поиск обновлены
+        :return: None
+        """
+        operations: list = [
+            {"op": "create", "title": "New", "author": self.author.pk, "is_current": True},
+            {"op": "update", "test_plan_id": self.plans[0].pk, "title": "Renamed",
+             "description": "Nightly regression"},
+            {"op": "delete", "test_plan_id": self.plans[1].pk},
+            {"op": "delete", "test_plan_id": self.plans[2].pk}
+        ]
+        with self.assertNumQueries(25):
+            report: PlanBatchReport = apply_plan_operations(operations, {}, self.author)
+
+        self.assertTrue(report.applied)
+        self.assertEqual([result["status"] for result in report.results],
+                         ["created", "updated", "deleted", "deleted"])
+        new: TestPlan = TestPlan.objects.get(pk=report.results[0]["test_plan_id"])
+        self.assertEqual(list(TestPlan.objects.filter(is_current=True)), [new])
+        self.assertEqual(TestPlan.objects.count(), 3)
+        self.assertEqual(TestPlanHistory.objects.filter(plan=self.current).latest(
+            "version").changes, {"is_current": False})
+        new_state: PlanState | None = plan_state_at(new.pk, timezone.now())
+        self.assertIsNotNone(new_state)
+        assert new_state is not None
+        self.assertEqual(new_state.state["author"], self.author.pk)
+        self.assertEqual([hit.title for hit in search("nightly")], ["Renamed"])
+        self.assertFalse(SearchDocument.objects.filter(
+            entity=SearchDocument.Entity.PLAN, object_id=self.plans[1].pk).exists())
+
+    def test_atomic_and_best_effort(self) -> None:
+        """
+        Тест-кейс режимов.
+        1. atomic: пакет с ошибкой не применяется
+        2. best effort: корректные операции применяются
+        3. Ошибки указаны по номеру операции
+        :return: None
+        """
+        operations: list = [
+            {"op": "update", "test_plan_id": self.plans[0].pk, "title": "Renamed"},
+            {"op": "delete", "test_plan_id": 10 ** 9},
+            {"op": "update", "test_plan_id": self.plans[0].pk, "title": "Twice"},
+            {"op": "create", "title": "Bad dates", "author": 10 ** 9,
+             "start_date": timezone.now(), "end_date": timezone.now() - datetime.timedelta(1)}
+        ]
+        report: PlanBatchReport = apply_plan_operations(operations, {}, atomic=True)
+        self.assertFalse(report.applied)
+        self.assertEqual([result["status"] for result in report.results],
+                         ["skipped", "error", "error", "error"])
+        self.assertEqual(sorted(report.results[3]["errors"]), ["author", "end_date"])
+        self.assertEqual(TestPlan.objects.get(pk=self.plans[0].pk).title, "Plan 0")
+
+        report = apply_plan_operations(operations, {}, atomic=False)
+        self.assertTrue(report.applied)
+        self.assertEqual([result["status"] for result in report.results],
+                         ["updated", "error", "error", "error"])
+        self.assertEqual(TestPlan.objects.get(pk=self.plans[0].pk).title, "Renamed")
+
+
+class TestSoftDeletedTestPlans(TestCase):
+    """
+    Тестирование менеджера неудаленных тест-планов и архивирования
+    """
+    # pylint: disable=attribute-defined-outside-init
+    def setUp(self) -> None:
+        """
+        Создание неудаленного, недавно удаленного и давно удаленных планов
+        :return: None
+        """
+        now: datetime.datetime = timezone.now()
+        self.alive: TestPlan = TestPlan.objects.create(title="Alive")
+        self.recent: TestPlan = TestPlan.objects.create(
+            title="Recent", deleted=now - datetime.timedelta(days=1))
+        self.expired: list = [
+            TestPlan.objects.create(title=f"Expired {index}",
+                                    deleted=now - datetime.timedelta(days=60))
+            for index in range(5)]
+        self.with_run: TestPlan = TestPlan.objects.create(
+            title="Expired with run", deleted=now - datetime.timedelta(days=60))
+        TestRun.objects.create(title="CI #1", plan=self.with_run)
+
+    def test_default_manager_hides_deleted_plans(self) -> None:
+        """
+        Тест-кейс, что objects возвращает только неудаленные планы,
+        а all_objects - все.
+        :return: None
+        """
+        self.assertEqual(list(TestPlan.objects.all()), [self.alive])
+        self.assertFalse(TestPlan.objects.filter(pk=self.recent.pk).exists())
+        self.assertEqual(TestPlan.all_objects.count(), 8)
+
+    def test_archive_moves_expired_plans_in_batches(self) -> None:
+        """
+        Тест-кейс, что в архив пачками переносятся только давно удаленные
+        планы без прогонов, с теми же ID и полями.
+        :return: None
+        """
+        report: ArchiveReport = archive_deleted_plans(
+            datetime.timedelta(days=30), batch_size=2, pause=0)
+
+        self.assertEqual((report.archived, report.skipped, report.batches), (5, 1, 3))
+        self.assertEqual(
+            sorted(ArchivedTestPlan.objects.values_list('id', flat=True)),
+            [plan.pk for plan in self.expired])
+        self.assertEqual(
+            sorted(TestPlan.all_objects.values_list('id', flat=True)),
+            [self.alive.pk, self.recent.pk, self.with_run.pk])
+        archived: ArchivedTestPlan = ArchivedTestPlan.objects.get(pk=self.expired[0].pk)
+        self.assertEqual((archived.title, archived.deleted, archived.created),
+                         (self.expired[0].title, self.expired[0].deleted,
+                          self.expired[0].created))
+
+
+class TestTestPlanHistory(TestCase):
+    """
+    Тестирование истории изменений тест-планов
+    """
+    # pylint: disable=attribute-defined-outside-init
+    def setUp(self) -> None:
+        """
+        Создание автора и тест-плана
+        :return: None
+        """
+        self.user: User = User.objects.create_user(
+            username="history", email="history@example.com", password="test123!")
+        self.plan: TestPlan = TestPlan.objects.create(title="Release 1")
+
+    def test_saves_and_bulk_updates_append_diffs(self) -> None:
+        """
+        Тест-кейс, что сохранение и QuerySet.update добавляют версии
+        только с измененными полями, а неизменившее сохранение - нет.
+        :return: None
+        """
+        plan: TestPlan = TestPlan.objects.get(pk=self.plan.pk)
+        plan.title = "Release 2"
+        plan.author = self.user
+        plan.save(changed_by=self.user)
+        plan.save()
+        TestPlan.objects.filter(pk=plan.pk).update(is_current=True, changed_by=self.user)
+        TestPlan.objects.filter(pk=plan.pk).update(is_current=True)
+
+        versions: list = list(TestPlanHistory.objects.filter(plan=plan).order_by('version')
+                              .values_list('version', 'changed_by', 'changes'))
+        self.assertEqual(versions[1:], [
+            (2, self.user.pk, {"title": "Release 2", "author": self.user.pk}),
+            (3, self.user.pk, {"is_current": True})])
+        self.assertEqual(versions[0][2]["title"], "Release 1")
+
+        with self.assertRaises(ValueError):
+            TestPlanHistory.objects.get(plan=plan, version=2).save()
+
+    @override_settings(HISTORY_SNAPSHOT_INTERVAL=3)
+    def test_state_at_replays_from_last_snapshot(self) -> None:
+        """
+        Тест-кейс восстановления состояния на момент времени.
+        1. Полное состояние хранится в версиях 1, 4, 7
+        2. Состояние на каждый момент совпадает с сохраненным тогда
+        3. Восстановление - два запроса, до создания плана состояния нет
+        :return: None
+        """
+        created: datetime.datetime = TestPlanHistory.objects.get(plan=self.plan).changed
+        moments: list = [timezone.now()]
+        for version in range(2, 8):
+            self.plan.title = f"Release {version}"
+            self.plan.save()
+            moments.append(timezone.now())
+
+        self.assertEqual(
+            list(TestPlanHistory.objects.filter(plan=self.plan, snapshot__isnull=False)
+                 .order_by('version').values_list('version', flat=True)), [1, 4, 7])
+        for version, moment in enumerate(moments, start=1):
+            with self.assertNumQueries(2):
+                plan_state: PlanState | None = plan_state_at(self.plan.pk, moment)
+            self.assertIsNotNone(plan_state)
+            assert plan_state is not None
+            self.assertEqual(plan_state.version, version)
+            self.assertEqual(plan_state.state["title"], f"Release {version}")
+            self.assertFalse(plan_state.state["is_current"])
+        self.assertIsNone(plan_state_at(self.plan.pk, created - datetime.timedelta(seconds=1)))
+
+
+class TestFlakiness(TestCase):
+    """
+    Тестирование оценки нестабильности тест-кейсов
+    """
+    # pylint: disable=attribute-defined-outside-init
+    def setUp(self) -> None:
+        """
+        Создание тест-плана, стабильного и нестабильного тест-кейсов
+        :return: None
+        """
+        self.plan: TestPlan = TestPlan.objects.create(title="Release")
+        suite: TestSuite = TestSuite.objects.create(title="API")
+        self.stable: CaseModel = CaseModel.objects.create(title="Login", suite=suite)
+        self.flaky: CaseModel = CaseModel.objects.create(title="Checkout", suite=suite)
+
+    def ingest(self, flaky_statuses: str) -> None:
+        """
+        Загрузить по прогону на каждый исход нестабильного кейса
+        :param flaky_statuses: str - исходы буквами P и F
+        :return: None
+        """
+        for index, letter in enumerate(flaky_statuses):
+            run: TestRun = TestRun.objects.create(title=f"CI #{index}", plan=self.plan)
+            ingest_results(run, [
+                {"name": "test_login", "status": "passed", "case": self.stable.pk},
+                {"name": "test_checkout", "status": "failed" if letter == "F" else "passed",
+                 "case": self.flaky.pk},
+                {"name": "test_setup", "status": "skipped", "case": self.flaky.pk}])
+
+    @override_settings(FLAKY_WINDOW=4)
+    def test_score_over_sliding_window(self) -> None:
+        """
+        Тест-кейс оценки по окну последних результатов.
+        1. Смены считаются только внутри окна из 4 результатов
+        2. Стабильный кейс не попадает в рейтинг
+        3. Хронология отмечает смены исхода
+        :return: None
+        """
+        self.ingest("FFFPFP")
+
+        flakiness: CaseFlakiness = CaseFlakiness.objects.get(case=self.flaky)
+        self.assertEqual((flakiness.observed, flakiness.flips), (4, 3))
+        self.assertEqual(flakiness.score, 1.0)
+        self.assertEqual(CaseFlakiness.objects.get(case=self.stable).flips, 0)
+        self.assertEqual([item.case_id for item in flaky_cases(min_runs=2)], [self.flaky.pk])
+        self.assertEqual([(item["status"], item["flip"]) for item in flip_timeline(self.flaky.pk)],
+                         [("failed", False), ("passed", True), ("failed", True), ("passed", True)])
+
+    def test_update_is_constant_per_batch_and_matches_rebuild(self) -> None:
+        """
+        Тест-кейс инкрементального обновления.
+        1. Пересчет по истории дает те же оценки
+        2. Пакет обновляет оценки двумя запросами независимо от размера
+        3. Одиночный результат учитывается при сохранении
+        :return: None
+        """
+        self.ingest("PFPP")
+        fields: tuple = ('case_id', 'outcomes', 'observed', 'flips', 'score')
+        incremental: list = list(CaseFlakiness.objects.order_by('case_id').values_list(*fields))
+        self.assertEqual(rebuild_flakiness(), 2)
+        self.assertEqual(list(CaseFlakiness.objects.order_by('case_id').values_list(*fields)),
+                         incremental)
+
+        with self.assertNumQueries(4):
+            record_outcomes([(self.flaky.pk, "failed"), (self.stable.pk, "passed")] * 50)
+        self.assertEqual(CaseFlakiness.objects.get(case=self.flaky).observed, 30)
+
+        TestResult.objects.create(run=TestRun.objects.first(), case=self.flaky,
+                                  name="test_checkout", status="passed")
+        flakiness: CaseFlakiness = CaseFlakiness.objects.get(case=self.flaky)
+        self.assertEqual((flakiness.outcomes & 0b11, flakiness.flips), (0b10, 1))
+
+
+class TestAttachments(TestCase):
+    """
+    Тестирование хранилища вложений
+    """
+    # pylint: disable=attribute-defined-outside-init
+    def setUp(self) -> None:
+        """
+        Создание временного хранилища и результата теста
+        :return: None
+        """
+        root: str = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        storage: override_settings = override_settings(ATTACHMENT_ROOT=root)
+        storage.enable()
+        self.addCleanup(storage.disable)
+
+        plan: TestPlan = TestPlan.objects.create(title="Release")
+        run: TestRun = TestRun.objects.create(title="CI #1", plan=plan)
+        self.result: TestResult = TestResult.objects.create(
+            run=run, name="test_checkout", status="failed")
+        self.content: bytes = b"screenshot" * 1000
+
+    def upload(self, chunk: int) -> Attachment:
+        """
+        Загрузить содержимое частями
+        :param chunk: int - размер части
+        :return: Attachment
+        """
+        upload: AttachmentUpload = start_upload(
+            self.result, "screen.png", "image/png", len(self.content))
+        for offset in range(0, len(self.content), chunk):
+            uploaded: AttachmentUpload | Attachment = append_chunk(
+                upload.pk, offset, io.BytesIO(self.content[offset:offset + chunk]),
+                len(self.content[offset:offset + chunk]))
+        return uploaded
+
+    def test_chunked_upload_is_deduplicated(self) -> None:
+        """
+        Тест-кейс загрузки по частям.
+        1. Файл собирается из частей и хранится под своим SHA-256
+        2. Повторная загрузка и загрузка по известному хешу не создают копий
+        3. Часть не с того смещения отклоняется с текущим смещением
+        :return: None
+        """
+        sha256: str = hashlib.sha256(self.content).hexdigest()
+        first: Attachment = self.upload(3000)
+        self.assertEqual(first.blob_id, sha256)
+        self.assertEqual(blob_path(sha256).read_bytes(), self.content)
+
+        second: Attachment = self.upload(7000)
+        known: Attachment = start_upload(
+            self.result, "copy.png", "image/png", len(self.content), sha256)
+        self.assertIsInstance(known, Attachment)
+        self.assertEqual(Blob.objects.get().refcount, 3)
+        self.assertEqual(second.blob_id, known.blob_id)
+        self.assertFalse(AttachmentUpload.objects.exists())
+
+        upload: AttachmentUpload = start_upload(
+            self.result, "log.txt", "text/plain", len(self.content))
+        append_chunk(upload.pk, 0, io.BytesIO(self.content[:100]), 100)
+        with self.assertRaises(UploadOffsetMismatch) as mismatch:
+            append_chunk(upload.pk, 200, io.BytesIO(self.content[200:300]), 100)
+        self.assertEqual(mismatch.exception.offset, 100)
+
+    def test_garbage_collection(self) -> None:
+        """
+        Тест-кейс сборки мусора.
+        1. Файл с оставшимися ссылками не удаляется
+        2. После удаления всех вложений, в том числе каскадного, файл удаляется
+        3. Брошенная загрузка удаляется вместе с файлом
+        :return: None
+        """
+        first: Attachment = self.upload(4096)
+        self.upload(4096)
+        first.delete()
+        self.assertEqual(collect_garbage().blobs, 0)
+        self.assertTrue(blob_path(first.blob_id).exists())
+
+        self.result.delete()
+        self.assertEqual(Blob.objects.get().refcount, 0)
+        with override_settings(ATTACHMENT_UPLOAD_TTL=-1):
+            abandoned: AttachmentUpload = start_upload(
+                CaseModel.objects.create(title="Login", suite=TestSuite.objects.create(
+                    title="UI")), "log.txt", "text/plain", 10)
+            report = collect_garbage(scan=True)
+        self.assertEqual((report.blobs, report.uploads, report.freed),
+                         (1, 1, len(self.content)))
+        self.assertFalse(blob_path(first.blob_id).exists())
+        self.assertFalse(AttachmentUpload.objects.filter(pk=abandoned.pk).exists())
+
+    def test_delete_results_with_attachments(self) -> None:
+        """
+        Тест-кейс массового удаления результатов с вложениями.
+        1. Вложения и загрузки результата удаляются вместе с ним
+        2. Число ссылок на содержимое уменьшается на число вложений
+        3. Внешние ключи не нарушены
+        :return: None
+        """
+        self.upload(4096)
+        self.upload(4096)
+        start_upload(self.result, "log.txt", "text/plain", 10)
+        kept: TestResult = TestResult.objects.create(
+            run=self.result.run, name="test_login", status="passed")
+        start_upload(kept, "kept.png", "image/png", len(self.content),
+                     hashlib.sha256(self.content).hexdigest())
+
+        self.assertEqual(delete_results(TestResult.objects.filter(pk=self.result.pk)), 1)
+        connection.check_constraints()
+        self.assertEqual(Blob.objects.get().refcount, 1)
+        self.assertEqual(list(Attachment.objects.values_list("result_id", flat=True)), [kept.pk])
+        self.assertFalse(AttachmentUpload.objects.exists())
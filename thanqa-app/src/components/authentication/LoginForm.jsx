@@ -107,7 +107,9 @@ function LoginForm() {
                 .then((res) => {
                     localStorage.setItem("auth", JSON.stringify({
                         user: res.data.user.email,
-                        token: res.data.user.token
+                        token: res.data.user.token,
+                        access: res.data.user.access,
+                        refresh: res.data.user.refresh
                     }));
                     navigate("/main/");
                 })
@@ -1,16 +1,10 @@
 import './main.css';
-import axios from "axios";
+import axiosService from "../../helpers/axios";
 import showNotification from "../notification/notification";
 import {useEffect, useState} from "react";
 
 export const AuthorsList = () => {
     const [users, setUsers] = useState([]);
-    const token = JSON.parse(localStorage.getItem('auth')).token;
-    const config = {
-        headers: {
-            Authorization: `Bearer ${token}`
-        }
-    };
 
     const onHover = (event) => {
         event.target.style.background = 'rgba(217, 217, 217, 0.22)';
@@ -21,8 +15,8 @@ export const AuthorsList = () => {
     }
 
     useEffect(() => {
-        axios
-            .get('http://127.0.0.1:8000/api/users/all/', config)
+        axiosService
+            .get('users/all/?paginate=false')
             .then((res) => {
                 setUsers(res.data["users"]);
             })
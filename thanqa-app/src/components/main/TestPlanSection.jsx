@@ -1,7 +1,7 @@
 import {Text} from "./Text";
 import {TestPlanButton} from "./TestPlanButton";
 import {CreateTestPlan} from "./CreateTestPlan";
-import axios from "axios";
+import axiosService from "../../helpers/axios";
 import showNotification from "../notification/notification";
 import {useNavigate} from "react-router-dom";
 import './main.css';
@@ -11,19 +11,13 @@ import {useEffect, useState} from "react";
 export const TestPlanSection = () => {
     const navigate = useNavigate();
     const [modal, openModal] = useState(false);
-    const token = JSON.parse(localStorage.getItem('auth')).token;
-    const config = {
-        headers: {
-            Authorization: `Bearer ${token}`
-        }
-    };
     const onClick = (event) => {
         openModal(true);
         const testButton = document.getElementById('testPlanButton');
 
         if (testButton.textContent === 'Create Test Plan') {
-            axios
-                .get('http://127.0.0.1:8000/api/users/all/', config)
+            axiosService
+                .get('users/all/')
                 .then((res) => {
 
                 })
@@ -88,8 +82,8 @@ export const TestPlanSection = () => {
     };
 
     useEffect(() => {
-        axios
-            .get('http://127.0.0.1:8000/api/testplan/current/', config)
+        axiosService
+            .get('testplan/current/')
             .then((res) => {
                 if (res.data['test_plan']['test_plan_id']) {
                     const testPlanTitle = res.data['test_plan']['title'];
@@ -97,10 +91,10 @@ export const TestPlanSection = () => {
                     const endDate = res.data['test_plan']['end_date'];
                     changeTestPlanSection('Open Test Plan', testPlanTitle, startDate, endDate);
                 } else {
-                    axios
-                        .get('http://127.0.0.1:8000/api/testplan/all/', config)
+                    axiosService
+                        .get('testplan/all/?limit=1')
                         .then((res => {
-                            if (res.data['test_plan'].length > 0) {
+                            if (res.data['test_plan']['results'].length > 0) {
                                 changeTestPlanSection('Choose Test Plan');
                             } else {
                                 changeTestPlanSection('Create Test Plan');
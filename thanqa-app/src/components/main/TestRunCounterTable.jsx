@@ -1,9 +1,35 @@
- export const TestRunCounterTable = () => {
+import axiosService from "../../helpers/axios";
+import showNotification from "../notification/notification";
+import {useEffect, useState} from "react";
+
+export const TestRunCounterTable = () => {
+    const [runs, setRuns] = useState({});
+
+    useEffect(() => {
+        axiosService
+            .get('testplan/current/')
+            .then((res) => {
+                const testPlanId = res.data['test_plan']['test_plan_id'];
+                if (testPlanId) {
+                    return axiosService
+                        .get(`testplan/${testPlanId}/counters/`)
+                        .then((res) => {
+                            setRuns(res.data['test_plan']['runs']);
+                        })
+                }
+            })
+            .catch((err) => {
+                if (err.response) {
+                    showNotification('error', 'Server Error');
+                }
+            })
+    }, [])
+
     return (
         <div className="thanqa-test-runs-counter-table">
             <div className="thanqa-test-runs-form">
                 <p className="passed-thanqa-test-runs-counter">
-                    0
+                    {runs['completed'] || 0}
                 </p>
                 <p className="thanqa-test-runs-counter-text">
                     Test Runs Completed
@@ -11,7 +37,7 @@
             </div>
             <div className="thanqa-test-runs-form">
                 <p className="in-progress-thanqa-test-runs-counter">
-                    0
+                    {runs['in_progress'] || 0}
                 </p>
                 <p className="thanqa-test-runs-counter-text">
                     Test Runs In Progress
@@ -19,7 +45,7 @@
             </div>
             <div className="thanqa-test-runs-form">
                 <p className="blocked-thanqa-test-runs-counter">
-                    0
+                    {runs['blocked'] || 0}
                 </p>
                 <p className="thanqa-test-runs-counter-text">
                     Test Runs Blocked
@@ -27,7 +53,7 @@
             </div>
             <div className="thanqa-test-runs-form">
                 <p className="failed-thanqa-test-runs-counter">
-                    0
+                    {runs['failed'] || 0}
                 </p>
                 <p className="thanqa-test-runs-counter-text">
                     Test Runs Failed
@@ -1,19 +1,66 @@
 import axios from "axios";
 
+const baseURL = "http://127.0.0.1:8000/api/";
+
 const axiosService = axios.create({
-    baseURL: "http://localhost:8000",
+    baseURL: baseURL,
     headers: {
         "Content-Type": "application/json",
     },
 });
 
+const getAuth = () => JSON.parse(localStorage.getItem("auth"));
+
+// Refresh-токен одноразовый: параллельные запросы с истекшим
+// access-токеном ждут одного обновления, а не обновляют каждый сам
+let refreshing = null;
+
+const refreshTokens = () => {
+    if (!refreshing) {
+        const auth = getAuth();
+        refreshing = axios
+            .post(`${baseURL}users/token/refresh/`, {refresh: auth.refresh})
+            .then((res) => {
+                const {access, refresh} = res.data.user;
+                localStorage.setItem("auth", JSON.stringify({...auth, access, refresh}));
+                return access;
+            })
+            .finally(() => {
+                refreshing = null;
+            });
+    }
+    return refreshing;
+};
+
 axiosService.interceptors.request.use(async(config) => {
-    const { access } = JSON.parse(localStorage.getItem("auth"));
-    config.headers.Authorization = `Bearer ${access}`;
+    const auth = getAuth();
+    if (auth && auth.access) {
+        config.headers.Authorization = `Bearer ${auth.access}`;
+    }
     return config;
 });
 
 axiosService.interceptors.response.use(
     (res) => Promise.resolve(res),
-    (err) => Promise.reject(err),
+    (err) => {
+        const request = err.config;
+        const auth = getAuth();
+        if (!err.response || ![401, 403].includes(err.response.status)
+            || !request || request.retried || !auth || !auth.refresh) {
+            return Promise.reject(err);
+        }
+
+        // Access-токен истек: обновить пару токенов и повторить запрос один раз
+        request.retried = true;
+        return refreshTokens().then(
+            (access) => {
+                request.headers.Authorization = `Bearer ${access}`;
+                return axiosService(request);
+            },
+            // Refresh-токен тоже недействителен: вернуть исходную ошибку
+            () => Promise.reject(err),
+        );
+    },
 );
+
+export default axiosService;
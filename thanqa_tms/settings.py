@@ -140,6 +140,11 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# Права пользователей проверяются по кэшу наборов прав (с учетом ролей)
+AUTHENTICATION_BACKENDS = [
+    "authentication.backends.RoleModelBackend",
+]
+
 REST_FRAMEWORK = {
     "EXCEPTION_HANDLER": "api.exceptions.core_exception_handler",
     "NON_FIELD_ERRORS_KEY": "error",
@@ -148,6 +153,117 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Срок действия access- и refresh-токенов в секундах
+JWT_ACCESS_TOKEN_LIFETIME = env.int("JWT_ACCESS_TOKEN_LIFETIME", default=15 * 60)
+JWT_REFRESH_TOKEN_LIFETIME = env.int("JWT_REFRESH_TOKEN_LIFETIME", default=7 * 24 * 60 * 60)
+
+# Связка ключей подписи JWT-токенов v2 (kid -> секрет). Для ротации ключа
+# новый ключ добавляется в связку и делается активным, а старый удаляется
+# после истечения подписанных им токенов
+JWT_SIGNING_KEYS = env.dict("JWT_SIGNING_KEYS", default={"primary": SECRET_KEY})
+JWT_ACTIVE_KEY_ID = env.str("JWT_ACTIVE_KEY_ID", default="primary")
+# Принимать токены старого формата v1 (UserId/ExpirationDate)
+JWT_ACCEPT_V1_TOKENS = env.bool("JWT_ACCEPT_V1_TOKENS", default=True)
+
+# Кэш проверенных JWT-токенов (authentication.cache)
+JWT_TOKEN_CACHE_ENABLED = env.bool("JWT_TOKEN_CACHE_ENABLED", default=True)
+JWT_TOKEN_CACHE_SIZE = env.int("JWT_TOKEN_CACHE_SIZE", default=4096)
+JWT_TOKEN_CACHE_TTL = env.int("JWT_TOKEN_CACHE_TTL", default=60)
+# Карта версий токенов пользователей (authentication.cache.TokenVersionMap)
+JWT_VERSION_MAP_SIZE = env.int("JWT_VERSION_MAP_SIZE", default=10000)
+JWT_VERSION_MAP_TTL = env.int("JWT_VERSION_MAP_TTL", default=30)
+
+# Кэш наборов прав пользователей (authentication.cache.PermissionCache)
+PERMISSION_CACHE_SIZE = env.int("PERMISSION_CACHE_SIZE", default=10000)
+PERMISSION_CACHE_TTL = env.int("PERMISSION_CACHE_TTL", default=60)
+
+# Отзыв токенов (authentication.revocation): емкость и точность фильтра Блума,
+# период подгрузки отзывов из других процессов и период удаления истекших записей
+JWT_REVOCATION_FILTER_CAPACITY = env.int("JWT_REVOCATION_FILTER_CAPACITY", default=100000)
+JWT_REVOCATION_FILTER_ERROR_RATE = env.float("JWT_REVOCATION_FILTER_ERROR_RATE", default=0.001)
+JWT_REVOCATION_SYNC_INTERVAL = env.int("JWT_REVOCATION_SYNC_INTERVAL", default=5)
+JWT_REVOCATION_GC_INTERVAL = env.int("JWT_REVOCATION_GC_INTERVAL", default=60 * 60)
+
+# Учет активности пользователей (authentication.activity): период записи
+# в секундах и число пользователей, после которого запись начинается досрочно
+ACTIVITY_FLUSH_INTERVAL = env.int("ACTIVITY_FLUSH_INTERVAL", default=30)
+ACTIVITY_MAX_PENDING = env.int("ACTIVITY_MAX_PENDING", default=5000)
+
+# Пул проверки паролей асинхронного входа (authentication.hashing):
+# число потоков, глубина очереди и значение Retry-After при ее переполнении
+LOGIN_HASH_POOL_WORKERS = env.int("LOGIN_HASH_POOL_WORKERS", default=os.cpu_count() or 1)
+LOGIN_HASH_POOL_QUEUE_DEPTH = env.int("LOGIN_HASH_POOL_QUEUE_DEPTH", default=32)
+LOGIN_HASH_POOL_RETRY_AFTER = env.int("LOGIN_HASH_POOL_RETRY_AFTER", default=1)
+
+# Ограничение неудачных попыток входа (authentication.throttling): окно в секундах,
+# число интервалов в окне, лимиты на email и IP-адрес и хранилище счетчиков
+# (MemoryAttemptStore для одного узла, DatabaseAttemptStore для нескольких)
+LOGIN_RATE_LIMIT_WINDOW = env.int("LOGIN_RATE_LIMIT_WINDOW", default=15 * 60)
+LOGIN_RATE_LIMIT_BUCKETS = env.int("LOGIN_RATE_LIMIT_BUCKETS", default=15)
+LOGIN_RATE_LIMIT_PER_EMAIL = env.int("LOGIN_RATE_LIMIT_PER_EMAIL", default=5)
+LOGIN_RATE_LIMIT_PER_IP = env.int("LOGIN_RATE_LIMIT_PER_IP", default=50)
+LOGIN_RATE_LIMIT_STORE = env.str(
+    "LOGIN_RATE_LIMIT_STORE", default="authentication.throttling.MemoryAttemptStore")
+
+# Массовое создание пользователей (authentication.provisioning):
+# число процессов хеширования паролей и размер пачки bulk_create
+USER_IMPORT_HASH_WORKERS = env.int("USER_IMPORT_HASH_WORKERS", default=os.cpu_count() or 1)
+USER_IMPORT_BATCH_SIZE = env.int("USER_IMPORT_BATCH_SIZE", default=1000)
+
+# Наибольшее число операций в одном пакете testplan/batch/ (testware.batch)
+TESTPLAN_BATCH_MAX_OPERATIONS = env.int("TESTPLAN_BATCH_MAX_OPERATIONS", default=1000)
+
+# Загрузка результатов тестов (testware.ingestion): размер пачки bulk_create
+# и размер пакета, начиная с которого в PostgreSQL используется COPY
+TESTRUN_RESULT_BATCH_SIZE = env.int("TESTRUN_RESULT_BATCH_SIZE", default=2000)
+TESTRUN_RESULT_COPY_THRESHOLD = env.int("TESTRUN_RESULT_COPY_THRESHOLD", default=5000)
+
+# Импорт отчетов JUnit XML (testware.junit): число результатов в пачке,
+# которая копится в памяти и загружается в прогон за раз
+JUNIT_IMPORT_BATCH_SIZE = env.int("JUNIT_IMPORT_BATCH_SIZE", default=5000)
+
+# Потоковая выгрузка (testware.export): сколько строк читается из курсора за раз
+EXPORT_CHUNK_SIZE = env.int("EXPORT_CHUNK_SIZE", default=2000)
+
+# Полнотекстовый поиск (testware.search): сколько совпадений ранжируется
+# в PostgreSQL (ограничивает время запроса для частых слов) и сколько слов
+# запроса учитывается. При небольшом числе кандидатов планировщик читает
+# таблицу до LIMIT, а не строит полный bitmap GIN-индекса: на 1M документов
+# от 800 кандидатов слово средней частоты искалось около 50 мс, при 500 -
+# около 15 мс
+SEARCH_RANK_CANDIDATES = env.int("SEARCH_RANK_CANDIDATES", default=500)
+SEARCH_MAX_TERMS = env.int("SEARCH_MAX_TERMS", default=8)
+
+# Пагинация списков (api.pagination): размер страницы по умолчанию
+# и наибольший размер страницы, который можно запросить
+LIST_PAGE_SIZE = env.int("LIST_PAGE_SIZE", default=50)
+LIST_MAX_PAGE_SIZE = env.int("LIST_MAX_PAGE_SIZE", default=200)
+
+# Архивирование тест-планов (testware.archive): через сколько дней после
+# мягкого удаления план переносится в архив, размер пачки (одна короткая
+# транзакция) и пауза между пачками в секундах
+ARCHIVE_AFTER_DAYS = env.int("ARCHIVE_AFTER_DAYS", default=30)
+ARCHIVE_BATCH_SIZE = env.int("ARCHIVE_BATCH_SIZE", default=500)
+ARCHIVE_BATCH_PAUSE = env.float("ARCHIVE_BATCH_PAUSE", default=0.5)
+
+# История тест-планов (testware.history): полное состояние плана хранится
+# в каждой N-й версии, поэтому состояние на момент времени собирается
+# не более чем из N строк истории
+HISTORY_SNAPSHOT_INTERVAL = env.int("HISTORY_SNAPSHOT_INTERVAL", default=20)
+
+# Нестабильные тесты (testware.flakiness): по скольким последним результатам
+# тест-кейса считается доля смен passed/failed (не больше 63 - окно хранится
+# битами в BigIntegerField)
+FLAKY_WINDOW = env.int("FLAKY_WINDOW", default=30)
+
+# Вложения (testware.attachments): каталог хранилища, наибольший размер
+# вложения и одной части загрузки в байтах и через сколько секунд
+# без новых частей незавершенная загрузка удаляется сборкой мусора
+ATTACHMENT_ROOT = env.str("ATTACHMENT_ROOT", default=str(BASE_DIR / "attachments"))
+ATTACHMENT_MAX_SIZE = env.int("ATTACHMENT_MAX_SIZE", default=2 * 1024 ** 3)
+ATTACHMENT_CHUNK_SIZE = env.int("ATTACHMENT_CHUNK_SIZE", default=8 * 1024 ** 2)
+ATTACHMENT_UPLOAD_TTL = env.int("ATTACHMENT_UPLOAD_TTL", default=24 * 60 * 60)
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
     "http://127.0.0.1:3000"